@@ -0,0 +1,121 @@
+# bench_breakpoints.py
+# 실행: python bench_breakpoints.py [--sizes 10000,100000,300000] [--format 카카오톡 PC]
+# 합성 대화 로그(활발한 구간 사이사이에 '식은' 구간을 정답으로 심어 둠)를 만들어
+#   - 처리 속도 (메시지/초) — 크기를 키워도 메시지당 시간이 그대로인지 (선형)
+#   - 최대 메모리 (tracemalloc) — 크기를 키워도 그대로인지 (입력은 생성기로 흘려보내 파일 전체를 들고 있지 않음)
+#   - 심어 둔 구간 재현율 / 탐지 구간 정밀도 (겹치면 맞힌 것으로)
+# 를 잰다.
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Dict, Any, Iterator, List, Tuple
+
+from breakpoints import DEFAULTS, detect_text
+
+_LIVELY = ["주말에 뭐 했어? 나는 영화 보러 갔었는데 생각보다 재밌더라", "오 무슨 영화? 나도 요즘 볼 게 없어서 찾는 중이었어",
+           "다음에 같이 보러 갈래? 팝콘은 내가 살게 ㅋㅋ", "좋아! 언제가 편해? 나는 토요일 오후면 괜찮아",
+           "어제 회사에서 있었던 일 얘기해줄까? 진짜 웃겼어", "헐 뭔데 궁금해 빨리 말해줘", "거기 카페 디저트 맛있대 가본 적 있어?",
+           "아직 못 가봤어 너는 가봤어? 분위기 어때?", "요즘 운동 시작했는데 생각보다 힘들다 너는 운동해?",
+           "나는 요가 다녀 한 달 됐는데 몸이 좀 가벼워진 것 같아"]
+_COLD_REPLY = ["ㅇㅇ", "응", "ㅋㅋ", "그래", "아", "ㅇㅋ", "웅"]
+_COLD_PUSH = ["근데 요즘 바빠? 연락이 좀 뜸한 것 같아서", "이번 주말에 시간 되면 밥 먹을래?", "혹시 내가 뭐 서운하게 했어?",
+              "그 영화 다음 편도 나온대 같이 볼래?"]
+
+def synth(messages: int, fmt: str, seed: int = 0, cold_every: Tuple[int, int] = (120, 400),
+          cold_len: Tuple[int, int] = (8, 20), noise: float = 0.12) -> Tuple[Iterator[str], List[Tuple[int, int]]]:
+    """(줄 생성기, 정답 구간 [시작 메시지, 끝 메시지] 목록). 구간 목록은 미리 정해 두고 줄은 흘려보낸다."""
+    rnd = random.Random(seed)
+    plan: List[Tuple[int, int]] = []
+    i = rnd.randint(*cold_every)
+    while i < messages:
+        n = rnd.randint(*cold_len)
+        plan.append((i + 1, min(messages, i + n)))
+        i += n + rnd.randint(*cold_every)
+
+    def lines() -> Iterator[str]:
+        r = random.Random(seed + 1)
+        cold = iter(plan)
+        cur = next(cold, None)
+        speaker = "지은"
+        if fmt == "카카오톡 PC":
+            yield "홍길동 님과 카카오톡 대화"
+            yield "저장한 날짜 : 2024-01-05 15:00:00"
+        for k in range(1, messages + 1):
+            while cur is not None and k > cur[1]:
+                cur = next(cold, None)
+            in_cold = cur is not None and cur[0] <= k <= cur[1]
+            if in_cold:
+                speaker = "민수" if speaker == "지은" else "지은"
+                text = r.choice(_COLD_PUSH) if speaker == "민수" else r.choice(_COLD_REPLY)
+            else:
+                # 활발한 구간에도 잡음: 가끔 같은 사람이 이어서 말하고, 가끔은 짧은 맞장구
+                if r.random() > noise:
+                    speaker = "민수" if speaker == "지은" else "지은"
+                text = r.choice(_COLD_REPLY) if r.random() < noise else r.choice(_LIVELY)
+            if fmt == "카카오톡 PC":
+                if k % 300 == 1:
+                    yield f"--------------- 2024년 1월 {1 + k // 300 % 28}일 금요일 ---------------"
+                yield f"[{speaker}] [오후 {1 + k // 60 % 12}:{k % 60:02d}] {text}"
+            else:
+                yield f"{speaker} - {text}"
+    return lines(), plan
+
+def _overlap(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    return a[0] <= b[1] and b[0] <= a[1]
+
+def _score(spans: Iterator[Dict[str, Any]], plan: List[Tuple[int, int]]) -> Dict[str, int]:
+    """탐지 구간을 나오는 대로 정답과 맞춘다 (둘 다 시작 순서, 탐지 구간은 쌓아 두지 않음)."""
+    found = hit_found = hit_plan = 0
+    last = -1     # 마지막으로 맞힌 정답 구간 번호 (탐지 구간이 시작 순서로 나오므로 증가만 함)
+    j = 0
+    for sp in spans:
+        f = (sp["start"], sp["end"])
+        found += 1
+        while j < len(plan) and plan[j][1] < f[0]:
+            j += 1
+        k, any_hit = j, False
+        while k < len(plan) and plan[k][0] <= f[1]:
+            if _overlap(plan[k], f):
+                any_hit = True
+                if k > last:
+                    hit_plan, last = hit_plan + 1, k
+            k += 1
+        hit_found += any_hit
+    return {"found": found, "hit_found": hit_found, "hit_plan": hit_plan}
+
+def run(messages: int, fmt: str) -> Dict[str, Any]:
+    # 1) 시간: 계측 없이
+    lines, plan = synth(messages, fmt)
+    t0 = time.perf_counter()
+    m = _score(detect_text(lines, **DEFAULTS), plan)
+    dt = time.perf_counter() - t0
+    # 2) 메모리: 같은 입력을 한 번 더 (tracemalloc 은 느리므로 시간은 1) 기준)
+    lines, _ = synth(messages, fmt)
+    tracemalloc.start()
+    _score(detect_text(lines, **DEFAULTS), plan)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "messages": messages, "sec": round(dt, 3), "msg_per_s": int(messages / dt),
+        "us_per_msg": round(dt / messages * 1e6, 2), "peak_kb": round(peak / 1024, 1),
+        "planted": len(plan), "found": m["found"],
+        "recall": round(m["hit_plan"] / len(plan), 3) if plan else None,
+        "precision": round(m["hit_found"] / m["found"], 3) if m["found"] else None,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="끊김 구간 탐지: 속도/메모리/재현율 (합성 로그)")
+    ap.add_argument("--sizes", default="10000,100000,300000", help="메시지 수 (쉼표로 구분)")
+    ap.add_argument("--format", default="카카오톡 PC", choices=["카카오톡 PC", "정규화"])
+    args = ap.parse_args()
+    print(f"형식: {args.format}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = run(n, args.format)
+        print(f"{r['messages']:>8,}개 메시지 | {r['sec']:>6.2f}s ({r['msg_per_s']:,}/s, {r['us_per_msg']}µs/개)"
+              f" | 최대 메모리 {r['peak_kb']:,}KB | 심은 구간 {r['planted']} · 찾은 구간 {r['found']}"
+              f" | 재현율 {r['recall']} · 정밀도 {r['precision']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# breakpoints.py
+# FixTalk 엔진: 대화가 끊기는(식는) 지점을 한 번 훑으면서(online) 찾아 원인 라벨과 함께 구간으로 낸다
+# - 입력: NextTalk normalize_dialog() 가 내는 '이름 - 내용' 줄 스트림 (또는 카카오톡/LINE 내보내기 원문 → iter_turns 가 같은 형식으로)
+# - 메시지마다 상수 크기 상태만 갱신한다: 화자별 길이 EMA, 최근 WINDOW 개 메시지 링 버퍼(길이/질문/화자 합계는 증분 갱신)
+#   → 수십만 줄 내보내기도 한 번의 선형 패스, 메모리는 창 크기 + 화자 수에 비례
+# - 메시지별 신호 (원인 라벨):
+#     답장 길이 급감 : 화자의 평소 길이(EMA)보다 collapse_ratio 배 이하로 짧아짐
+#     질문 없음     : 최근 창에 질문이 하나도 없음
+#     질문에 단답   : 상대가 방금 물었는데 단답/급감한 답
+#     한쪽만 말함   : 한 사람이 연속 monologue 번 이상 말하거나, (창이 반 이상 찼을 때) 창 글자 수의 imbalance 이상을 차지
+#     단답          : 'ㅇㅇ', '응', 'ㅋ' 같은 맞장구뿐인 짧은 답
+#     호응 부족     : SimTalk 휴리스틱에서 공감·호기심이 모두 낮음 (짧지 않은 메시지만)
+#     거친 표현     : SimTalk 휴리스틱 레드플래그가 경고 수준(RED_ALERT) 이상
+#   신호 가중합을 위험도로 보고 EMA 로 평활, open 에 닿으면 구간, close 아래로 내려오면 구간 끝 (히스테리시스)
+#   구간 시작은 위험도가 close 를 처음 넘은 메시지로 잡는다
+# - 휴리스틱 점수는 SimTalk scoring.extract_signals/heuristic_scores (heuristic_evaluate 의 점수 부분) 를 그대로 쓰고,
+#   내보내기에 자주 반복되는 짧은 메시지를 위해 내용별 LRU 캐시를 둔다 (크기 고정)
+# 실행 예 (FixTalk/ 에서):
+#   python breakpoints.py chat_export.txt              # 구간을 JSONL 로 출력
+#   python breakpoints.py chat_export.txt --top 10     # 위험도 높은 구간 10개만
+
+import argparse
+import heapq
+import json
+import sys
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(_ROOT / "NextTalk"), str(_ROOT / "SimTalk")]   # chatlog(NextTalk), scoring(SimTalk)
+from chatlog import classify
+from scoring import RED_ALERT, extract_signals, heuristic_scores
+
+CAUSES = ("답장 길이 급감", "질문 없음", "질문에 단답", "한쪽만 말함", "단답", "호응 부족", "거친 표현")
+# 원인별 위험도 가중치
+WEIGHTS = {"답장 길이 급감": 0.9, "질문 없음": 0.6, "질문에 단답": 1.0, "한쪽만 말함": 0.8, "단답": 0.7,
+           "호응 부족": 0.4, "거친 표현": 1.0}
+DEFAULTS: Dict[str, Any] = {
+    "window": 12,            # 최근 메시지 링 버퍼 크기
+    "alpha": 0.15,           # 화자별 길이 EMA 계수
+    "min_len": 8,            # 평소 길이가 이보다 짧은 화자는 '급감'을 보지 않음
+    "collapse_ratio": 0.35,
+    "monologue": 4,          # 같은 화자 연속 메시지 수
+    "imbalance": 0.85,       # 창 글자 수 중 한 사람 몫
+    "smooth": 0.2,           # 위험도 EMA 계수 (한 번 튄 단답으로는 구간이 열리지 않을 만큼)
+    "open": 1.2,             # 구간 시작 위험도
+    "close": 0.5,            # 구간 끝 위험도
+    "min_turns": 3,          # 이보다 짧은 구간은 버림
+}
+_SHORT_ACKS = {"ㅇㅇ", "ㅇㅋ", "ㅇ", "응", "웅", "엉", "어", "그래", "그렇구나", "아", "아하", "오", "헐", "넹", "네", "예",
+               "ㅋ", "ㅋㅋ", "ㅋㅋㅋ", "ㅎ", "ㅎㅎ", "ㅎㅎㅎ", "ㄱㄱ", "ㄴㄴ", "ok", "굿", "ㄳ", "사진", "이모티콘"}
+_TURN_SEP = " - "
+
+# ================== 입력 ==================
+def parse_turn(line: str) -> Optional[Tuple[str, str]]:
+    """'이름 - 내용' 한 줄 → (이름, 내용). 구분자가 없으면 None."""
+    i = line.find(_TURN_SEP)
+    if i <= 0:
+        return None
+    return line[:i].strip(), line[i + len(_TURN_SEP):].strip()
+
+def iter_turns(lines: Iterable[str]) -> Iterator[Tuple[int, str, str]]:
+    """
+    원문(내보내기/붙여넣은 로그)이나 정규화된 줄을 앞에서부터 (줄 번호, 이름, 내용)으로.
+    헤더/날짜/시스템 줄은 건너뛰고, 헤더 없는 줄은 앞 메시지에 이어 붙인다 (메시지 하나만 들고 있음).
+    """
+    cur: Optional[List[Any]] = None
+    for no, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line:
+            continue
+        kind, name, content, _ = classify(line)
+        if kind == "skip":
+            continue
+        if kind == "text":
+            if cur is not None:
+                cur[2] += " " + line
+            continue
+        if cur is not None:
+            yield cur[0], cur[1], cur[2]
+        cur = [no, name.strip(), content.strip()]
+    if cur is not None:
+        yield cur[0], cur[1], cur[2]
+
+@lru_cache(maxsize=8192)
+def _heuristic(content: str) -> Tuple[float, float, float]:
+    """(공감, 호기심, 레드플래그) — 같은 짧은 메시지가 수없이 반복되므로 내용별로 캐시."""
+    s = heuristic_scores(extract_signals(content))
+    return s["공감"], s["호기심"], s["레드플래그"]
+
+# ================== 탐지기 ==================
+class BreakpointDetector:
+    """메시지를 하나씩 push 하면 닫힌 구간을 돌려준다. 끝나면 finish() 로 열린 구간까지."""
+
+    def __init__(self, **cfg: Any):
+        self.cfg = {**DEFAULTS, **cfg}
+        w = self.cfg["window"]
+        self._win: deque = deque(maxlen=w)            # (화자, 길이, 질문 여부)
+        self._win_chars: Dict[str, int] = {}          # 창 안 화자별 글자 수
+        self._win_q = 0                               # 창 안 질문 수
+        self._len_ema: Dict[str, float] = {}          # 화자별 평소 길이
+        self._run_speaker: Optional[str] = None
+        self._run = 0
+        self._last_q = False                          # 바로 앞 메시지가 질문이었는지
+        self.risk = 0.0
+        self.n = 0
+        self._span: Optional[Dict[str, Any]] = None
+        self.stats = {"messages": 0, "spans": 0, "dropped_spans": 0}
+
+    def _slide(self, speaker: str, length: int, has_q: bool):
+        if len(self._win) == self._win.maxlen:
+            old_sp, old_len, old_q = self._win[0]
+            self._win_chars[old_sp] -= old_len
+            if not self._win_chars[old_sp]:
+                del self._win_chars[old_sp]
+            self._win_q -= old_q
+        self._win.append((speaker, length, has_q))
+        self._win_chars[speaker] = self._win_chars.get(speaker, 0) + length
+        self._win_q += has_q
+
+    def signals(self, speaker: str, content: str) -> List[str]:
+        """이번 메시지로 켜진 원인 라벨 (상태도 함께 갱신)."""
+        c = self.cfg
+        length = len(content)
+        has_q = "?" in content or "？" in content
+        causes: List[str] = []
+
+        ema = self._len_ema.get(speaker)
+        if ema is not None and ema >= c["min_len"] and length <= c["collapse_ratio"] * ema:
+            causes.append("답장 길이 급감")
+        self._len_ema[speaker] = length if ema is None else ema + c["alpha"] * (length - ema)
+
+        self._slide(speaker, length, has_q)
+        if len(self._win) == self._win.maxlen and not self._win_q:
+            causes.append("질문 없음")
+
+        replied = speaker != self._run_speaker
+        self._run = 1 if replied else self._run + 1
+        self._run_speaker = speaker
+        total = sum(self._win_chars.values())
+        half = len(self._win) * 2 >= self._win.maxlen
+        if self._run >= c["monologue"] or (half and total and max(self._win_chars.values()) >= c["imbalance"] * total):
+            causes.append("한쪽만 말함")
+
+        ack = content.lower().strip(" .!~") in _SHORT_ACKS
+        if replied and self._last_q and (ack or "답장 길이 급감" in causes):
+            causes.append("질문에 단답")
+        self._last_q = has_q
+        if ack:
+            causes.append("단답")
+        elif length >= 8:
+            emp, cur, red = _heuristic(content)
+            if emp < 3 and cur < 3:
+                causes.append("호응 부족")
+            if red >= RED_ALERT:
+                causes.append("거친 표현")
+        return causes
+
+    def push(self, speaker: str, content: str, line: int = 0) -> Optional[Dict[str, Any]]:
+        c = self.cfg
+        self.n += 1
+        self.stats["messages"] += 1
+        causes = self.signals(speaker, content)
+        score = sum(WEIGHTS[k] for k in causes)
+        self.risk += c["smooth"] * (score - self.risk)
+
+        # 위험도가 close 를 넘으면 후보 구간을 시작해 두고(시작점을 앞당기려고), open 에 닿아야 진짜 구간
+        if self._span is None:
+            if self.risk < c["close"]:
+                return None
+            self._span = {"start": self.n, "start_line": line or self.n, "opened": False,
+                          "peak": 0.0, "causes": {}, "speakers": {}, "preview": f"{speaker} - {content[:40]}"}
+        sp = self._span
+        sp["opened"] = sp["opened"] or self.risk >= c["open"]
+        sp["end"], sp["end_line"] = self.n, line or self.n
+        sp["peak"] = max(sp["peak"], round(self.risk, 3))
+        for k in causes:
+            sp["causes"][k] = sp["causes"].get(k, 0) + 1
+        if len(sp["speakers"]) < 16 or speaker in sp["speakers"]:   # 단톡방에서도 크기 고정
+            sp["speakers"][speaker] = sp["speakers"].get(speaker, 0) + 1
+        if self.risk < c["close"]:
+            return self._close()
+        return None
+
+    def _close(self) -> Optional[Dict[str, Any]]:
+        sp, self._span = self._span, None
+        if sp is None or not sp["opened"]:
+            return None
+        turns = sp["end"] - sp["start"] + 1
+        if turns < self.cfg["min_turns"]:
+            self.stats["dropped_spans"] += 1
+            return None
+        self.stats["spans"] += 1
+        causes = sorted(sp["causes"].items(), key=lambda kv: -kv[1])
+        return {
+            "start": sp["start"], "end": sp["end"], "start_line": sp["start_line"], "end_line": sp["end_line"],
+            "turns": turns, "peak": sp["peak"],
+            "causes": [k for k, _ in causes],
+            "cause_counts": dict(causes),
+            "speakers": sp["speakers"],
+            "preview": sp["preview"],
+        }
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """입력이 끝났을 때 열린 구간을 닫는다 (대화가 식은 채로 끝난 경우)."""
+        return self._close()
+
+def detect(turns: Iterable[Tuple[int, str, str]], **cfg: Any) -> Iterator[Dict[str, Any]]:
+    """(줄 번호, 이름, 내용) 스트림 → 끊김 구간 스트림."""
+    det = BreakpointDetector(**cfg)
+    for line, name, content in turns:
+        span = det.push(name, content, line)
+        if span is not None:
+            yield span
+    span = det.finish()
+    if span is not None:
+        yield span
+
+def detect_text(lines: Iterable[str], **cfg: Any) -> Iterator[Dict[str, Any]]:
+    """원문/정규화된 줄 스트림 (파일 객체 그대로 넘겨도 됨)."""
+    return detect(iter_turns(lines), **cfg)
+
+def describe_span(sp: Dict[str, Any]) -> str:
+    return (f"{sp['start_line']}~{sp['end_line']}줄 ({sp['turns']}개 메시지, 위험도 {sp['peak']:.2f}): "
+            f"{', '.join(sp['causes'][:3])} — {sp['preview']}")
+
+# ================== CLI ==================
+def main():
+    ap = argparse.ArgumentParser(description="대화 끊김 구간 탐지 (한 번 훑기)")
+    ap.add_argument("path", help="대화 로그 파일 (- 이면 stdin)")
+    ap.add_argument("--top", type=int, default=0, help="위험도 높은 구간 N개만 (0 이면 전부, 나오는 대로)")
+    ap.add_argument("--text", action="store_true", help="JSONL 대신 사람이 읽는 한 줄 요약")
+    for k, v in DEFAULTS.items():
+        ap.add_argument(f"--{k.replace('_', '-')}", type=type(v), default=v)
+    args = ap.parse_args()
+    cfg = {k: getattr(args, k) for k in DEFAULTS}
+
+    f: TextIO = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    try:
+        spans: Iterable[Dict[str, Any]] = detect_text(f, **cfg)
+        if args.top:
+            # 상위 N개만 들고 있는다 (메모리 고정)
+            spans = heapq.nlargest(args.top, spans, key=lambda s: s["peak"])
+        for sp in spans:
+            print(describe_span(sp) if args.text else json.dumps(sp, ensure_ascii=False))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,28 @@
 ##모델 성능 테스트
 
+import sys
+import time
+import uuid
+from pathlib import Path
+
 import streamlit as st
-import ollama
-import re  # ← 추가
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로
+from common.metrics import Trace, get_sink, trace_row
+from common.model_info import describe_model
+from common.resources import get_model_info, get_scheduler, get_warmer
+from common.scheduler import PRIORITY_SUGGEST, describe_load
+from common.transport import describe_transport, get_transport
+from common.warmup import describe
+from chatlog import describe_window, log_budget, tail_window
+from dialog import (
+    TOKEN_BASELINE, SuggestionStream, clean_model_output, split_suggestions, system_message, user_prompt,
+)
+from compare import (
+    KNOWN_MODELS, compare_models, load_results, log_fingerprint, result_row, save_results, summarize_results,
+)
+from semantic_cache import DEFAULT_EMBED_MODEL, get_semantic_cache, key_text, namespace
+from summarize import SUMMARY_RESERVE, describe_summary, summarize_head
 
 st.set_page_config(page_title="다음 멘트 추천 (Ollama)", page_icon="💬")
 st.title("💬 다음 멘트 추천 (Ollama)")
@@ -21,140 +41,264 @@ with st.sidebar:
     MODEL = st.text_input("모델명", value="EEVE-Korean-10.8B:latest")  # 대화형은 보통 :instruct 권장
     N = st.slider("제안 개수", 3, 5, 3, 1)
     TEMP = st.slider("temperature", 0.0, 1.5, 0.7, 0.1)
+    NUM_CTX = st.select_slider("컨텍스트 (num_ctx)", [2048, 4096, 8192, 16384, 32768], value=4096,
+                               help="대화 로그는 끝에서부터 이 예산에 들어가는 최근 발화만 보냅니다.")
+    SUMMARIZE = st.toggle("앞부분 요약 (map-reduce)", value=True,
+                          help="컨텍스트에 못 들어간 앞부분을 청크별로 요약해 함께 보냅니다. "
+                               "청크 요약은 캐시되므로 같은 로그에 덧붙여 다시 붙여넣으면 새 청크만 요약합니다.")
+    SUMMARY_CHUNKS = st.slider("요약할 앞부분 청크 수 (최대)", 4, 64, 16, 4, disabled=not SUMMARIZE,
+                               help="창 바로 앞부터 이만큼만 요약합니다 (청크 ≈ 3000자).")
+    KEEP_ALIVE = st.selectbox("모델 유지 시간 (keep_alive)", ["5m", "30m", "2h", -1], index=1,
+                              format_func=lambda v: "계속 유지" if v == -1 else v)
+    STREAM = st.toggle("스트리밍 + 조기 종료", value=True,
+                       help="제안이 한 줄 완성될 때마다 바로 보여주고, 제안이 다 차면 생성을 멈춰 토큰을 아낍니다. "
+                            "<think> 구간은 도착하는 대로 숨깁니다.")
+    SEM_CACHE = st.toggle("의미 캐시", value=True,
+                          help="마지막 몇 발화가 예전 입력과 (임베딩 기준으로) 거의 같으면 생성 없이 그때 제안을 바로 보여줍니다.")
+    if SEM_CACHE:
+        with st.expander("의미 캐시 설정"):
+            EMBED_MODEL = st.text_input("임베딩 모델", value=DEFAULT_EMBED_MODEL)
+            SEM_K = st.slider("비교할 마지막 발화 수", 2, 12, 6, 1)
+            SEM_THRESHOLD = st.slider("유사도 기준", 0.80, 0.99, 0.92, 0.01)
+    COMPARE = st.toggle("모델 비교 모드", value=False,
+                        help="같은 로그를 여러 모델에 동시에 보내 제안/속도/형식 준수를 나란히 비교합니다.")
+    if COMPARE:
+        _choices = list(dict.fromkeys([MODEL.strip(), *KNOWN_MODELS]))
+        COMPARE_MODELS = st.multiselect("비교할 모델", _choices, default=[MODEL.strip()])
+        COMPARE_PARALLEL = st.slider("동시 실행 모델 수", 1, 4, 2, 1,
+                                     help="모델을 여러 개 동시에 올리면 그만큼 메모리가 필요합니다.")
+        SAVE_BENCH = st.toggle("결과를 벤치마크 파일에 저장", value=True, help="NextTalk/model_bench.jsonl 에 덧붙입니다.")
+    DEBUG_METRICS = st.toggle("단계별 계측 보기", value=False)
     if st.button("세션 초기화"):
         st.session_state.clear()
         st.rerun()
 
-system_message = f"""
-너는 '대화 이어주기 코치'야. 항상 한국어 반말로 짧고 자연스럽게 제안해.
-출력 규칙:
-- 딱 {N}개 제안만.
-- 각 제안은 1문장, 30자 내외.
-"""
+# 모델 워밍업: 앱 시작/모델 변경 시 백그라운드로 미리 로드
+_warmer = get_warmer()
+if _warmer.will_reload(MODEL.strip()):
+    st.sidebar.warning(f"`{MODEL.strip()}` 은(는) 아직 메모리에 없어 첫 추천 전에 로드 시간이 걸려. 미리 올려둘게.")
+_warmer.warm(MODEL.strip(), keep_alive=KEEP_ALIVE)
+st.sidebar.caption(f"모델 상태: {describe(_warmer.status(MODEL.strip()))}")
+
+# 요청 스케줄러: 여러 세션이 한 Ollama 서버를 나눠 쓸 때 세션별로 공평하게 순서를 잡음
+if "sid" not in st.session_state:
+    st.session_state.sid = uuid.uuid4().hex[:12]
+st.sidebar.caption(describe_load(get_scheduler().snapshot()))
+if describe_transport(get_transport()):
+    st.sidebar.caption(describe_transport(get_transport()))
 
 if "turns" not in st.session_state:
     st.session_state.turns = []
 
+# 모델 존재/메타데이터: 제출마다 show() 를 부르지 않도록 TTL 캐시 (common/model_info.py)
 def ensure_model_exists(name: str) -> bool:
-    try:
-        ollama.show(model=name)
+    if get_model_info().exists(name):
         return True
-    except Exception:
-        st.error(f"❌ 모델이 없습니다: `{name}`\n- `ollama list`로 확인\n- 필요 시 `ollama pull {name}`")
-        return False
-    
-import re
-
-def clean_model_output(text: str) -> str:
-    """
-    모델이 reasoning(생각)이나 진단용 태그를 노출할 때를 대비해 안전하게 제거한다.
-    - <think> ... </think>
-    - /think, /no_think (단독 라인 or 문장 중 포함)
-    - <tool_call> ... </tool_call> (혹시 템플릿에 있을 때)
-    - 불필요한 마커 여백 정리
-    """
-    if not text:
-        return text
-
-    # 1) <think> 블록 제거 (개행 포함, 대/소문자 무시)
-    text = re.sub(r'(?is)<\s*think\s*>.*?<\s*/\s*think\s*>', '', text)
-
-    # 2) /think, /no_think 토큰 제거 (라인 단독/문장 내 둘 다 커버)
-    text = re.sub(r'(?im)^\s*/\s*(?:no_)?think\s*$', '', text)  # 단독 라인
-    text = re.sub(r'/\s*(?:no_)?think\b', '', text)             # 문장 중 포함
-
-    # 3) (옵션) tool_call 블록 제거
-    text = re.sub(r'(?is)<\s*tool_call\s*>.*?<\s*/\s*tool_call\s*>', '', text)
-
-    # 4) 남은 태그/마커 여백 정리
-    text = re.sub(r'\n{3,}', '\n\n', text).strip()
-    return text
-
-
-# ✅ 로그를 "이름 - 내용"으로 정규화
-def normalize_dialog(text: str) -> str:
-    """
-    다음과 같은 흔한 패턴들을 '이름 - 내용'으로 통일:
-    1) [이름] [시간] 내용
-    2) [이름] 내용
-    3) 이름: 내용
-    4) 이름 - 내용
-    그 외 매치되지 않으면 공백 정리 후 원문 유지
-    """
-    patterns = [
-        re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*\[(?P<time>[^\]]*)\]\s*(?P<content>.+)\s*$'),
-        re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*(?P<content>.+)\s*$'),
-        re.compile(r'^\s*(?P<name>[^:\-\[\]]+)\s*[:\-]\s*(?P<content>.+)\s*$'),
-    ]
-    out = []
-    for raw in text.strip().splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        normalized = None
-        for p in patterns:
-            m = p.match(line)
-            if m:
-                name = re.sub(r'\s+', ' ', m.group('name').strip())
-                content = re.sub(r'\s+', ' ', m.group('content').strip())
-                normalized = f"{name} - {content}"
-                break
-        out.append(normalized if normalized else re.sub(r'\s+', ' ', line))
-    return "\n".join(out)
+    st.error(f"❌ 모델이 없습니다: `{name}`\n- `ollama list`로 확인\n- 필요 시 `ollama pull {name}`")
+    return False
+
+_model_info = get_model_info().get(MODEL.strip())
+if describe_model(_model_info):
+    st.sidebar.caption(f"모델 정보: {describe_model(_model_info)}")
+if _model_info.get("context_length") and NUM_CTX > _model_info["context_length"]:
+    st.sidebar.warning(f"num_ctx({NUM_CTX})가 모델 최대 길이({_model_info['context_length']})보다 커요.")
+if SEM_CACHE:
+    st.sidebar.caption(get_semantic_cache().describe())
+    if get_semantic_cache().stats["embed_errors"]:
+        st.sidebar.caption(f"임베딩 실패: {get_semantic_cache().last_error} (`ollama pull {EMBED_MODEL.strip()}`)")
+if STREAM and TOKEN_BASELINE.summary(MODEL.strip(), N)["saved_total"]:
+    st.sidebar.caption(f"조기 종료로 아낀 토큰(추정, 누적): {TOKEN_BASELINE.summary(MODEL.strip(), N)['saved_total']:,}")
+
+# ================== 추천 호출 ==================
+def compare_view(messages, trace: Trace, norm_log: str, window):
+    """고른 모델들에 동시에 보내고, 끝나는 대로 열에 나란히 그린다."""
+    models = COMPARE_MODELS or [MODEL.strip()]
+    cols = st.columns(len(models))
+    boxes = {}
+    for col, m in zip(cols, models):
+        col.markdown(f"**{m}**")
+        boxes[m] = col.empty()
+        boxes[m].caption("생성 중…")
+
+    def show(r):
+        with boxes[r["model"]].container():
+            if not r["ok"]:
+                st.error(f"실패: {r['error']}")
+                return
+            for i, ln in enumerate(r["suggestions"], 1):
+                st.markdown(f"{i}. {ln}")
+            st.caption(f"로드 {r.get('load_s') or 0:.2f}s · TTFT {r.get('ttft_s') or 0:.2f}s · "
+                       f"{r.get('gen_tok_s') or '-'} tok/s · {r['lines']}줄" + (" ✅" if r["exact_n"] else f" (목표 {N})"))
+
+    sid = st.session_state.sid   # 모델별 호출은 스레드 풀에서 돌므로 session_state 대신 id 를 넘긴다
+    with trace.span("compare"):
+        rows = compare_models(models, messages, N, TEMP, NUM_CTX, keep_alive=KEEP_ALIVE, parallel=COMPARE_PARALLEL,
+                              slot=lambda m: get_scheduler().slot(sid, PRIORITY_SUGGEST), on_result=show)
+    st.dataframe([result_row(r, N) for r in rows], use_container_width=True, hide_index=True)
+    if SAVE_BENCH:
+        run = save_results(rows, n=N, temperature=TEMP, num_ctx=NUM_CTX, log=log_fingerprint(norm_log),
+                           log_turns=window["turns"])
+        st.caption(f"벤치마크 파일에 저장함 (run {run})")
+    trace.note("compare", [{k: r.get(k) for k in ("model", "ok", "ttft_s", "total_s", "gen_tok_s", "lines")}
+                           for r in rows])
+    return rows
+
+def full_suggestions(messages, trace: Trace):
+    """응답을 다 받은 뒤 정리해서 앞의 N줄."""
+    t0 = time.perf_counter()
+    with get_scheduler().slot(st.session_state.sid, PRIORITY_SUGGEST):
+        trace.add("suggest_queue", time.perf_counter() - t0)
+        with trace.span("suggest"):
+            res = get_transport().chat(
+                model=MODEL.strip(),
+                messages=messages,
+                options={"temperature": float(TEMP), "num_ctx": NUM_CTX},
+                keep_alive=KEEP_ALIVE,
+            )
+    trace.record_ollama("suggest", res)
+    # thinking/툴콜 등 제거
+    with trace.span("clean"):
+        raw = res["message"]["content"].replace("\\n", "\n").strip()
+        lines = split_suggestions(clean_model_output(raw), N)   # 라인 정리
+    return lines, res.get("model", MODEL)
+
+def stream_suggestions(messages, trace: Trace):
+    """제안이 한 줄 완성될 때마다 바로 그리고, N개가 차면 스트림을 닫아 생성을 멈춘다."""
+    model = MODEL.strip()
+    calibrate = TOKEN_BASELINE.should_calibrate(model, N)   # 가끔은 끝까지 받아 '아낀 토큰' 기준을 잰다
+    parser = SuggestionStream(N)
+    status = st.empty()
+    status.caption("생각하는 중…")
+    t0 = time.perf_counter()
+    # 스트림이 끝날(또는 끊을) 때까지 슬롯을 잡고 있는다
+    with get_scheduler().slot(st.session_state.sid, PRIORITY_SUGGEST):
+        trace.add("suggest_queue", time.perf_counter() - t0)
+        t1 = time.perf_counter()
+        stream = get_transport().chat(
+            model=model,
+            messages=messages,
+            options={"temperature": float(TEMP), "num_ctx": NUM_CTX},
+            keep_alive=KEEP_ALIVE,
+            stream=True,
+        )
+        for i, ln in enumerate(parser.iter_suggestions(stream, early_stop=not calibrate), 1):
+            if i == 1:
+                trace.add("suggest_first", time.perf_counter() - t1)
+                status.empty()
+            st.markdown(f"{i}. {ln}")
+        trace.add("suggest", time.perf_counter() - t1)
+    if parser.final is not None:
+        trace.record_ollama("suggest", parser.final)
+        TOKEN_BASELINE.observe(model, N, parser.final.get("eval_count"))
+    saved = TOKEN_BASELINE.saved(model, N, parser.tokens) if parser.stopped_early else 0
+    trace.note("stream", {"tokens": parser.tokens, "hidden_chars": parser.hidden_chars,
+                          "stopped_early": parser.stopped_early, "tokens_saved_est": saved})
+    if not parser.suggestions:
+        status.markdown("생성된 제안이 없네. 로그를 조금 더 붙여줘! 😅")
+    else:
+        status.empty()
+    info = f"생성 {parser.tokens} 토큰"
+    if parser.hidden_chars:
+        info += f" (생각/툴콜 {parser.hidden_chars}자 숨김)"
+    if parser.stopped_early:
+        info += f" · {N}개 완성 후 중단" + (f" · 약 {saved} 토큰 절약(추정)" if saved is not None else "")
+    elif calibrate:
+        info += " · 끝까지 생성해 절약량 기준 측정"
+    st.caption(info)
+    return parser.suggestions, (parser.final or {}).get("model", model)
 
 user_log = st.chat_input("여기에 '대화 로그'를 그대로 붙여넣고 Enter")
 if user_log:
-    # 1) 정규화해서 화면에 깔끔히 보여주기
-    norm_log = normalize_dialog(user_log)
+    # 단계별 계측 (정규화/모델 확인/추천 호출/후처리/렌더링)
+    trace = Trace()
+    t_turn = time.perf_counter()
+
+    # 1) 끝에서부터 컨텍스트 예산에 들어가는 최근 발화만 정규화해서 화면에 깔끔히 보여주기
+    #    (카카오톡/LINE 내보내기 통째로 붙여넣어도 모델이 못 볼 앞부분은 건드리지 않음)
+    budget = log_budget(NUM_CTX, N)
+    with trace.span("normalize"):
+        window = tail_window(user_log, budget)
+        if SUMMARIZE and window["dropped_lines"]:
+            # 앞부분 요약이 들어갈 자리를 비워 두고 창을 다시 잡는다
+            window = tail_window(user_log, max(256, budget - SUMMARY_RESERVE))
+        norm_log = window["text"]
+    trace.note("log_window", {k: v for k, v in window.items() if k != "text"})
     with st.chat_message("user"):
         st.markdown("**정규화된 대화**")
         st.code(norm_log)
-
-    # 2) 모델에도 정규화된 로그를 전달
-    user_content = f"""
-이 대화에서 상대방과 대화를 자연스럽게 이어가기 위해, 다음에 어떤 말을 하면 좋을지 한국어로 추천해줘.
-
-[대화 로그 시작]
-{norm_log}
-[대화 로그 끝]
-
-조건:
-- 반말, 공감, 가벼운 유머 허용
-- {N}개 제안, 각 1문장/30자 내외
-"""
+        st.caption(describe_window(window))
 
     with st.chat_message("assistant"):
-        if not ensure_model_exists(MODEL.strip()):
-            st.stop()
+        # 비교 모드에선 모델마다 실패를 따로 보여준다
+        if not COMPARE:
+            with trace.span("model_check"):
+                model_ok = ensure_model_exists(MODEL.strip())
+            if not model_ok:
+                st.stop()
 
         try:
-            res = ollama.chat(
-                model=MODEL.strip(),
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_content},
-                ],
-                options={"temperature": float(TEMP), "num_ctx": 4096},
-            )
-            # ▼▼▼ 추가: thinking/툴콜 등 제거 ▼▼▼
-            raw = res["message"]["content"].replace("\\n", "\n").strip()
-            text = clean_model_output(raw)
-
-            # 라인 정리
-            lines = [
-                ln.strip(" -•0123456789.").strip()
-                for ln in text.splitlines() if ln.strip()
-            ]
-            lines = lines[:N] if len(lines) >= N else lines
-
-            if not lines:
-                st.markdown("생성된 제안이 없네. 로그를 조금 더 붙여줘! 😅")
-            else:
+            # 마지막 K 발화가 예전 입력과 거의 같으면 생성(과 앞부분 요약) 없이 그때 제안을 쓴다
+            sem = None
+            if SEM_CACHE and not COMPARE:
+                sem_ns = namespace(MODEL.strip(), TEMP, N, EMBED_MODEL.strip())
+                sem_key = key_text(norm_log, SEM_K)
+                with trace.span("semantic_lookup"):
+                    sem = get_semantic_cache().lookup(sem_ns, sem_key, EMBED_MODEL.strip(), SEM_THRESHOLD)
+                trace.note("semantic_cache", {k: sem[k] for k in ("hit", "exact", "similarity")})
+            if sem is not None and sem["hit"]:
+                lines, model_name = sem["suggestions"], MODEL.strip()
                 for i, ln in enumerate(lines, 1):
                     st.markdown(f"{i}. {ln}")
+                st.caption("의미 캐시 적중 · 생성 생략" +
+                           (" (같은 대화 꼬리)" if sem["exact"] else f" (유사도 {sem['similarity']:.3f})"))
+            else:
+                # 2) 창에 못 들어간 앞부분은 청크별 요약(캐시) → 합친 요약을 최근 창과 함께 전달
+                background = ""
+                if SUMMARIZE and window["start"]:
+                    sid = st.session_state.sid   # 청크 요약은 스레드 풀에서 돌므로 session_state 대신 id 를 넘긴다
+                    with st.spinner("앞부분 요약 중…"):
+                        summary = summarize_head(
+                            user_log, window["start"], MODEL.strip(), max_chunks=SUMMARY_CHUNKS, keep_alive=KEEP_ALIVE,
+                            slot=lambda: get_scheduler().slot(sid, PRIORITY_SUGGEST), trace=trace)
+                    background = summary["summary"]
+                    trace.note("summary", {k: v for k, v in summary.items() if k != "summary"})
+                    if describe_summary(summary):
+                        st.caption(describe_summary(summary))
+                user_content = user_prompt(norm_log, N, background)
+
+                messages = [
+                    {"role": "system", "content": system_message(N)},
+                    {"role": "user", "content": user_content},
+                ]
+                if COMPARE:
+                    rows = compare_view(messages, trace, norm_log, window)
+                    lines = [f"[{r['model']}] {ln}" for r in rows if r["ok"] for ln in r["suggestions"]]
+                    model_name = ", ".join(r["model"] for r in rows)
+                elif STREAM:
+                    lines, model_name = stream_suggestions(messages, trace)
+                else:
+                    lines, model_name = full_suggestions(messages, trace)
+                    with trace.span("render"):
+                        if not lines:
+                            st.markdown("생성된 제안이 없네. 로그를 조금 더 붙여줘! 😅")
+                        else:
+                            for i, ln in enumerate(lines, 1):
+                                st.markdown(f"{i}. {ln}")
+
+                if not COMPARE:
+                    gen_rate = trace.ollama.get("suggest", {}).get("gen_tok_s")
+                    st.caption(f"모델: **{model_name}** | temp={TEMP}" + (f" | {gen_rate} tok/s" if gen_rate else ""))
 
-            st.caption(f"모델: **{res.get('model', MODEL)}** | temp={TEMP}")
             st.session_state.turns.append((norm_log, lines))
+            if sem is not None and not sem["hit"] and lines:
+                get_semantic_cache().put(sem_ns, sem_key, lines, vec=sem["vec"], embed_model=EMBED_MODEL.strip())
+                get_semantic_cache().maybe_save()
+
+            trace.add("turn", time.perf_counter() - t_turn)
+            st.session_state.last_trace = {"turn": len(st.session_state.turns), **trace.to_dict()}
+            sink = get_sink()
+            if sink is not None:
+                sink.record("nexttalk", st.session_state.last_trace, session=st.session_state.sid, model=MODEL.strip())
 
         except Exception as e:
             st.error(f"모델 호출 실패: {e}\n- `ollama serve`가 실행 중인지와 모델명을 확인해줘.")
@@ -169,4 +313,16 @@ if st.session_state.turns:
                 for j, ln in enumerate(suggs, 1):
                     st.markdown(f"{j}. {ln}")
 
+# 모델 비교 누적 결과 (벤치마크 파일)
+if COMPARE:
+    _bench = summarize_results(load_results())
+    if _bench:
+        with st.expander("📊 모델 벤치마크 누적"):
+            st.dataframe(_bench, use_container_width=True, hide_index=True)
+
+# 단계별 계측 (마지막 추천 1건)
+if DEBUG_METRICS and st.session_state.get("last_trace"):
+    with st.sidebar.expander("🔧 단계별 지연(초) / 토큰", expanded=True):
+        st.dataframe([trace_row(st.session_state.last_trace)], use_container_width=True, hide_index=True)
+
 #streamlit run ST.py 으로 실행하면 됨
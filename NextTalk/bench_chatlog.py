@@ -0,0 +1,56 @@
+# bench_chatlog.py
+# 실행: python bench_chatlog.py [--lines 50000] [--num-ctx 4096]
+# 큰 카카오톡/LINE 내보내기를 예전처럼 통째로 normalize_dialog 하는 경우와,
+# chatlog.tail_window 로 끝에서부터 예산만큼만 정규화하는 경우의 시간/보내는 토큰을 비교한다.
+
+import argparse
+import random
+import time
+
+from chatlog import describe_window, estimate_tokens, log_budget, tail_window
+from dialog import normalize_dialog
+
+_NAMES = ["홍길동", "김영희", "이민수"]
+_TEXTS = ["주말에 뭐 했어?", "그냥 집에 있었어 ㅋㅋ", "오늘 저녁 뭐 먹을까", "사진", "이모티콘", "그거 진짜 재밌더라!", "내일 몇 시에 볼래?"]
+
+def make_export(kind: str, lines: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    out = ["홍길동 님과 카카오톡 대화", "저장한 날짜 : 2024-01-05 15:00:00", ""] if kind != "LINE" else \
+          ["[LINE] 홍길동와의 대화 기록", "저장 날짜：2024/01/05 15:00", ""]
+    for i in range(lines):
+        if i % 200 == 0:
+            day = 1 + i // 200 % 28
+            out.append(f"--------------- 2024년 1월 {day}일 금요일 ---------------" if kind == "카카오톡 PC" else
+                       f"2024년 1월 {day}일 금요일" if kind == "카카오톡 모바일" else f"2024.01.{day:02d} 금요일")
+        name, text = rnd.choice(_NAMES), rnd.choice(_TEXTS)
+        h, m = 1 + i // 60 % 12, i % 60
+        if kind == "카카오톡 PC":
+            out.append(f"[{name}] [오후 {h}:{m:02d}] {text}")
+        elif kind == "카카오톡 모바일":
+            out.append(f"2024년 1월 5일 오후 {h}:{m:02d}, {name} : {text}")
+        else:
+            out.append(f"{h + 12}:{m:02d}\t{name}\t{text}")
+        if rnd.random() < 0.05:
+            out.append("여러 줄 메시지의 다음 줄")
+    return "\n".join(out)
+
+def main():
+    ap = argparse.ArgumentParser(description="대용량 대화 로그: 전체 정규화 vs 토큰 예산 꼬리 창")
+    ap.add_argument("--lines", type=int, default=50000)
+    ap.add_argument("--num-ctx", type=int, default=4096)
+    ap.add_argument("--n", type=int, default=3, help="제안 개수 (프롬프트 고정 부분 계산용)")
+    args = ap.parse_args()
+    budget = log_budget(args.num_ctx, args.n)
+    print(f"로그 예산 {budget:,} 토큰 (num_ctx {args.num_ctx})")
+    for kind in ("카카오톡 PC", "카카오톡 모바일", "LINE"):
+        text = make_export(kind, args.lines)
+        t0 = time.perf_counter()
+        full = normalize_dialog(text)
+        t1 = time.perf_counter()
+        w = tail_window(text, budget)
+        t2 = time.perf_counter()
+        print(f"{kind:<9} 전체 정규화 {(t1 - t0) * 1000:8.1f}ms (≈{estimate_tokens(full):,} 토큰) | "
+              f"꼬리 창 {(t2 - t1) * 1000:6.2f}ms · {describe_window(w)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# chatlog.py
+# 메신저 내보내기(카카오톡 PC/모바일, LINE) 같은 큰 대화 로그를 토큰 예산 안의 '최근 창'으로 자른다 (Streamlit 없이 import 가능)
+# - 끝에서부터 거꾸로 한 줄씩 읽으며(전체를 split 하지 않음) 발화 단위로 정규화하고, 예산이 차면 멈춘다
+#   → 모델이 어차피 못 보는 앞부분은 정규화도 전송도 하지 않는다
+# - 내보내기 헤더(…님과 카카오톡 대화, 저장한 날짜, [LINE] …)와 날짜 구분선, 입장/퇴장 같은 시스템 줄은 발화로 치지 않는다
+# - 내보내기 형식 메시지 아래의 헤더 없는 줄은 여러 줄 메시지로 보고 앞 발화에 이어 붙인다
+# - 짧게 붙여넣은 '이름: 내용' / '[이름] 내용' 로그는 dialog.normalize_dialog 와 같은 결과
+
+import re
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from dialog import DIALOG_PATTERNS, system_message, user_prompt
+
+# ================== 줄 패턴 ==================
+_AMPM = r'(?:오전|오후)'
+# 내보내기 형식 메시지: (형식 이름, 패턴) — 위에서부터 먼저 맞는 것
+EXPORT_PATTERNS: Tuple[Tuple[str, "re.Pattern"], ...] = (
+    # 카카오톡 PC: [이름] [오후 3:14] 내용
+    ("카카오톡 PC", re.compile(rf'^\[(?P<name>[^\]]+)\]\s*\[(?P<time>{_AMPM}\s*\d{{1,2}}:\d{{2}}|\d{{1,2}}:\d{{2}})\]\s*(?P<content>.*)$')),
+    # 카카오톡 안드로이드: 2024년 1월 5일 오후 3:14, 이름 : 내용
+    ("카카오톡 모바일", re.compile(rf'^\d{{4}}년 \d{{1,2}}월 \d{{1,2}}일 {_AMPM} \d{{1,2}}:\d{{2}}, (?P<name>[^:]+?) : (?P<content>.*)$')),
+    # 카카오톡 iOS: 2024. 1. 5. 오후 3:14, 이름 : 내용  (또는 24시간제 15:14)
+    ("카카오톡 모바일", re.compile(rf'^\d{{4}}\. \d{{1,2}}\. \d{{1,2}}\. (?:{_AMPM} )?\d{{1,2}}:\d{{2}}, (?P<name>[^:]+?) : (?P<content>.*)$')),
+    # LINE: 15:14<TAB>이름<TAB>내용  (또는 오후 3:14)
+    ("LINE", re.compile(rf'^(?:{_AMPM} ?)?\d{{1,2}}:\d{{2}}\t(?P<name>[^\t]+)\t(?P<content>.*)$')),
+)
+# 발화가 아닌 줄: 헤더 / 날짜 구분선 / 시스템 메시지
+SKIP_PATTERNS = (
+    re.compile(r'^.+ 님과 카카오톡 대화$'),
+    re.compile(r'^저장(?:한)? 날짜\s*[:：]'),
+    re.compile(r'^\[LINE\] '),
+    re.compile(r'^-{3,}\s*\d{4}년 \d{1,2}월 \d{1,2}일.*?-{3,}$'),                  # 카카오톡 PC 날짜 구분선
+    re.compile(r'^\d{4}년 \d{1,2}월 \d{1,2}일(?: \S+요일)?$'),                      # 카카오톡 모바일 날짜 줄
+    re.compile(r'^\d{4}\. \d{1,2}\. \d{1,2}\.(?: \S+요일)?$'),
+    re.compile(r'^\d{4}[./]\d{1,2}[./]\d{1,2}(?:\s*\(\S+\)|\s+\S+요일)?$'),        # LINE 날짜 줄
+    re.compile(rf'^\d{{4}}년 \d{{1,2}}월 \d{{1,2}}일 {_AMPM} \d{{1,2}}:\d{{2}}(?:, [^:]*)?$'),   # 모바일 시스템 줄 (입장/퇴장 등)
+    re.compile(rf'^\d{{4}}\. \d{{1,2}}\. \d{{1,2}}\. (?:{_AMPM} )?\d{{1,2}}:\d{{2}}(?:, [^:]*)?$'),
+)
+_HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_SPACES = re.compile(r'\s+')
+
+def estimate_tokens(text: str) -> int:
+    """SimTalk/history.py 와 같은 근사치: 한글 1자 ≈ 1토큰, 그 외 4자 ≈ 1토큰."""
+    if not text:
+        return 0
+    n_hangul = len(_HANGUL_RE.findall(text))
+    return n_hangul + (len(text) - n_hangul + 3) // 4
+
+def classify(line: str) -> Tuple[str, Optional[str], str, str]:
+    """(종류, 이름, 내용, 형식). 종류: msg(내보내기) / plain(일반 '이름 - 내용') / skip / text(패턴 없음)."""
+    for fmt, p in EXPORT_PATTERNS:
+        m = p.match(line)
+        if m:
+            return "msg", m.group("name"), m.group("content"), fmt
+    for p in SKIP_PATTERNS:
+        if p.match(line):
+            return "skip", None, "", ""
+    for p in DIALOG_PATTERNS:
+        m = p.match(line)
+        if m:
+            return "plain", m.group("name"), m.group("content"), "일반"
+    return "text", None, line, ""
+
+def _turn(name: str, content: str) -> str:
+    return f"{_SPACES.sub(' ', name.strip())} - {_SPACES.sub(' ', content.strip())}"
+
+def iter_lines_reverse(text: str) -> Iterator[Tuple[int, str]]:
+    """(줄 시작 위치, 줄)을 끝에서부터. 전체를 splitlines 하지 않는다."""
+    end = len(text)
+    while end >= 0:
+        start = text.rfind("\n", 0, end) + 1
+        yield start, text[start:end].strip()
+        end = start - 1
+
+# ================== 최근 창 ==================
+def tail_window(text: str, budget_tokens: int) -> Dict[str, Any]:
+    """
+    끝에서부터 발화를 모아 budget_tokens 안에 드는 최근 창을 만든다.
+    반환: text(정규화된 창), turns, tokens, format(창 안에서 가장 많이 본 형식),
+          dropped_lines / dropped_tokens_est(창에 못 들어간 앞부분, 토큰은 창의 글자당 토큰으로 추정),
+          start(창이 시작하는 원문 위치 — text[:start] 가 창에 못 들어간 앞부분)
+    """
+    kept: List[str] = []                  # 거꾸로 쌓는다
+    used = 0
+    pending: List[Tuple[int, str]] = []   # 헤더 없는 줄 (위쪽 내보내기 메시지의 이어지는 줄일 수 있음), 아래 줄부터
+    pending_tokens = 0
+    formats: Dict[str, int] = {}
+    cut: Optional[int] = None             # 창에 못 들어간 첫 줄(아래에서부터 본 순서로)의 시작 위치
+    top = len(text)                       # 창에 들어간 가장 위 줄의 시작 위치
+
+    def take(unit: str, pos: int) -> bool:
+        nonlocal used, cut, top
+        cost = estimate_tokens(unit) + 1
+        if used + cost > budget_tokens:
+            cut = pos
+            return False
+        kept.append(unit)
+        used += cost
+        top = min(top, pos)
+        return True
+
+    def flush_pending() -> bool:
+        nonlocal pending_tokens
+        for pos, ln in pending:
+            if not take(_SPACES.sub(' ', ln), pos):
+                return False
+        pending.clear()
+        pending_tokens = 0
+        return True
+
+    for pos, line in iter_lines_reverse(text):
+        if not line:
+            continue
+        kind, name, content, fmt = classify(line)
+        if kind == "text":
+            pending.append((pos, line))
+            pending_tokens += estimate_tokens(line) + 1
+            # 이어 붙일 메시지가 끝내 안 나와도 예산은 넘지 못하므로, 넘는 순간 따로따로 채우고 멈춘다
+            if used + pending_tokens > budget_tokens and not flush_pending():
+                break
+            continue
+        if kind == "skip":
+            if not flush_pending():
+                break
+            continue
+        if kind == "msg" and pending:
+            content = " ".join([content] + [ln for _, ln in reversed(pending)])
+            pending.clear()
+            pending_tokens = 0
+        elif not flush_pending():
+            break
+        if not take(_turn(name, content), pos):
+            break
+        formats[fmt] = formats.get(fmt, 0) + 1
+    else:
+        flush_pending()
+
+    window = "\n".join(reversed(kept))
+    if cut is None:
+        dropped_lines = dropped_chars = 0
+    else:
+        eol = text.find("\n", cut)
+        dropped_chars = len(text) if eol == -1 else eol
+        dropped_lines = text.count("\n", 0, cut) + 1
+    # 버린 앞부분의 토큰은 원문 글자 수 × (창의 토큰 / 창이 차지한 원문 글자 수) 로 추정
+    return {
+        "text": window,
+        "turns": len(kept),
+        "tokens": used,
+        "format": max(formats, key=formats.get) if formats else "일반",
+        "dropped_lines": dropped_lines,
+        "dropped_tokens_est": int(dropped_chars * used / max(1, len(text) - top)),
+        "start": 0 if cut is None else top,
+    }
+
+def log_budget(num_ctx: int, n: int, reply_reserve: int = 512) -> int:
+    """num_ctx 에서 시스템/지시문과 답변 몫을 빼고 대화 로그에 쓸 수 있는 토큰."""
+    fixed = estimate_tokens(system_message(n)) + estimate_tokens(user_prompt("", n)) + 16
+    return max(256, num_ctx - fixed - reply_reserve)
+
+def describe_window(w: Dict[str, Any]) -> str:
+    s = f"{w['format']} 형식 · 최근 {w['turns']:,}개 발화 (약 {w['tokens']:,} 토큰)"
+    if w["dropped_lines"]:
+        s += f" · 앞쪽 {w['dropped_lines']:,}줄(약 {w['dropped_tokens_est']:,} 토큰)은 컨텍스트에 안 들어가 생략"
+    return s
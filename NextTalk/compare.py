@@ -0,0 +1,195 @@
+# compare.py
+# 여러 모델 비교/벤치마크: 같은 프롬프트(정규화된 로그)를 고른 모델들에 동시에 보내고
+#   - 제안 (나란히 보기)
+#   - 로드 시간(load_duration) / 첫 토큰까지(TTFT) / 전체 / 생성 tok/s
+#   - 형식 준수: 정리 후 줄 수가 정확히 N 인지, 30자 내외(40자 이하)인지, <think> 노출량
+# 을 재고, 결과를 JSONL 벤치마크 파일에 한 줄씩 쌓아 모델을 시간에 따라 비교할 수 있게 한다.
+# ST.py 의 비교 모드와 아래 CLI 가 같은 함수를 쓴다 (Streamlit 없이 import 가능).
+# 실행 예 (NextTalk/ 에서):
+#   python compare.py --log chat.txt --models qwen3:8b,gemma3:4b,llama3.1:8b --repeat 3 --parallel 2
+#   python compare.py --history              # 쌓인 벤치마크 파일을 모델별로 요약
+# 비교 중에는 끝까지 생성한다 (조기 종료 없이 — 형식 준수와 전체 토큰을 재야 하므로).
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Any, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로
+from common.metrics import ollama_stats
+from common.transport import get_transport
+from chatlog import tail_window, log_budget
+from dialog import TOKEN_BASELINE, clean_model_output, split_suggestions, system_message, user_prompt
+
+# ST.py 상단 주석의 평가 대상 모델들
+KNOWN_MODELS = [
+    "qwen3:8b",
+    "qwen3_cpu:latest",
+    "smooth:latest",
+    "EEVE-Korean-10.8B:latest",
+    "hf.co/heegyu/EEVE-Korean-Instruct-10.8B-v1.0-GGUF:Q4_K_M",
+    "llama3.1:8b",
+    "gemma3:4b",
+]
+DEFAULT_BENCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_bench.jsonl")
+MAX_SUGGESTION_CHARS = 40   # 프롬프트의 '30자 내외' 허용 범위
+
+Slot = Optional[Callable[[str], ContextManager]]   # 모델 이름 → 컨텍스트 매니저
+
+# ================== 형식 준수 ==================
+def format_check(raw: str, n: int) -> Dict[str, Any]:
+    """정리한 출력의 줄 수가 정확히 n 인지, 너무 긴 제안이 몇 개인지."""
+    lines = split_suggestions(clean_model_output(raw.replace("\\n", "\n").strip()), 10 ** 6)
+    return {
+        "lines": len(lines),
+        "exact_n": len(lines) == n,
+        "long_lines": sum(len(ln) > MAX_SUGGESTION_CHARS for ln in lines[:n]),
+        "suggestions": lines[:n],
+    }
+
+# ================== 모델 하나 ==================
+def run_model(model: str, messages: List[Dict[str, str]], n: int, temperature: float, num_ctx: int,
+              keep_alive=None, slot: Slot = None) -> Dict[str, Any]:
+    """스트리밍으로 끝까지 받아 타이밍/토큰/형식을 잰다. 실패하면 error 만 채워 돌려준다."""
+    row: Dict[str, Any] = {"model": model, "ok": False, "error": None}
+    t0 = time.perf_counter()
+    try:
+        with (slot(model) if slot is not None else nullcontext()):
+            row["queue_s"] = round(time.perf_counter() - t0, 4)
+            t1 = time.perf_counter()
+            raw, ttft, final = [], None, None
+            for chunk in get_transport().chat(model=model, messages=messages, keep_alive=keep_alive, stream=True,
+                                              options={"temperature": float(temperature), "num_ctx": num_ctx}):
+                piece = chunk["message"]["content"]
+                if piece and ttft is None:
+                    ttft = time.perf_counter() - t1
+                raw.append(piece or "")
+                if chunk.get("done"):
+                    final = chunk
+            row["total_s"] = round(time.perf_counter() - t1, 4)
+        row["ttft_s"] = round(ttft, 4) if ttft is not None else None
+        text = "".join(raw)
+        row.update(format_check(text, n))
+        row["hidden_chars"] = len(text) - len(clean_model_output(text))
+        stats = ollama_stats(final)
+        for k in ("load_s", "prompt_eval_count", "eval_count", "prompt_tok_s", "gen_tok_s"):
+            row[k] = stats.get(k)
+        TOKEN_BASELINE.observe(model, n, stats.get("eval_count"))   # 끝까지 받은 요청이므로 조기 종료 기준에도 쓴다
+        row["ok"] = True
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+# ================== 여러 모델 동시에 ==================
+def compare_models(models: List[str], messages: List[Dict[str, str]], n: int, temperature: float, num_ctx: int,
+                   keep_alive=None, parallel: int = 2, slot: Slot = None,
+                   on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """models 를 최대 parallel 개씩 동시에 돌린다. 결과는 models 순서. on_result 는 끝나는 대로 불린다(호출 스레드에서)."""
+    results: Dict[int, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(models)))) as pool:
+        futures = {pool.submit(run_model, m, messages, n, temperature, num_ctx, keep_alive, slot): i
+                   for i, m in enumerate(models)}
+        for f in as_completed(futures):
+            results[futures[f]] = f.result()
+            if on_result is not None:
+                on_result(results[futures[f]])
+    return [results[i] for i in range(len(models))]
+
+# ================== 벤치마크 파일 ==================
+def log_fingerprint(norm_log: str) -> str:
+    return hashlib.sha256(norm_log.encode("utf-8")).hexdigest()[:12]
+
+def save_results(rows: List[Dict[str, Any]], path: str = DEFAULT_BENCH, **meta: Any) -> str:
+    """한 번의 비교(run)를 JSONL 로 덧붙인다. meta: n, temperature, num_ctx, log 등. run id 를 돌려준다."""
+    run = uuid.uuid4().hex[:8]
+    ts = round(time.time(), 3)
+    with open(path, "a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps({"ts": ts, "run": run, **meta, **r}, ensure_ascii=False) + "\n")
+    return run
+
+def load_results(path: str = DEFAULT_BENCH) -> Iterable[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _median(xs: List[float]) -> Optional[float]:
+    xs = [x for x in xs if x is not None]
+    return round(statistics.median(xs), 3) if xs else None
+
+def summarize_results(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """모델별 누적: 실행 수, 실패 수, 정확히 N줄 비율, 중앙값 로드/TTFT/전체/tok/s, 마지막 실행 시각."""
+    by_model: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_model.setdefault(r["model"], []).append(r)
+    out = []
+    for model, rs in by_model.items():
+        ok = [r for r in rs if r.get("ok")]
+        out.append({
+            "모델": model,
+            "실행": len(rs),
+            "실패": len(rs) - len(ok),
+            "N줄 정확": round(sum(r["exact_n"] for r in ok) / len(ok), 2) if ok else None,
+            "로드(s)": _median([r.get("load_s") for r in ok]),
+            "TTFT(s)": _median([r.get("ttft_s") for r in ok]),
+            "전체(s)": _median([r.get("total_s") for r in ok]),
+            "tok/s": _median([r.get("gen_tok_s") for r in ok]),
+            "마지막": time.strftime("%Y-%m-%d %H:%M", time.localtime(max(r["ts"] for r in rs))),
+        })
+    return sorted(out, key=lambda r: r["모델"])
+
+def result_row(r: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """비교 표 한 줄."""
+    if not r["ok"]:
+        return {"모델": r["model"], "오류": r["error"]}
+    return {"모델": r["model"], "로드(s)": r.get("load_s"), "TTFT(s)": r.get("ttft_s"), "전체(s)": r.get("total_s"),
+            "tok/s": r.get("gen_tok_s"), "생성 토큰": r.get("eval_count"), f"줄 수(목표 {n})": r["lines"],
+            "40자 초과": r["long_lines"], "숨긴 생각(자)": r["hidden_chars"]}
+
+# ================== CLI ==================
+def main():
+    ap = argparse.ArgumentParser(description="NextTalk 여러 모델 비교 벤치마크")
+    ap.add_argument("--log", default="", help="대화 로그 파일 (카카오톡/LINE 내보내기 또는 '이름: 내용')")
+    ap.add_argument("--models", default=",".join(KNOWN_MODELS), help="쉼표로 구분")
+    ap.add_argument("--n", type=int, default=3, help="제안 개수")
+    ap.add_argument("--temperature", type=float, default=0.7)
+    ap.add_argument("--num-ctx", type=int, default=4096)
+    ap.add_argument("--parallel", type=int, default=2, help="동시에 돌릴 모델 수")
+    ap.add_argument("--repeat", type=int, default=1, help="같은 비교를 몇 번 반복할지")
+    ap.add_argument("--keep-alive", default="30m")
+    ap.add_argument("--out", default=DEFAULT_BENCH, help="결과를 덧붙일 JSONL")
+    ap.add_argument("--history", action="store_true", help="--out 파일의 누적 결과만 요약해서 출력")
+    args = ap.parse_args()
+
+    if not args.history:
+        if not args.log:
+            ap.error("--log 가 필요해 (또는 --history)")
+        with open(args.log, encoding="utf-8") as f:
+            window = tail_window(f.read(), log_budget(args.num_ctx, args.n))
+        messages = [{"role": "system", "content": system_message(args.n)},
+                    {"role": "user", "content": user_prompt(window["text"], args.n)}]
+        models = [m.strip() for m in args.models.split(",") if m.strip()]
+        for i in range(args.repeat):
+            rows = compare_models(models, messages, args.n, args.temperature, args.num_ctx,
+                                  keep_alive=args.keep_alive, parallel=args.parallel)
+            run = save_results(rows, args.out, n=args.n, temperature=args.temperature, num_ctx=args.num_ctx,
+                               log=log_fingerprint(window["text"]), log_turns=window["turns"])
+            print(f"# run {run} ({i + 1}/{args.repeat})")
+            for r in rows:
+                print(json.dumps(result_row(r, args.n), ensure_ascii=False))
+    for r in summarize_results(load_results(args.out)):
+        print(json.dumps(r, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
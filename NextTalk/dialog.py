@@ -0,0 +1,259 @@
+# dialog.py
+# NextTalk 텍스트 처리: 대화 로그 정규화 / 모델 출력 정리 / 프롬프트 / 스트리밍 제안 파서 (Streamlit 없이 import 가능)
+# ST.py 는 입력마다 통째로 다시 실행되므로, 정규식과 프롬프트는 여기서 import 시 한 번만 만든다.
+
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# ================== 모델 출력 정리 ==================
+_THINK_BLOCK = re.compile(r'(?is)<\s*think\s*>.*?<\s*/\s*think\s*>')
+_THINK_LINE = re.compile(r'(?im)^\s*/\s*(?:no_)?think\s*$')
+_THINK_INLINE = re.compile(r'/\s*(?:no_)?think\b')
+_TOOL_CALL_BLOCK = re.compile(r'(?is)<\s*tool_call\s*>.*?<\s*/\s*tool_call\s*>')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+def clean_model_output(text: str) -> str:
+    """
+    모델이 reasoning(생각)이나 진단용 태그를 노출할 때를 대비해 안전하게 제거한다.
+    - <think> ... </think>
+    - /think, /no_think (단독 라인 or 문장 중 포함)
+    - <tool_call> ... </tool_call> (혹시 템플릿에 있을 때)
+    - 불필요한 마커 여백 정리
+    """
+    if not text:
+        return text
+
+    # 1) <think> 블록 제거 (개행 포함, 대/소문자 무시)
+    text = _THINK_BLOCK.sub('', text)
+
+    # 2) /think, /no_think 토큰 제거 (라인 단독/문장 내 둘 다 커버)
+    text = _THINK_LINE.sub('', text)    # 단독 라인
+    text = _THINK_INLINE.sub('', text)  # 문장 중 포함
+
+    # 3) (옵션) tool_call 블록 제거
+    text = _TOOL_CALL_BLOCK.sub('', text)
+
+    # 4) 남은 태그/마커 여백 정리
+    text = _BLANK_LINES.sub('\n\n', text).strip()
+    return text
+
+# ================== 로그 정규화 ==================
+# 위에서부터 먼저 맞는 패턴을 쓴다
+DIALOG_PATTERNS = (
+    re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*\[(?P<time>[^\]]*)\]\s*(?P<content>.+)\s*$'),  # [이름] [시간] 내용
+    re.compile(r'^\s*\[(?P<name>[^\]]+)\]\s*(?P<content>.+)\s*$'),                         # [이름] 내용
+    re.compile(r'^\s*(?P<name>[^:\-\[\]]+)\s*[:\-]\s*(?P<content>.+)\s*$'),               # 이름: 내용 / 이름 - 내용
+)
+_SPACES = re.compile(r'\s+')
+
+def normalize_line(line: str) -> str:
+    for p in DIALOG_PATTERNS:
+        m = p.match(line)
+        if m:
+            name = _SPACES.sub(' ', m.group('name').strip())
+            content = _SPACES.sub(' ', m.group('content').strip())
+            return f"{name} - {content}"
+    return _SPACES.sub(' ', line)
+
+# ✅ 로그를 "이름 - 내용"으로 정규화
+def normalize_dialog(text: str) -> str:
+    """
+    다음과 같은 흔한 패턴들을 '이름 - 내용'으로 통일:
+    1) [이름] [시간] 내용
+    2) [이름] 내용
+    3) 이름: 내용
+    4) 이름 - 내용
+    그 외 매치되지 않으면 공백 정리 후 원문 유지
+    """
+    return "\n".join(normalize_line(ln) for ln in (raw.strip() for raw in text.strip().splitlines()) if ln)
+
+# ================== 프롬프트 ==================
+@lru_cache(maxsize=None)
+def system_message(n: int) -> str:
+    return f"""
+너는 '대화 이어주기 코치'야. 항상 한국어 반말로 짧고 자연스럽게 제안해.
+출력 규칙:
+- 딱 {n}개 제안만.
+- 각 제안은 1문장, 30자 내외.
+"""
+
+def user_prompt(norm_log: str, n: int, background: str = "") -> str:
+    """background: 로그 창에 못 들어간 앞부분의 요약 (summarize.summarize_head)."""
+    earlier = f"\n[앞부분 대화 요약]\n{background}\n" if background else ""
+    return f"""
+이 대화에서 상대방과 대화를 자연스럽게 이어가기 위해, 다음에 어떤 말을 하면 좋을지 한국어로 추천해줘.
+{earlier}
+[대화 로그 시작]
+{norm_log}
+[대화 로그 끝]
+
+조건:
+- 반말, 공감, 가벼운 유머 허용
+- {n}개 제안, 각 1문장/30자 내외
+"""
+
+def split_suggestions(text: str, n: int) -> List[str]:
+    """정리된 출력에서 번호/글머리표를 떼고 최대 n줄."""
+    lines = [ln.strip(" -•0123456789.").strip() for ln in text.splitlines() if ln.strip()]
+    return lines[:n]
+
+# ================== 스트리밍 제안 파서 ==================
+# 조각(≈토큰)이 올 때마다:
+#   - <think>/<tool_call> 구간은 닫는 태그가 올 때까지 숨긴다 (태그가 조각 경계에 걸쳐 와도 됨)
+#   - 줄이 끝날 때마다 번호/글머리표를 떼어 제안 1개로 내보낸다 (빈 줄, /think 토큰은 버림)
+#   - n개가 차면 스트림을 닫는다 → 연결이 끊기면 Ollama 가 생성을 멈춘다
+_HIDDEN_OPEN = re.compile(r'<\s*(think|tool_call)\s*>', re.I)
+_HIDDEN_CLOSE = {k: re.compile(rf'<\s*/\s*{k}\s*>', re.I) for k in ("think", "tool_call")}
+_OPEN_TAGS = ("<think>", "<tool_call>")
+_TAG_MAX = 32   # 이보다 긴 '<...' 꼬리는 태그로 보지 않는다
+
+def _tag_prefix(s: str, tags: Iterable[str]) -> bool:
+    """s 가 (공백 무시하고) 태그의 앞부분일 수 있는지 — 다음 조각을 더 봐야 하는지."""
+    if len(s) > _TAG_MAX:
+        return False
+    t = _SPACES.sub('', s).lower()
+    return any(tag.startswith(t) for tag in tags)
+
+def suggestion_text(line: str) -> str:
+    """한 줄에서 /think 토큰과 번호/글머리표를 떼어낸 제안 (비-스트리밍 split_suggestions 와 같은 정리)."""
+    return _THINK_INLINE.sub('', line).strip().strip(" -•0123456789.").strip()
+
+class SuggestionStream:
+    def __init__(self, n: int):
+        self.n = n
+        self.suggestions: List[str] = []
+        self.tokens = 0                        # 받은 조각 수 (Ollama 스트림은 조각 ≈ 토큰)
+        self.hidden_chars = 0                  # 숨긴 <think>/<tool_call> 글자 수
+        self.final: Optional[Dict[str, Any]] = None   # done 조각 (끝까지 받았을 때만)
+        self.stopped_early = False
+        self._hiding: Optional[str] = None     # 지금 숨기는 중인 태그 이름
+        self._carry = ""                       # 태그 일부일 수 있어 보류한 꼬리
+        self._line = ""                        # 아직 줄바꿈이 안 온 보이는 텍스트
+
+    @property
+    def done(self) -> bool:
+        return len(self.suggestions) >= self.n
+
+    def feed(self, piece: str) -> List[str]:
+        """조각 하나를 먹이고 이번에 완성된 제안들을 돌려준다."""
+        buf, self._carry = self._carry + piece, ""
+        visible: List[str] = []
+        while buf:
+            if self._hiding is not None:
+                m = _HIDDEN_CLOSE[self._hiding].search(buf)
+                if m:
+                    self.hidden_chars += m.end()
+                    buf, self._hiding = buf[m.end():], None
+                    continue
+                cut = buf.rfind("<")
+                if cut != -1 and _tag_prefix(buf[cut:], (f"</{self._hiding}>",)):
+                    buf, self._carry = buf[:cut], buf[cut:]
+                self.hidden_chars += len(buf)
+                break
+            i = buf.find("<")
+            if i == -1:
+                visible.append(buf)
+                break
+            visible.append(buf[:i])
+            buf = buf[i:]
+            m = _HIDDEN_OPEN.match(buf)
+            if m:
+                self._hiding = m.group(1).lower()
+                self.hidden_chars += m.end()
+                buf = buf[m.end():]
+            elif _tag_prefix(buf, _OPEN_TAGS):
+                self._carry = buf
+                break
+            else:
+                visible.append("<")
+                buf = buf[1:]
+        return self._take_lines("".join(visible))
+
+    def finish(self) -> List[str]:
+        """스트림이 끝났을 때 남은 꼬리(마지막 줄)를 처리."""
+        if self._hiding is not None:
+            self.hidden_chars += len(self._carry)
+            tail = ""
+        else:
+            tail = self._carry
+        self._carry = ""
+        return self._take_lines(tail + "\n")
+
+    def _take_lines(self, text: str) -> List[str]:
+        # 모델이 줄바꿈을 "\\n" 글자로 내보내는 경우도 줄바꿈으로 (조각 경계에 걸쳐도 합친 뒤 바꾼다)
+        self._line = (self._line + text).replace("\\n", "\n")
+        *lines, self._line = self._line.split("\n")
+        out = []
+        for ln in lines:
+            sug = suggestion_text(ln)
+            if sug and not self.done:
+                self.suggestions.append(sug)
+                out.append(sug)
+        return out
+
+    def iter_suggestions(self, stream: Iterable[Any], early_stop: bool = True) -> Iterator[str]:
+        """chat(stream=True) 조각을 먹이며 완성된 제안을 yield. early_stop 이면 n개에서 스트림을 닫는다."""
+        try:
+            for chunk in stream:
+                if chunk.get("done"):
+                    self.final = chunk
+                piece = chunk["message"]["content"]
+                if piece:
+                    self.tokens += 1
+                yield from self.feed(piece or "")
+                if early_stop and self.done and self.final is None:
+                    self.stopped_early = True
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        yield from self.finish()
+
+# ================== 조기 종료로 아낀 토큰 추정 ==================
+# 중간에 끊은 요청은 끝까지 갔으면 몇 토큰이었을지 알 수 없으므로, (모델, 제안 수)별로
+# 끝까지 생성한 요청의 eval_count 이동 평균을 기준으로 삼는다.
+# 기준이 없거나 calibrate_every 번째 요청이면 끊지 않고 끝까지 받아 기준을 갱신한다.
+class TokenBaseline:
+    def __init__(self, calibrate_every: int = 10, alpha: float = 0.3):
+        self.calibrate_every = calibrate_every
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._full: Dict[Tuple[str, int], float] = {}
+        self._requests: Dict[Tuple[str, int], int] = {}
+        self._saved: Dict[Tuple[str, int], int] = {}
+
+    def should_calibrate(self, model: str, n: int) -> bool:
+        """이번 요청을 끝까지 받아 기준을 잴지. 호출할 때마다 요청 수를 센다."""
+        with self._lock:
+            k = (model, n)
+            i = self._requests.get(k, 0)
+            self._requests[k] = i + 1
+            return k not in self._full or (self.calibrate_every > 0 and i % self.calibrate_every == 0)
+
+    def observe(self, model: str, n: int, eval_count: Optional[int]):
+        if not eval_count:
+            return
+        with self._lock:
+            prev = self._full.get((model, n))
+            self._full[(model, n)] = eval_count if prev is None else prev + self.alpha * (eval_count - prev)
+
+    def saved(self, model: str, n: int, generated: int) -> Optional[int]:
+        """끝까지 갔을 때 대비 아낀 토큰 (기준이 없으면 None). 누적 합계에도 더한다."""
+        with self._lock:
+            full = self._full.get((model, n))
+            if full is None:
+                return None
+            est = max(0, int(round(full - generated)))
+            self._saved[(model, n)] = self._saved.get((model, n), 0) + est
+            return est
+
+    def summary(self, model: str, n: int) -> Dict[str, Any]:
+        with self._lock:
+            full = self._full.get((model, n))
+            return {"requests": self._requests.get((model, n), 0), "saved_total": self._saved.get((model, n), 0),
+                    "full_tokens": round(full, 1) if full is not None else None}
+
+TOKEN_BASELINE = TokenBaseline()
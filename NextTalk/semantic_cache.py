@@ -0,0 +1,239 @@
+# semantic_cache.py
+# 추천 결과 의미 캐시: 비슷한 대화 꼬리면 생성 없이 예전 제안을 바로 돌려준다 (Streamlit 없이 import 가능)
+# - 키 텍스트: 정규화된 로그의 마지막 K 발화 (로그 앞쪽을 조금 고치거나 흔한 스몰토크 꼬리가 같으면 같은 키로 모인다)
+# - 1단계: 키 텍스트의 sha256 이 같으면 임베딩도 없이 바로 적중
+# - 2단계: 로컬 Ollama 임베딩 모델로 벡터를 만들어 네임스페이스의 NumPy 행렬과 코사인 유사도 → threshold 이상이면 적중
+# - 네임스페이스: (추천 모델, temperature, 제안 개수, 임베딩 모델) — 다른 설정의 제안을 섞지 않는다
+# - 네임스페이스마다 capacity 개까지, 넘치면 가장 오래 안 쓴 항목(LRU) 자리에 덮어쓴다
+# - save()/load(): 벡터와 항목을 .npz 하나로 (pickle 없이)
+# - 임베딩 호출이 실패하면(모델 미설치 등) retry_s 동안 그 임베딩 모델은 건너뛴다 → 매 제출마다 실패 왕복을 하지 않음
+# 호출은 common.transport 를 거친다.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from common.resources import get_shared
+from common.transport import get_transport
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "semantic_cache.npz")
+DEFAULT_EMBED_MODEL = "bge-m3"     # 한국어를 잘 다루는 다국어 임베딩 (`ollama pull bge-m3`)
+
+def key_text(norm_log: str, k: int) -> str:
+    """정규화된 로그(이름 - 내용 줄들)의 마지막 k 발화."""
+    lines = [ln for ln in norm_log.splitlines() if ln.strip()]
+    return "\n".join(lines[-k:])
+
+def namespace(model: str, temperature: float, n: int, embed_model: str) -> str:
+    return f"{model}|t={float(temperature):.2f}|n={n}|{embed_model}"
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class _Index:
+    """네임스페이스 하나: 정규화된 벡터 행렬 + 항목 + 마지막 사용 시점."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vecs = np.zeros((min(capacity, 64), dim), dtype=np.float32)
+        self.used = np.zeros(len(self.vecs), dtype=np.int64)
+        self.items: List[Dict[str, Any]] = []       # {"sha", "suggestions"}
+        self.by_sha: Dict[str, int] = {}
+        self.capacity = capacity
+
+    @property
+    def size(self) -> int:
+        return len(self.items)
+
+    def search(self, q: np.ndarray):
+        if not self.items:
+            return -1, 0.0
+        sims = self.vecs[:self.size] @ q
+        i = int(np.argmax(sims))
+        return i, float(sims[i])
+
+    def add(self, sha: str, vec: np.ndarray, suggestions: List[str], tick: int) -> bool:
+        """항목을 넣는다. 자리가 없으면 LRU 자리에 덮어쓰고 True."""
+        evicted = False
+        if sha in self.by_sha:
+            i = self.by_sha[sha]
+        elif self.size < self.capacity:
+            i = self.size
+            if i >= len(self.vecs):   # 두 배씩 늘린다 (capacity 까지)
+                grow = min(self.capacity, 2 * len(self.vecs)) - len(self.vecs)
+                self.vecs = np.vstack([self.vecs, np.zeros((grow, self.vecs.shape[1]), dtype=np.float32)])
+                self.used = np.concatenate([self.used, np.zeros(grow, dtype=np.int64)])
+            self.items.append({})
+        else:
+            i = int(np.argmin(self.used[:self.size]))
+            del self.by_sha[self.items[i]["sha"]]
+            evicted = True
+        self.vecs[i] = vec
+        self.used[i] = tick
+        self.items[i] = {"sha": sha, "suggestions": list(suggestions)}
+        self.by_sha[sha] = i
+        return evicted
+
+class SemanticCache:
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, capacity: int = 2000, retry_s: float = 60.0):
+        self.path = path
+        self.capacity = capacity
+        self.retry_s = retry_s
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "puts": 0, "evictions": 0,
+                      "embed_calls": 0, "embed_errors": 0, "embed_s": 0.0}
+        self._ns: Dict[str, _Index] = {}
+        self._tick = 0
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+        self._embed_down: Dict[str, float] = {}      # 임베딩 모델 -> 다시 시도할 시각
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                self.load(path)
+            except Exception as e:     # 깨진 파일은 버리고 새로 시작
+                self.last_error = f"캐시 파일을 읽지 못함: {e}"
+
+    # ---------- 임베딩 ----------
+    def embed(self, text: str, embed_model: str) -> Optional[np.ndarray]:
+        """정규화된 벡터. 실패하면 None (retry_s 동안 같은 모델은 바로 None)."""
+        if self._embed_down.get(embed_model, 0.0) > time.monotonic():
+            return None
+        t0 = time.perf_counter()
+        try:
+            resp = get_transport().embed(model=embed_model, input=text)
+            vec = np.asarray((resp.get("embeddings") if hasattr(resp, "get") else resp.embeddings)[0], dtype=np.float32)
+        except Exception as e:
+            self.stats["embed_errors"] += 1
+            self.last_error = str(e)
+            self._embed_down[embed_model] = time.monotonic() + self.retry_s
+            return None
+        finally:
+            self.stats["embed_calls"] += 1
+            self.stats["embed_s"] += time.perf_counter() - t0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    # ---------- 조회/저장 ----------
+    def lookup(self, ns: str, text: str, embed_model: str, threshold: float) -> Dict[str, Any]:
+        """
+        반환: hit(bool), suggestions, similarity, exact(bool), vec(put 에 넘길 임베딩, 없을 수 있음)
+        적중하지 않으면 vec 를 그대로 put() 에 넘겨 임베딩을 두 번 하지 않는다.
+        """
+        sha = _sha(text)
+        with self._lock:
+            idx = self._ns.get(ns)
+            if idx is not None and sha in idx.by_sha:
+                i = idx.by_sha[sha]
+                self._tick += 1
+                idx.used[i] = self._tick
+                self.stats["exact_hits"] += 1
+                return {"hit": True, "exact": True, "similarity": 1.0, "vec": None,
+                        "suggestions": list(idx.items[i]["suggestions"])}
+        vec = self.embed(text, embed_model)   # 서버 왕복은 락 밖에서
+        best = None                             # 못 맞혀도 가장 가까운 유사도는 알려준다 (기준값 조정용)
+        with self._lock:
+            idx = self._ns.get(ns)
+            if vec is not None and idx is not None and idx.vecs.shape[1] == len(vec):
+                i, sim = idx.search(vec)
+                best = round(sim, 4) if i >= 0 else None
+                if i >= 0 and sim >= threshold:
+                    self._tick += 1
+                    idx.used[i] = self._tick
+                    self.stats["semantic_hits"] += 1
+                    return {"hit": True, "exact": False, "similarity": round(sim, 4), "vec": vec,
+                            "suggestions": list(idx.items[i]["suggestions"])}
+            self.stats["misses"] += 1
+            return {"hit": False, "exact": False, "similarity": best, "vec": vec, "suggestions": []}
+
+    def put(self, ns: str, text: str, suggestions: List[str], vec: Optional[np.ndarray] = None,
+            embed_model: str = DEFAULT_EMBED_MODEL):
+        if not suggestions:
+            return
+        if vec is None:
+            vec = self.embed(text, embed_model)
+            if vec is None:
+                return
+        with self._lock:
+            idx = self._ns.get(ns)
+            if idx is None or idx.vecs.shape[1] != len(vec):   # 임베딩 차원이 바뀌면(모델 교체) 새로 시작
+                idx = self._ns[ns] = _Index(len(vec), self.capacity)
+            self._tick += 1
+            if idx.add(_sha(text), vec, suggestions, self._tick):
+                self.stats["evictions"] += 1
+            self.stats["puts"] += 1
+            self._dirty += 1
+
+    # ---------- 디스크 ----------
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            arrays: Dict[str, np.ndarray] = {}
+            meta = {"tick": self._tick, "namespaces": []}
+            for j, (ns, idx) in enumerate(self._ns.items()):
+                arrays[f"vecs_{j}"] = idx.vecs[:idx.size].copy()   # 저장은 락 밖에서 하므로 복사본
+                arrays[f"used_{j}"] = idx.used[:idx.size].copy()
+                meta["namespaces"].append({"ns": ns, "items": idx.items})
+            arrays["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+            self._dirty = 0
+            self._saved_at = time.monotonic()
+        # 세션 여럿이 동시에 저장해도 서로의 임시 파일을 덮지 않도록 같은 디렉터리에 고유 임시 파일
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def maybe_save(self, every_puts: int = 20, every_s: float = 30.0):
+        """새 항목이 every_puts 개 쌓였거나 마지막 저장 후 every_s 초가 지났으면 저장."""
+        if self._dirty and (self._dirty >= every_puts or time.monotonic() - self._saved_at >= every_s):
+            self.save()
+
+    def load(self, path: str):
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            with self._lock:
+                self._ns.clear()
+                self._tick = int(meta["tick"])
+                for j, entry in enumerate(meta["namespaces"]):
+                    vecs, used = z[f"vecs_{j}"], z[f"used_{j}"]
+                    idx = _Index(vecs.shape[1], self.capacity)
+                    for i, item in enumerate(entry["items"][:self.capacity]):
+                        idx.add(item["sha"], vecs[i], item["suggestions"], int(used[i]))
+                    self._ns[entry["ns"]] = idx
+
+    # ---------- 지표 ----------
+    def hit_rate(self) -> float:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(idx.size for idx in self._ns.values())
+
+    def clear(self):
+        with self._lock:
+            self._ns.clear()
+            self._dirty += 1
+
+    def describe(self) -> str:
+        s = self.stats
+        lookups = s["exact_hits"] + s["semantic_hits"] + s["misses"]
+        if not lookups:
+            return f"의미 캐시: {self.size():,}개 저장됨"
+        return (f"의미 캐시 적중률 {self.hit_rate():.0%} (같은 꼬리 {s['exact_hits']} · 비슷한 꼬리 {s['semantic_hits']}"
+                f" · 실패 {s['misses']}) · {self.size():,}개 저장됨")
+
+def get_semantic_cache() -> SemanticCache:
+    return get_shared("semantic_cache", SemanticCache)
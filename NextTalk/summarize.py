@@ -0,0 +1,190 @@
+# summarize.py
+# 컨텍스트 창(chatlog.tail_window)에 못 들어간 앞부분을 청크별 map-reduce 로 요약한다 (Streamlit 없이 import 가능)
+# - 앞부분을 원문 기준 CHUNK_CHARS 단위 청크로 자른다. 경계는 항상 로그 맨 앞에서부터 같은 규칙으로 정하므로
+#   같은 로그에 대화를 덧붙여 다시 붙여넣으면 앞쪽 청크는 글자 하나 안 바뀐다 → 청크 요약은 내용 해시로 캐시
+# - map: 캐시에 없는 청크만 정규화 + 요약 (스레드 풀, 스케줄러 슬롯 안에서)
+# - reduce: REDUCE_FANOUT 개씩 묶어 합치는 트리. 묶음도 청크 번호로 고정해 두고 하위 요약들의 해시로 캐시
+#   → 덧붙인 뒤엔 새 청크와 그 위 묶음 몇 개만 다시 부른다
+# - 너무 긴 로그는 창 바로 앞의 max_chunks 개 청크만 요약하고, 그보다 앞은 건너뛴 줄 수만 알려준다
+# - 호출은 common.transport 를 거친다. 실패한 요약은 캐시하지 않고 빼고 합친다
+# ※ common/ 패키지를 쓰므로 호출 측에서 저장소 루트를 sys.path 에 넣어 둬야 한다.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Any, List, Optional, Tuple
+
+from chatlog import classify, estimate_tokens, tail_window
+from common.metrics import Trace
+from common.resources import get_shared
+from common.transport import get_transport
+from summary_cache import SummaryCache
+
+Slot = Optional[Callable[[], ContextManager]]
+
+CHUNK_CHARS = 3000          # 청크 하나의 원문 글자 수 (이 길이를 넘긴 줄의 끝에서 자름)
+MAX_CONT_LINES = 50         # 경계 뒤의 '이어지는 줄'(헤더 없는 줄)은 이만큼까지 같은 청크에 붙인다
+REDUCE_FANOUT = 8           # reduce 한 번에 합치는 요약 수
+SUMMARY_RESERVE = 400       # 합친 요약이 user_content 에서 차지할 토큰 (최근 창 예산에서 미리 뺀다)
+MAP_PREDICT = 200
+REDUCE_PREDICT = 320
+
+def get_cache() -> SummaryCache:
+    return get_shared("summary_cache", SummaryCache)
+
+def _enter(slot: Slot) -> ContextManager:
+    return slot() if slot is not None else nullcontext()
+
+# ================== 청크 나누기 ==================
+def split_chunks(text: str, end: int, chunk_chars: int = CHUNK_CHARS) -> List[Tuple[int, int]]:
+    """text[:end] 를 (시작, 끝) 원문 구간으로. 마지막 청크만 end 에서 잘린 '미완성' 청크일 수 있다."""
+    chunks: List[Tuple[int, int]] = []
+    pos = 0
+    while pos < end:
+        eol = text.find("\n", min(pos + chunk_chars, len(text)))
+        stop = len(text) if eol == -1 else eol + 1
+        # 여러 줄 메시지가 청크 사이에서 갈라지지 않도록 이어지는 줄까지 붙인다
+        for _ in range(MAX_CONT_LINES):
+            if stop >= end:
+                break
+            eol = text.find("\n", stop)
+            nxt = text[stop:len(text) if eol == -1 else eol].strip()
+            if not nxt or classify(nxt)[0] != "text":
+                break
+            stop = len(text) if eol == -1 else eol + 1
+        stop = min(stop, end)
+        chunks.append((pos, stop))
+        pos = stop
+    return chunks
+
+# ================== 프롬프트 ==================
+def map_prompt(norm_chunk: str) -> str:
+    return f"""다음은 긴 대화 로그의 일부야.
+누가 무슨 이야기를 했는지 사실(이름, 관심사, 약속, 감정 흐름) 위주로 3문장 이내 한국어 요약만 출력해.
+
+[대화 일부]
+{norm_chunk}
+"""
+
+def reduce_prompt(parts: List[str]) -> str:
+    joined = "\n".join(f"- {p}" for p in parts)
+    return f"""다음은 한 대화를 시간 순서대로 나눠 요약한 것들이야.
+하나로 합쳐 사실(이름, 관심사, 약속, 감정 흐름) 위주로 5문장 이내 한국어 요약만 출력해.
+
+[부분 요약]
+{joined}
+"""
+
+def _num_ctx(prompt: str, predict: int) -> int:
+    need = estimate_tokens(prompt) + predict + 64
+    ctx = 2048
+    while ctx < need and ctx < 32768:
+        ctx *= 2
+    return ctx
+
+def _call(prompt: str, model: str, predict: int, keep_alive, slot: Slot) -> Tuple[str, Any]:
+    with _enter(slot):
+        resp = get_transport().chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": 0.2, "num_predict": predict, "num_ctx": _num_ctx(prompt, predict)},
+            keep_alive=keep_alive,
+        )
+    return resp["message"]["content"].strip(), resp
+
+# ================== map-reduce ==================
+def summarize_head(text: str, end: int, model: str, cache: Optional[SummaryCache] = None,
+                   max_chunks: int = 16, keep_alive=None, slot: Slot = None, workers: int = 2,
+                   trace: Optional[Trace] = None) -> Dict[str, Any]:
+    """
+    text[:end](최근 창 앞부분)의 요약.
+    반환: summary(없으면 ""), chunks(요약에 쓴 청크 수), mapped / reduced(이번에 실제로 부른 횟수),
+          cached(캐시에서 가져온 청크 요약 수), failed, skipped_lines(max_chunks 밖이라 건너뛴 앞쪽 줄 수)
+    """
+    cache = cache if cache is not None else get_cache()
+    out = {"summary": "", "chunks": 0, "mapped": 0, "reduced": 0, "cached": 0, "failed": 0, "skipped_lines": 0}
+    if end <= 0 or not text[:end].strip() or not get_transport().available():
+        return out
+    spans = split_chunks(text, end)
+    first = max(0, len(spans) - max_chunks)
+    if first:
+        out["skipped_lines"] = text.count("\n", 0, spans[first][0])
+
+    # map: 캐시에 없는 청크만 (청크 번호는 로그 맨 앞 기준이라 덧붙여도 그대로)
+    level: List[Tuple[int, str]] = []
+    todo: List[Tuple[int, str, str]] = []          # (청크 번호, 키, 정규화된 청크)
+    for i in range(first, len(spans)):
+        raw = text[spans[i][0]:spans[i][1]]
+        if not raw.strip():
+            continue
+        key = cache.key("map", model, raw)
+        hit = cache.get(key)
+        if hit is not None:
+            level.append((i, hit))
+            out["cached"] += 1
+        else:
+            todo.append((i, key, tail_window(raw, 1 << 30)["text"]))
+
+    def run(prompt: str, predict: int):
+        try:
+            return _call(prompt, model, predict, keep_alive, slot)
+        except Exception:
+            return "", None
+
+    t0 = time.perf_counter()
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as pool:
+            results = list(pool.map(lambda job: run(map_prompt(job[2]), MAP_PREDICT), todo))
+        for (i, key, _), (summary, resp) in zip(todo, results):
+            if trace is not None and resp is not None:
+                trace.record_ollama("summary_map", resp)
+            if not summary:
+                out["failed"] += 1
+                continue
+            cache.put(key, summary)
+            level.append((i, summary))
+        out["mapped"] = len(todo)
+    if trace is not None:
+        trace.add("summary_map", time.perf_counter() - t0)
+    level.sort()
+    out["chunks"] = len(level)
+
+    # reduce: 번호 // FANOUT 으로 묶는다. 하나짜리 묶음은 그대로 올린다
+    t0 = time.perf_counter()
+    while len(level) > 1:
+        groups: Dict[int, List[str]] = {}
+        for i, s in level:
+            groups.setdefault(i // REDUCE_FANOUT, []).append(s)
+        nxt: List[Tuple[int, str]] = []
+        for g, parts in sorted(groups.items()):
+            if len(parts) == 1:
+                nxt.append((g, parts[0]))
+                continue
+            key = cache.key("reduce", model, parts)
+            merged = cache.get(key)
+            if merged is None:
+                merged, resp = run(reduce_prompt(parts), REDUCE_PREDICT)
+                out["reduced"] += 1
+                if trace is not None and resp is not None:
+                    trace.record_ollama("summary_reduce", resp)
+                if merged:
+                    cache.put(key, merged)
+                else:
+                    out["failed"] += 1
+                    merged = " ".join(parts)   # 합치기 실패: 이어 붙여서라도 올린다 (캐시는 안 함)
+            nxt.append((g, merged))
+        level = nxt
+    if trace is not None:
+        trace.add("summary_reduce", time.perf_counter() - t0)
+    out["summary"] = level[0][1] if level else ""
+    return out
+
+def describe_summary(s: Dict[str, Any]) -> str:
+    if not s["chunks"]:
+        return ""
+    msg = f"앞부분 {s['chunks']}개 청크 요약 (새로 요약 {s['mapped']}개 · 캐시 {s['cached']}개 · 합치기 {s['reduced']}회)"
+    if s["failed"]:
+        msg += f" · 실패 {s['failed']}개"
+    if s["skipped_lines"]:
+        msg += f" · 그보다 앞 {s['skipped_lines']:,}줄은 요약 안 함"
+    return msg
@@ -0,0 +1,20 @@
+# summary_cache.py
+# 앞부분 요약(map/reduce) 결과 2단 캐시 (common/tiered_cache.py 의 얇은 래퍼, SimTalk/eval_cache.py 와 같은 구조)
+# - 키: SUMMARY_VERSION/단계(map|reduce)/모델/원문 청크(또는 하위 요약들)의 sha256
+# - SUMMARY_VERSION(요약 프롬프트 버전)이 바뀌면 예전 레코드는 열 때 삭제
+# - 값은 요약 문자열 그대로. 실패한 호출은 넣지 않는다
+# ※ common/ 패키지를 쓰므로 호출 측에서 저장소 루트를 sys.path 에 넣어 둬야 한다.
+
+import os
+from typing import Optional
+
+from common.tiered_cache import TieredCache
+
+SUMMARY_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "summary_cache.sqlite3")
+
+class SummaryCache(TieredCache):
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, max_memory: int = 2048,
+                 max_disk: int = 50_000, ttl_s: float = 30 * 24 * 3600):
+        super().__init__(path, "summary_cache", SUMMARY_VERSION, max_memory=max_memory, max_disk=max_disk,
+                         ttl_s=ttl_s)
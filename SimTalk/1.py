@@ -2,105 +2,169 @@
 # 실행: streamlit run 1.py
 # 필요: pip install streamlit, 그리고 로컬에서 `ollama pull gemma3:4b` (또는 원하는 모델)
 
-import json
-import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Optional
 
 import streamlit as st
 
-# ================== 상황별 아이콘/타이틀(초기 설정) ==================
-SCENARIO_META = {
-    "소개팅":                           {"icon": "💘", "title": "Smooth Talk: 소개팅 시뮬레이터"},
-    "첫 만남(직장)":                    {"icon": "💼", "title": "Smooth Talk: 첫 만남(직장) 시뮬레이터"},
-    "동아리/동호회":                    {"icon": "🎯", "title": "Smooth Talk: 동아리/동호회 시뮬레이터"},
-    "친구의 친구 모임":                 {"icon": "👥", "title": "Smooth Talk: 친구의 친구 모임 시뮬레이터"},
-    "면접(캐주얼)":                     {"icon": "🧑‍💻", "title": "Smooth Talk: 면접(캐주얼) 시뮬레이터"},
-    "첫 만남 (카페)":                   {"icon": "☕", "title": "Smooth Talk: 카페 첫 만남"},
-    "첫 만남 (레스토랑/저녁 식사)":     {"icon": "🍽️", "title": "Smooth Talk: 저녁 식사 첫 만남"},
-    "첫 만남 (영화관/데이트 코스)":     {"icon": "🎬", "title": "Smooth Talk: 영화관 데이트"},
-    "첫 만남 (공원/야외 산책)":          {"icon": "🌿", "title": "Smooth Talk: 야외 산책 첫 만남"},
-}
-_DEFAULT_ICON = "💬"
-_DEFAULT_TITLE = "Smooth Talk: 시뮬레이터"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로
+from common.metrics import Trace, get_sink, trace_row
+from common.model_info import describe_model
+from common.resources import get_executor, get_model_info, get_scheduler, get_shared, get_warmer
+from common.scheduler import PRIORITY_NPC, describe_load
+from common.transport import describe_transport, get_transport
+from common.warmup import describe
+import engine
+from eval_cache import EvalCache
+from history import build_context, drop_folded, new_history_state
+from progress import get_progress_store, user_key
+from prompts import DEFAULT_ICON, DEFAULT_TITLE, DIFFICULTIES, SCENARIO_META, SCENARIOS, build_system_prompt, scenario_hint
+from session_store import SessionStore, TurnRecord, new_session_id
+from scoring import CASCADE_DEFAULTS, CASCADE_STATS, PARSE_STATS, describe_cascade, summarize_overall
 
 # set_page_config는 최상단 1회만!
-st.set_page_config(page_title=_DEFAULT_TITLE, page_icon=_DEFAULT_ICON)
+st.set_page_config(page_title=DEFAULT_TITLE, page_icon=DEFAULT_ICON)
 
 # ================== Ollama 체크 ==================
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except Exception:
+# OLLAMA_TRANSPORT=record|replay 로 호출을 기록/재생할 수 있다 (common/transport.py)
+TRANSPORT = get_transport()
+OLLAMA_AVAILABLE = TRANSPORT.available()
+if not OLLAMA_AVAILABLE:
     print("올라마없")
-    OLLAMA_AVAILABLE = False
 
 # ================== 사이드바 설정 ==================
 with st.sidebar:
     st.markdown("### ⚙️ 설정")
     MODEL = st.text_input("모델명 (Ollama)", value="gemma3:4b", help="예: gemma3:4b, llama3.1:8b, qwen2.5:7b 등")
+    KEEP_ALIVE = st.selectbox("모델 유지 시간 (keep_alive)", ["5m", "30m", "2h", -1], index=1,
+                              format_func=lambda v: "계속 유지" if v == -1 else v,
+                              help="마지막 요청 후 모델을 메모리에 남겨둘 시간")
     TEMP = st.slider("Temperature", 0.0, 1.5, 0.7, 0.1)
-    ROUNDS = st.slider("라운드 수", 3, 12, 6, 1)
-    DIFF = st.selectbox("난이도", ["쉬움", "보통", "어려움"], index=1)
-
-    SCENARIO = st.selectbox(
-        "상황",
-        [
-            "소개팅",
-            "첫 만남(직장)",
-            "동아리/동호회",
-            "친구의 친구 모임",
-            "면접(캐주얼)",
-            "첫 만남 (카페)",
-            "첫 만남 (레스토랑/저녁 식사)",
-            "첫 만남 (영화관/데이트 코스)",
-            "첫 만남 (공원/야외 산책)",
-        ],
-        index=0,
-    )
+    ROUNDS = st.slider("라운드 수", 3, 30, 6, 1)
+    DIFF = st.selectbox("난이도", DIFFICULTIES, index=1)
+
+    SCENARIO = st.selectbox("상황", SCENARIOS, index=0)
 
     EVAL_MODE = st.radio(
         "평가 엔진",
-        ["자동", "LLM", "휴리스틱"],
+        engine.EVAL_MODES,
         index=0,
-        help="자동: LLM 사용, 실패 시 휴리스틱"
+        help="자동: LLM 사용, 실패 시 휴리스틱 / 단계별: 휴리스틱 먼저, 점수가 경계 근처이거나 신호가 엇갈리거나 긴 발화일 때만 LLM"
+    )
+    EVAL_MODEL = st.text_input("평가 모델 (비우면 대화 모델)", value="",
+                               help="평가만 더 작은 모델로 돌리려면 입력 (예: gemma3:1b, qwen2.5:1.5b)").strip() or MODEL
+    CASCADE: Dict[str, Any] = dict(CASCADE_DEFAULTS)
+    if EVAL_MODE == "단계별":
+        CASCADE["margin"] = st.slider("승격 여유폭(점)", 0.0, 3.0, float(CASCADE_DEFAULTS["margin"]), 0.1,
+                                      help="휴리스틱 점수가 피드백 경계(7점, 레드플래그 4점)에서 이만큼 안쪽이면 LLM 으로 재평가")
+        CASCADE["long_chars"] = st.slider("긴 발화 기준(글자)", 40, 400, int(CASCADE_DEFAULTS["long_chars"]), 10)
+        CASCADE["audit_rate"] = st.slider("표본 재평가 비율", 0.0, 0.5, float(CASCADE_DEFAULTS["audit_rate"]), 0.05,
+                                          help="승격 안 된 턴 중 이 비율만큼도 LLM 으로 채점해 두 단계 일치율을 잰다")
+    EVAL_PREV_NPC = st.checkbox(
+        "직전 NPC 발화 기준으로 평가",
+        value=False,
+        help="평가가 이번 NPC 응답을 기다리지 않아 두 모델 호출이 동시에 진행됩니다."
     )
+    USE_EVAL_CACHE = st.checkbox("평가 캐시 사용", value=True, help="같은 발화/상대 발화/난이도/모델 평가는 저장된 결과 재사용")
+    CTX_BUDGET = st.slider(
+        "컨텍스트 예산(토큰)", 1024, 16384, 4096, 512,
+        help="시스템 프롬프트 + 최근 대화가 이 안에 들어가도록 하고, 밀려난 예전 턴은 요약으로 접습니다."
+    )
+    STREAM = st.toggle("NPC 응답 스트리밍", value=True, help="토큰이 생성되는 대로 말풍선에 바로 표시")
+    DEBUG_METRICS = st.toggle("턴별 계측 패널", value=False,
+                              help="단계별 지연(기록 정리/요약/NPC/평가/파싱/렌더링)과 Ollama 토큰 처리량을 표로 표시")
     st.caption("※ Ollama가 실행 중이어야 모델 대화/평가가 동작합니다.")
+    if describe_transport(TRANSPORT):
+        st.caption(describe_transport(TRANSPORT))
+
+# ================== 모델 워밍업 ==================
+# 워머/스케줄러/모델 정보 캐시는 common/resources.py 에 프로세스 공용으로 한 번만 만든다 (rerun 마다 재생성 X)
+if OLLAMA_AVAILABLE:
+    _warmer = get_warmer()
+    if _warmer.will_reload(MODEL):
+        st.sidebar.warning(f"`{MODEL}` 은(는) 아직 메모리에 없어 첫 응답 전에 로드 시간이 걸려요. 백그라운드에서 미리 올립니다.")
+    _warmer.warm(MODEL, keep_alive=KEEP_ALIVE)
+    st.sidebar.caption(f"모델 상태: {describe(_warmer.status(MODEL))}")
+    if EVAL_MODEL != MODEL and EVAL_MODE != "휴리스틱":
+        _warmer.warm(EVAL_MODEL, keep_alive=KEEP_ALIVE)
+        st.sidebar.caption(f"평가 모델 상태: {describe(_warmer.status(EVAL_MODEL))}")
+
+# 모델 메타데이터(컨텍스트 길이 등): show() 결과를 TTL 캐시해 rerun 마다 서버에 묻지 않는다
+if OLLAMA_AVAILABLE:
+    _info = get_model_info().get(MODEL)
+    if describe_model(_info):
+        st.sidebar.caption(f"모델 정보: {describe_model(_info)}")
+    if _info.get("context_length") and CTX_BUDGET > _info["context_length"]:
+        st.sidebar.warning(f"컨텍스트 예산({CTX_BUDGET})이 모델 최대 길이({_info['context_length']})보다 커요.")
+
+# ================== 요청 스케줄러 ==================
+# 모든 세션의 Ollama 호출이 하나의 서버를 나눠 쓰므로, NPC 응답이 평가 뒤에 줄 서지 않도록 슬롯을 받아서 호출
+def _session_id() -> str:
+    return st.session_state.get("sid", "")
 
 # 상황별 타이틀/아이콘 적용
-_meta = SCENARIO_META.get(SCENARIO, {"icon": _DEFAULT_ICON, "title": _DEFAULT_TITLE})
+_meta = SCENARIO_META.get(SCENARIO, {"icon": DEFAULT_ICON, "title": DEFAULT_TITLE})
 st.title(f"{_meta['icon']} {_meta['title']}")
 st.caption("상황을 선택하고 프로필을 입력하면, 해당 상황에 맞는 톤과 맥락으로 시뮬레이션이 진행됩니다.")
 
 # ================== 세션 상태 ==================
+# 턴 기록/점수는 sessions/<sid>.jsonl 에 append 하고, 메모리에는 시스템 프롬프트 + 요약 안 된 최근 창만 둔다.
+# sid 는 URL(?sid=...)에 남겨 새로고침/서버 재시작 뒤에도 이어서 진행.
 def init_state():
     st.session_state.messages: List[Dict[str, str]] = []
     st.session_state.turn = 0
     st.session_state.max_rounds = ROUNDS
-    st.session_state.scores: List[Dict[str, Any]] = []
     st.session_state.summary = None
     st.session_state.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     st.session_state.finished = False
+    st.session_state.history = new_history_state()
+    st.session_state.store = None   # 첫 메시지에서 생성 (프로필 입력 후)
+    st.session_state.sid = new_session_id()
+    st.query_params["sid"] = st.session_state.sid
     if "profile" not in st.session_state:
         st.session_state.profile = {}
 
-if ("messages" not in st.session_state) or st.sidebar.button("🔄 새 시뮬레이션 시작", use_container_width=True):
+def resume_state(store: SessionStore):
+    rs = store.resume_state()
     init_state()
+    st.session_state.sid = store.header()["id"]
+    st.query_params["sid"] = st.session_state.sid
+    st.session_state.store = store
+    st.session_state.messages = [{"role": "system", "content": rs["system"]}] + rs["messages"]
+    st.session_state.turn = rs["turn"]
+    st.session_state.max_rounds = rs["meta"].get("rounds", ROUNDS)
+    st.session_state.started_at = rs["meta"].get("started_at", st.session_state.started_at)
+    st.session_state.finished = rs["finished"]
+    st.session_state.summary = rs["summary"]
+    st.session_state.history = rs["history"]
+    st.session_state.profile = rs["profile"]
+
+def session_meta() -> Dict[str, Any]:
+    return {
+        "started_at": st.session_state.started_at,
+        "model": MODEL,
+        "temperature": float(TEMP),
+        "rounds": st.session_state.max_rounds,
+        "difficulty": DIFF,
+        "scenario": SCENARIO,
+        "eval_mode": EVAL_MODE,
+        "eval_model": EVAL_MODEL,
+    }
 
-export = st.sidebar.button("💾 기록 내보내기 (JSON)", use_container_width=True)
+if st.sidebar.button("🔄 새 시뮬레이션 시작", use_container_width=True):
+    init_state()
+elif "messages" not in st.session_state:
+    _store = SessionStore.open(st.query_params.get("sid", ""))
+    if _store is not None:
+        resume_state(_store)
+    else:
+        init_state()
 
-# ================== 시나리오 힌트 ==================
-def scenario_hint(s: str) -> str:
-    if s == "소개팅": return "가볍게 서로를 탐색, 예의 바르고 부담 적게."
-    if s == "첫 만남(직장)": return "정중·차분, 업무/업무외 밸런스. 사생활 과도 침투 금지."
-    if s == "동아리/동호회": return "공통 취미 중심으로 라포 형성, 활동 경험 공유."
-    if s == "친구의 친구 모임": return "공통분모(공통친구)로 안전한 주제 확장."
-    if s == "면접(캐주얼)": return "라이트톤 + 전문성, 구체 사례 위주. 공격적 질문 지양."
-    if "카페" in s: return "첫 만남 특유의 가벼운 탐색, 취향·일상 질문 위주."
-    if "레스토랑" in s: return "정중하고 차분한 톤, 감정·가치관 질문 1개 포함."
-    if "영화관" in s: return "경험 공유와 감상 질문 1개 포함."
-    if "산책" in s: return "자연스러운 관찰 코멘트 + 가벼운 질문."
-    return ""
+export = st.sidebar.button("💾 기록 내보내기 (JSON)", use_container_width=True)
 
 # ================== 상황별 프로필 입력(심플) ==================
 with st.expander("🧾 상황별 프로필", expanded=False):
@@ -151,320 +215,92 @@ with st.expander("🧾 상황별 프로필", expanded=False):
         st.caption(f"시나리오 힌트: {scenario_hint(SCENARIO)}")
 
 # ================== 시스템 프롬프트 ==================
-def profile_summary_kr(profile: Dict[str, Any]) -> str:
-    parts = []
-    if profile.get("내 이름"): parts.append(f"내 이름: {profile['내 이름']}")
-    if profile.get("상대 이름"): parts.append(f"상대 이름: {profile['상대 이름']}")
-    if profile.get("_관심사_list"): parts.append(f"관심사: {', '.join(profile['_관심사_list'])}")
-    if profile.get("팀"): parts.append(f"팀/파트: {profile['팀']}")
-    if profile.get("역할"): parts.append(f"역할: {profile['역할']}")
-    if profile.get("동아리"): parts.append(f"동아리: {profile['동아리']}")
-    if profile.get("공통 친구"): parts.append(f"공통 친구: {profile['공통 친구']}")
-    if profile.get("기술스택"): parts.append(f"기술스택: {profile['기술스택']}")
-    return " · ".join(parts) if parts else "추가 프로필 없음"
-
-def build_system_prompt():
-    prof = st.session_state.get("profile", {})
-    ctx = profile_summary_kr(prof)
-    return f"""You are a Korean-speaking NPC for a conversation simulator.
-
-- Role: 상대역(NPC)로 자연스럽게 대화한다. 사용자는 '{prof.get('내 이름') or '사용자'}'.
-- Style: 공손하고 따뜻하며, 솔직하고 유머는 가볍게.
-- Length: 2~4문장 위주로 답하고, 마지막에 짧은 질문 1개를 덧붙인다.
-- Avoid: 장문 독백, 과도한 칭찬/사담, 모호한 답변, 신상침해성 요구.
-- Boundaries: 과한 신체/사생활 침해성 질문은 부드럽게 선 긋기.
-- Scenario: {SCENARIO} — Hint: {scenario_hint(SCENARIO)}
-- Difficulty: {DIFF} (난이도가 높을수록 말을 아끼고, 되묻거나 작은 테스트 질문을 섞는다)
-- Politeness: 존댓말 사용을 권장한다. 예의 없는 반말/명령형/호칭 무시는 사용자 평가의 '정중함'에서 감점 요인이다.
-- Context Summary: {ctx}
-- Language: 한국어만 사용한다.
-"""
-
 def ensure_system_message():
-    sys_prompt = build_system_prompt()
+    sys_prompt = build_system_prompt(st.session_state.get("profile", {}), SCENARIO, DIFF)
     if not any(m.get("role") == "system" for m in st.session_state.messages):
         st.session_state.messages.insert(0, {"role": "system", "content": sys_prompt})
     else:
         if st.session_state.messages[0]["content"] != sys_prompt:
             st.session_state.messages[0]["content"] = sys_prompt
+            if st.session_state.get("store") is not None:
+                st.session_state.store.set_system(sys_prompt)
 
 ensure_system_message()
 
 # ================== NPC 응답 생성 ==================
-def npc_reply(messages: List[Dict[str, str]]) -> str:
-    if not OLLAMA_AVAILABLE:
-        return "저는 시뮬레이터 NPC예요. (Ollama 미동작) — 요즘 어떤 취미 즐기세요?"
-
-    try:
-        resp = ollama.chat(
-            model=MODEL,
-            messages=messages,
-            options={"temperature": float(TEMP)},
-        )
-        return resp["message"]["content"].strip()
-    except Exception as e:
-        hint = f"모델이 로컬에 없을 수 있어요. 터미널에서 `ollama pull {MODEL}` 후 다시 시도해보세요."
-        return f"(모델 오류) 간단히 이어갈게요. 요즘 어떻게 지내셨어요?\n\n— 에러: {e}\n— 힌트: {hint}"
+# 실제 호출은 engine.py, 여기서는 사이드바 설정값과 이 세션의 스케줄러 슬롯만 묶어 준다
+def _npc_slot():
+    return get_scheduler().slot(_session_id(), PRIORITY_NPC)
+
+def npc_reply(messages: List[Dict[str, str]], num_ctx: Optional[int] = None,
+              timing: Optional[Dict[str, Any]] = None, trace: Optional[Trace] = None) -> str:
+    return engine.npc_reply(messages, MODEL, TEMP, num_ctx=num_ctx, keep_alive=KEEP_ALIVE,
+                            timing=timing, slot=_npc_slot, trace=trace)
+
+def npc_reply_stream(messages: List[Dict[str, str]], timing: Dict[str, Any],
+                     num_ctx: Optional[int] = None, trace: Optional[Trace] = None) -> Iterator[str]:
+    return engine.npc_reply_stream(messages, MODEL, TEMP, timing, num_ctx=num_ctx,
+                                   keep_alive=KEEP_ALIVE, slot=_npc_slot, trace=trace)
+
+# ================== 대화 기록 예산 관리 ==================
+def summarize_history(prev_summary: str, new_msgs: List[Dict[str, str]], trace: Optional[Trace] = None) -> str:
+    # NPC 응답 직전에 동기로 도는 작업이라 NPC 와 같은 우선순위
+    return engine.summarize_history(prev_summary, new_msgs, MODEL, keep_alive=KEEP_ALIVE, slot=_npc_slot,
+                                    trace=trace)
+
+def build_npc_context(trace: Optional[Trace] = None):
+    state = st.session_state.setdefault("history", new_history_state())
+    return build_context(st.session_state.messages, state, budget_tokens=CTX_BUDGET,
+                         summarize=lambda prev, new: summarize_history(prev, new, trace))
 
 # ================== 평가 로직(반말/무례 톤 페널티 강화) ==================
-RUBRIC = {
-    "공감": 0.25,
-    "호기심": 0.20,
-    "명료성": 0.20,
-    "정중함": 0.20,
-    "레드플래그": 0.15
-}
-
-def build_eval_prompt(user_msg: str, npc_msg: str, difficulty: str) -> str:
-    return f"""너는 소개팅/사회적 대화 코치야. 아래 '평가대상' 발화만 평가해.
-오직 평가대상의 문장만 점수화하고 피드백을 작성해.
-'상대 발화'는 맥락 참고용일 뿐이고, 강점/개선/팁에 인용하거나 근거로 사용하지 마.
-
-[평가대상] 나(사용자)
-
-[평가대상 발화]
-{user_msg}
-
-[상대 발화(참고용, 인용 금지)]
-{npc_msg}
-
-[평가 기준]
-- 공감(0~10): 상대의 감정/내용을 이해하고 반영했는가?
-- 호기심(0~10): 자연스러운 관심 질문이 있는가?
-- 명료성(0~10): 구체적이고 분명한가?
-- 정중함(0~10): 예의를 갖추었는가? (반말/명령형/호칭 무시/무례어/비격식 강한 슬랭 사용 시 크게 감점)
-- 레드플래그(0~10): 무례/과몰입/사생활침해/거짓말/셀프디스 등(높을수록 나쁨)
-
-[난이도]
-{difficulty}
-
-[출력 형식(JSON strict)]
-{{
-  "scores": {{
-    "공감": 0-10,
-    "호기심": 0-10,
-    "명료성": 0-10,
-    "정중함": 0-10,
-    "레드플래그": 0-10
-  }},
-  "feedback": {{
-    "strengths": ["짧은 문장", "최대 3개"],
-    "improvements": ["짧은 문장", "최대 3개"],
-    "tip": "다음 턴에 바로 쓸 한 문장 코칭"
-  }}
-}}
-반드시 유효한 JSON만 출력해. 주석/설명/추가 텍스트 금지.
-"""
-
-def safe_json_parse(text: str) -> Dict[str, Any]:
-    cleaned = re.sub(r"```json|```", "", text).strip()
-    try:
-        return json.loads(cleaned)
-    except Exception:
-        cleaned = re.sub(r"(\d+)\s*-\s*10", "10", cleaned)
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
-
-def heuristic_evaluate(user_msg: str) -> Dict[str, Any]:
-    txt = (user_msg or "").strip()
-    low = txt.lower()
-
-    tokens = re.findall(r"[가-힣A-Za-z0-9]+", low)
-    n_tokens = len(tokens)
-    n_chars = len(txt)
-
-    n_q = txt.count("?")
-    n_exc = txt.count("!")
-    n_ellipsis = txt.count("…") + txt.count("...")
-
-    cap_tokens = [t for t in re.findall(r"[A-Za-z]+", txt) if len(t) >= 3]
-    all_caps_ratio = (len([t for t in cap_tokens if t.isupper()]) / len(cap_tokens)) if cap_tokens else 0.0
-
-    emoji_like = bool(re.search(r"[😊😂🤣😍😘🥰🙌👍✨❤💕💘😉😅🙏]|[^\w\s][\)D]|[~]{2,}", txt))
-
-    is_very_short = n_chars < 8
-    is_long = n_chars > 120
-    has_sentences = len(re.split(r"[.!?？！。…]+", txt)) >= 2
-
-    softeners = ["혹시", "괜찮다면", "실례지만", "가능할까요", "바쁘시면", "천천히", "부탁", "고맙", "감사", "죄송", "미안"]
-    empathy_pos = ["좋", "재밌", "대단", "멋지", "축하", "응원", "이해", "그렇군", "알겠", "수고", "고생"]
-    empathy_reflect = ["말씀", "얘기", "이야기", "포인트", "공감", "맞아요", "맞다", "그렇죠"]
-
-    curiosity_words = ["왜", "언제", "어디", "무엇", "무슨", "어떤", "어떻게", "어때", "가능할까요", "물어봐도"]
-    question_suffix = bool(re.search(r"(나요|니요|죠\?|지요\?)$", low))
-
-    boundary_bad = ["카톡아이디", "카카오톡", "집주소", "만나자지금", "지금만나", "번호줘", "연락처줘", "숙소", "방잡", "술자리 강요"]
-    red_flags = ["싫", "꺼져", "닥쳐", "미친", "뭐래", "멍청", "병신", "야 ", "돈자랑"]
-
-    # ---------- 반말/무례 톤 감지(정중함 감점용) ----------
-    honorific_markers = ["요", "입니다", "합니다", "하세요", "십시오", "합니까", "해요", "드립니다"]
-    honorific_hits = sum(1 for m in honorific_markers if m in txt)
-
-    banmal_patterns = [
-        r"[가-힣A-Za-z0-9]+다$", r"[가-힣]+해$", r"[가-힣]+해\?", r"[가-힣]+해라$", r"[가-힣]+해봐$",
-        r"[가-힣]+해줘$", r"[가-힣]+해줄래", r"[가-힣]+냐\?$", r"[가-힣]+니\?$", r"[가-힣]+해라\?$",
-        r".*빨리.*", r".*지금.*해$", r".*와라$", r".*보자$"
-    ]
-    banmal_hit = any(re.search(p, txt) for p in banmal_patterns)
-
-    # ✅ '야' 단독/변형(야?, 야!! 등) 강력 감지 + 문장 내 포함 케이스
-    rude_vocative_regex = r"^\s*야+[!?.]?\s*$"
-    rude_vocatives_inline = ["야 ", "야,", "야?", "야!"]
-    rude_vocative_hit = bool(re.search(rude_vocative_regex, txt)) or any(rv in txt for rv in rude_vocatives_inline)
-
-    # ---------- 점수 산정 ----------
-    def clamp01(x): return max(0.0, min(1.0, x))
-    def to10(x): return round(10 * clamp01(x), 1)
-
-    # 공감
-    emp_score = 0.0
-    emp_score += 0.6 * sum(1 for k in empathy_pos if k in low)
-    emp_score += 0.7 * sum(1 for k in empathy_reflect if k in low)
-    emp_score += 0.5 * sum(1 for k in softeners if k in low)
-    emp_score += 0.4 if emoji_like else 0.0
-    emp_score -= 0.2 * max(0, n_exc - 2)
-
-    # 호기심
-    cur_score = 0.0
-    cur_score += 0.9 if n_q >= 1 else 0.0
-    cur_score += 0.6 * sum(1 for k in curiosity_words if k in low)
-    cur_score += 0.6 if question_suffix else 0.0
-    cur_score -= 0.2 * max(0, n_q - 2)
-
-    # 명료성
-    cla_score = 0.0
-    if is_very_short: cla_score += 0.3
-    elif is_long:     cla_score += 0.6
-    else:             cla_score += 1.0
-    cla_score += 0.4 if has_sentences else 0.0
-    cla_score -= 0.3 * (1 if n_ellipsis >= 1 else 0)
-    cla_score -= 0.3 * max(0, n_exc - 1)
-    cla_score -= 1.0 * clamp01(all_caps_ratio)
-
-    # 정중함 (기본치)
-    polite_score = 1.5
-    polite_score += 0.2 * sum(1 for k in softeners if k in low)
-    polite_score -= 1.2 * sum(1 for k in boundary_bad if k in low)
-    if re.search(r"(지금|바로|당장).*(만나|오|보자)", low): polite_score -= 1.0
-    if re.search(r"(우리집|내방|호텔|모텔)", low):          polite_score -= 1.0
-
-    # ✅ 정중함 페널티 강화
-    if rude_vocative_hit:
-        polite_score -= 1.5            # '야' 단독 등 강한 감점
-    if banmal_hit:
-        polite_score -= 1.2
-    if honorific_hits == 0 and n_chars <= 3:
-        polite_score -= 0.9            # 아주 짧은 반말/명령형
-    if honorific_hits == 0 and n_chars >= 8:
-        polite_score -= 0.6            # 평문인데 존댓말 흔적 전무
-
-    # 레드플래그
-    red_score = 0.0
-    red_score += 1.5 * sum(1 for k in red_flags if k in low)
-    red_score += 0.8 * max(0, n_exc - 2)
-    red_score += 1.0 * clamp01(all_caps_ratio * 2)
-
-    emp = to10(emp_score / 4.0)
-    cur = to10(cur_score / 3.0)
-    cla = to10(cla_score / 2.2)
-    polite = to10(polite_score / 2.0)
-    red = to10(red_score / 4.0)
-
-    scores = {"공감": emp, "호기심": cur, "명료성": cla, "정중함": polite, "레드플래그": red}
-
-    strengths, improvements = [], []
-    if emp >= 7: strengths.append("상대의 포인트를 인정·반영하는 표현이 좋아요.")
-    if cur >= 7: strengths.append("대화를 확장하는 질문이 자연스럽습니다.")
-    if cla >= 7: strengths.append("문장이 간결하고 읽기 쉬워요.")
-    if polite >= 7: strengths.append("존중감 있는 어투로 예의를 잘 지켰어요.")
-
-    if emp < 7:
-        improvements.append("공감 1구(“말씀 듣고 보니 공감돼요”) 후 관련 질문 1개로 이어보세요.")
-    if cur < 7:
-        improvements.append("문장 끝에 구체 질문 1개만 덧붙여 대화를 확장해 보세요.")
-    if cla < 7:
-        if is_long and not has_sentences:
-            improvements.append("길다면 문장을 나누고 생략부호/느낌표를 줄여 가독성을 높이세요.")
-        elif is_very_short:
-            improvements.append("핵심 정보(언제/어디/무엇)를 1–2개만 보강해 주세요.")
-        else:
-            improvements.append("짧은 문장 1–2개로 정리하고 생략부호/느낌표를 줄여보세요.")
-    if polite < 7:
-        improvements.append("존댓말(요/습니다)과 완곡한 표현을 사용해 톤을 부드럽게 해보세요.")
-        if rude_vocative_hit or banmal_hit or honorific_hits == 0:
-            improvements.append("반말/명령형을 피하고 “혹시…”, “괜찮으시면…” 같은 완곡어를 활용하세요.")
-    if red >= 4:
-        improvements.append("강한 단어·올캡·느낌표 남용을 피하고 톤을 부드럽게 하세요.")
-
-    candidates = [t for t in tokens if 2 <= len(t) <= 10]
-    keyword = candidates[0] if candidates else "이야기"
-    tip = f"'{keyword}'를 받아 한 문장으로: 공감 1구 → 존댓말 질문 1개."
-    rewrite_example = f"“{keyword}” 말씀 공감돼요. 혹시 {keyword}에서 가장 좋았던 점은 무엇이었나요?"
+def get_eval_cache() -> EvalCache:
+    # 워머/스케줄러처럼 common/resources.py 에 프로세스 공용으로 하나만
+    return get_shared("simtalk.eval_cache", EvalCache)
+
+def evaluate_turn(user_msg: str, npc_msg: str, difficulty: str, session: str = "",
+                  trace: Optional[Trace] = None) -> Dict[str, Any]:
+    # 스레드 풀에서 돌기 때문에 session_state 대신 세션 id 를 인자로 받는다 (trace 도 이 평가 전용)
+    cache = get_eval_cache() if USE_EVAL_CACHE else None
+    return engine.evaluate_turn(user_msg, npc_msg, difficulty, EVAL_MODEL, EVAL_MODE, cache=cache,
+                                keep_alive=KEEP_ALIVE, scheduler=get_scheduler(), session=session, trace=trace,
+                                cascade=CASCADE)
+
+if EVAL_MODE != "휴리스틱":
+    _ps = PARSE_STATS.get(EVAL_MODEL)
+    st.sidebar.caption(
+        f"평가 출력 파싱({EVAL_MODEL}): 정상 {_ps['ok']} · 복구 {_ps['repaired']} · 실패 {_ps['failed']}"
+        f" · 재호출 {_ps['recalls']} · 휴리스틱 대체 {_ps['fallbacks']}"
+    )
 
-    return {
-        "scores": scores,
-        "feedback": {
-            "strengths": strengths[:3],
-            "improvements": improvements[:3],
-            "tip": tip,
-            "rewrite_example": rewrite_example,
-        },
-        "signals": {},
-    }
+if EVAL_MODE == "단계별":
+    st.sidebar.caption(f"단계별 평가({EVAL_MODEL}): {describe_cascade(CASCADE_STATS.summary(EVAL_MODEL))}")
 
-def weighted_total(scores: Dict[str, float]) -> float:
-    total = 0.0
-    for k, w in RUBRIC.items():
-        val = scores.get(k, 0)
-        if k == "레드플래그":
-            val = 10 - val
-        total += val * w
-    return round(total, 2)
-
-def evaluate_turn(user_msg: str, npc_msg: str, difficulty: str) -> Dict[str, Any]:
-    use_llm = (EVAL_MODE == "LLM") or (EVAL_MODE == "자동" and OLLAMA_AVAILABLE)
-    if use_llm:
-        try:
-            prompt = build_eval_prompt(user_msg, npc_msg, difficulty)
-            resp = ollama.chat(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                options={"temperature": 0.2},
-            )
-            data = safe_json_parse(resp["message"]["content"])
-            if "scores" in data and all(k in data["scores"] for k in RUBRIC.keys()):
-                data["total"] = weighted_total(data["scores"])
-                data["__eval_target"] = "나(사용자)"
-                data["__evaluated_text"] = user_msg
-                data["__engine"] = "LLM"
-                return data
-        except Exception:
-            pass
-
-    data = heuristic_evaluate(user_msg)
-    data["total"] = weighted_total(data["scores"])
-    data["__eval_target"] = "나(사용자)"
-    data["__evaluated_text"] = user_msg
-    data["__engine"] = "휴리스틱"
-    return data
-
-def summarize_overall(score_list: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not score_list:
-        return {"avg_total": 0.0, "strengths": [], "improvements": [], "tip": ""}
-    avg_total = round(sum(d["total"] for d in score_list) / len(score_list), 2)
-    strengths, improvements = [], []
-    for d in score_list:
-        strengths += d.get("feedback", {}).get("strengths", [])
-        improvements += d.get("feedback", {}).get("improvements", [])
-    strengths = list(dict.fromkeys(strengths))[:3]
-    improvements = list(dict.fromkeys(improvements))[:3]
-    tip = "상대의 마지막 문장에서 키워드 1개를 골라 공감 + 존댓말 질문으로 이어가세요."
-    return {"avg_total": avg_total, "strengths": strengths, "improvements": improvements, "tip": tip}
+if OLLAMA_AVAILABLE:
+    st.sidebar.caption(describe_load(get_scheduler().snapshot()))
+
+if USE_EVAL_CACHE:
+    _cs = get_eval_cache().stats
+    st.sidebar.caption(
+        f"평가 캐시 적중률 {get_eval_cache().hit_rate():.0%} "
+        f"(메모리 {_cs['memory_hits']} · 디스크 {_cs['disk_hits']} · 미스 {_cs['misses']})"
+    )
 
 # ================== 채팅 표시 ==================
 def render_chat():
+    # 지난 턴은 디스크 로그에서 읽어 그린다. 메모리에는 최근 CHAT_TAIL 쌍만 두고 (새로 붙은 줄만 읽음),
+    # 그 앞 대화는 펼쳤을 때만 로그에서 흘려 읽는다 (모델 메모리는 최근 창만)
+    store = st.session_state.get("store")
+    if store is not None:
+        skipped, pairs = store.chat_tail()
+        if skipped and st.toggle(f"이전 대화 {skipped}턴 더 보기", key="show_full_chat"):
+            pairs = ((tr.user, tr.npc) for tr in store.iter_turns())
+        for user, npc in pairs:
+            with st.chat_message("user"):
+                st.markdown(user)
+            with st.chat_message("assistant"):
+                st.markdown(npc)
+        return
     for m in st.session_state.messages:
         if m["role"] == "system":
             continue
@@ -475,28 +311,12 @@ render_chat()
 user_input = st.chat_input("메시지를 입력하세요…")
 
 # ================== 전송 처리 ==================
-def on_user_message(content: str):
-    if st.session_state.finished:
-        st.info("이 시뮬레이션은 종료되었습니다. 🔄 새 시뮬레이션을 시작해 주세요.")
-        return
-
-    # 사용자 메시지
-    st.session_state.messages.append({"role": "user", "content": content})
-    with st.chat_message("user"):
-        st.markdown(content)
-
-    # NPC 응답
-    npc_msg = npc_reply(st.session_state.messages)
-    st.session_state.messages.append({"role": "assistant", "content": npc_msg})
-    with st.chat_message("assistant"):
-        st.markdown(npc_msg)
+def get_eval_executor() -> ThreadPoolExecutor:
+    # 평가 호출은 st.* 를 건드리지 않으므로 워커 스레드에서 돌려도 안전
+    return get_executor("simtalk-eval", max_workers=4)
 
-    # 평가 (항상 사용자 발화만)
-    eval_result = evaluate_turn(content, npc_msg, DIFF)
-    st.session_state.scores.append(eval_result)
-
-    # 점수 표시
-    with st.expander(f"턴 {st.session_state.turn + 1} 평가 보기", expanded=False):
+def render_eval(eval_result: Dict[str, Any], turn_no: int):
+    with st.expander(f"턴 {turn_no} 평가 보기", expanded=False):
         st.caption(f"평가 대상: **{eval_result.get('__eval_target', '나(사용자)')}** · 엔진: {eval_result.get('__engine','?')}")
         st.markdown("**평가한 발화(원문):**")
         st.code(eval_result.get("__evaluated_text", ""), language="text")
@@ -524,11 +344,94 @@ def on_user_message(content: str):
             st.markdown("**✍️ 바로 쓸 문장 예시**")
             st.markdown(f"> {fb['rewrite_example']}")
 
+def on_user_message(content: str):
+    if st.session_state.finished:
+        st.info("이 시뮬레이션은 종료되었습니다. 🔄 새 시뮬레이션을 시작해 주세요.")
+        return
+
+    if st.session_state.store is None:
+        st.session_state.store = SessionStore.create(
+            st.session_state.sid, session_meta(), st.session_state.get("profile", {}),
+            st.session_state.messages[0]["content"],
+        )
+    store: SessionStore = st.session_state.store
+    # 턴 계측: 단계별 구간은 trace 에, 평가는 스레드 풀에서 eval_trace 에 따로 모은 뒤 합친다
+    trace, eval_trace = Trace(), Trace()
+    t_turn = time.perf_counter()
+
+    # 사용자 메시지
+    st.session_state.messages.append({"role": "user", "content": content})
+    with st.chat_message("user"):
+        st.markdown(content)
+
+    # 직전 NPC 발화 기준이면 평가를 NPC 응답과 동시에 시작
+    eval_future = None
+    if EVAL_PREV_NPC:
+        prev_npc = next((m["content"] for m in reversed(st.session_state.messages[:-1]) if m["role"] == "assistant"), "")
+        eval_future = get_eval_executor().submit(evaluate_turn, content, prev_npc, DIFF, _session_id(), eval_trace)
+
+    # NPC 응답 (스트리밍이면 말풍선에 바로바로 표시) — 기록은 예산 안으로 잘라서 전달
+    with trace.span("context"):   # 요약(LLM)이 돌았으면 summary 구간이 따로 잡힘
+        ctx_msgs, ctx_info = build_npc_context(trace)
+        # 요약에 접힌 메시지는 메모리에서 빼고, 요약 상태를 로그에 남겨 재개 지점으로 삼는다
+        if drop_folded(st.session_state.messages, st.session_state.history):
+            store.record_fold(st.session_state.history["summary"], st.session_state.history["folded"])
+    with st.chat_message("assistant"), trace.span("npc"):
+        timing: Dict[str, Any] = {}
+        if STREAM:
+            streamed = st.write_stream(npc_reply_stream(ctx_msgs, timing, num_ctx=ctx_info["num_ctx"], trace=trace))
+            npc_msg = (streamed if isinstance(streamed, str) else "".join(map(str, streamed))).strip()
+        else:
+            t0 = time.perf_counter()
+            npc_msg = npc_reply(ctx_msgs, num_ctx=ctx_info["num_ctx"], timing=timing, trace=trace)
+            elapsed = time.perf_counter() - t0
+            timing.update({"ttft": elapsed, "total": elapsed})
+            timing.setdefault("error", None)
+            st.markdown(npc_msg)
+        timing["turn"] = st.session_state.turn + 1
+        timing["prompt_tokens_est"] = ctx_info["prompt_tokens"]
+        timing["num_ctx"] = ctx_info["num_ctx"]
+        timing["summarized_msgs"] = ctx_info["summarized"]
+        if timing["ttft"] is not None:
+            n_prompt = timing.get("prompt_eval_count") or f"~{ctx_info['prompt_tokens']}"
+            gen_rate = trace.ollama.get("npc", {}).get("gen_tok_s")
+            st.caption(
+                f"⏱ 첫 토큰 {timing['ttft']:.2f}s · 전체 {timing['total']:.2f}s"
+                + (f" · 생성 {gen_rate} tok/s" if gen_rate else "")
+                + f" · 프롬프트 {n_prompt} 토큰 (num_ctx {ctx_info['num_ctx']}, 요약된 메시지 {ctx_info['summarized']}개)"
+            )
+    st.session_state.messages.append({"role": "assistant", "content": npc_msg})
+
+    # 평가 (항상 사용자 발화만) — 백그라운드에서 끝나면 자리표시자를 채움
+    if eval_future is None:
+        eval_future = get_eval_executor().submit(evaluate_turn, content, npc_msg, DIFF, _session_id(), eval_trace)
+    eval_slot = st.empty()
+    eval_slot.caption(f"턴 {st.session_state.turn + 1} 평가 중…")
+    with trace.span("eval_wait"):   # NPC 가 끝난 뒤 평가를 더 기다린 시간
+        eval_result = eval_future.result()
+    trace.merge(eval_trace)
+    with eval_slot.container(), trace.span("render_eval"):
+        render_eval(eval_result, st.session_state.turn + 1)
+    trace.add("turn", time.perf_counter() - t_turn)
+    timing.update(trace.to_dict())
+    store.append_turn(TurnRecord.from_eval(st.session_state.turn + 1, content, npc_msg, eval_result, timing))
+    sink = get_sink()
+    if sink is not None:
+        sink.record("simtalk", timing, session=_session_id(), model=MODEL)
+
     # 라운드/종료
     st.session_state.turn += 1
     if st.session_state.turn >= st.session_state.max_rounds:
         st.session_state.finished = True
-        st.session_state.summary = summarize_overall(st.session_state.scores)
+        evals = [tr.to_eval() for tr in store.iter_turns()]
+        st.session_state.summary = summarize_overall(evals)
+        store.finish(st.session_state.summary)
+        # 세션 간 진행도 집계 갱신 (시작할 때의 상황/난이도/프로필 기준, 같은 세션은 한 번만)
+        header = store.header()
+        get_progress_store().record_session(
+            header["id"], user_key(header.get("profile", {})), header["meta"].get("scenario"),
+            header["meta"].get("difficulty"), evals, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
         st.success("✅ 시뮬레이션 종료!")
         show_summary()
 
@@ -549,6 +452,7 @@ def show_summary():
             st.markdown(f"- {x}")
     if s["tip"]:
         st.markdown(f"**🎯 최종 코칭:** {s['tip']}")
+    st.page_link("pages/1_📈_진행도.py", label="세션 간 진행도 보기", icon="📈")
 
 # ================== 입력 처리 ==================
 if user_input and user_input.strip():
@@ -560,30 +464,30 @@ if st.session_state.finished and st.session_state.summary:
     show_summary()
 
 # ================== JSON 내보내기 ==================
-def export_json():
-    data = {
-        "meta": {
-            "started_at": st.session_state.started_at,
-            "ended_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "model": MODEL,
-            "temperature": float(TEMP),
-            "rounds": st.session_state.max_rounds,
-            "difficulty": DIFF,
-            "scenario": SCENARIO,
-            "eval_mode": EVAL_MODE,
-        },
-        "profile": st.session_state.get("profile", {}),
-        "messages": st.session_state.messages,
-        "scores": st.session_state.scores,
-        "summary": st.session_state.summary or summarize_overall(st.session_state.scores),
-    }
-    return json.dumps(data, ensure_ascii=False, indent=2)
+# 내보내기 파일은 다운로드 버튼을 눌렀을 때만 로그에서 만든다 (rerun 마다 만들지 않음).
+# 서버 스레드에서 불리므로 session_state 대신 지금의 저장소/요약을 묶어 둔다.
+def _export_file(store: SessionStore, summary: Optional[Dict[str, Any]]):
+    return lambda: store.export_buffer(summary or summarize_overall([tr.to_eval() for tr in store.iter_turns()]))
 
 if export:
-    st.download_button(
-        label="JSON 다운로드",
-        data=export_json().encode("utf-8"),
-        file_name=f"date_sim_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-        mime="application/json",
-        use_container_width=True,
-    )
+    if st.session_state.get("store") is None:
+        st.sidebar.info("아직 내보낼 대화가 없어요.")
+    else:
+        st.download_button(
+            label="JSON 다운로드",
+            data=_export_file(st.session_state.store, st.session_state.summary),
+            file_name=f"date_sim_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+            on_click="ignore",   # 누른 뒤 rerun 하면 버튼(과 지연 생성 등록)이 사라진다
+            use_container_width=True,
+        )
+
+# ================== 턴별 계측 패널 ==================
+if DEBUG_METRICS and st.session_state.get("store") is not None:
+    with st.sidebar.expander("🔧 턴별 단계 지연(초) / 토큰", expanded=True):
+        _rows = [trace_row(tr.latency) for tr in st.session_state.store.recent_turns(10) if tr.latency]
+        if _rows:
+            st.dataframe(_rows, use_container_width=True, hide_index=True)
+            st.caption("context ⊃ summary · npc ⊃ npc_queue · eval ⊃ eval_queue/eval_llm/eval_parse")
+        else:
+            st.caption("아직 계측된 턴이 없어요.")
@@ -0,0 +1,478 @@
+# archive.py
+# 세션 기록 압축 아카이브: export_json() 으로 저장한 date_sim_*.json 수만~수십만 개를 디렉터리 하나로 모은다
+# (Streamlit 없이 import 가능)
+# 실행 예 (SimTalk/ 에서):
+#   python archive.py convert exports/ more.jsonl --out archive/          # 변환 (zstandard 가 있으면 zstd, 없으면 gzip)
+#   python archive.py stats archive/                                     # 세션/턴 수, 루브릭 평균, 상황별 평균
+#   python archive.py export archive/ --index 42 > date_sim_042.json     # 세션 하나를 예전 JSON 그대로 복원
+#
+# 디렉터리 구성:
+#   manifest.json   형식/버전, 루브릭 순서, 코덱, 개수, 텍스트 프레임 위치(offset, length)
+#   turns.npy       턴 레코드 — 고정폭 숫자 열 (session, turn, engine, scores[루브릭], total). 점수는 ×100 정수,
+#                   MISSING(0xFFFF)은 없음/표현 불가. 보통 .npy 라 np.load(mmap_mode="r") 로 바로 매핑된다
+#   sessions.npy    세션 레코드 — 첫 턴 위치, 턴 수, 상황/난이도/모델/프로필/시스템 프롬프트 번호, 시작 시각, 평균 총점
+#   tables.json.*   번호 → 값 사전 (상황, 난이도, 모델, 평가 엔진, 프로필, 시스템 프롬프트). 프로필/시스템 프롬프트는
+#                   세션마다 반복되므로 내용이 같으면 한 번만 저장한다
+#   text.bin        나머지(발화, 피드백, 지연시간, 요약 등)를 세션당 JSON 한 줄로, frame_sessions 개씩 독립 압축한 프레임
+#                   → 세션 하나를 볼 때 그 프레임만 푼다
+# 점수만 필요한 분석(재채점 비교, 추세)은 turns.npy 만 읽으면 되고, session(i) 는 원래 JSON 과 같은 dict 를 돌려준다
+# (정수 점수는 실수로 돌아온다 — 7 → 7.0, 값은 같음).
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from scoring import RUBRIC, RUBRIC_VERSION
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ARCHIVE_FORMAT = "smoothtalk-archive"
+ARCHIVE_VERSION = 1
+FRAME_SESSIONS = 256             # 임의 접근 한 번에 푸는 양 ↔ 압축률 (1000 이면 2% 작아지고 3배 느려짐)
+MISSING = 0xFFFF                 # 점수/총점/번호 열의 '없음'
+MISSING_ID = 0xFFFFFFFF          # 프로필/시스템 프롬프트 번호의 '없음'
+
+TURN_DTYPE = np.dtype([
+    ("session", "<u4"),
+    ("turn", "<u2"),
+    ("engine", "<u2"),
+    ("scores", "<u2", (len(RUBRIC),)),
+    ("total", "<u2"),
+])
+SESSION_DTYPE = np.dtype([
+    ("first_turn", "<u8"),
+    ("n_turns", "<u2"),
+    ("scenario", "<u2"),
+    ("difficulty", "<u2"),
+    ("model", "<u2"),
+    ("engine", "<u2"),           # 첫 턴의 평가 엔진 (세션 단위로 거를 때)
+    ("profile", "<u4"),
+    ("system", "<u4"),
+    ("started", "<f8"),          # meta.started_at 의 epoch 초 (없으면 NaN)
+    ("avg_total", "<u2"),
+])
+_TABLES = ("scenarios", "difficulties", "models", "engines", "profiles", "systems")
+
+# ================== 코덱 ==================
+def pick_codec(codec: str = "auto") -> str:
+    if codec == "auto":
+        return "zstd" if ZSTD_AVAILABLE else "gzip"
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        raise RuntimeError("zstd 코덱은 zstandard 패키지가 필요해요 (`pip install zstandard`, 또는 --codec gzip)")
+    if codec not in ("zstd", "gzip"):
+        raise ValueError(f"알 수 없는 코덱: {codec}")
+    return codec
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd 로 만든 아카이브예요 — zstandard 패키지를 설치해야 읽을 수 있어요")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)   # gzip 프레임 (CRC 확인 포함, gzip 모듈보다 빠름)
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+# ================== 숫자 열 인코딩 ==================
+def _enc(v: Any) -> Optional[int]:
+    """0~655.34 의 소수 둘째 자리까지 값이면 ×100 정수, 아니면 None (원본은 텍스트 쪽에 남긴다)."""
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return None
+    q = round(v * 100)
+    if 0 <= q < MISSING and q / 100 == v:
+        return q
+    return None
+
+def _epoch(s: Any) -> float:
+    try:
+        return datetime.strptime(s, "%Y-%m-%d %H:%M:%S").timestamp()
+    except (TypeError, ValueError):
+        return float("nan")
+
+class _Table:
+    """값 → 번호 (처음 나온 순서). 프로필처럼 dict 인 값은 정렬된 JSON 으로 같은지 본다."""
+
+    def __init__(self, limit: int):
+        self.values: List[Any] = []
+        self._ids: Dict[str, int] = {}
+        self.limit = limit
+
+    def id(self, value: Any) -> int:
+        key = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, sort_keys=True)
+        i = self._ids.get(key)
+        if i is None:
+            if len(self.values) >= self.limit:
+                raise OverflowError(f"사전 항목이 {self.limit:,}개를 넘었어요")
+            i = self._ids[key] = len(self.values)
+            self.values.append(value)
+        return i
+
+def _npy_header(fp, dtype: np.dtype, n: int):
+    np.lib.format.write_array_header_1_0(fp, {
+        "descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (n,),
+    })
+
+def _npy_offset(path: str) -> Tuple[np.dtype, int, int]:
+    """(dtype, 행 수, 데이터 시작 위치). 헤더만 읽는다."""
+    with open(path, "rb") as f:
+        major, _ = np.lib.format.read_magic(f)
+        read = np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0
+        shape, _, dtype = read(f)
+        return dtype, shape[0], f.tell()
+
+# ================== 쓰기 ==================
+class ArchiveWriter:
+    """
+    세션 export dict 를 하나씩 add() 로 넣고 close().
+    턴/세션 열은 임시 파일에 덧붙이고, 텍스트는 frame_sessions 개가 모일 때마다 압축해 내보내므로 메모리는
+    프레임 하나 + 사전 크기만큼만 쓴다.
+    """
+
+    def __init__(self, out_dir: str, codec: str = "auto", frame_sessions: int = FRAME_SESSIONS,
+                 overwrite: bool = False):
+        if os.path.exists(out_dir):
+            if not overwrite:
+                raise FileExistsError(f"이미 있는 경로: {out_dir}")
+            shutil.rmtree(out_dir)
+        os.makedirs(out_dir)
+        self.out_dir = out_dir
+        self.codec = pick_codec(codec)
+        self.frame_sessions = frame_sessions
+        self.tables = {name: _Table(MISSING_ID if name in ("profiles", "systems") else MISSING) for name in _TABLES}
+        self.n_sessions = 0
+        self.n_turns = 0
+        self.frames: List[Tuple[int, int]] = []
+        self._lines: List[str] = []
+        self._text = open(os.path.join(out_dir, "text.bin"), "wb")
+        self._turns_raw = open(os.path.join(out_dir, "turns.raw"), "wb")
+        self._sessions_raw = open(os.path.join(out_dir, "sessions.raw"), "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sid(self, table: str, value: Any, none: int = MISSING) -> int:
+        return self.tables[table].id(value) if isinstance(value, str) else none
+
+    def add(self, data: Dict[str, Any], name: str = "") -> int:
+        """세션 하나를 넣고 그 번호를 돌려준다."""
+        idx = self.n_sessions
+        meta = dict(data.get("meta") or {})
+        srow = np.zeros(1, dtype=SESSION_DTYPE)[0]
+        srow["first_turn"] = self.n_turns
+        for col, table in (("scenario", "scenarios"), ("difficulty", "difficulties"), ("model", "models")):
+            srow[col] = self._sid(table, meta.get(col))
+            if srow[col] != MISSING:
+                del meta[col]
+        srow["started"] = _epoch(meta.get("started_at"))
+        srow["profile"] = self.tables["profiles"].id(data["profile"]) if "profile" in data else MISSING_ID
+
+        # 메시지: 맨 앞 system 은 사전 번호로, 나머지 user/assistant 는 [u|a, 내용]
+        msgs = list(data.get("messages") or [])
+        srow["system"] = MISSING_ID
+        if msgs and set(msgs[0]) == {"role", "content"} and msgs[0]["role"] == "system" \
+                and isinstance(msgs[0]["content"], str):
+            srow["system"] = self.tables["systems"].id(msgs[0]["content"])
+            msgs = msgs[1:]
+        packed = [[m["role"][0], m["content"]]
+                  if set(m) == {"role", "content"} and m["role"] in ("user", "assistant") else m for m in msgs]
+
+        # 턴: 점수/총점/엔진은 열로, 표현할 수 없는 것과 피드백은 텍스트로
+        evals = list(data.get("scores") or [])
+        turns = np.zeros(len(evals), dtype=TURN_DTYPE)
+        rest: List[Dict[str, Any]] = []
+        for t, ev in enumerate(evals):
+            ev = dict(ev)
+            row = turns[t]
+            row["session"], row["turn"] = idx, t + 1
+            row["scores"] = MISSING
+            sc = ev.get("scores")
+            if isinstance(sc, dict) and set(sc) == set(RUBRIC):
+                q = [_enc(sc[k]) for k in RUBRIC]
+                row["scores"] = [MISSING if x is None else x for x in q]
+                if None not in q:
+                    del ev["scores"]
+            tot = _enc(ev.get("total"))
+            row["total"] = MISSING if tot is None else tot
+            if tot is not None:
+                del ev["total"]
+            row["engine"] = self._sid("engines", ev.get("__engine"))
+            if row["engine"] != MISSING:
+                del ev["__engine"]
+            rest.append(ev)
+        srow["n_turns"] = len(evals)
+        srow["engine"] = turns[0]["engine"] if len(evals) else MISSING
+        summary = data.get("summary")
+        avg = _enc(summary.get("avg_total")) if isinstance(summary, dict) else None
+        srow["avg_total"] = MISSING if avg is None else avg
+
+        line = {"n": name, "k": list(data), "meta": meta, "m": packed, "sc": rest}
+        for key, value in data.items():
+            if key not in ("meta", "profile", "messages", "scores"):
+                line.setdefault("x", {})[key] = value
+        self._lines.append(_dumps(line))
+        turns.tofile(self._turns_raw)
+        np.array([srow], dtype=SESSION_DTYPE).tofile(self._sessions_raw)
+        self.n_sessions += 1
+        self.n_turns += len(evals)
+        if len(self._lines) >= self.frame_sessions:
+            self._flush()
+        return idx
+
+    def _flush(self):
+        if not self._lines:
+            return
+        blob = _compress(("\n".join(self._lines)).encode("utf-8"), self.codec)
+        self.frames.append((self._text.tell(), len(blob)))
+        self._text.write(blob)
+        self._lines = []
+
+    def _finish_npy(self, raw_name: str, npy_name: str, dtype: np.dtype, n: int):
+        raw = os.path.join(self.out_dir, raw_name)
+        with open(os.path.join(self.out_dir, npy_name), "wb") as out, open(raw, "rb") as src:
+            _npy_header(out, dtype, n)
+            shutil.copyfileobj(src, out, 1 << 20)
+        os.remove(raw)
+
+    def close(self) -> Dict[str, Any]:
+        if self._text.closed:
+            return self.manifest
+        self._flush()
+        self._text.close()
+        self._turns_raw.close()
+        self._sessions_raw.close()
+        self._finish_npy("turns.raw", "turns.npy", TURN_DTYPE, self.n_turns)
+        self._finish_npy("sessions.raw", "sessions.npy", SESSION_DTYPE, self.n_sessions)
+        tables_file = f"tables.json.{'zst' if self.codec == 'zstd' else 'gz'}"
+        with open(os.path.join(self.out_dir, tables_file), "wb") as f:
+            f.write(_compress(_dumps({k: t.values for k, t in self.tables.items()}).encode("utf-8"), self.codec))
+        self.manifest = {
+            "format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION,
+            "rubric": list(RUBRIC), "rubric_version": RUBRIC_VERSION,
+            "codec": self.codec, "frame_sessions": self.frame_sessions,
+            "sessions": self.n_sessions, "turns": self.n_turns,
+            "tables": tables_file, "frames": self.frames,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(os.path.join(self.out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        return self.manifest
+
+def convert(inputs: Iterable[str], out_dir: str, codec: str = "auto", frame_sessions: int = FRAME_SESSIONS,
+            overwrite: bool = False) -> Dict[str, Any]:
+    """date_sim_*.json / JSONL 을 아카이브로. 읽지 못한 파일은 건너뛰고 errors 에 모은다."""
+    from batch_eval import iter_tasks, load_session
+    errors: List[str] = []
+    t0 = time.perf_counter()
+    with ArchiveWriter(out_dir, codec, frame_sessions, overwrite) as w:
+        for task in iter_tasks(inputs):
+            try:
+                data = load_session(task)
+            except Exception as e:
+                errors.append(f"{task[0]}: {e}")
+                continue
+            w.add(data, name=os.path.basename(task[0]))
+    return {**w.manifest, "errors": errors, "convert_s": round(time.perf_counter() - t0, 3)}
+
+# ================== 읽기 ==================
+class ArchiveReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != ARCHIVE_FORMAT or self.manifest.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"지원하지 않는 아카이브: {self.manifest.get('format')} v{self.manifest.get('version')}")
+        self.rubric: List[str] = self.manifest["rubric"]   # 점수 열 순서 (만들 때의 RUBRIC)
+        self.codec: str = self.manifest["codec"]
+        self._tables: Optional[Dict[str, List[Any]]] = None
+        self._frame: Tuple[int, List[bytes]] = (-1, [])
+        self._mm: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.manifest["sessions"]
+
+    # ---------- 숫자 열 ----------
+    def turns(self, mmap: bool = True) -> np.ndarray:
+        """턴 레코드 전체 (TURN_DTYPE). mmap=True 면 필요한 페이지만 읽힌다."""
+        return self._load("turns.npy", mmap)
+
+    def sessions(self, mmap: bool = True) -> np.ndarray:
+        return self._load("sessions.npy", mmap)
+
+    def _load(self, name: str, mmap: bool) -> np.ndarray:
+        if not mmap:
+            return np.load(os.path.join(self.path, name))
+        if name not in self._mm:
+            self._mm[name] = np.load(os.path.join(self.path, name), mmap_mode="r")
+        return self._mm[name]
+
+    def score_matrix(self, turns: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(점수 float32[턴, 루브릭], 총점 float32[턴]). 없는 값은 NaN."""
+        return decode_scores(self.turns() if turns is None else turns)
+
+    def iter_score_chunks(self, rows: int = 1 << 16) -> Iterator[np.ndarray]:
+        """turns.npy 를 rows 행씩 흘려 읽는다 (mmap 을 못 쓰는 곳/한 번 훑고 버릴 때). 각 조각은 TURN_DTYPE 배열."""
+        dtype, n, offset = _npy_offset(os.path.join(self.path, "turns.npy"))
+        with open(os.path.join(self.path, "turns.npy"), "rb") as f:
+            f.seek(offset)
+            done = 0
+            while done < n:
+                chunk = np.fromfile(f, dtype=dtype, count=min(rows, n - done))
+                if not len(chunk):
+                    break
+                done += len(chunk)
+                yield chunk
+
+    # ---------- 사전 ----------
+    @property
+    def tables(self) -> Dict[str, List[Any]]:
+        if self._tables is None:
+            with open(os.path.join(self.path, self.manifest["tables"]), "rb") as f:
+                self._tables = json.loads(_decompress(f.read(), self.codec))
+        return self._tables
+
+    def lookup(self, table: str, value: Any) -> int:
+        """값의 번호 (없으면 -1). 예: sessions()["scenario"] == r.lookup("scenarios", "소개팅")"""
+        try:
+            return self.tables[table].index(value)
+        except ValueError:
+            return -1
+
+    # ---------- 텍스트 ----------
+    def _frame_lines(self, k: int) -> List[bytes]:
+        if self._frame[0] != k:
+            off, length = self.manifest["frames"][k]
+            with open(os.path.join(self.path, "text.bin"), "rb") as f:
+                f.seek(off)
+                blob = f.read(length)
+            self._frame = (k, _decompress(blob, self.codec).split(b"\n"))
+        return self._frame[1]
+
+    def session(self, i: int, srow: Optional[np.void] = None, turns: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """세션 i 를 원래 export JSON 과 같은 dict 로."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        fs = self.manifest["frame_sessions"]
+        line = json.loads(self._frame_lines(i // fs)[i % fs])
+        if srow is None:
+            srow = self.sessions()[i]
+        if turns is None:
+            first = int(srow["first_turn"])
+            turns = self.turns()[first:first + int(srow["n_turns"])]
+        return self._rebuild(line, srow, turns)
+
+    def name(self, i: int) -> str:
+        fs = self.manifest["frame_sessions"]
+        return json.loads(self._frame_lines(i // fs)[i % fs])["n"]
+
+    def iter_sessions(self) -> Iterator[Dict[str, Any]]:
+        """앞에서부터 전부 (프레임을 차례로 한 번씩만 푼다)."""
+        srows, turns = self.sessions(), self.turns()
+        for i in range(len(self)):
+            first = int(srows[i]["first_turn"])
+            yield self.session(i, srows[i], turns[first:first + int(srows[i]["n_turns"])])
+
+    def _rebuild(self, line: Dict[str, Any], srow: np.void, turns: np.ndarray) -> Dict[str, Any]:
+        tb = self.tables
+        meta = dict(line["meta"])
+        for col, table in (("scenario", "scenarios"), ("difficulty", "difficulties"), ("model", "models")):
+            if srow[col] != MISSING:
+                meta[col] = tb[table][int(srow[col])]
+        messages = [] if srow["system"] == MISSING_ID else [{"role": "system", "content": tb["systems"][int(srow["system"])]}]
+        for m in line["m"]:
+            messages.append({"role": "user" if m[0] == "u" else "assistant", "content": m[1]} if isinstance(m, list) else m)
+        evals = []
+        for ev, row in zip(line["sc"], turns):
+            ev = dict(ev)
+            if "scores" not in ev and not (row["scores"] == MISSING).any():
+                ev["scores"] = {k: int(v) / 100 for k, v in zip(self.rubric, row["scores"])}
+            if "total" not in ev and row["total"] != MISSING:
+                ev["total"] = int(row["total"]) / 100
+            if "__engine" not in ev and row["engine"] != MISSING:
+                ev["__engine"] = tb["engines"][int(row["engine"])]
+            evals.append(ev)
+        parts = {"meta": meta, "messages": messages, "scores": evals, **line.get("x", {})}
+        if srow["profile"] != MISSING_ID:
+            parts["profile"] = tb["profiles"][int(srow["profile"])]
+        return {k: parts[k] for k in line["k"]}
+
+    # ---------- 요약 ----------
+    def stats(self) -> Dict[str, Any]:
+        scores, total = self.score_matrix()
+        srows = self.sessions()
+        out: Dict[str, Any] = {
+            "sessions": len(self), "turns": int(len(total)), "codec": self.codec,
+            "bytes": {name: os.path.getsize(os.path.join(self.path, name)) for name in sorted(os.listdir(self.path))},
+            "rubric_mean": {k: _nanround(scores[:, j]) for j, k in enumerate(self.rubric)},
+            "total_mean": _nanround(total),
+            "profiles": len(self.tables["profiles"]), "systems": len(self.tables["systems"]),
+        }
+        avg = np.where(srows["avg_total"] == MISSING, np.nan, srows["avg_total"] / 100)
+        out["by_scenario"] = {
+            name: {"sessions": int(m.sum()), "avg_total": _nanround(avg[m])}
+            for j, name in enumerate(self.tables["scenarios"]) for m in [srows["scenario"] == j]
+        }
+        return out
+
+def decode_scores(turns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """TURN_DTYPE 배열 → (점수 float32[턴, 루브릭], 총점 float32[턴]). MISSING 은 NaN."""
+    s = np.asarray(turns["scores"])
+    t = np.asarray(turns["total"])
+    scores = np.where(s == MISSING, np.nan, s / np.float32(100)).astype(np.float32)
+    total = np.where(t == MISSING, np.nan, t / np.float32(100)).astype(np.float32)
+    return scores, total
+
+def _nanround(x: np.ndarray) -> Optional[float]:
+    x = x[~np.isnan(x)]
+    return round(float(x.mean()), 3) if len(x) else None
+
+# ================== CLI ==================
+def main():
+    ap = argparse.ArgumentParser(description="SimTalk 세션 기록 압축 아카이브")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="date_sim_*.json / JSONL → 아카이브")
+    c.add_argument("inputs", nargs="+", help="파일 또는 디렉터리")
+    c.add_argument("--out", required=True, help="만들 아카이브 디렉터리")
+    c.add_argument("--codec", default="auto", choices=["auto", "zstd", "gzip"])
+    c.add_argument("--frame", type=int, default=FRAME_SESSIONS, help="텍스트 프레임 하나에 넣을 세션 수")
+    c.add_argument("--overwrite", action="store_true")
+    s = sub.add_parser("stats", help="아카이브 요약")
+    s.add_argument("archive")
+    e = sub.add_parser("export", help="세션 하나를 예전 JSON 으로")
+    e.add_argument("archive")
+    e.add_argument("--index", type=int, required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "convert":
+        res = convert(args.inputs, args.out, args.codec, args.frame, args.overwrite)
+        print(json.dumps({k: res[k] for k in ("sessions", "turns", "codec", "convert_s")}, ensure_ascii=False))
+        for err in res["errors"]:
+            print(f"건너뜀: {err}", file=sys.stderr)
+    elif args.cmd == "stats":
+        print(json.dumps(ArchiveReader(args.archive).stats(), ensure_ascii=False, indent=1))
+    else:
+        json.dump(ArchiveReader(args.archive).session(args.index), sys.stdout, ensure_ascii=False)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# batch_eval.py
+# 실행 예:
+#   python batch_eval.py exports/ --out rescored/                 # 휴리스틱, CPU 코어 수만큼 프로세스
+#   python batch_eval.py exports/ sessions.jsonl --out rescored/ --mode llm --model gemma3:4b --llm-concurrency 4
+#   python batch_eval.py exports/ --out rescored/ --resume        # 중단된 지점부터 이어서
+#   OLLAMA_TRANSPORT=replay python batch_eval.py exports/ --out rescored/ --mode llm   # 기록된 응답으로 재현
+#   python batch_eval.py exports/ --out rescored/ --weights weights.json   # features.py fit 으로 맞춘 가중치로 휴리스틱 채점
+#   python batch_eval.py exports/ --out cascade/ --mode cascade --model gemma3:1b --margin 1.0 --audit-rate 0.1
+#       # 단계별 평가를 돌려 승격률/두 단계 일치율을 본다 (여유폭 조정용)
+#
+# export_json() 으로 저장한 date_sim_*.json (또는 한 줄에 세션 1개인 JSONL)을 헤드리스로 다시 채점한다.
+# RUBRIC 가중치/휴리스틱을 바꾼 뒤 기존 기록 전체를 재평가할 때 사용.
+#
+# 출력: <out>/results.jsonl
+#   {"type": "turn", "session": ..., "turn": 1, "scores": {...}, "total": 7.1, "engine": "휴리스틱"}
+#   {"type": "session", "session": ..., "turns": 6, "avg_total": 6.8, "avg_scores": {...}, ...}
+# 세션의 turn 레코드들과 session 레코드는 한 번에 기록되며, session 레코드가 곧 체크포인트다.
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로 (LLM 모드 transport)
+from eval_cache import EvalCache
+from features import load_weights, matrix_evaluate
+from scoring import (
+    CASCADE_DEFAULTS, CASCADE_STATS, RUBRIC, cascade_evaluate, finalize_eval, heuristic_evaluate, llm_evaluate,
+    summarize_overall,
+)
+
+RESULTS_FILE = "results.jsonl"
+
+# 프로세스/스레드 공용 평가 캐시 (--cache 지정 시)
+_CACHE: Optional[EvalCache] = None
+# 휴리스틱 재학습 가중치 (--weights 지정 시, 세션 단위로 특징 행렬 채점)
+_WEIGHTS: Optional[Dict[str, Dict[str, float]]] = None
+
+# (세션 id, 파일 경로, JSONL 이면 줄 시작 오프셋 / JSON 이면 None)
+Task = Tuple[str, str, Optional[int]]
+
+# ================== 입력 탐색 ==================
+def iter_tasks(inputs: Iterable[str], pattern_prefix: str = "date_sim_") -> Iterator[Task]:
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if name.endswith(".jsonl"):
+                    yield from _jsonl_tasks(full)
+                elif name.startswith(pattern_prefix) and name.endswith(".json"):
+                    yield (full, full, None)
+        elif path.endswith(".jsonl"):
+            yield from _jsonl_tasks(path)
+        else:
+            yield (path, path, None)
+
+def _jsonl_tasks(path: str) -> Iterator[Task]:
+    # 부모 프로세스는 줄 오프셋만 훑고, 실제 JSON 파싱은 워커가 한다
+    with open(path, "rb") as f:
+        offset = 0
+        for lineno, line in enumerate(f, 1):
+            if line.strip():
+                yield (f"{path}:{lineno}", path, offset)
+            offset += len(line)
+
+def load_session(task: Task) -> Dict[str, Any]:
+    _, path, offset = task
+    if offset is None:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+def iter_turns(messages: List[Dict[str, str]]) -> Iterator[Tuple[str, str]]:
+    """(사용자 발화, 바로 뒤 NPC 응답) 쌍. 평가 대상은 항상 사용자 발화."""
+    for i, m in enumerate(messages):
+        if m.get("role") != "user":
+            continue
+        npc = next((n["content"] for n in messages[i + 1:] if n.get("role") == "assistant"), "")
+        yield m["content"], npc
+
+# ================== 채점 ==================
+def score_session(task: Task, mode: str = "heuristic", model: str = "", temperature: float = 0.2,
+                  cascade: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """세션 1개를 채점해 출력 레코드(turn..., session) 리스트를 돌려준다."""
+    session_id = task[0]
+    try:
+        data = load_session(task)
+    except Exception as e:
+        return session_id, [{"type": "session", "session": session_id, "error": f"load: {e}"}]
+
+    meta = data.get("meta", {})
+    difficulty = meta.get("difficulty") or "보통"
+    records, evals = [], []
+    turns = list(iter_turns(data.get("messages", [])))
+    fitted = matrix_evaluate([u for u, _ in turns], _WEIGHTS) if (mode == "heuristic" and _WEIGHTS) else None
+    for turn_no, (user_msg, npc_msg) in enumerate(turns, 1):
+        ev = None
+        if mode == "llm":
+            raw = llm_evaluate(user_msg, npc_msg, difficulty, model, temperature, cache=_CACHE)
+            ev = finalize_eval(raw, user_msg, "LLM") if raw is not None else None
+        elif mode == "cascade":
+            ev = cascade_evaluate(user_msg, npc_msg, difficulty, model, cache=_CACHE, cfg=cascade)
+        elif fitted is not None:
+            ev = finalize_eval({"scores": fitted[turn_no - 1]}, user_msg, "휴리스틱(가중치)")
+        if ev is None:
+            ev = finalize_eval(heuristic_evaluate(user_msg), user_msg, "휴리스틱")
+        evals.append(ev)
+        records.append({
+            "type": "turn", "session": session_id, "turn": turn_no,
+            "scores": ev["scores"], "total": ev["total"], "engine": ev["__engine"],
+        })
+
+    avg_scores = {k: round(sum(e["scores"][k] for e in evals) / len(evals), 2) for k in RUBRIC} if evals else {}
+    records.append({
+        "type": "session", "session": session_id, "turns": len(evals),
+        "avg_total": summarize_overall(evals)["avg_total"], "avg_scores": avg_scores,
+        "scenario": meta.get("scenario"), "difficulty": meta.get("difficulty"), "model": meta.get("model"),
+    })
+    return session_id, records
+
+def _init_worker(cache_path: Optional[str], weights: Optional[Dict[str, Dict[str, float]]] = None):
+    global _CACHE, _WEIGHTS
+    _CACHE = EvalCache(cache_path) if cache_path else None
+    _WEIGHTS = weights
+
+def _score_heuristic(task: Task) -> Tuple[str, List[Dict[str, Any]]]:
+    return score_session(task, "heuristic")
+
+# ================== 체크포인트 ==================
+def load_checkpoint(results_path: str) -> Set[str]:
+    """완료된 세션 id 집합. 마지막 session 레코드 뒤의 잔여(중단된 세션의 일부)는 잘라낸다."""
+    done: Set[str] = set()
+    if not os.path.exists(results_path):
+        return done
+    keep = 0
+    with open(results_path, "rb") as f:
+        offset = 0
+        for line in f:
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                break
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            if rec.get("type") == "session":
+                done.add(rec["session"])
+                keep = offset
+    with open(results_path, "r+b") as f:
+        f.truncate(keep)
+    return done
+
+# ================== 실행 ==================
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    os.makedirs(args.out, exist_ok=True)
+    results_path = os.path.join(args.out, RESULTS_FILE)
+    done = load_checkpoint(results_path) if args.resume else set()
+    if not args.resume and os.path.exists(results_path):
+        os.remove(results_path)
+
+    # 가중치 파일은 부모에서 읽어 검증 (워커 initializer 가 실패하면 Pool 이 재시작만 반복한다)
+    weights = load_weights(args.weights) if args.weights else None
+    tasks = [t for t in iter_tasks(args.inputs) if t[0] not in done]
+    print(f"세션 {len(tasks)}개 채점 시작 (건너뜀 {len(done)}개, 모드={args.mode})", file=sys.stderr)
+
+    n_sessions = n_turns = n_errors = 0
+    t0 = time.perf_counter()
+    last_report = t0
+
+    cascade = {"margin": args.margin, "long_chars": args.long_chars, "audit_rate": args.audit_rate}
+    if args.mode in ("llm", "cascade"):
+        # LLM 은 I/O 대기라 스레드로, 동시 호출 수는 --llm-concurrency 로 제한
+        _init_worker(args.cache)
+        pool = ThreadPoolExecutor(max_workers=args.llm_concurrency)
+        results = pool.map(lambda t: score_session(t, args.mode, args.model, args.temperature, cascade), tasks)
+    else:
+        pool = mp.Pool(processes=args.workers, initializer=_init_worker, initargs=(args.cache, weights))
+        results = pool.imap_unordered(_score_heuristic, tasks, chunksize=args.chunksize)
+
+    with open(results_path, "a", encoding="utf-8") as out:
+        for _, records in results:
+            out.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            out.flush()
+            n_sessions += 1
+            n_turns += len(records) - 1
+            n_errors += 1 if "error" in records[-1] else 0
+            now = time.perf_counter()
+            if now - last_report >= args.report_every:
+                last_report = now
+                print(f"  {n_sessions}/{len(tasks)} 세션 · {n_turns / (now - t0):,.1f} 턴/s", file=sys.stderr)
+
+    if args.mode in ("llm", "cascade"):
+        pool.shutdown()
+    else:
+        pool.close()
+        pool.join()
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "sessions": n_sessions,
+        "turns": n_turns,
+        "errors": n_errors,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(n_turns / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    if args.mode == "cascade":
+        stats["cascade"] = CASCADE_STATS.summary(args.model)
+    if _CACHE is not None:
+        stats["cache_hit_rate"] = round(_CACHE.hit_rate(), 3)
+    print(json.dumps(stats, ensure_ascii=False), file=sys.stderr)
+    return stats
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="SimTalk 내보내기(JSON/JSONL) 일괄 재채점")
+    ap.add_argument("inputs", nargs="+", help="date_sim_*.json 파일/디렉터리 또는 .jsonl")
+    ap.add_argument("--out", required=True, help="결과 디렉터리 (results.jsonl)")
+    ap.add_argument("--mode", choices=["heuristic", "llm", "cascade"], default="heuristic",
+                    help="cascade: 휴리스틱 먼저, 애매한 턴만 LLM (scoring.cascade_evaluate)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="휴리스틱 프로세스 수")
+    ap.add_argument("--chunksize", type=int, default=16)
+    ap.add_argument("--model", default="gemma3:4b", help="LLM/cascade 모드 평가 모델")
+    ap.add_argument("--temperature", type=float, default=0.2)
+    ap.add_argument("--margin", type=float, default=CASCADE_DEFAULTS["margin"], help="cascade: 승격 여유폭(점)")
+    ap.add_argument("--long-chars", type=int, default=CASCADE_DEFAULTS["long_chars"], help="cascade: 긴 발화 기준(글자)")
+    ap.add_argument("--audit-rate", type=float, default=CASCADE_DEFAULTS["audit_rate"],
+                    help="cascade: 승격 안 된 턴 중 LLM 으로도 채점해 일치율을 잴 비율")
+    ap.add_argument("--llm-concurrency", type=int, default=2, help="LLM 동시 호출 수 상한")
+    ap.add_argument("--cache", default=None, help="평가 캐시 SQLite 경로 (eval_cache.sqlite3 등)")
+    ap.add_argument("--weights", default=None, help="휴리스틱 모드에서 쓸 가중치 JSON (features.py fit 결과)")
+    ap.add_argument("--resume", action="store_true", help="results.jsonl 의 완료 세션은 건너뛰고 이어서")
+    ap.add_argument("--report-every", type=float, default=5.0, help="진행 상황 출력 간격(초)")
+    return ap
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
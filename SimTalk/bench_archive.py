@@ -0,0 +1,132 @@
+# bench_archive.py
+# 실행: python bench_archive.py [--sessions 5000] [--codec auto|zstd|gzip]
+#       python bench_archive.py --sessions 100000 --direct     # JSON 파일을 안 쓰고 바로 아카이브로 (큰 N)
+# 합성 세션 기록(loadtest.py 의 프로필/발화 + 휴리스틱 채점, export_json() 과 같은 구조)으로
+#   - 예전 방식: date_sim_*.json 을 하나씩 json.load 해서 점수만 뽑기
+#   - 아카이브: convert 시간, 점수 열 로드(mmap / 흘려 읽기), 세션 하나 복원 시간
+#   - 디스크 크기 (JSON 파일 합 vs 아카이브 디렉터리)
+# 를 비교하고, 표본 세션이 원래 dict 와 같게 복원되는지 확인한다.
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Any, Iterator, List
+
+import numpy as np
+
+from archive import ArchiveReader, ArchiveWriter, convert, decode_scores
+from loadtest import PERSONAS, make_profile, next_utterance
+from prompts import DIFFICULTIES, SCENARIOS, build_system_prompt
+from scoring import RUBRIC, finalize_eval, heuristic_evaluate, summarize_overall
+
+_NPC = ["아 그렇군요! 저도 그거 좋아해요.", "음… 잘 모르겠어요. 다른 얘기 할까요?", "오 재밌네요 ㅎㅎ 더 얘기해 주세요.",
+        "그건 좀 부담스러워요.", "저는 주말엔 주로 집에서 쉬어요. 그쪽은요?"]
+_EVALS: Dict[str, Dict[str, Any]] = {}
+
+def _eval(text: str) -> Dict[str, Any]:
+    """세션 기록에 저장되는 모양 (SessionStore.TurnRecord.to_eval 과 같은 키)."""
+    if text not in _EVALS:
+        ev = finalize_eval(heuristic_evaluate(text), text, "휴리스틱")
+        _EVALS[text] = {"scores": ev["scores"], "feedback": ev["feedback"], "total": ev["total"],
+                        "__eval_target": ev["__eval_target"], "__engine": ev["__engine"]}
+    return _EVALS[text]
+
+def synth(n: int, seed: int = 0, rounds: int = 6) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for uid in range(n):
+        scenario, difficulty = rng.choice(SCENARIOS), rng.choice(DIFFICULTIES)
+        profile = make_profile(rng, uid % 500)       # 같은 사용자가 여러 번 연습한다
+        persona = rng.choice(PERSONAS)
+        messages = [{"role": "system", "content": build_system_prompt(profile, scenario, difficulty)}]
+        evals, latency = [], []
+        for t in range(rng.randint(2, rounds)):
+            user = next_utterance(rng, persona, profile, t, "generated")
+            messages += [{"role": "user", "content": user}, {"role": "assistant", "content": rng.choice(_NPC)}]
+            evals.append(json.loads(json.dumps(_eval(user))))
+            latency.append({"npc_s": round(rng.uniform(0.5, 4), 3), "eval_s": round(rng.uniform(0.01, 2), 3)})
+        ts = 1_700_000_000 + uid * 600
+        yield {
+            "meta": {"started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)), "model": "gemma3:4b",
+                     "temperature": 0.6, "rounds": rounds, "difficulty": difficulty, "scenario": scenario,
+                     "eval_mode": "휴리스틱", "eval_model": "", "ended_at": time.strftime("%Y-%m-%d %H:%M:%S",
+                                                                                      time.localtime(ts + 300))},
+            "profile": profile, "messages": messages, "scores": evals, "latency": latency,
+            "summary": summarize_overall(evals),
+        }
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def old_load(src: str) -> np.ndarray:
+    """예전 방식: 파일마다 json.load → 턴 점수 행렬."""
+    rows: List[List[float]] = []
+    for name in sorted(os.listdir(src)):
+        with open(os.path.join(src, name), encoding="utf-8") as f:
+            data = json.load(f)
+        rows.extend([ev["scores"][k] for k in RUBRIC] for ev in data["scores"])
+    return np.array(rows, dtype=np.float32)
+
+def main():
+    ap = argparse.ArgumentParser(description="세션 기록 아카이브: 변환/로드 속도와 크기")
+    ap.add_argument("--sessions", type=int, default=5000)
+    ap.add_argument("--codec", default="auto", choices=["auto", "zstd", "gzip"])
+    ap.add_argument("--direct", action="store_true", help="JSON 파일 없이 합성 세션을 바로 아카이브에 쓴다")
+    ap.add_argument("--check", type=int, default=200, help="복원 확인할 표본 세션 수")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, out = os.path.join(tmp, "exports"), os.path.join(tmp, "archive")
+        if args.direct:
+            t0 = time.perf_counter()
+            with ArchiveWriter(out, args.codec) as w:
+                for data in synth(args.sessions):
+                    w.add(data)
+            print(f"합성+쓰기 {args.sessions:,}세션: {time.perf_counter() - t0:.2f}s")
+            json_bytes, old = None, None
+        else:
+            os.makedirs(src)
+            for i, data in enumerate(synth(args.sessions)):
+                with open(os.path.join(src, f"date_sim_{i:07d}.json"), "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            json_bytes = _dir_bytes(src)
+            t0 = time.perf_counter()
+            old = old_load(src)
+            t_old = time.perf_counter() - t0
+            print(f"예전 방식 (json.load × {args.sessions:,}): {t_old:.2f}s · {json_bytes / 1e6:.1f}MB")
+            res = convert([src], out, args.codec)
+            print(f"변환: {res['convert_s']:.2f}s ({res['codec']})")
+
+        arch_bytes = _dir_bytes(out)
+        t0 = time.perf_counter()
+        r = ArchiveReader(out)
+        scores, total = r.score_matrix()
+        t_mmap = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        n_stream = 0
+        for chunk in r.iter_score_chunks():
+            s, _ = decode_scores(chunk)
+            n_stream += len(s)
+        t_stream = time.perf_counter() - t0
+        print(f"아카이브 점수 로드: mmap {t_mmap * 1000:.1f}ms · 흘려 읽기 {t_stream * 1000:.1f}ms "
+              f"({len(total):,}턴) · {arch_bytes / 1e6:.1f}MB"
+              + (f" (JSON 대비 {json_bytes / arch_bytes:.1f}배 작음)" if json_bytes else ""))
+        if old is not None:
+            assert np.allclose(old, scores), "점수 열이 원본과 다름"
+            print(f"속도: 예전 대비 x{t_old / t_mmap:,.0f}")
+
+        # 표본 복원
+        rnd = random.Random(1)
+        picks = sorted(rnd.sample(range(len(r)), min(args.check, len(r))))
+        originals = dict(zip(picks, (d for i, d in enumerate(synth(max(picks) + 1)) if i in set(picks))))
+        t0 = time.perf_counter()
+        bad = [i for i in picks if r.session(i) != originals[i]]
+        t_one = (time.perf_counter() - t0) / len(picks)
+        print(f"세션 복원: {len(picks)}개 중 불일치 {len(bad)} · 세션당 {t_one * 1000:.2f}ms (임의 접근, 프레임 풀기 포함)")
+        if bad:
+            raise SystemExit(f"❌ 복원 불일치: 세션 {bad[:5]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# bench_features.py
+# 실행: python bench_features.py [--n 200000]
+# 특징 행렬 경로(features.feature_matrix + score_matrix)가 스칼라 경로(extract_signals + heuristic_scores)와
+# 점수가 완전히 같은지 확인하고 처리량을 비교한다. 가중치 재학습이 기본 가중치를 되찾는지도 본다.
+# (같은 parity 검사는 test_features.py 에서 작은 크기로 pytest 가 돌린다)
+
+import argparse
+import time
+
+import numpy as np
+
+from bench_heuristics import make_corpus, make_fuzz
+from features import (
+    DEFAULT_WEIGHTS, SCORE_KEYS, feature_matrix, fit_report, fit_weights, scalar_feature_matrix, score_matrix,
+)
+from scoring import extract_signals, heuristic_scores
+
+def scalar_scores(corpus):
+    rows = (heuristic_scores(extract_signals(u)) for u in corpus)
+    return np.array([[d[k] for k in SCORE_KEYS] for d in rows])
+
+def check_parity(corpus, label: str):
+    X_batch = feature_matrix(corpus, dedupe=False)
+    X_scalar = scalar_feature_matrix(corpus)
+    bad = np.flatnonzero((X_batch != X_scalar).any(axis=1))
+    if len(bad):
+        raise SystemExit(f"❌ 특징 parity 실패 ({label}) {len(bad)}건, 예: {corpus[bad[0]]!r}")
+    bad = np.flatnonzero((score_matrix(X_batch) != scalar_scores(corpus)).any(axis=1))
+    if len(bad):
+        raise SystemExit(f"❌ 점수 parity 실패 ({label}) {len(bad)}건, 예: {corpus[bad[0]]!r}")
+    print(f"✅ parity OK ({label} {len(corpus)}개)")
+
+def main():
+    ap = argparse.ArgumentParser(description="특징 행렬 채점 parity 확인 + 처리량 비교")
+    ap.add_argument("--n", type=int, default=200000, help="코퍼스 발화 수")
+    ap.add_argument("--parity-n", type=int, default=20000, help="parity 확인 발화 수 (코퍼스/퍼즈 각각)")
+    args = ap.parse_args()
+
+    check_parity(make_corpus(args.parity_n), "코퍼스")
+    check_parity(make_fuzz(args.parity_n), "퍼즈")
+
+    corpus = make_corpus(args.n)
+    fuzz = make_fuzz(args.n, seed=2)   # 중복이 거의 없는 입력
+    n_scalar = min(args.n, 20000)
+    t0 = time.perf_counter()
+    scalar_scores(corpus[:n_scalar])
+    t_scalar = (time.perf_counter() - t0) / n_scalar
+    print(f"스칼라:          {1 / t_scalar:>11,.0f} 발화/s")
+    for label, data, dedupe in (("행렬", corpus, True), ("행렬(중복제거X)", corpus, False), ("행렬(퍼즈)", fuzz, True)):
+        t0 = time.perf_counter()
+        X = feature_matrix(data, dedupe=dedupe)
+        t1 = time.perf_counter()
+        score_matrix(X)
+        t2 = time.perf_counter()
+        print(f"{label:<15} {len(data) / (t2 - t0):>11,.0f} 발화/s  "
+              f"(추출 {t1 - t0:.3f}s · 점수 {t2 - t1:.3f}s, 스칼라 대비 x{t_scalar * len(data) / (t2 - t0):.1f})")
+
+    # 재학습 확인: 기본 점수(정수로 반올림 = LLM 라벨 흉내)를 라벨로 주면 기본 가중치 근처로 돌아와야 한다
+    X = feature_matrix(corpus[:50000])
+    Y = np.rint(score_matrix(X))
+    fitted = fit_weights(X, Y)
+    print("재학습 MAE  기본:", fit_report(X, Y, DEFAULT_WEIGHTS))
+    print("재학습 MAE  추정:", fit_report(X, Y, fitted))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# bench_heuristics.py
+# 실행: python bench_heuristics.py [--n 20000]
+# 사전 컴파일 휴리스틱(scoring.heuristic_evaluate)이 기존 구현과 결과가 완전히 같은지 확인하고 속도를 비교한다.
+# (같은 parity 검사는 test_scoring.py 에서 작은 크기로 pytest 가 돌린다)
+
+import argparse
+import random
+import re
+import time
+from typing import Dict, Any, List
+
+from scoring import LEXICONS, heuristic_evaluate
+
+# ================== 기존 구현(기준) — 1.py 에 있던 코드 그대로 ==================
+def legacy_heuristic_evaluate(user_msg: str) -> Dict[str, Any]:
+    txt = (user_msg or "").strip()
+    low = txt.lower()
+
+    tokens = re.findall(r"[가-힣A-Za-z0-9]+", low)
+    n_tokens = len(tokens)
+    n_chars = len(txt)
+
+    n_q = txt.count("?")
+    n_exc = txt.count("!")
+    n_ellipsis = txt.count("…") + txt.count("...")
+
+    cap_tokens = [t for t in re.findall(r"[A-Za-z]+", txt) if len(t) >= 3]
+    all_caps_ratio = (len([t for t in cap_tokens if t.isupper()]) / len(cap_tokens)) if cap_tokens else 0.0
+
+    emoji_like = bool(re.search(r"[😊😂🤣😍😘🥰🙌👍✨❤💕💘😉😅🙏]|[^\w\s][\)D]|[~]{2,}", txt))
+
+    is_very_short = n_chars < 8
+    is_long = n_chars > 120
+    has_sentences = len(re.split(r"[.!?？！。…]+", txt)) >= 2
+
+    softeners = ["혹시", "괜찮다면", "실례지만", "가능할까요", "바쁘시면", "천천히", "부탁", "고맙", "감사", "죄송", "미안"]
+    empathy_pos = ["좋", "재밌", "대단", "멋지", "축하", "응원", "이해", "그렇군", "알겠", "수고", "고생"]
+    empathy_reflect = ["말씀", "얘기", "이야기", "포인트", "공감", "맞아요", "맞다", "그렇죠"]
+
+    curiosity_words = ["왜", "언제", "어디", "무엇", "무슨", "어떤", "어떻게", "어때", "가능할까요", "물어봐도"]
+    question_suffix = bool(re.search(r"(나요|니요|죠\?|지요\?)$", low))
+
+    boundary_bad = ["카톡아이디", "카카오톡", "집주소", "만나자지금", "지금만나", "번호줘", "연락처줘", "숙소", "방잡", "술자리 강요"]
+    red_flags = ["싫", "꺼져", "닥쳐", "미친", "뭐래", "멍청", "병신", "야 ", "돈자랑"]
+
+    # ---------- 반말/무례 톤 감지(정중함 감점용) ----------
+    honorific_markers = ["요", "입니다", "합니다", "하세요", "십시오", "합니까", "해요", "드립니다"]
+    honorific_hits = sum(1 for m in honorific_markers if m in txt)
+
+    banmal_patterns = [
+        r"[가-힣A-Za-z0-9]+다$", r"[가-힣]+해$", r"[가-힣]+해\?", r"[가-힣]+해라$", r"[가-힣]+해봐$",
+        r"[가-힣]+해줘$", r"[가-힣]+해줄래", r"[가-힣]+냐\?$", r"[가-힣]+니\?$", r"[가-힣]+해라\?$",
+        r".*빨리.*", r".*지금.*해$", r".*와라$", r".*보자$"
+    ]
+    banmal_hit = any(re.search(p, txt) for p in banmal_patterns)
+
+    # ✅ '야' 단독/변형(야?, 야!! 등) 강력 감지 + 문장 내 포함 케이스
+    rude_vocative_regex = r"^\s*야+[!?.]?\s*$"
+    rude_vocatives_inline = ["야 ", "야,", "야?", "야!"]
+    rude_vocative_hit = bool(re.search(rude_vocative_regex, txt)) or any(rv in txt for rv in rude_vocatives_inline)
+
+    # ---------- 점수 산정 ----------
+    def clamp01(x): return max(0.0, min(1.0, x))
+    def to10(x): return round(10 * clamp01(x), 1)
+
+    # 공감
+    emp_score = 0.0
+    emp_score += 0.6 * sum(1 for k in empathy_pos if k in low)
+    emp_score += 0.7 * sum(1 for k in empathy_reflect if k in low)
+    emp_score += 0.5 * sum(1 for k in softeners if k in low)
+    emp_score += 0.4 if emoji_like else 0.0
+    emp_score -= 0.2 * max(0, n_exc - 2)
+
+    # 호기심
+    cur_score = 0.0
+    cur_score += 0.9 if n_q >= 1 else 0.0
+    cur_score += 0.6 * sum(1 for k in curiosity_words if k in low)
+    cur_score += 0.6 if question_suffix else 0.0
+    cur_score -= 0.2 * max(0, n_q - 2)
+
+    # 명료성
+    cla_score = 0.0
+    if is_very_short: cla_score += 0.3
+    elif is_long:     cla_score += 0.6
+    else:             cla_score += 1.0
+    cla_score += 0.4 if has_sentences else 0.0
+    cla_score -= 0.3 * (1 if n_ellipsis >= 1 else 0)
+    cla_score -= 0.3 * max(0, n_exc - 1)
+    cla_score -= 1.0 * clamp01(all_caps_ratio)
+
+    # 정중함 (기본치)
+    polite_score = 1.5
+    polite_score += 0.2 * sum(1 for k in softeners if k in low)
+    polite_score -= 1.2 * sum(1 for k in boundary_bad if k in low)
+    if re.search(r"(지금|바로|당장).*(만나|오|보자)", low): polite_score -= 1.0
+    if re.search(r"(우리집|내방|호텔|모텔)", low):          polite_score -= 1.0
+
+    # ✅ 정중함 페널티 강화
+    if rude_vocative_hit:
+        polite_score -= 1.5            # '야' 단독 등 강한 감점
+    if banmal_hit:
+        polite_score -= 1.2
+    if honorific_hits == 0 and n_chars <= 3:
+        polite_score -= 0.9            # 아주 짧은 반말/명령형
+    if honorific_hits == 0 and n_chars >= 8:
+        polite_score -= 0.6            # 평문인데 존댓말 흔적 전무
+
+    # 레드플래그
+    red_score = 0.0
+    red_score += 1.5 * sum(1 for k in red_flags if k in low)
+    red_score += 0.8 * max(0, n_exc - 2)
+    red_score += 1.0 * clamp01(all_caps_ratio * 2)
+
+    emp = to10(emp_score / 4.0)
+    cur = to10(cur_score / 3.0)
+    cla = to10(cla_score / 2.2)
+    polite = to10(polite_score / 2.0)
+    red = to10(red_score / 4.0)
+
+    scores = {"공감": emp, "호기심": cur, "명료성": cla, "정중함": polite, "레드플래그": red}
+
+    strengths, improvements = [], []
+    if emp >= 7: strengths.append("상대의 포인트를 인정·반영하는 표현이 좋아요.")
+    if cur >= 7: strengths.append("대화를 확장하는 질문이 자연스럽습니다.")
+    if cla >= 7: strengths.append("문장이 간결하고 읽기 쉬워요.")
+    if polite >= 7: strengths.append("존중감 있는 어투로 예의를 잘 지켰어요.")
+
+    if emp < 7:
+        improvements.append("공감 1구(“말씀 듣고 보니 공감돼요”) 후 관련 질문 1개로 이어보세요.")
+    if cur < 7:
+        improvements.append("문장 끝에 구체 질문 1개만 덧붙여 대화를 확장해 보세요.")
+    if cla < 7:
+        if is_long and not has_sentences:
+            improvements.append("길다면 문장을 나누고 생략부호/느낌표를 줄여 가독성을 높이세요.")
+        elif is_very_short:
+            improvements.append("핵심 정보(언제/어디/무엇)를 1–2개만 보강해 주세요.")
+        else:
+            improvements.append("짧은 문장 1–2개로 정리하고 생략부호/느낌표를 줄여보세요.")
+    if polite < 7:
+        improvements.append("존댓말(요/습니다)과 완곡한 표현을 사용해 톤을 부드럽게 해보세요.")
+        if rude_vocative_hit or banmal_hit or honorific_hits == 0:
+            improvements.append("반말/명령형을 피하고 “혹시…”, “괜찮으시면…” 같은 완곡어를 활용하세요.")
+    if red >= 4:
+        improvements.append("강한 단어·올캡·느낌표 남용을 피하고 톤을 부드럽게 하세요.")
+
+    candidates = [t for t in tokens if 2 <= len(t) <= 10]
+    keyword = candidates[0] if candidates else "이야기"
+    tip = f"'{keyword}'를 받아 한 문장으로: 공감 1구 → 존댓말 질문 1개."
+    rewrite_example = f"“{keyword}” 말씀 공감돼요. 혹시 {keyword}에서 가장 좋았던 점은 무엇이었나요?"
+
+    return {
+        "scores": scores,
+        "feedback": {
+            "strengths": strengths[:3],
+            "improvements": improvements[:3],
+            "tip": tip,
+            "rewrite_example": rewrite_example,
+        },
+        "signals": {},
+    }
+
+# ================== 코퍼스 ==================
+_SAMPLES = [
+    "안녕하세요! 혹시 주말에 뭐 하셨어요?",
+    "야", "야!!", "야 빨리 와라", "지금 만나자", "번호줘", "우리집 갈래?",
+    "말씀 듣고 보니 정말 공감돼요. 어떤 영화 좋아하세요?",
+    "ㅋㅋ 그렇군요~~ 저도 카페 좋아해요 :)",
+    "OMG THAT IS SO COOL!!! 대박!!!",
+    "음… 잘 모르겠어요...",
+    "저는 개발자로 일하고 있습니다. 요즘은 Python 이랑 React 를 주로 합니다.",
+    "싫어 꺼져", "뭐래 멍청하게", "괜찮다면 다음에 천천히 같이 산책 가능할까요?",
+    "고생 많으셨어요. 축하드려요! 응원할게요 😊",
+    "어디 살아? 몇 살이야?", "이거 해줘", "그거 해봐", "밥 먹었냐?", "뭐 하니?",
+    "", "   ", "ok", "Hello there, how are you?", "카톡아이디 알려주세요",
+]
+
+def make_corpus(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    out = list(_SAMPLES)
+    while len(out) < n:
+        k = rng.randint(1, 4)
+        out.append(" ".join(rng.choice(_SAMPLES) for _ in range(k)))
+    return out[:n]
+
+def make_fuzz(n: int, seed: int = 1) -> List[str]:
+    # 사전 어휘 조각 + 패턴 경계 문자를 섞은 무작위 문자열 (겹치는 키워드/끝맺음 경계 검증용)
+    rng = random.Random(seed)
+    frags = [w for words in LEXICONS.values() for w in words]
+    alpha = sorted({c for w in frags for c in w} | set("다해라봐줘냐니?!.… 지금빨리와보자AB~)\n"))
+    return [
+        "".join(rng.choice(alpha) if rng.random() < 0.6 else rng.choice(frags) for _ in range(rng.randint(0, 30)))
+        for _ in range(n)
+    ]
+
+def _bench(fn, corpus: List[str]) -> float:
+    t0 = time.perf_counter()
+    for u in corpus:
+        fn(u)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="휴리스틱 평가 parity 확인 + 마이크로벤치마크")
+    ap.add_argument("--n", type=int, default=20000, help="코퍼스 발화 수")
+    args = ap.parse_args()
+
+    corpus = make_corpus(args.n)
+    mismatches = [u for u in corpus + make_fuzz(args.n) if heuristic_evaluate(u) != legacy_heuristic_evaluate(u)]
+    if mismatches:
+        raise SystemExit(f"❌ parity 실패 {len(mismatches)}건, 예: {mismatches[0]!r}")
+    print(f"✅ parity OK ({len(corpus)} 발화 + 퍼즈 {args.n}개)")
+
+    t_old = _bench(legacy_heuristic_evaluate, corpus)
+    t_new = _bench(heuristic_evaluate, corpus)
+    print(f"기존:   {len(corpus) / t_old:,.0f} 발화/s")
+    print(f"컴파일: {len(corpus) / t_new:,.0f} 발화/s  (x{t_old / t_new:.2f})")
+
+if __name__ == "__main__":
+    main()
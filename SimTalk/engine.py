@@ -0,0 +1,171 @@
+# engine.py
+# SimTalk 대화 엔진: NPC 응답/기록 요약/턴 평가 (Streamlit 없이 import 가능)
+# 1.py 는 사이드바 설정값을 인자로 넘겨 쓰고, loadtest.py 는 브라우저 없이 같은 경로를 그대로 돈다.
+# slot 인자는 Ollama 호출을 감쌀 컨텍스트 매니저 팩토리 (common.scheduler 슬롯 등).
+# Ollama 호출은 모두 common.transport 를 거친다 (live / record / replay).
+# trace 인자(common.metrics.Trace)가 있으면 단계별 구간과 Ollama 타이밍/토큰 필드를 남긴다.
+# ※ common/ 패키지를 쓰므로 호출 측에서 저장소 루트를 sys.path 에 넣어 둬야 한다.
+
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Any, List, Iterator, Optional
+
+from common.metrics import Trace
+from common.scheduler import PRIORITY_EVAL, RequestScheduler
+from common.transport import get_transport
+from history import extractive_summary
+from scoring import cascade_evaluate, finalize_eval, heuristic_evaluate, llm_evaluate
+
+Message = Dict[str, str]
+Slot = Optional[Callable[[], ContextManager]]
+
+def _enter(slot: Slot) -> ContextManager:
+    return slot() if slot is not None else nullcontext()
+
+def ollama_available() -> bool:
+    # 재생(replay) 모드면 ollama/모델 없이도 응답할 수 있다
+    return get_transport().available()
+
+# ================== NPC 응답 생성 ==================
+def npc_error_message(e: Exception, model: str) -> str:
+    hint = f"모델이 로컬에 없을 수 있어요. 터미널에서 `ollama pull {model}` 후 다시 시도해보세요."
+    return f"(모델 오류) 간단히 이어갈게요. 요즘 어떻게 지내셨어요?\n\n— 에러: {e}\n— 힌트: {hint}"
+
+def npc_options(temperature: float, num_ctx: Optional[int]) -> Dict[str, Any]:
+    opts: Dict[str, Any] = {"temperature": float(temperature)}
+    if num_ctx:
+        opts["num_ctx"] = int(num_ctx)
+    return opts
+
+def npc_reply(messages: List[Message], model: str, temperature: float, num_ctx: Optional[int] = None,
+              keep_alive=None, timing: Optional[Dict[str, Any]] = None, slot: Slot = None,
+              trace: Optional[Trace] = None) -> str:
+    if not ollama_available():
+        return "저는 시뮬레이터 NPC예요. (Ollama 미동작) — 요즘 어떤 취미 즐기세요?"
+
+    try:
+        t0 = time.perf_counter()
+        with _enter(slot):
+            if trace is not None:
+                trace.add("npc_queue", time.perf_counter() - t0)
+            resp = get_transport().chat(
+                model=model,
+                messages=messages,
+                options=npc_options(temperature, num_ctx),
+                keep_alive=keep_alive,
+            )
+        if timing is not None:
+            timing["prompt_eval_count"] = resp.get("prompt_eval_count")
+        if trace is not None:
+            trace.record_ollama("npc", resp)
+        return resp["message"]["content"].strip()
+    except Exception as e:
+        if timing is not None:
+            timing["error"] = str(e)
+        return npc_error_message(e, model)
+
+def npc_reply_stream(messages: List[Message], model: str, temperature: float, timing: Dict[str, Any],
+                     num_ctx: Optional[int] = None, keep_alive=None, slot: Slot = None,
+                     trace: Optional[Trace] = None) -> Iterator[str]:
+    """
+    npc_reply의 스트리밍 버전. 토큰 조각을 생성되는 대로 yield 한다.
+    - timing에 ttft(첫 토큰까지 초), total(전체 초), error, prompt_eval_count를 기록
+    - 첫 토큰 전에 실패하면 npc_reply와 같은 오류 안내문으로 대체
+    - 스트림 도중 끊기면 받은 부분은 살리고 안내 한 줄만 덧붙임
+    """
+    timing.update({"ttft": None, "total": None, "error": None})
+    t0 = time.perf_counter()
+    try:
+        if not ollama_available():
+            yield npc_reply(messages, model, temperature)
+            return
+        # 스트림이 끝날 때까지 슬롯을 잡고 있는다 (생성 중인 동안 서버 병렬 슬롯을 쓰므로)
+        with _enter(slot):
+            if trace is not None:
+                trace.add("npc_queue", time.perf_counter() - t0)
+            stream = get_transport().chat(
+                model=model,
+                messages=messages,
+                options=npc_options(temperature, num_ctx),
+                keep_alive=keep_alive,
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.get("done"):
+                    timing["prompt_eval_count"] = chunk.get("prompt_eval_count")
+                    if trace is not None:
+                        trace.record_ollama("npc", chunk)
+                piece = chunk["message"]["content"]
+                if not piece:
+                    continue
+                if timing["ttft"] is None:
+                    timing["ttft"] = time.perf_counter() - t0
+                yield piece
+    except Exception as e:
+        timing["error"] = str(e)
+        if timing["ttft"] is None:
+            yield npc_error_message(e, model)
+        else:
+            yield "\n\n(응답이 중간에 끊겼어요. 이어서 말씀해 주세요.)"
+    finally:
+        timing["total"] = time.perf_counter() - t0
+
+# ================== 대화 기록 요약 ==================
+def summarize_history(prev_summary: str, new_msgs: List[Message], model: str,
+                      keep_alive=None, slot: Slot = None, trace: Optional[Trace] = None) -> str:
+    """창 밖으로 밀려난 턴만 이전 요약에 합친다 (LLM, 실패 시 첫 문장 발췌)."""
+    if not ollama_available():
+        return extractive_summary(prev_summary, new_msgs)
+    convo = "\n".join(f"{'사용자' if m['role'] == 'user' else '상대'}: {m['content']}" for m in new_msgs)
+    prompt = f"""다음은 대화의 이전 요약과 그 뒤에 이어진 대화야.
+둘을 합쳐 사실(이름, 관심사, 약속, 감정 흐름) 위주로 5문장 이내 한국어 요약만 출력해.
+
+[이전 요약]
+{prev_summary or "(없음)"}
+
+[이어진 대화]
+{convo}
+"""
+    try:
+        with (trace.span("summary") if trace is not None else nullcontext()), _enter(slot):
+            resp = get_transport().chat(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                options={"temperature": 0.2, "num_predict": 256},
+                keep_alive=keep_alive,
+            )
+        if trace is not None:
+            trace.record_ollama("summary", resp)
+        return resp["message"]["content"].strip() or extractive_summary(prev_summary, new_msgs)
+    except Exception:
+        return extractive_summary(prev_summary, new_msgs)
+
+# ================== 턴 평가 ==================
+# 평가 엔진: 자동 = LLM 먼저(실패 시 휴리스틱) / 단계별 = 휴리스틱 먼저, 애매할 때만 LLM (scoring.cascade_evaluate)
+EVAL_MODES = ["자동", "단계별", "LLM", "휴리스틱"]
+
+def use_llm_eval(eval_mode: str) -> bool:
+    return (eval_mode == "LLM") or (eval_mode == "자동" and ollama_available())
+
+def evaluate_turn(user_msg: str, npc_msg: str, difficulty: str, model: str, eval_mode: str,
+                  cache=None, keep_alive=None, scheduler: Optional[RequestScheduler] = None,
+                  session: str = "", trace: Optional[Trace] = None,
+                  cascade: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    평가는 항상 사용자 발화 대상. model 은 평가 모델 (NPC 모델보다 작은 모델을 따로 줘도 된다).
+    스케줄러 대기열이 길면(배압) LLM 대신 휴리스틱. cascade 는 단계별 모드 설정 (scoring.CASCADE_DEFAULTS 덮어쓰기).
+    """
+    trace = trace if trace is not None else Trace()
+    slot = (lambda: scheduler.slot(session, PRIORITY_EVAL)) if scheduler is not None else None
+    with trace.span("eval"):
+        if eval_mode == "단계별":
+            allow = lambda: ollama_available() and not (scheduler is not None and scheduler.should_degrade(PRIORITY_EVAL))
+            return cascade_evaluate(user_msg, npc_msg, difficulty, model, cache=cache, keep_alive=keep_alive,
+                                    cfg=cascade, slot=slot, trace=trace, allow_llm=allow)
+        if use_llm_eval(eval_mode) and not (scheduler is not None and scheduler.should_degrade(PRIORITY_EVAL)):
+            data = llm_evaluate(user_msg, npc_msg, difficulty, model, cache=cache, keep_alive=keep_alive,
+                                slot=slot, trace=trace)
+            if data is not None:
+                return finalize_eval(data, user_msg, "LLM")
+        with trace.span("eval_heuristic"):
+            return finalize_eval(heuristic_evaluate(user_msg), user_msg, "휴리스틱")
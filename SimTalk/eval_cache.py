@@ -0,0 +1,21 @@
+# eval_cache.py
+# 평가 결과 2단 캐시 (common/tiered_cache.py 의 얇은 래퍼)
+# - 키: 평가 엔진/모델/temperature/프롬프트(또는 발화) + RUBRIC_VERSION 의 sha256
+# - RUBRIC_VERSION 이 바뀌면 예전 버전 레코드는 열 때 삭제
+# - 값은 평가 dict (JSON 으로 저장, 꺼낼 때마다 새 dict)
+# ※ common/ 패키지를 쓰므로 호출 측에서 저장소 루트를 sys.path 에 넣어 둬야 한다.
+
+import json
+import os
+from typing import Optional
+
+from common.tiered_cache import TieredCache
+from scoring import RUBRIC_VERSION
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_cache.sqlite3")
+
+class EvalCache(TieredCache):
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, max_memory: int = 1024,
+                 max_disk: int = 100_000, ttl_s: float = 30 * 24 * 3600):
+        super().__init__(path, "eval_cache", RUBRIC_VERSION, max_memory=max_memory, max_disk=max_disk, ttl_s=ttl_s,
+                         dumps=lambda v: json.dumps(v, ensure_ascii=False), loads=json.loads)
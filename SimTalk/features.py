@@ -0,0 +1,396 @@
+# features.py
+# 휴리스틱 평가의 배치(행렬) 버전: 발화 목록 → 특징 행렬 X → 루브릭 5개 점수 = X·W (열 순서대로 누적) → 0~10
+# - 기본 가중치(DEFAULT_WEIGHTS)는 scoring.heuristic_scores 의 상수 그대로라 점수가 스칼라 경로와 완전히 같다
+#   (parity 확인: python -m pytest test_features.py, 속도 비교: python bench_features.py)
+# - LLM 채점 결과에 맞춰 가중치를 다시 맞출 수 있다:
+#     python batch_eval.py exports/ --out llm_scored/ --mode llm
+#     python features.py fit exports/ --labels llm_scored/results.jsonl --out weights.json
+#     python batch_eval.py exports/ --out rescored/ --weights weights.json
+#
+# 특징 추출은 발화를 한 줄로 이어 붙인 코드포인트 배열에서 글자/어휘 위치를 한꺼번에 찾고,
+# 정규식이 꼭 필요한 신호(반말, 이모티콘의 `[^\w\s][)D]` 등)만 후보 발화에 한해 scoring 의 정규식을 그대로 돌린다.
+
+import argparse
+import json
+import sys
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scoring import (
+    EMOJI_CHARS, LEXICONS, MEET_NOW_WORDS, PRIVATE_PLACES, QUESTION_SUFFIXES, RUBRIC, SENTENCE_END_CHARS,
+    _BANMAL_RE, _EMOJI_RE, _LATIN_WORD_RE, _MEET_NOW_RE, _RUDE_VOCATIVE_RE, extract_signals,
+)
+
+SCORE_KEYS: Tuple[str, ...] = tuple(RUBRIC)
+
+# extract_signals() 의 수치 신호 (keyword 제외)
+SIGNALS: Tuple[str, ...] = (
+    "n_chars", "n_q", "n_exc", "n_ellipsis", "all_caps_ratio", "emoji_like", "has_sentences",
+    "question_suffix", "softeners", "empathy_pos", "empathy_reflect", "curiosity_words", "boundary_bad",
+    "red_flags", "honorific_hits", "banmal_hit", "rude_vocative_hit", "meet_now", "private_place",
+)
+
+# 신호에서 파생한 특징 = 점수식의 항. 순서는 heuristic_scores 의 항 순서를 따른다 (score_matrix 참고)
+FEATURES: Tuple[str, ...] = (
+    "bias", "empathy_pos", "empathy_reflect", "softeners", "emoji", "exc_over2",
+    "q_any", "curiosity_words", "question_suffix", "q_over2",
+    "very_short", "long", "mid_length", "has_sentences", "ellipsis_any", "exc_over1", "caps",
+    "boundary_bad", "meet_now", "private_place", "rude_vocative", "banmal", "no_honorific_tiny",
+    "no_honorific_plain", "red_flags", "caps2",
+)
+
+# 점수 = to10(Σ 가중치×특징 / SCORE_SCALE)
+SCORE_SCALE: Dict[str, float] = {"공감": 4.0, "호기심": 3.0, "명료성": 2.2, "정중함": 2.0, "레드플래그": 4.0}
+
+DEFAULT_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "공감": {"empathy_pos": 0.6, "empathy_reflect": 0.7, "softeners": 0.5, "emoji": 0.4, "exc_over2": -0.2},
+    "호기심": {"q_any": 0.9, "curiosity_words": 0.6, "question_suffix": 0.6, "q_over2": -0.2},
+    "명료성": {"very_short": 0.3, "long": 0.6, "mid_length": 1.0, "has_sentences": 0.4,
+              "ellipsis_any": -0.3, "exc_over1": -0.3, "caps": -1.0},
+    "정중함": {"bias": 1.5, "softeners": 0.2, "boundary_bad": -1.2, "meet_now": -1.0, "private_place": -1.0,
+              "rude_vocative": -1.5, "banmal": -1.2, "no_honorific_tiny": -0.9, "no_honorific_plain": -0.6},
+    "레드플래그": {"red_flags": 1.5, "exc_over2": 0.8, "caps2": 1.0},
+}
+
+# ================== 신호 → 특징 ==================
+def signal_row(sig: Dict[str, Any]) -> np.ndarray:
+    """extract_signals() 결과 1개를 SIGNALS 순서의 벡터로."""
+    return np.array([float(sig[k]) for k in SIGNALS])
+
+def design_matrix(S: np.ndarray) -> np.ndarray:
+    """신호 행렬(n×SIGNALS) → 특징 행렬(n×FEATURES)."""
+    col = {k: S[:, i] for i, k in enumerate(SIGNALS)}
+    n_chars, n_q, n_exc = col["n_chars"], col["n_q"], col["n_exc"]
+    very_short = n_chars < 8
+    long = n_chars > 120
+    no_hon = col["honorific_hits"] == 0
+    feats = {
+        "bias": np.ones(len(S)),
+        "empathy_pos": col["empathy_pos"],
+        "empathy_reflect": col["empathy_reflect"],
+        "softeners": col["softeners"],
+        "emoji": col["emoji_like"],
+        "exc_over2": np.maximum(0, n_exc - 2),
+        "q_any": n_q >= 1,
+        "curiosity_words": col["curiosity_words"],
+        "question_suffix": col["question_suffix"],
+        "q_over2": np.maximum(0, n_q - 2),
+        "very_short": very_short,
+        "long": long & ~very_short,
+        "mid_length": ~very_short & ~long,
+        "has_sentences": col["has_sentences"],
+        "ellipsis_any": col["n_ellipsis"] >= 1,
+        "exc_over1": np.maximum(0, n_exc - 1),
+        "caps": np.clip(col["all_caps_ratio"], 0.0, 1.0),
+        "boundary_bad": col["boundary_bad"],
+        "meet_now": col["meet_now"],
+        "private_place": col["private_place"],
+        "rude_vocative": col["rude_vocative_hit"],
+        "banmal": col["banmal_hit"],
+        "no_honorific_tiny": no_hon & (n_chars <= 3),
+        "no_honorific_plain": no_hon & (n_chars >= 8),
+        "red_flags": col["red_flags"],
+        "caps2": np.clip(col["all_caps_ratio"] * 2, 0.0, 1.0),
+    }
+    return np.column_stack([np.asarray(feats[k], dtype=np.float64) for k in FEATURES])
+
+# ================== 배치 신호 추출 ==================
+# 어휘 외에 위치를 찾는 글자 (문장부호/이모티콘/접두어 등)
+_SCAN_CHARS = "?!….~)D" + EMOJI_CHARS + SENTENCE_END_CHARS + "야지바당우내호모해빨"
+_SCAN_TABLE = sorted({ord(c) for c in _SCAN_CHARS} | {ord(w[0]) for words in LEXICONS.values() for w in words})
+# 코드포인트 → 찾는 글자 번호 (없으면 255) 조회표
+_SCAN_LUT = np.full(0x110000, 255, dtype=np.uint8)
+_SCAN_LUT[_SCAN_TABLE] = np.arange(len(_SCAN_TABLE))
+
+class _Batch:
+    """발화들을 \\x00 으로 이어 붙인 코드포인트 배열. 위치 → 발화 번호는 owner 배열로."""
+
+    def __init__(self, txts: List[str]):
+        self.txts = txts
+        self.n = len(txts)
+        self.lens = np.fromiter(map(len, txts), dtype=np.int64, count=self.n)
+        self.starts = np.zeros(self.n, dtype=np.int64)
+        if self.n > 1:
+            self.starts[1:] = np.cumsum(self.lens[:-1] + 1)
+        self.ends = self.starts + self.lens
+        joined = "\x00".join(txts).encode("utf-32-le", "surrogatepass")
+        pad = max(len(w) for words in LEXICONS.values() for w in words) + 1
+        # 끝에 0 을 덧대 두면 여러 글자 키워드를 비교할 때 범위 검사가 필요 없다
+        self.cp = np.concatenate([np.frombuffer(joined, dtype="<u4"), np.zeros(pad, dtype="<u4")])
+        self.owner = np.repeat(np.arange(self.n, dtype=np.int32), self.lens + 1)
+        self._first = self._index_first_chars()
+
+    def _index_first_chars(self) -> Dict[int, np.ndarray]:
+        # 찾을 글자(키워드 첫 글자 + 단일 문자 신호)별 위치를 조회표 한 번 + 계수 정렬로 모아 둔다
+        codes = _SCAN_LUT[self.cp]
+        pos = np.flatnonzero(codes != 255)
+        codes = codes[pos]
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(_SCAN_TABLE) + 1))
+        return {c: pos[order[bounds[j]:bounds[j + 1]]] for j, c in enumerate(_SCAN_TABLE)}
+
+    def positions(self, word: str) -> np.ndarray:
+        """word 가 시작하는 모든 위치 (겹침 포함). 키워드에는 \\x00 이 없으니 발화 경계를 넘지 않는다."""
+        pos = self._first.get(ord(word[0]))
+        if pos is None:
+            pos = self._first[ord(word[0])] = np.flatnonzero(self.cp == ord(word[0]))
+        for i, ch in enumerate(word[1:], 1):
+            pos = pos[self.cp[pos + i] == ord(ch)]
+        return pos
+
+    def owners(self, pos: np.ndarray) -> np.ndarray:
+        return self.owner[pos]
+
+    def contains(self, word: str) -> np.ndarray:
+        hit = np.zeros(self.n, dtype=bool)
+        hit[self.owners(self.positions(word))] = True
+        return hit
+
+    def contains_any(self, words: Iterable[str]) -> np.ndarray:
+        hit = np.zeros(self.n, dtype=bool)
+        for w in words:
+            hit |= self.contains(w)
+        return hit
+
+    def count_char(self, ch: str) -> np.ndarray:
+        return np.bincount(self.owners(self.positions(ch)), minlength=self.n)
+
+    def endswith(self, suffix: str) -> np.ndarray:
+        ok = self.lens >= len(suffix)
+        for i, ch in enumerate(suffix):
+            ok &= self.cp[self.ends - len(suffix) + i] == ord(ch)
+        return ok
+
+    def startswith(self, prefix: str) -> np.ndarray:
+        ok = self.lens >= len(prefix)
+        for i, ch in enumerate(prefix):
+            ok &= self.cp[self.starts + i] == ord(ch)
+        return ok
+
+    def refine(self, cand: np.ndarray, test) -> np.ndarray:
+        """후보 발화에만 test(txt) 를 돌려 정확한 값으로."""
+        out = np.zeros(self.n, dtype=bool)
+        for i in np.flatnonzero(cand):
+            out[i] = test(self.txts[i])
+        return out
+
+def _is_hangul(cp: np.ndarray) -> np.ndarray:
+    return (cp >= 0xAC00) & (cp <= 0xD7A3)     # [가-힣]
+
+def _is_ascii_alnum(cp: np.ndarray) -> np.ndarray:
+    low = cp | 0x20
+    return ((low >= ord("a")) & (low <= ord("z"))) | ((cp >= ord("0")) & (cp <= ord("9")))
+
+def _banmal(b: _Batch) -> np.ndarray:
+    """scoring._BANMAL_PATTERNS 를 글자 비교로 (`지금.*해$` 만 후보에 정규식)."""
+    def before(suffix: str) -> np.ndarray:
+        # 접미사 바로 앞 글자 (발화가 접미사뿐이면 0)
+        return np.where(b.lens > len(suffix), b.cp[np.maximum(b.ends - len(suffix) - 1, 0)], 0)
+
+    hit = b.endswith("다") & (_is_hangul(before("다")) | _is_ascii_alnum(before("다")))
+    for suffix in ("해", "해라", "해봐", "해줘", "냐?", "니?", "해라?"):
+        hit |= b.endswith(suffix) & _is_hangul(before(suffix))
+    hit |= b.endswith("와라") | b.endswith("보자") | b.contains("빨리")
+    for word in ("해?", "해줄래"):
+        pos = b.positions(word)
+        pos = pos[_is_hangul(b.cp[pos - 1])]     # 발화 첫 글자면 앞은 구분자(또는 덧댄 0)
+        hit[b.owners(pos)] = True
+    rest = ~hit & b.endswith("해") & b.contains("지금")
+    return hit | b.refine(rest, lambda t: _BANMAL_RE.search(t) is not None)
+
+def _caps_ratio(txt: str) -> float:
+    cap_tokens = _LATIN_WORD_RE.findall(txt)
+    return (sum(1 for t in cap_tokens if t.isupper()) / len(cap_tokens)) if cap_tokens else 0.0
+
+def signals_matrix(txts: List[str]) -> np.ndarray:
+    """strip() 된 발화들 → 신호 행렬(n×SIGNALS). 값은 extract_signals() 와 같다.
+    어휘/문장부호/접미사는 모두 대소문자가 없는 글자라 lower() 없이 원문에서 찾아도 결과가 같다."""
+    b = _Batch(txts)
+    sig: Dict[str, np.ndarray] = {"n_chars": b.lens}
+    sig["n_q"] = b.count_char("?")
+    sig["n_exc"] = b.count_char("!")
+    # "..." 는 str.count 처럼 겹치지 않게 세야 하므로 후보만 직접 센다
+    dots = np.zeros(b.n, dtype=np.int64)
+    for i in np.flatnonzero(b.contains("...")):
+        dots[i] = txts[i].count("...")
+    sig["n_ellipsis"] = b.count_char("…") + dots
+
+    latin = ((b.cp | 0x20) >= ord("a")) & ((b.cp | 0x20) <= ord("z"))
+    has_latin = np.zeros(b.n, dtype=bool)
+    has_latin[b.owners(np.flatnonzero(latin))] = True
+    caps = np.zeros(b.n)
+    for i in np.flatnonzero(has_latin):
+        caps[i] = _caps_ratio(txts[i])
+    sig["all_caps_ratio"] = caps
+
+    emoji = b.contains_any(EMOJI_CHARS) | b.contains("~~")
+    sig["emoji_like"] = emoji | b.refine(~emoji & b.contains_any(")D"), lambda t: _EMOJI_RE.search(t) is not None)
+    sig["has_sentences"] = b.contains_any(SENTENCE_END_CHARS)
+    sig["question_suffix"] = np.logical_or.reduce([b.endswith(s) for s in QUESTION_SUFFIXES])
+
+    for name, words in LEXICONS.items():
+        counts = np.zeros(b.n, dtype=np.int64)
+        for w in words:
+            counts += b.contains(w)
+        sig[name] = counts
+    sig["honorific_hits"] = sig.pop("honorific_markers")
+
+    sig["banmal_hit"] = _banmal(b)
+    sig["rude_vocative_hit"] = (sig.pop("rude_vocatives_inline") > 0) | b.refine(
+        b.startswith("야"), lambda t: _RUDE_VOCATIVE_RE.search(t) is not None)
+    sig["meet_now"] = b.refine(b.contains_any(MEET_NOW_WORDS), lambda t: _MEET_NOW_RE.search(t.lower()) is not None)
+    sig["private_place"] = b.contains_any(PRIVATE_PLACES)
+    return np.column_stack([np.asarray(sig[k], dtype=np.float64) for k in SIGNALS])
+
+def feature_matrix(utterances: Sequence[str], dedupe: bool = True) -> np.ndarray:
+    """발화 목록 → 특징 행렬(n×FEATURES). dedupe 면 같은 발화는 한 번만 추출."""
+    txts = [(u or "").strip() for u in utterances]
+    if not txts:
+        return np.zeros((0, len(FEATURES)))
+    if not dedupe:
+        return design_matrix(signals_matrix(txts))
+    index: Dict[str, int] = {}
+    inv = np.fromiter((index.setdefault(t, len(index)) for t in txts), dtype=np.int64, count=len(txts))
+    return design_matrix(signals_matrix(list(index)))[inv]
+
+def scalar_feature_matrix(utterances: Sequence[str]) -> np.ndarray:
+    """기준 경로: 발화마다 extract_signals() → 특징 (parity 확인용)."""
+    if not utterances:
+        return np.zeros((0, len(FEATURES)))
+    return design_matrix(np.vstack([signal_row(extract_signals(u)) for u in utterances]))
+
+# ================== 점수 ==================
+def weight_matrix(weights: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+    weights = weights or DEFAULT_WEIGHTS
+    W = np.zeros((len(FEATURES), len(SCORE_KEYS)))
+    for j, key in enumerate(SCORE_KEYS):
+        for feat, w in weights.get(key, {}).items():
+            W[FEATURES.index(feat), j] = w
+    return W
+
+def _round1(v: np.ndarray) -> np.ndarray:
+    """파이썬 round(v, 1) 과 같은 결과 (v 의 정확한 이진값 기준, 동률이면 짝수 쪽).
+    np.round 는 v*10 을 먼저 반올림하므로 그 곱이 딱 .5 로 떨어질 때만 곱의 오차 부호로 방향을 정한다."""
+    y = v * 10
+    # Dekker TwoProduct: v*10 의 반올림 오차 (정확히 계산됨)
+    c = 134217729.0 * v
+    hi = c - (c - v)
+    err = (hi * 10 - y) + (v - hi) * 10
+    lo = np.floor(y)
+    k = np.rint(y)
+    tie = (y - lo) == 0.5
+    k = np.where(tie & (err > 0), lo + 1, np.where(tie & (err < 0), lo, k))
+    return k / 10
+
+def score_matrix(X: np.ndarray, weights: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+    """특징 행렬 → 점수 행렬(n×SCORE_KEYS, 0~10, 소수 1자리).
+    X @ W 와 같지만 특징 열 순서대로 더해서 부동소수 누적 순서가 heuristic_scores 와 같다 (기본 가중치면 비트 단위 동일)."""
+    W = weight_matrix(weights)
+    Xt = np.ascontiguousarray(X.T)
+    raw = np.zeros((len(SCORE_KEYS), len(X)))
+    for j in range(len(SCORE_KEYS)):
+        for i in np.flatnonzero(W[:, j]):
+            raw[j] += Xt[i] * W[i, j]
+    scale = np.array([SCORE_SCALE[k] for k in SCORE_KEYS])[:, None]
+    return _round1(10 * np.clip(raw / scale, 0.0, 1.0)).T
+
+def score_dicts(scores: np.ndarray) -> List[Dict[str, float]]:
+    return [dict(zip(SCORE_KEYS, map(float, row))) for row in scores]
+
+def matrix_evaluate(utterances: Sequence[str], weights: Optional[Dict[str, Dict[str, float]]] = None) -> List[Dict[str, float]]:
+    """heuristic_scores(extract_signals(u)) 의 배치 버전 (피드백 문구 없이 점수만)."""
+    return score_dicts(score_matrix(feature_matrix(utterances), weights))
+
+# ================== 가중치 재학습 ==================
+def fit_weights(X: np.ndarray, Y: np.ndarray, l2: float = 1e-3, free: bool = False,
+                iters: int = 100) -> Dict[str, Dict[str, float]]:
+    """
+    LLM 점수(Y: n×SCORE_KEYS, 0~10)에 맞춰 점수별 가중치를 릿지 최소제곱으로 다시 구한다.
+    - 목표값은 Y/10×SCORE_SCALE (to10 의 역)
+    - 0/10 은 잘린 값이라 "그 이하/이상"으로만 본다: 예측이 이미 경계 밖이면 그 행은 목표를 예측값으로 바꿔 다시 푼다
+    - free=False 면 기본 가중치에 있는 항(+bias)만 쓴다 → 식 모양 유지, 과적합 방지
+    """
+    out: Dict[str, Dict[str, float]] = {}
+    for j, key in enumerate(SCORE_KEYS):
+        used = [i for i, f in enumerate(FEATURES) if free or f == "bias" or f in DEFAULT_WEIGHTS[key]]
+        A = X[:, used]
+        t0 = Y[:, j] / 10.0 * SCORE_SCALE[key]
+        t = t0
+        # [A; √l2·I] w = [t; 0]  (릿지)
+        A_aug = np.vstack([A, np.sqrt(l2) * np.eye(len(used))])
+        for _ in range(max(1, iters)):
+            w, *_ = np.linalg.lstsq(A_aug, np.concatenate([t, np.zeros(len(used))]), rcond=None)
+            pred = A @ w
+            t_next = np.where((Y[:, j] >= 10) & (pred > t0), pred, np.where((Y[:, j] <= 0) & (pred < t0), pred, t0))
+            if np.allclose(t_next, t, atol=1e-6):
+                break
+            t = t_next
+        out[key] = {FEATURES[i]: round(float(c), 4) for i, c in zip(used, w) if abs(c) >= 1e-4}
+    return out
+
+def fit_report(X: np.ndarray, Y: np.ndarray, weights: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, float]:
+    """점수별 평균 절대 오차(MAE)."""
+    err = np.abs(score_matrix(X, weights) - Y).mean(axis=0) if len(X) else np.zeros(len(SCORE_KEYS))
+    return {k: round(float(e), 3) for k, e in zip(SCORE_KEYS, err)}
+
+def save_weights(path: str, weights: Dict[str, Dict[str, float]], meta: Optional[Dict[str, Any]] = None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"weights": weights, "meta": meta or {}}, f, ensure_ascii=False, indent=2)
+
+def load_weights(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    weights = data.get("weights", data)
+    unknown = {feat for ws in weights.values() for feat in ws} - set(FEATURES)
+    if unknown or set(weights) - set(SCORE_KEYS):
+        raise ValueError(f"알 수 없는 가중치 키: {sorted(unknown | (set(weights) - set(SCORE_KEYS)))}")
+    return weights
+
+# ================== CLI: LLM 채점 결과로 가중치 맞추기 ==================
+def load_labelled(inputs: List[str], labels_path: str) -> Tuple[List[str], np.ndarray]:
+    """batch_eval --mode llm 결과(results.jsonl)의 LLM 점수와 원본 발화를 (세션, 턴)으로 짝짓는다."""
+    from batch_eval import iter_tasks, iter_turns, load_session
+
+    labels: Dict[Tuple[str, int], Dict[str, float]] = {}
+    with open(labels_path, encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec.get("type") == "turn" and rec.get("engine") == "LLM":
+                labels[(rec["session"], rec["turn"])] = rec["scores"]
+    utts, ys = [], []
+    for task in iter_tasks(inputs):
+        try:
+            data = load_session(task)
+        except Exception:
+            continue
+        for turn_no, (user_msg, _) in enumerate(iter_turns(data.get("messages", [])), 1):
+            scores = labels.get((task[0], turn_no))
+            if scores is not None:
+                utts.append(user_msg)
+                ys.append([float(scores.get(k, 0)) for k in SCORE_KEYS])
+    return utts, np.array(ys).reshape(-1, len(SCORE_KEYS))
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="휴리스틱 특징 행렬 가중치 재학습")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    fit = sub.add_parser("fit", help="LLM 채점 결과에 맞춰 가중치 추정")
+    fit.add_argument("inputs", nargs="+", help="batch_eval 과 같은 입력 (date_sim_*.json 디렉터리/JSONL)")
+    fit.add_argument("--labels", required=True, help="batch_eval --mode llm 의 results.jsonl")
+    fit.add_argument("--out", required=True, help="가중치 JSON 경로")
+    fit.add_argument("--l2", type=float, default=1e-3)
+    fit.add_argument("--free", action="store_true", help="기본 식에 없는 항도 모두 사용")
+    args = ap.parse_args(argv)
+
+    utts, Y = load_labelled(args.inputs, args.labels)
+    if not utts:
+        raise SystemExit("짝지어진 LLM 채점 턴이 없습니다 (--labels 와 입력이 같은 세션인지 확인)")
+    X = feature_matrix(utts)
+    weights = fit_weights(X, Y, args.l2, args.free)
+    before, after = fit_report(X, Y), fit_report(X, Y, weights)
+    save_weights(args.out, weights, {"turns": len(utts), "l2": args.l2, "mae_default": before, "mae_fitted": after})
+    print(f"턴 {len(utts)}개로 학습 → {args.out}", file=sys.stderr)
+    print(json.dumps({"mae_default": before, "mae_fitted": after}, ensure_ascii=False), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
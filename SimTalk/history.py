@@ -0,0 +1,103 @@
+# history.py
+# NPC 에 보내는 대화 기록을 토큰 예산 안으로 관리한다.
+# - 시스템 프롬프트 + 최근 대화는 원문 그대로
+# - 창 밖으로 밀려난 예전 턴은 '롤링 요약'에 접어 넣음 (새로 밀려난 턴만 요약 → 이전 요약에 누적)
+# - 실제 프롬프트 크기로 num_ctx 를 고른다
+# 상태(state)는 {"summary": str, "upto": int, "folded": int} 형태의 평범한 dict 라 st.session_state 에 그대로 둘 수 있다.
+#   upto   : messages 안에서 요약에 접힌 앞쪽 메시지 수
+#   folded : drop_folded() 로 메모리에서 이미 빼 버린 메시지 수 (누적)
+
+import re
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+Message = Dict[str, str]
+Summarizer = Callable[[str, List[Message]], str]
+
+MESSAGE_OVERHEAD = 4          # 역할/구분 토큰 대략치
+_HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_SENTENCE_RE = re.compile(r"[^.!?？！。…\n]+[.!?？！。…]?")
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 근사치: 한글 1자 ≈ 1토큰, 그 외 4자 ≈ 1토큰."""
+    if not text:
+        return 0
+    n_hangul = len(_HANGUL_RE.findall(text))
+    return n_hangul + (len(text) - n_hangul + 3) // 4
+
+def message_tokens(m: Message) -> int:
+    return estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD
+
+def new_history_state() -> Dict[str, Any]:
+    return {"summary": "", "upto": 0, "folded": 0}
+
+def pick_num_ctx(prompt_tokens: int, reply_tokens: int, min_ctx: int = 2048, max_ctx: int = 32768) -> int:
+    need = prompt_tokens + reply_tokens
+    ctx = min_ctx
+    while ctx < need and ctx < max_ctx:
+        ctx *= 2
+    return min(ctx, max_ctx)
+
+def extractive_summary(prev_summary: str, new_msgs: List[Message], max_chars: int = 600) -> str:
+    """LLM 없이 쓰는 요약: 각 발화의 첫 문장만 남겨 이전 요약 뒤에 붙이고, 길면 앞부분부터 버린다."""
+    lines = [ln for ln in (prev_summary or "").splitlines() if ln.strip()]
+    for m in new_msgs:
+        who = "사용자" if m.get("role") == "user" else "상대"
+        first = _SENTENCE_RE.search(m.get("content", "").strip())
+        if first:
+            lines.append(f"- {who}: {first.group().strip()[:80]}")
+    while lines and sum(len(ln) + 1 for ln in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+def build_context(messages: List[Message], state: Dict[str, Any], budget_tokens: int = 4096,
+                  reply_tokens: int = 512, min_recent: int = 2,
+                  summarize: Optional[Summarizer] = None) -> Tuple[List[Message], Dict[str, Any]]:
+    """
+    messages(맨 앞이 system)를 예산 안의 프롬프트로 만든다. state 는 제자리에서 갱신.
+    반환: (모델에 보낼 메시지, {"prompt_tokens", "num_ctx", "kept", "summarized", "summary_tokens"})
+    """
+    summarize = summarize or extractive_summary
+    system = [m for m in messages[:1] if m.get("role") == "system"]
+    convo = messages[len(system):]
+
+    # 요약이 들어갈 자리까지 감안해 최근 창을 뒤에서부터 채운다
+    fixed = sum(message_tokens(m) for m in system) + estimate_tokens(state["summary"]) + MESSAGE_OVERHEAD
+    available = budget_tokens - reply_tokens - fixed
+    start = len(convo)
+    used = 0
+    while start > 0:
+        cost = message_tokens(convo[start - 1])
+        if len(convo) - start >= min_recent and used + cost > available:
+            break
+        used += cost
+        start -= 1
+    # 이미 요약에 접힌 턴은 다시 원문으로 넣지 않는다
+    start = max(start, state["upto"])
+
+    if start > state["upto"]:
+        state["summary"] = summarize(state["summary"], convo[state["upto"]:start])
+        state["upto"] = start
+
+    out = list(system)
+    if state["summary"]:
+        out.append({"role": "system", "content": f"[이전 대화 요약]\n{state['summary']}"})
+    out += convo[start:]
+
+    prompt_tokens = sum(message_tokens(m) for m in out)
+    return out, {
+        "prompt_tokens": prompt_tokens,
+        "num_ctx": pick_num_ctx(prompt_tokens, reply_tokens),
+        "kept": len(convo) - start,
+        "summarized": state.get("folded", 0) + state["upto"],
+        "summary_tokens": estimate_tokens(state["summary"]),
+    }
+
+def drop_folded(messages: List[Message], state: Dict[str, Any]) -> int:
+    """요약에 접힌 메시지를 리스트에서 제자리로 빼고 upto 를 0 으로 되돌린다. 뺀 개수를 반환."""
+    n = state["upto"]
+    if n:
+        offset = 1 if messages and messages[0].get("role") == "system" else 0
+        del messages[offset:offset + n]
+        state["folded"] = state.get("folded", 0) + n
+        state["upto"] = 0
+    return n
@@ -0,0 +1,327 @@
+# loadtest.py
+# 실행 예:
+#   python loadtest.py --stub --users 20                              # 저장소 안의 가짜 Ollama 서버로
+#   python loadtest.py --stub --users 50 --stub-parallel 2 --out lt.json
+#   python loadtest.py --users 20 --model gemma3:4b --rounds 6       # 실제 Ollama (OLLAMA_HOST)
+#   OLLAMA_TRANSPORT=replay OLLAMA_REPLAY_LATENCY=1 python loadtest.py --users 20   # 기록해 둔 응답으로
+#   python loadtest.py --stub --eval-mode 단계별 --eval-model gemma3:1b --cascade-margin 1.0   # 단계별 평가 승격률/일치율
+#
+# 브라우저 없이 SimTalk 세션을 여러 개 동시에 돌리는 부하 테스트 드라이버.
+# 상황(SCENARIO_META) × 난이도 조합마다 --repeat 개 세션을 만들고, --users 명이 동시에 ROUNDS 턴씩 진행한다.
+# 턴 처리 순서는 1.py 의 on_user_message 와 같다:
+#   기록 예산(build_context, 필요하면 요약) → NPC 응답(스트리밍) → 평가(공용 스레드 풀, 스케줄러 EVAL 슬롯)
+# 출력: 턴/NPC 첫 토큰/NPC 전체/평가 지연의 p50·p95·p99, 처리량, 오류율, 스케줄러 지표 (JSON)
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로
+from common.scheduler import PRIORITY_NPC, RequestScheduler
+from common.transport import LiveTransport, get_transport, set_transport
+import engine
+from history import build_context, drop_folded, new_history_state
+from prompts import DIFFICULTIES, SCENARIOS, build_system_prompt
+from scoring import CASCADE_DEFAULTS, CASCADE_STATS, PARSE_STATS, summarize_overall
+
+# ================== 가상 사용자 발화 ==================
+# persona 별 발화 풀. {i} 는 프로필 관심사로 채운다.
+SCRIPTS: Dict[str, List[str]] = {
+    "정중": [
+        "안녕하세요! 만나서 반가워요. 오늘 오시는 길은 괜찮으셨어요?",
+        "저는 요즘 {i}에 빠져 있어요. 혹시 {i} 좋아하세요?",
+        "그렇군요, 그 얘기 더 듣고 싶어요. 어떻게 시작하게 되셨어요?",
+        "아 정말요? 저도 비슷한 경험이 있어서 공감돼요.",
+        "주말에는 보통 어떻게 시간 보내세요?",
+        "오늘 얘기 나눠서 즐거웠어요. 다음에 {i} 같이 해보실래요?",
+    ],
+    "호기심": [
+        "{i} 얘기 나왔는데, 제일 기억에 남는 순간이 뭐예요?",
+        "왜 그걸 좋아하게 되셨는지 궁금해요!",
+        "요즘 가장 신경 쓰고 있는 일은 뭐예요?",
+        "혹시 추천해 주실 만한 {i} 관련 장소 있어요?",
+    ],
+    "무례": [
+        "야 그래서 뭐 하는데",
+        "빨리 말해봐 ㅋㅋ",
+        "{i}? 그거 별로던데",
+        "됐고 다른 얘기 하자",
+    ],
+    "선넘기": [
+        "집이 어디예요? 주소 알려주세요",
+        "지금 당장 만나요 우리",
+        "연봉은 얼마 받아요?",
+    ],
+}
+PERSONAS = list(SCRIPTS)
+_INTERESTS = ["영화", "카페", "등산", "보드게임", "여행", "음악", "요리", "산책", "전시회"]
+
+def make_profile(rng: random.Random, uid: int) -> Dict[str, Any]:
+    interests = rng.sample(_INTERESTS, 2)
+    return {
+        "내 이름": f"사용자{uid}",
+        "상대 이름": "지수",
+        "관심사": ", ".join(interests),
+        "_관심사_list": interests,
+    }
+
+def next_utterance(rng: random.Random, persona: str, profile: Dict[str, Any], turn: int, mode: str) -> str:
+    """scripted: 페르소나 풀을 순서대로 / generated: 페르소나를 섞어 무작위 조합."""
+    interest = rng.choice(profile["_관심사_list"])
+    if mode == "scripted":
+        pool = SCRIPTS[persona]
+        return pool[turn % len(pool)].format(i=interest)
+    # 대부분은 자기 페르소나, 가끔 다른 톤이 섞인다
+    p = persona if rng.random() < 0.7 else rng.choice(PERSONAS)
+    head = rng.choice(SCRIPTS[p]).format(i=interest)
+    tail = rng.choice(["", "", " ㅎㅎ", " 어떻게 생각하세요?", " 그쵸?"])
+    return head + tail
+
+# ================== 통계 ==================
+def percentile(sorted_vals: List[float], q: float) -> float:
+    """최근접 순위 백분위수 (q: 0~100)."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(q / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+def describe_latency(vals: List[float]) -> Dict[str, float]:
+    s = sorted(v for v in vals if v is not None)
+    if not s:
+        return {"n": 0}
+    return {
+        "n": len(s),
+        "mean": round(sum(s) / len(s), 4),
+        "p50": round(percentile(s, 50), 4),
+        "p95": round(percentile(s, 95), 4),
+        "p99": round(percentile(s, 99), 4),
+        "max": round(s[-1], 4),
+    }
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns: List[Dict[str, Any]] = []
+        self.sessions: List[Dict[str, Any]] = []
+
+    def turn(self, row: Dict[str, Any]):
+        with self._lock:
+            self.turns.append(row)
+
+    def session(self, row: Dict[str, Any]):
+        with self._lock:
+            self.sessions.append(row)
+
+# ================== 세션 실행 ==================
+def run_session(job: Tuple[int, str, str], args: argparse.Namespace, sched: RequestScheduler,
+                eval_pool: ThreadPoolExecutor, rec: Recorder):
+    uid, scenario, difficulty = job
+    rng = random.Random(args.seed * 100_003 + uid)
+    sid = f"lt-{uid}"
+    persona = PERSONAS[uid % len(PERSONAS)] if args.script == "scripted" else rng.choice(PERSONAS)
+    profile = make_profile(rng, uid)
+    messages = [{"role": "system", "content": build_system_prompt(profile, scenario, difficulty)}]
+    state = new_history_state()
+    npc_slot = lambda: sched.slot(sid, PRIORITY_NPC)
+    summarize = lambda prev, new: engine.summarize_history(prev, new, args.model, slot=npc_slot)
+    evals: List[Dict[str, Any]] = []
+    t_session = time.perf_counter()
+    try:
+        for turn in range(args.rounds):
+            if args.think_time:
+                time.sleep(rng.uniform(0, 2 * args.think_time))
+            content = next_utterance(rng, persona, profile, turn, args.script)
+            t0 = time.perf_counter()
+            messages.append({"role": "user", "content": content})
+            ctx_msgs, ctx_info = build_context(messages, state, budget_tokens=args.ctx_budget, summarize=summarize)
+            drop_folded(messages, state)
+            t_ctx = time.perf_counter()
+
+            timing: Dict[str, Any] = {}
+            if args.no_stream:
+                timing["error"] = None
+                npc_msg = engine.npc_reply(ctx_msgs, args.model, args.temperature, num_ctx=ctx_info["num_ctx"],
+                                           timing=timing, slot=npc_slot)
+                timing["total"] = timing["ttft"] = time.perf_counter() - t_ctx
+            else:
+                npc_msg = "".join(engine.npc_reply_stream(ctx_msgs, args.model, args.temperature, timing,
+                                                          num_ctx=ctx_info["num_ctx"], slot=npc_slot)).strip()
+            messages.append({"role": "assistant", "content": npc_msg})
+
+            t_eval = time.perf_counter()
+            ev = eval_pool.submit(engine.evaluate_turn, content, npc_msg, difficulty, eval_model(args), args.eval_mode,
+                                  None, None, sched, sid, None, cascade_config(args)).result()
+            t_end = time.perf_counter()
+            evals.append(ev)
+            rec.turn({
+                "session": sid, "scenario": scenario, "difficulty": difficulty, "turn": turn + 1,
+                "turn_s": t_end - t0, "context_s": t_ctx - t0,
+                "npc_ttft_s": timing.get("ttft"), "npc_total_s": timing.get("total"),
+                "eval_s": t_end - t_eval, "npc_error": timing.get("error"),
+                "engine": ev["__engine"], "total": ev["total"], "prompt_tokens": ctx_info["prompt_tokens"],
+            })
+        rec.session({
+            "session": sid, "scenario": scenario, "difficulty": difficulty, "persona": persona,
+            "elapsed_s": time.perf_counter() - t_session, "avg_total": summarize_overall(evals)["avg_total"],
+            "error": None,
+        })
+    except Exception as e:
+        rec.session({"session": sid, "scenario": scenario, "difficulty": difficulty, "persona": persona,
+                     "elapsed_s": time.perf_counter() - t_session, "error": repr(e)})
+
+# ================== 리포트 ==================
+def build_report(args: argparse.Namespace, rec: Recorder, sched: RequestScheduler, elapsed: float,
+                 stub_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    turns = rec.turns
+    n_turns = len(turns)
+    npc_errors = sum(1 for t in turns if t["npc_error"])
+    session_errors = sum(1 for s in rec.sessions if s["error"])
+    heuristic = sum(1 for t in turns if t["engine"] == "휴리스틱")
+    ps = PARSE_STATS.get(eval_model(args))
+
+    by_scenario: Dict[str, Dict[str, Any]] = {}
+    for sc in sorted({t["scenario"] for t in turns}):
+        rows = [t for t in turns if t["scenario"] == sc]
+        by_scenario[sc] = {
+            "turns": len(rows),
+            "turn_p95_s": describe_latency([t["turn_s"] for t in rows]).get("p95"),
+            "avg_total": round(sum(t["total"] for t in rows) / len(rows), 2),
+        }
+
+    return {
+        "config": {
+            "users": args.users, "sessions": len(rec.sessions), "rounds": args.rounds, "model": args.model,
+            "eval_mode": args.eval_mode, "eval_model": eval_model(args), "stream": not args.no_stream, "script": args.script,
+            "scheduler_concurrency": sched.max_concurrency, "stub": bool(args.stub),
+            "host": os.environ.get("OLLAMA_HOST", "(default)"),
+            "transport": get_transport().mode,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "turns_per_s": round(n_turns / elapsed, 3) if elapsed > 0 else 0.0,
+            "sessions_per_min": round(len(rec.sessions) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        },
+        "latency_s": {
+            "turn": describe_latency([t["turn_s"] for t in turns]),
+            "npc_ttft": describe_latency([t["npc_ttft_s"] for t in turns]),
+            "npc_total": describe_latency([t["npc_total_s"] for t in turns]),
+            "eval": describe_latency([t["eval_s"] for t in turns]),
+            "context": describe_latency([t["context_s"] for t in turns]),
+        },
+        "errors": {
+            "turns": n_turns,
+            "npc_errors": npc_errors,
+            "npc_error_rate": round(npc_errors / n_turns, 4) if n_turns else 0.0,
+            "session_errors": session_errors,
+            "session_error_rate": round(session_errors / len(rec.sessions), 4) if rec.sessions else 0.0,
+            "eval_heuristic_turns": heuristic,
+            "eval_parse": ps,
+        },
+        "cascade": CASCADE_STATS.summary(eval_model(args)) if args.eval_mode == "단계별" else None,
+        "scheduler": sched.snapshot(),
+        "by_scenario": by_scenario,
+        "stub": stub_stats,
+    }
+
+def print_summary(report: Dict[str, Any]):
+    lat = report["latency_s"]
+    err = report["errors"]
+    print(f"세션 {report['config']['sessions']}개 · 턴 {err['turns']}개 · {report['elapsed_s']}s "
+          f"({report['throughput']['turns_per_s']} 턴/s)", file=sys.stderr)
+    print(f"{'구간':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}", file=sys.stderr)
+    for name in ("turn", "npc_ttft", "npc_total", "eval", "context"):
+        d = lat[name]
+        if d.get("n"):
+            print(f"{name:<10}{d['p50']:>9.3f}{d['p95']:>9.3f}{d['p99']:>9.3f}{d['max']:>9.3f}", file=sys.stderr)
+    print(f"NPC 오류율 {err['npc_error_rate']:.2%} · 세션 오류율 {err['session_error_rate']:.2%} · "
+          f"휴리스틱 평가 {err['eval_heuristic_turns']}턴 · 평가 휴리스틱 전환(배압) {report['scheduler']['eval']['degraded']}",
+          file=sys.stderr)
+    cas = report.get("cascade")
+    if cas:
+        line = (f"단계별 평가: 승격 {cas['escalation_rate']:.1%} ({cas['escalated']}/{cas['turns']}) · "
+                f"승격 못 함(배압/미동작) {cas['skipped']} · 사유 {cas['reasons']}")
+        for name, label in (("escalated_agree", "승격 턴"), ("audit_agree", "audit")):
+            if name in cas:
+                a = cas[name]
+                line += f" · {label} 일치 {a['same_bands_rate']:.0%} (점수차 {a['mae']}, 총점차 {a['total_diff']})"
+        print(line, file=sys.stderr)
+
+# ================== 실행 ==================
+def eval_model(args: argparse.Namespace) -> str:
+    return args.eval_model or args.model
+
+def cascade_config(args: argparse.Namespace) -> Dict[str, Any]:
+    return {"margin": args.cascade_margin, "long_chars": args.cascade_long_chars, "audit_rate": args.cascade_audit_rate}
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub_cfg = None
+    if args.stub:
+        from common.stub_ollama import StubConfig, base_url, serve
+        server, stub_cfg = serve(port=0, background=True, cfg=StubConfig(
+            token_delay=args.stub_token_delay, parallel=args.stub_parallel, error_rate=args.stub_error_rate))
+        os.environ["OLLAMA_HOST"] = base_url(server)
+        set_transport(LiveTransport(host=base_url(server)))
+
+    scenarios = args.scenarios or SCENARIOS
+    difficulties = args.difficulties or DIFFICULTIES
+    combos = [(sc, df) for sc in scenarios for df in difficulties] * args.repeat
+    jobs = [(uid, sc, df) for uid, (sc, df) in enumerate(combos)]
+
+    sched = RequestScheduler(max_concurrency=args.concurrency)
+    rec = Recorder()
+    eval_pool = ThreadPoolExecutor(max_workers=args.eval_workers)   # 1.py 의 get_eval_executor() 와 같은 역할
+    print(f"세션 {len(jobs)}개 (상황 {len(scenarios)} × 난이도 {len(difficulties)} × {args.repeat}), "
+          f"동시 사용자 {args.users}명, 라운드 {args.rounds}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as users:
+        list(users.map(lambda j: run_session(j, args, sched, eval_pool, rec), jobs))
+    elapsed = time.perf_counter() - t0
+    eval_pool.shutdown()
+
+    report = build_report(args, rec, sched, elapsed, stub_cfg.stats if stub_cfg else None)
+    print_summary(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="SimTalk 헤드리스 부하 테스트")
+    ap.add_argument("--users", type=int, default=20, help="동시 가상 사용자 수")
+    ap.add_argument("--repeat", type=int, default=1, help="상황×난이도 조합당 세션 수")
+    ap.add_argument("--rounds", type=int, default=6, help="세션당 턴 수 (앱의 ROUNDS)")
+    ap.add_argument("--scenarios", nargs="*", default=None, help="기본: SCENARIO_META 전체")
+    ap.add_argument("--difficulties", nargs="*", default=None, help="기본: 쉬움 보통 어려움")
+    ap.add_argument("--script", choices=["scripted", "generated"], default="scripted", help="사용자 발화 방식")
+    ap.add_argument("--think-time", type=float, default=0.0, help="턴 사이 평균 대기(초)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", default="gemma3:4b")
+    ap.add_argument("--temperature", type=float, default=0.7)
+    ap.add_argument("--eval-mode", choices=engine.EVAL_MODES, default="자동")
+    ap.add_argument("--eval-model", default=None, help="평가 모델 (기본: --model)")
+    ap.add_argument("--cascade-margin", type=float, default=CASCADE_DEFAULTS["margin"],
+                    help="단계별: 피드백 경계에서 이만큼 안쪽 점수면 LLM 으로 승격")
+    ap.add_argument("--cascade-long-chars", type=int, default=CASCADE_DEFAULTS["long_chars"])
+    ap.add_argument("--cascade-audit-rate", type=float, default=CASCADE_DEFAULTS["audit_rate"],
+                    help="단계별: 승격 안 된 턴 중 LLM 으로도 채점해 일치율을 잴 비율")
+    ap.add_argument("--ctx-budget", type=int, default=4096)
+    ap.add_argument("--no-stream", action="store_true", help="NPC 응답을 비스트리밍으로")
+    ap.add_argument("--concurrency", type=int, default=None, help="스케줄러 동시 실행 수 (기본 OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--eval-workers", type=int, default=4, help="평가 스레드 풀 크기")
+    ap.add_argument("--stub", action="store_true", help="common/stub_ollama.py 서버를 띄워 사용")
+    ap.add_argument("--stub-token-delay", type=float, default=0.01)
+    ap.add_argument("--stub-parallel", type=int, default=2, help="가짜 서버 동시 생성 수 (0=무제한)")
+    ap.add_argument("--stub-error-rate", type=float, default=0.0)
+    ap.add_argument("--out", default=None, help="리포트 JSON 경로")
+    return ap
+
+if __name__ == "__main__":
+    print(json.dumps(run(build_parser().parse_args()), ensure_ascii=False, indent=2))
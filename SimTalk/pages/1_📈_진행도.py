@@ -0,0 +1,79 @@
+# 1_📈_진행도.py
+# 진행도 페이지 (streamlit run 1.py 로 띄우면 사이드바 페이지 목록에 나온다)
+# 세션이 끝날 때 progress.py 가 갱신해 둔 집계만 읽는다 → 사용자의 세션 수와 무관하게 일정한 시간에 그려진다.
+
+import sys
+from pathlib import Path
+from typing import Dict, Any, List
+
+import streamlit as st
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # SimTalk/ 모듈 경로
+from progress import DEFAULT_USER, DIMS, TOTAL, get_progress_store, trend_label, user_key
+from scoring import RUBRIC
+
+st.set_page_config(page_title="Smooth Talk: 진행도", page_icon="📈")
+st.title("📈 내 대화 실력 진행도")
+st.caption("끝낸 시뮬레이션마다 항목별 세션 평균을 누적합니다. 추세는 세션 하나당 점수 변화예요 (레드플래그는 낮을수록 좋음).")
+
+store = get_progress_store()
+users = store.users()
+me = user_key(st.session_state.get("profile", {}))
+names = [u for u, _ in users] or [DEFAULT_USER]
+if me not in names:
+    names.insert(0, me)
+user = st.selectbox("사용자 (프로필의 '내 이름')", names, index=names.index(me))
+prog = store.user_progress(user)
+
+if not prog["sessions"]:
+    st.info("아직 끝낸 시뮬레이션이 없어요. 라운드를 끝까지 진행하면 여기에 기록됩니다.")
+    st.stop()
+
+def _better(dim: str, slope) -> bool:
+    return slope is not None and ((slope < 0) if dim == "레드플래그" else (slope > 0))
+
+def _weakest(stats: Dict[str, Dict[str, Any]]) -> str:
+    """평균이 가장 낮은 항목 (레드플래그는 10 - 평균으로 뒤집어 비교)."""
+    cands = {k: (10 - s["mean"] if k == "레드플래그" else s["mean"]) for k, s in stats.items() if k in RUBRIC}
+    return min(cands, key=cands.get) if cands else "—"
+
+tot = prog["all"][TOTAL]
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("끝낸 세션", f"{prog['sessions']:,}")
+c2.metric("총점 평균", tot["mean"], help=f"표준편차 {tot['std']} · 최저 {tot['min']} · 최고 {tot['max']}")
+c3.metric("최근 폼 (EWMA)", tot["ewma"], delta=round(tot["ewma"] - tot["mean"], 2) if tot["ewma"] is not None else None)
+c4.metric("추세", trend_label(tot["slope"]), help=f"최근 {len(tot['recent'])}세션 추세: {trend_label(tot['recent_slope'])}")
+
+st.markdown(f"**가장 보완할 항목:** {_weakest(prog['all'])}")
+
+rows: List[Dict[str, Any]] = []
+for dim in DIMS:
+    s = prog["all"].get(dim)
+    if not s:
+        continue
+    rows.append({
+        "항목": dim, "평균": s["mean"], "표준편차": s["std"], "중앙값": s["p50"],
+        "p25~p75": f"{s['p25']} ~ {s['p75']}", "p90": s["p90"], "최근 폼": s["ewma"],
+        "추세(전체)": trend_label(s["slope"]), "추세(최근)": trend_label(s["recent_slope"]),
+        "좋아지는 중": "✅" if _better(dim, s["recent_slope"]) else "",
+    })
+st.dataframe(rows, use_container_width=True, hide_index=True)
+
+st.markdown(f"**최근 {len(tot['recent'])}세션 총점**")
+st.line_chart({"총점": tot["recent"]}, height=180)
+
+def _scope_table(scope: Dict[str, Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    out = []
+    for key, stats in sorted(scope.items()):
+        t = stats.get(TOTAL)
+        if not t:
+            continue
+        out.append({"": key or "(미지정)", "세션": t["n"], "총점 평균": t["mean"], "중앙값": t["p50"],
+                    "최근 폼": t["ewma"], "추세": trend_label(t["slope"]), "보완할 항목": _weakest(stats)})
+    return out
+
+tab_s, tab_d = st.tabs(["상황별", "난이도별"])
+with tab_s:
+    st.dataframe(_scope_table(prog["scenario"]), use_container_width=True, hide_index=True)
+with tab_d:
+    st.dataframe(_scope_table(prog["difficulty"]), use_container_width=True, hide_index=True)
@@ -0,0 +1,288 @@
+# progress.py
+# 세션 간 진행도 집계: 세션이 끝날 때마다 사용자별 누적 통계를 갱신해 두고, 진행도 화면은 그 집계만 읽는다
+# (Streamlit 없이 import 가능)
+# - 범위: 전체 / 상황(SCENARIO)별 / 난이도(DIFF)별, 항목: RUBRIC 각 항목 + 총점 (세션 평균 한 값이 관측 하나)
+# - 항목마다 고정 크기 상태 (RunningStat):
+#     Welford 평균/분산, 0~10 점 히스토그램(HIST_BINS 칸) → 백분위수, 세션 순번 대비 최소제곱 기울기
+#     (Σx, Σx² 는 n 으로 계산되므로 Σxy 만 들고 있음), 최근 RECENT 개 값(최근 기울기/작은 추이 그래프), EWMA
+#   → 세션이 몇 개든 갱신/조회 비용이 같다 (원본 로그를 다시 읽지 않음)
+# - 같은 세션을 두 번 반영하지 않도록 반영한 세션 id 를 기록한다 (재개 후 다시 종료해도 한 번)
+# - RUBRIC_VERSION 이 바뀌면 예전 집계는 지우지 않고 조회에서만 뺀다 (항목/척도가 달라 섞을 수 없음)
+# 실행 예 (SimTalk/ 에서): 기존 기록을 한 번 채워 넣을 때
+#   python progress.py backfill sessions/            # SessionStore 로그 (종료된 세션만)
+#   python progress.py backfill archive/             # archive.py 로 만든 아카이브
+#   python progress.py show --user 홍길동
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 공용 모듈(common/) 경로
+from common.resources import get_shared
+from scoring import RUBRIC, RUBRIC_VERSION
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "progress.sqlite3")
+DEFAULT_USER = "나"
+TOTAL = "총점"
+DIMS: List[str] = [*RUBRIC, TOTAL]
+SCOPES = ("all", "scenario", "difficulty")
+HIST_BINS = 40                  # 0~10 점을 0.25 점 칸으로
+RECENT = 10
+EWMA_ALPHA = 0.3
+
+def user_key(profile: Dict[str, Any]) -> str:
+    """진행도를 묶는 사용자: 프로필의 '내 이름' (없으면 DEFAULT_USER)."""
+    return (profile or {}).get("내 이름", "").strip() or DEFAULT_USER
+
+def session_values(evals: List[Dict[str, Any]]) -> Dict[str, float]:
+    """턴 평가 목록 → 항목별 세션 평균 (총점 포함). 점수가 없는 항목은 뺀다."""
+    out: Dict[str, float] = {}
+    for k in RUBRIC:
+        xs = [e["scores"][k] for e in evals if isinstance(e.get("scores", {}).get(k), (int, float))]
+        if xs:
+            out[k] = sum(xs) / len(xs)
+    totals = [e["total"] for e in evals if isinstance(e.get("total"), (int, float))]
+    if totals:
+        out[TOTAL] = sum(totals) / len(totals)
+    return out
+
+# ================== 누적 통계 ==================
+class RunningStat:
+    """관측값 하나씩 넣는 고정 크기 요약. to_dict()/from_dict() 로 저장."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sxy = 0.0          # Σ (순번 x · 값 y), x = 0, 1, 2, …
+        self.lo = math.inf
+        self.hi = -math.inf
+        self.ewma: Optional[float] = None
+        self.hist = [0] * HIST_BINS
+        self.recent: List[float] = []
+        self.last_at: Optional[str] = None
+
+    def push(self, y: float, at: Optional[str] = None):
+        x = self.n
+        self.n += 1
+        d = y - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (y - self.mean)
+        self.sxy += x * y
+        self.lo, self.hi = min(self.lo, y), max(self.hi, y)
+        self.ewma = y if self.ewma is None else EWMA_ALPHA * y + (1 - EWMA_ALPHA) * self.ewma
+        self.hist[min(HIST_BINS - 1, max(0, int(y / 10 * HIST_BINS)))] += 1
+        self.recent = (self.recent + [round(y, 3)])[-RECENT:]
+        self.last_at = at or self.last_at
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def slope(self) -> Optional[float]:
+        """세션 하나당 점수 변화 (전체 기록 최소제곱)."""
+        n = self.n
+        if n < 2:
+            return None
+        sx, sxx, sy = n * (n - 1) / 2, (n - 1) * n * (2 * n - 1) / 6, self.mean * n
+        return (n * self.sxy - sx * sy) / (n * sxx - sx * sx)
+
+    def recent_slope(self) -> Optional[float]:
+        ys = self.recent
+        n = len(ys)
+        if n < 2:
+            return None
+        xm, ym = (n - 1) / 2, sum(ys) / n
+        return sum((x - xm) * (y - ym) for x, y in enumerate(ys)) / sum((x - xm) ** 2 for x in range(n))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """히스토그램 칸 안에서 선형 보간 (칸 폭 10/HIST_BINS 점만큼의 오차)."""
+        if not self.n:
+            return None
+        target, seen, width = q / 100 * self.n, 0, 10 / HIST_BINS
+        for i, c in enumerate(self.hist):
+            if c and seen + c >= target:
+                v = (i + (target - seen) / c) * width
+                return min(max(v, self.lo), self.hi)
+            seen += c
+        return self.hi
+
+    def summary(self) -> Dict[str, Any]:
+        r = lambda v, k=2: None if v is None else round(v, k)
+        return {
+            "n": self.n, "mean": r(self.mean), "std": r(self.std), "min": r(self.lo if self.n else None),
+            "max": r(self.hi if self.n else None), "p25": r(self.percentile(25)), "p50": r(self.percentile(50)),
+            "p75": r(self.percentile(75)), "p90": r(self.percentile(90)), "slope": r(self.slope(), 3),
+            "recent_slope": r(self.recent_slope(), 3), "ewma": r(self.ewma), "recent": list(self.recent),
+            "last_at": self.last_at,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "sxy": self.sxy, "lo": self.lo if self.n else None,
+                "hi": self.hi if self.n else None, "ewma": self.ewma, "hist": self.hist, "recent": self.recent,
+                "last_at": self.last_at}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RunningStat":
+        s = cls()
+        s.n, s.mean, s.m2, s.sxy = d["n"], d["mean"], d["m2"], d["sxy"]
+        s.lo = d["lo"] if d["lo"] is not None else math.inf
+        s.hi = d["hi"] if d["hi"] is not None else -math.inf
+        s.ewma, s.hist, s.recent, s.last_at = d["ewma"], list(d["hist"]), list(d["recent"]), d.get("last_at")
+        return s
+
+# ================== 저장소 ==================
+class ProgressStore:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS progress_agg ("
+            " user TEXT, version TEXT, scope TEXT, key TEXT, dim TEXT, state TEXT, updated REAL,"
+            " PRIMARY KEY (user, version, scope, key, dim))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS progress_sessions (session TEXT PRIMARY KEY, user TEXT, applied REAL)")
+
+    def record_session(self, session: str, user: str, scenario: str, difficulty: str,
+                       evals: List[Dict[str, Any]], ended_at: Optional[str] = None) -> bool:
+        """끝난 세션 하나를 반영. 이미 반영했거나 점수가 없으면 False."""
+        return self.record_values(session, user, scenario, difficulty, session_values(evals), ended_at)
+
+    def record_values(self, session: str, user: str, scenario: str, difficulty: str,
+                      values: Dict[str, float], ended_at: Optional[str] = None) -> bool:
+        if not values:
+            return False
+        version = str(RUBRIC_VERSION)
+        scopes = [("all", ""), ("scenario", scenario or ""), ("difficulty", difficulty or "")]
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if db.execute("SELECT 1 FROM progress_sessions WHERE session = ?", (session,)).fetchone():
+                    db.execute("ROLLBACK")
+                    return False
+                now = time.time()
+                for scope, key in scopes:
+                    rows = dict(db.execute(
+                        "SELECT dim, state FROM progress_agg WHERE user = ? AND version = ? AND scope = ? AND key = ?",
+                        (user, version, scope, key)).fetchall())
+                    for dim, y in values.items():
+                        st = RunningStat.from_dict(json.loads(rows[dim])) if dim in rows else RunningStat()
+                        st.push(y, ended_at)
+                        db.execute(
+                            "INSERT OR REPLACE INTO progress_agg(user, version, scope, key, dim, state, updated)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (user, version, scope, key, dim, json.dumps(st.to_dict()), now))
+                db.execute("INSERT INTO progress_sessions(session, user, applied) VALUES (?, ?, ?)", (session, user, now))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return True
+
+    def user_progress(self, user: str) -> Dict[str, Any]:
+        """
+        {"sessions": n, "all": {항목: 요약}, "scenario": {상황: {항목: 요약}}, "difficulty": {난이도: {항목: 요약}}}
+        한 사용자의 집계 행(범위 수 × 항목 수)만 읽는다.
+        """
+        out: Dict[str, Any] = {"sessions": 0, "all": {}, "scenario": {}, "difficulty": {}}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT scope, key, dim, state FROM progress_agg WHERE user = ? AND version = ?",
+                (user, str(RUBRIC_VERSION))).fetchall()
+        for scope, key, dim, state in rows:
+            s = RunningStat.from_dict(json.loads(state)).summary()
+            if scope == "all":
+                out["all"][dim] = s
+            else:
+                out[scope].setdefault(key, {})[dim] = s
+        out["sessions"] = out["all"].get(TOTAL, {}).get("n", 0)
+        return out
+
+    def users(self) -> List[Tuple[str, int]]:
+        """(사용자, 반영된 세션 수), 최근에 갱신된 순."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT user, COUNT(*) FROM progress_sessions GROUP BY user ORDER BY MAX(applied) DESC").fetchall()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM progress_agg")
+            self._db.execute("DELETE FROM progress_sessions")
+
+def get_progress_store() -> ProgressStore:
+    return get_shared("progress_store", ProgressStore)
+
+def trend_label(slope: Optional[float]) -> str:
+    if slope is None:
+        return "—"
+    if slope > 0.05:
+        return f"▲ {slope:+.2f}/세션"
+    if slope < -0.05:
+        return f"▼ {slope:+.2f}/세션"
+    return f"→ {slope:+.2f}/세션"
+
+# ================== 기존 기록 채우기 ==================
+def iter_finished(path: str) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any], List[Dict[str, Any]], Optional[str]]]:
+    """(세션 id, meta, profile, 턴 평가 목록, 종료 시각). 세션 로그 디렉터리 또는 아카이브."""
+    if os.path.exists(os.path.join(path, "manifest.json")):
+        from archive import ArchiveReader
+        reader = ArchiveReader(path)
+        for i, data in enumerate(reader.iter_sessions()):
+            meta = data.get("meta", {})
+            # 내보내기에 남은 원래 세션 id (진행 중에 반영한 것과 같은 키). 예전 내보내기에는 없으므로 시작 시각+파일명
+            sid = meta.get("session_id") or f"{meta.get('started_at', '')}|{reader.name(i) or i}"
+            yield sid, meta, data.get("profile", {}), data.get("scores", []), meta.get("ended_at")
+        return
+    from session_store import SessionStore
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(".jsonl"):
+            continue
+        store = SessionStore(os.path.join(path, name))
+        header = store.header()
+        final = next((r for r in store.iter_records() if r["t"] == "f"), None)
+        if final is None:     # 진행 중/중단된 세션은 빼고 끝난 세션만
+            continue
+        yield header["id"], header.get("meta", {}), header.get("profile", {}), \
+            [tr.to_eval() for tr in store.iter_turns()], final.get("ended_at")
+
+def backfill(paths: Iterable[str], store: ProgressStore) -> Dict[str, int]:
+    """시작 시각 순으로 반영한다 (추세 기울기가 세션 순서를 쓰므로). 정렬 전에 세션마다 항목 평균으로 줄여 둔다."""
+    rows = [(meta.get("started_at") or "", sid, user_key(profile), meta.get("scenario"), meta.get("difficulty"),
+             session_values(evals), ended)
+            for p in paths for sid, meta, profile, evals, ended in iter_finished(p)]
+    rows.sort(key=lambda r: r[0])
+    added = sum(store.record_values(*r[1:]) for r in rows)
+    return {"seen": len(rows), "added": added}
+
+# ================== CLI ==================
+def main():
+    ap = argparse.ArgumentParser(description="SimTalk 세션 간 진행도 집계")
+    ap.add_argument("--db", default=DEFAULT_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("backfill", help="기존 세션 로그/아카이브를 집계에 반영 (이미 반영한 세션은 건너뜀)")
+    b.add_argument("paths", nargs="+")
+    s = sub.add_parser("show", help="사용자 진행도 출력")
+    s.add_argument("--user", default="", help="비우면 사용자 목록")
+    args = ap.parse_args()
+
+    store = ProgressStore(args.db)
+    if args.cmd == "backfill":
+        print(json.dumps(backfill(args.paths, store), ensure_ascii=False))
+    elif not args.user:
+        for user, n in store.users():
+            print(f"{user}\t{n}")
+    else:
+        print(json.dumps(store.user_progress(args.user), ensure_ascii=False, indent=1))
+
+if __name__ == "__main__":
+    main()
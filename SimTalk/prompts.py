@@ -0,0 +1,75 @@
+# prompts.py
+# SimTalk 상황/난이도 목록과 NPC 시스템 프롬프트 (Streamlit 없이 import 가능)
+# 1.py 화면과 loadtest.py 헤드리스 드라이버가 같은 프롬프트를 쓰도록 여기 모아 둔다.
+
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+# ================== 상황별 아이콘/타이틀 ==================
+SCENARIO_META = {
+    "소개팅":                           {"icon": "💘", "title": "Smooth Talk: 소개팅 시뮬레이터"},
+    "첫 만남(직장)":                    {"icon": "💼", "title": "Smooth Talk: 첫 만남(직장) 시뮬레이터"},
+    "동아리/동호회":                    {"icon": "🎯", "title": "Smooth Talk: 동아리/동호회 시뮬레이터"},
+    "친구의 친구 모임":                 {"icon": "👥", "title": "Smooth Talk: 친구의 친구 모임 시뮬레이터"},
+    "면접(캐주얼)":                     {"icon": "🧑‍💻", "title": "Smooth Talk: 면접(캐주얼) 시뮬레이터"},
+    "첫 만남 (카페)":                   {"icon": "☕", "title": "Smooth Talk: 카페 첫 만남"},
+    "첫 만남 (레스토랑/저녁 식사)":     {"icon": "🍽️", "title": "Smooth Talk: 저녁 식사 첫 만남"},
+    "첫 만남 (영화관/데이트 코스)":     {"icon": "🎬", "title": "Smooth Talk: 영화관 데이트"},
+    "첫 만남 (공원/야외 산책)":          {"icon": "🌿", "title": "Smooth Talk: 야외 산책 첫 만남"},
+}
+DEFAULT_ICON = "💬"
+DEFAULT_TITLE = "Smooth Talk: 시뮬레이터"
+
+SCENARIOS: List[str] = list(SCENARIO_META)
+DIFFICULTIES: List[str] = ["쉬움", "보통", "어려움"]
+
+# ================== 시나리오 힌트 ==================
+def scenario_hint(s: str) -> str:
+    if s == "소개팅": return "가볍게 서로를 탐색, 예의 바르고 부담 적게."
+    if s == "첫 만남(직장)": return "정중·차분, 업무/업무외 밸런스. 사생활 과도 침투 금지."
+    if s == "동아리/동호회": return "공통 취미 중심으로 라포 형성, 활동 경험 공유."
+    if s == "친구의 친구 모임": return "공통분모(공통친구)로 안전한 주제 확장."
+    if s == "면접(캐주얼)": return "라이트톤 + 전문성, 구체 사례 위주. 공격적 질문 지양."
+    if "카페" in s: return "첫 만남 특유의 가벼운 탐색, 취향·일상 질문 위주."
+    if "레스토랑" in s: return "정중하고 차분한 톤, 감정·가치관 질문 1개 포함."
+    if "영화관" in s: return "경험 공유와 감상 질문 1개 포함."
+    if "산책" in s: return "자연스러운 관찰 코멘트 + 가벼운 질문."
+    return ""
+
+# ================== 시스템 프롬프트 ==================
+def profile_summary_kr(profile: Dict[str, Any]) -> str:
+    parts = []
+    if profile.get("내 이름"): parts.append(f"내 이름: {profile['내 이름']}")
+    if profile.get("상대 이름"): parts.append(f"상대 이름: {profile['상대 이름']}")
+    if profile.get("_관심사_list"): parts.append(f"관심사: {', '.join(profile['_관심사_list'])}")
+    if profile.get("팀"): parts.append(f"팀/파트: {profile['팀']}")
+    if profile.get("역할"): parts.append(f"역할: {profile['역할']}")
+    if profile.get("동아리"): parts.append(f"동아리: {profile['동아리']}")
+    if profile.get("공통 친구"): parts.append(f"공통 친구: {profile['공통 친구']}")
+    if profile.get("기술스택"): parts.append(f"기술스택: {profile['기술스택']}")
+    return " · ".join(parts) if parts else "추가 프로필 없음"
+
+# Streamlit 이 입력마다 다시 호출하므로 (프로필, 상황, 난이도) 조합별로 한 번만 만든다
+def _profile_key(profile: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in (profile or {}).items()))
+
+def build_system_prompt(profile: Dict[str, Any], scenario: str, difficulty: str) -> str:
+    return _system_prompt(_profile_key(profile), scenario, difficulty)
+
+@lru_cache(maxsize=256)
+def _system_prompt(profile_key: Tuple, scenario: str, difficulty: str) -> str:
+    prof = {k: list(v) if isinstance(v, tuple) else v for k, v in profile_key}
+    ctx = profile_summary_kr(prof)
+    return f"""You are a Korean-speaking NPC for a conversation simulator.
+
+- Role: 상대역(NPC)로 자연스럽게 대화한다. 사용자는 '{prof.get('내 이름') or '사용자'}'.
+- Style: 공손하고 따뜻하며, 솔직하고 유머는 가볍게.
+- Length: 2~4문장 위주로 답하고, 마지막에 짧은 질문 1개를 덧붙인다.
+- Avoid: 장문 독백, 과도한 칭찬/사담, 모호한 답변, 신상침해성 요구.
+- Boundaries: 과한 신체/사생활 침해성 질문은 부드럽게 선 긋기.
+- Scenario: {scenario} — Hint: {scenario_hint(scenario)}
+- Difficulty: {difficulty} (난이도가 높을수록 말을 아끼고, 되묻거나 작은 테스트 질문을 섞는다)
+- Politeness: 존댓말 사용을 권장한다. 예의 없는 반말/명령형/호칭 무시는 사용자 평가의 '정중함'에서 감점 요인이다.
+- Context Summary: {ctx}
+- Language: 한국어만 사용한다.
+"""
@@ -0,0 +1,695 @@
+# scoring.py
+# SimTalk 평가 로직(루브릭/휴리스틱/가중 총점). Streamlit 없이 import 가능해야 함
+# (1.py 와 오프라인 스크립트가 같이 사용)
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, List, Optional, Sequence, Set, Tuple
+
+# ================== 루브릭 ==================
+RUBRIC = {
+    "공감": 0.25,
+    "호기심": 0.20,
+    "명료성": 0.20,
+    "정중함": 0.20,
+    "레드플래그": 0.15
+}
+# 평가 프롬프트/휴리스틱/루브릭 키를 바꾸면 올릴 것 → 평가 캐시(eval_cache)의 예전 결과가 무효화됨
+RUBRIC_VERSION = 1
+
+def weighted_total(scores: Dict[str, float]) -> float:
+    total = 0.0
+    for k, w in RUBRIC.items():
+        val = scores.get(k, 0)
+        if k == "레드플래그":
+            val = 10 - val
+        total += val * w
+    return round(total, 2)
+
+# ================== LLM 평가 ==================
+def build_eval_prompt(user_msg: str, npc_msg: str, difficulty: str) -> str:
+    return f"""너는 소개팅/사회적 대화 코치야. 아래 '평가대상' 발화만 평가해.
+오직 평가대상의 문장만 점수화하고 피드백을 작성해.
+'상대 발화'는 맥락 참고용일 뿐이고, 강점/개선/팁에 인용하거나 근거로 사용하지 마.
+
+[평가대상] 나(사용자)
+
+[평가대상 발화]
+{user_msg}
+
+[상대 발화(참고용, 인용 금지)]
+{npc_msg}
+
+[평가 기준]
+- 공감(0~10): 상대의 감정/내용을 이해하고 반영했는가?
+- 호기심(0~10): 자연스러운 관심 질문이 있는가?
+- 명료성(0~10): 구체적이고 분명한가?
+- 정중함(0~10): 예의를 갖추었는가? (반말/명령형/호칭 무시/무례어/비격식 강한 슬랭 사용 시 크게 감점)
+- 레드플래그(0~10): 무례/과몰입/사생활침해/거짓말/셀프디스 등(높을수록 나쁨)
+
+[난이도]
+{difficulty}
+
+[출력 형식(JSON strict)]
+{{
+  "scores": {{
+    "공감": 0-10,
+    "호기심": 0-10,
+    "명료성": 0-10,
+    "정중함": 0-10,
+    "레드플래그": 0-10
+  }},
+  "feedback": {{
+    "strengths": ["짧은 문장", "최대 3개"],
+    "improvements": ["짧은 문장", "최대 3개"],
+    "tip": "다음 턴에 바로 쓸 한 문장 코칭"
+  }}
+}}
+반드시 유효한 JSON만 출력해. 주석/설명/추가 텍스트 금지.
+"""
+
+# Ollama structured output(format=스키마)로 모델 출력 자체를 이 형태로 제한한다
+EVAL_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "scores": {
+            "type": "object",
+            "properties": {k: {"type": "number", "minimum": 0, "maximum": 10} for k in RUBRIC},
+            "required": list(RUBRIC),
+        },
+        "feedback": {
+            "type": "object",
+            "properties": {
+                "strengths": {"type": "array", "items": {"type": "string"}, "maxItems": 3},
+                "improvements": {"type": "array", "items": {"type": "string"}, "maxItems": 3},
+                "tip": {"type": "string"},
+            },
+            "required": ["strengths", "improvements", "tip"],
+        },
+    },
+    "required": ["scores", "feedback"],
+}
+
+_FENCE_RE = re.compile(r"```(?:json)?")
+_RANGE_RE = re.compile(r"(\d+)\s*-\s*10")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SCORE_RES = {k: re.compile(rf'"{k}"\s*:\s*"?(\d+(?:\.\d+)?)') for k in RUBRIC}
+_LIST_RES = {k: re.compile(rf'"{k}"\s*:\s*\[(.*?)\]', re.S) for k in ("strengths", "improvements")}
+_TIP_RE = re.compile(r'"tip"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_STR_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+def _as_score(v: Any) -> Optional[float]:
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, str):
+        try:
+            v = float(v.strip())
+        except ValueError:
+            return None
+    if not isinstance(v, (int, float)):
+        return None
+    return max(0, min(10, v))
+
+def _str_list(v: Any) -> List[str]:
+    if isinstance(v, str):
+        v = [v]
+    return [str(x).strip() for x in (v or []) if str(x).strip()][:3] if isinstance(v, list) else []
+
+def validate_eval(obj: Any) -> Optional[Dict[str, Any]]:
+    """스키마 검사 + 정규화. 루브릭 점수 5개가 모두 숫자여야 통과 (피드백은 없으면 빈 값)."""
+    if not isinstance(obj, dict) or not isinstance(obj.get("scores"), dict):
+        return None
+    scores = {}
+    for k in RUBRIC:
+        v = _as_score(obj["scores"].get(k))
+        if v is None:
+            return None
+        scores[k] = v
+    fb = obj.get("feedback") if isinstance(obj.get("feedback"), dict) else {}
+    tip = fb.get("tip")
+    return {
+        "scores": scores,
+        "feedback": {
+            "strengths": _str_list(fb.get("strengths")),
+            "improvements": _str_list(fb.get("improvements")),
+            "tip": tip.strip() if isinstance(tip, str) else "",
+        },
+    }
+
+def _unescape(s: str) -> str:
+    try:
+        return json.loads(f'"{s}"')
+    except ValueError:
+        return s
+
+def _salvage_fields(text: str) -> Optional[Dict[str, Any]]:
+    # JSON 으로는 못 읽어도 필드 단위로 건질 수 있는 만큼 건진다
+    scores = {}
+    for k, rx in _SCORE_RES.items():
+        m = rx.search(text)
+        if not m:
+            return None
+        scores[k] = m.group(1)
+    fb: Dict[str, Any] = {}
+    for k, rx in _LIST_RES.items():
+        m = rx.search(text)
+        fb[k] = [_unescape(x) for x in _STR_RE.findall(m.group(1))] if m else []
+    m = _TIP_RE.search(text)
+    fb["tip"] = _unescape(m.group(1)) if m else ""
+    return validate_eval({"scores": scores, "feedback": fb})
+
+def parse_eval_output(text: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    평가 출력 파싱. (정규화된 dict 또는 None, 상태) — 상태: "ok" | "repaired" | "failed"
+    1) 그대로 json.loads + 검증 (structured output 이면 거의 여기서 끝)
+    2) 싼 복구: 코드펜스 제거, 바깥 {...}만 잘라내기, "0-10" 표기/후행 쉼표 정리
+    3) 필드 단위 정규식 추출
+    """
+    text = text or ""
+    try:
+        data = validate_eval(json.loads(text))
+        if data is not None:
+            return data, "ok"
+    except ValueError:
+        pass
+
+    cleaned = _FENCE_RE.sub("", text).strip()
+    lo, hi = cleaned.find("{"), cleaned.rfind("}")
+    if lo != -1 and hi > lo:
+        cleaned = cleaned[lo:hi + 1]
+    cleaned = _TRAILING_COMMA_RE.sub(r"\1", _RANGE_RE.sub("10", cleaned))
+    try:
+        data = validate_eval(json.loads(cleaned))
+        if data is not None:
+            return data, "repaired"
+    except ValueError:
+        pass
+
+    data = _salvage_fields(text)
+    return (data, "repaired") if data is not None else (None, "failed")
+
+class ParseStats:
+    """모델별 평가 출력 파싱 결과 카운터 (스레드 안전)."""
+    FIELDS = ("ok", "repaired", "failed", "recalls", "fallbacks", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_model: Dict[str, Dict[str, int]] = {}
+
+    def record(self, model: str, field: str):
+        with self._lock:
+            row = self._by_model.setdefault(model, dict.fromkeys(self.FIELDS, 0))
+            row[field] += 1
+
+    def get(self, model: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._by_model.get(model, dict.fromkeys(self.FIELDS, 0)))
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {m: dict(row) for m, row in self._by_model.items()}
+
+PARSE_STATS = ParseStats()
+
+def llm_evaluate(user_msg: str, npc_msg: str, difficulty: str, model: str,
+                 temperature: float = 0.2, cache=None, keep_alive=None,
+                 max_calls: int = 2, slot=None, trace=None) -> Optional[Dict[str, Any]]:
+    """
+    LLM 으로 1턴 평가. JSON 스키마(EVAL_SCHEMA)로 출력을 제한하고 parse_eval_output 으로 검증/복구.
+    복구까지 실패하면 max_calls 까지 재호출, 그래도 안 되면 None (호출 측에서 휴리스틱으로 대체).
+    cache(eval_cache.EvalCache)가 있으면 (프롬프트, 모델, temperature) 기준으로 재사용한다.
+    slot 은 모델 호출을 감쌀 컨텍스트 매니저를 돌려주는 함수 (common.scheduler 슬롯 등). 캐시 적중이면 쓰지 않는다.
+    trace(common.metrics.Trace)가 있으면 대기(eval_queue)/호출(eval_llm)/파싱(eval_parse) 구간과 Ollama 통계를 남긴다.
+    """
+    prompt = build_eval_prompt(user_msg, npc_msg, difficulty)
+    key = cache.key("llm", model, temperature, prompt) if cache is not None else None
+    if key is not None:
+        hit = cache.get(key)
+        if trace is not None:
+            trace.note("eval_cache", "hit" if hit is not None else "miss")
+        if hit is not None:
+            return hit
+    try:
+        from common.transport import get_transport   # 저장소 루트가 sys.path 에 있어야 함
+        transport = get_transport()
+    except Exception:
+        return None
+    if not transport.available():
+        return None
+
+    for attempt in range(max_calls):
+        if attempt:
+            PARSE_STATS.record(model, "recalls")
+        try:
+            t0 = time.perf_counter()
+            with (slot() if slot is not None else nullcontext()):
+                t1 = time.perf_counter()
+                resp = transport.chat(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    options={"temperature": temperature},
+                    format=EVAL_SCHEMA,
+                    keep_alive=keep_alive,
+                )
+        except Exception:
+            PARSE_STATS.record(model, "errors")
+            break
+        t2 = time.perf_counter()
+        data, status = parse_eval_output(resp["message"]["content"])
+        PARSE_STATS.record(model, status)
+        if trace is not None:
+            trace.add("eval_queue", t1 - t0)
+            trace.add("eval_llm", t2 - t1)
+            trace.add("eval_parse", time.perf_counter() - t2)
+            trace.record_ollama("eval", resp)
+            trace.note("eval_parse_status", status)
+        if data is not None:
+            if key is not None:
+                cache.put(key, data)
+            return data
+    PARSE_STATS.record(model, "fallbacks")
+    return None
+
+def finalize_eval(data: Dict[str, Any], user_msg: str, engine: str) -> Dict[str, Any]:
+    data["total"] = weighted_total(data["scores"])
+    data["__eval_target"] = "나(사용자)"
+    data["__evaluated_text"] = user_msg
+    data["__engine"] = engine
+    return data
+
+# ================== 어휘 사전(import 시 1회 컴파일) ==================
+LEXICONS: Dict[str, Sequence[str]] = {
+    "softeners":       ["혹시", "괜찮다면", "실례지만", "가능할까요", "바쁘시면", "천천히", "부탁", "고맙", "감사", "죄송", "미안"],
+    "empathy_pos":     ["좋", "재밌", "대단", "멋지", "축하", "응원", "이해", "그렇군", "알겠", "수고", "고생"],
+    "empathy_reflect": ["말씀", "얘기", "이야기", "포인트", "공감", "맞아요", "맞다", "그렇죠"],
+    "curiosity_words": ["왜", "언제", "어디", "무엇", "무슨", "어떤", "어떻게", "어때", "가능할까요", "물어봐도"],
+    "boundary_bad":    ["카톡아이디", "카카오톡", "집주소", "만나자지금", "지금만나", "번호줘", "연락처줘", "숙소", "방잡", "술자리 강요"],
+    "red_flags":       ["싫", "꺼져", "닥쳐", "미친", "뭐래", "멍청", "병신", "야 ", "돈자랑"],
+    # ---------- 반말/무례 톤 감지(정중함 감점용) ----------
+    "honorific_markers": ["요", "입니다", "합니다", "하세요", "십시오", "합니까", "해요", "드립니다"],
+    "rude_vocatives_inline": ["야 ", "야,", "야?", "야!"],
+}
+
+class LexiconMatcher:
+    """
+    여러 어휘 목록을 텍스트 한 번 훑기로 동시에 찾는 Aho-Corasick 오토마톤.
+    - 실패 링크를 미리 펼쳐 둔 DFA(state -> {문자: 다음 state})라 글자당 dict 조회 1번
+    - 각 어휘 목록의 적중 수는 `sum(1 for k in 목록 if k in text)` 와 정확히 같다
+    """
+
+    def __init__(self, lexicons: Dict[str, Sequence[str]]):
+        self.lexicons = {name: tuple(words) for name, words in lexicons.items()}
+        # 키워드 -> 속한 목록 이름들 (같은 목록에 중복이 있으면 그만큼 반복)
+        self._membership: Dict[str, List[str]] = {}
+        for name, words in self.lexicons.items():
+            for w in words:
+                self._membership.setdefault(w, []).append(name)
+
+        # 1) 트라이
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[str]] = [set()]
+        for word in self._membership:
+            state = 0
+            for ch in word:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append(set())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].add(word)
+
+        # 2) BFS 로 실패 링크 계산 + DFA 전이로 펼치기
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())  # 깊이 1 노드의 실패 링크는 루트(0)
+        while queue:
+            r = queue.popleft()
+            delta[r] = {**delta[fail[r]], **goto[r]}
+            for ch, u in goto[r].items():
+                fail[u] = delta[fail[r]].get(ch, 0)
+                outputs[u] |= outputs[fail[u]]
+                queue.append(u)
+
+        self._delta = delta
+        self._outputs = [frozenset(o) if o else None for o in outputs]
+
+    def find(self, text: str) -> Set[str]:
+        delta, outputs = self._delta, self._outputs
+        found: Set[str] = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            out = outputs[state]
+            if out:
+                found |= out
+        return found
+
+    def counts(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.lexicons, 0)
+        for w in self.find(text):
+            for name in self._membership[w]:
+                counts[name] += 1
+        return counts
+
+LEXICON_MATCHER = LexiconMatcher(LEXICONS)
+
+# re.search 기준으로 기존 패턴과 동치인 형태로 줄임 (`[가-힣]+X` → `[가-힣]X`, 앞뒤 `.*` 제거)
+# — 원래 꼴은 위치마다 `.*` 백트래킹이 일어나 긴 발화에서 제곱 시간이 걸렸다
+_BANMAL_PATTERNS = [
+    r"[가-힣A-Za-z0-9]다$", r"[가-힣]해$", r"[가-힣]해\?", r"[가-힣]해라$", r"[가-힣]해봐$",
+    r"[가-힣]해줘$", r"[가-힣]해줄래", r"[가-힣]냐\?$", r"[가-힣]니\?$", r"[가-힣]해라\?$",
+    r"빨리", r"지금.*해$", r"와라$", r"보자$"
+]
+_BANMAL_RE = re.compile("|".join(f"(?:{p})" for p in _BANMAL_PATTERNS))
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z]{3,}")
+# 문자 집합/어휘는 features.py(배치 추출)와 같이 쓰므로 상수로 빼 둔다
+EMOJI_CHARS = "😊😂🤣😍😘🥰🙌👍✨❤💕💘😉😅🙏"
+SENTENCE_END_CHARS = ".!?？！。…"
+QUESTION_SUFFIXES = ("나요", "니요", "죠?", "지요?")
+MEET_NOW_WORDS = ("지금", "바로", "당장")
+PRIVATE_PLACES = ("우리집", "내방", "호텔", "모텔")
+_EMOJI_RE = re.compile(f"[{EMOJI_CHARS}]|[^\\w\\s][\\)D]|[~]{{2,}}")
+_SENTENCE_END_RE = re.compile(f"[{re.escape(SENTENCE_END_CHARS)}]+")
+_QUESTION_SUFFIX_RE = re.compile(f"({'|'.join(map(re.escape, QUESTION_SUFFIXES))})$")
+# ✅ '야' 단독/변형(야?, 야!! 등) 강력 감지
+_RUDE_VOCATIVE_RE = re.compile(r"^\s*야+[!?.]?\s*$")
+_MEET_NOW_RE = re.compile(f"({'|'.join(MEET_NOW_WORDS)}).*(만나|오|보자)")
+_PRIVATE_PLACE_RE = re.compile(f"({'|'.join(PRIVATE_PLACES)})")
+
+# ================== 신호 추출 ==================
+def extract_signals(user_msg: str) -> Dict[str, Any]:
+    """발화 1개에서 휴리스틱 점수에 쓰이는 신호를 모두 뽑는다 (사전 매칭은 1회 스캔)."""
+    txt = (user_msg or "").strip()
+    low = txt.lower()
+
+    # 사전 어휘는 모두 한글/문장부호라 lower() 영향이 없으므로 low 한 번만 훑는다
+    hits = LEXICON_MATCHER.counts(low)
+
+    cap_tokens = _LATIN_WORD_RE.findall(txt)
+    all_caps_ratio = (sum(1 for t in cap_tokens if t.isupper()) / len(cap_tokens)) if cap_tokens else 0.0
+
+    keyword = next((t for t in (m.group() for m in _TOKEN_RE.finditer(low)) if 2 <= len(t) <= 10), "이야기")
+
+    return {
+        "n_chars": len(txt),
+        "n_q": txt.count("?"),
+        "n_exc": txt.count("!"),
+        "n_ellipsis": txt.count("…") + txt.count("..."),
+        "all_caps_ratio": all_caps_ratio,
+        "emoji_like": _EMOJI_RE.search(txt) is not None,
+        "has_sentences": _SENTENCE_END_RE.search(txt) is not None,
+        "question_suffix": _QUESTION_SUFFIX_RE.search(low) is not None,
+        "softeners": hits["softeners"],
+        "empathy_pos": hits["empathy_pos"],
+        "empathy_reflect": hits["empathy_reflect"],
+        "curiosity_words": hits["curiosity_words"],
+        "boundary_bad": hits["boundary_bad"],
+        "red_flags": hits["red_flags"],
+        "honorific_hits": hits["honorific_markers"],
+        "banmal_hit": _BANMAL_RE.search(txt) is not None,
+        "rude_vocative_hit": _RUDE_VOCATIVE_RE.search(txt) is not None or hits["rude_vocatives_inline"] > 0,
+        "meet_now": _MEET_NOW_RE.search(low) is not None,
+        "private_place": _PRIVATE_PLACE_RE.search(low) is not None,
+        "keyword": keyword,
+    }
+
+# ================== 휴리스틱 평가 ==================
+def clamp01(x): return max(0.0, min(1.0, x))
+def to10(x): return round(10 * clamp01(x), 1)
+
+def heuristic_scores(sig: Dict[str, Any]) -> Dict[str, float]:
+    n_chars, n_q, n_exc = sig["n_chars"], sig["n_q"], sig["n_exc"]
+    is_very_short = n_chars < 8
+    is_long = n_chars > 120
+
+    # 공감
+    emp_score = 0.0
+    emp_score += 0.6 * sig["empathy_pos"]
+    emp_score += 0.7 * sig["empathy_reflect"]
+    emp_score += 0.5 * sig["softeners"]
+    emp_score += 0.4 if sig["emoji_like"] else 0.0
+    emp_score -= 0.2 * max(0, n_exc - 2)
+
+    # 호기심
+    cur_score = 0.0
+    cur_score += 0.9 if n_q >= 1 else 0.0
+    cur_score += 0.6 * sig["curiosity_words"]
+    cur_score += 0.6 if sig["question_suffix"] else 0.0
+    cur_score -= 0.2 * max(0, n_q - 2)
+
+    # 명료성
+    cla_score = 0.0
+    if is_very_short: cla_score += 0.3
+    elif is_long:     cla_score += 0.6
+    else:             cla_score += 1.0
+    cla_score += 0.4 if sig["has_sentences"] else 0.0
+    cla_score -= 0.3 * (1 if sig["n_ellipsis"] >= 1 else 0)
+    cla_score -= 0.3 * max(0, n_exc - 1)
+    cla_score -= 1.0 * clamp01(sig["all_caps_ratio"])
+
+    # 정중함 (기본치)
+    polite_score = 1.5
+    polite_score += 0.2 * sig["softeners"]
+    polite_score -= 1.2 * sig["boundary_bad"]
+    if sig["meet_now"]:      polite_score -= 1.0
+    if sig["private_place"]: polite_score -= 1.0
+
+    # ✅ 정중함 페널티 강화
+    if sig["rude_vocative_hit"]:
+        polite_score -= 1.5            # '야' 단독 등 강한 감점
+    if sig["banmal_hit"]:
+        polite_score -= 1.2
+    if sig["honorific_hits"] == 0 and n_chars <= 3:
+        polite_score -= 0.9            # 아주 짧은 반말/명령형
+    if sig["honorific_hits"] == 0 and n_chars >= 8:
+        polite_score -= 0.6            # 평문인데 존댓말 흔적 전무
+
+    # 레드플래그
+    red_score = 0.0
+    red_score += 1.5 * sig["red_flags"]
+    red_score += 0.8 * max(0, n_exc - 2)
+    red_score += 1.0 * clamp01(sig["all_caps_ratio"] * 2)
+
+    return {
+        "공감": to10(emp_score / 4.0),
+        "호기심": to10(cur_score / 3.0),
+        "명료성": to10(cla_score / 2.2),
+        "정중함": to10(polite_score / 2.0),
+        "레드플래그": to10(red_score / 4.0),
+    }
+
+# 피드백이 갈리는 경계: 이 점수 이상이면 강점, 미만이면 개선점 / 레드플래그는 이 이상이면 경고
+GOOD_SCORE = 7
+RED_ALERT = 4
+
+def heuristic_evaluate(user_msg: str) -> Dict[str, Any]:
+    return heuristic_from_signals(extract_signals(user_msg))
+
+def heuristic_from_signals(sig: Dict[str, Any]) -> Dict[str, Any]:
+    """extract_signals() 결과로 휴리스틱 평가 (신호를 다른 곳에서도 쓰는 경우 한 번만 추출하도록)."""
+    scores = heuristic_scores(sig)
+    emp, cur, cla, polite, red = (scores[k] for k in ("공감", "호기심", "명료성", "정중함", "레드플래그"))
+    is_very_short = sig["n_chars"] < 8
+    is_long = sig["n_chars"] > 120
+
+    strengths: List[str] = []
+    improvements: List[str] = []
+    if emp >= GOOD_SCORE: strengths.append("상대의 포인트를 인정·반영하는 표현이 좋아요.")
+    if cur >= GOOD_SCORE: strengths.append("대화를 확장하는 질문이 자연스럽습니다.")
+    if cla >= GOOD_SCORE: strengths.append("문장이 간결하고 읽기 쉬워요.")
+    if polite >= GOOD_SCORE: strengths.append("존중감 있는 어투로 예의를 잘 지켰어요.")
+
+    if emp < GOOD_SCORE:
+        improvements.append("공감 1구(“말씀 듣고 보니 공감돼요”) 후 관련 질문 1개로 이어보세요.")
+    if cur < GOOD_SCORE:
+        improvements.append("문장 끝에 구체 질문 1개만 덧붙여 대화를 확장해 보세요.")
+    if cla < GOOD_SCORE:
+        if is_long and not sig["has_sentences"]:
+            improvements.append("길다면 문장을 나누고 생략부호/느낌표를 줄여 가독성을 높이세요.")
+        elif is_very_short:
+            improvements.append("핵심 정보(언제/어디/무엇)를 1–2개만 보강해 주세요.")
+        else:
+            improvements.append("짧은 문장 1–2개로 정리하고 생략부호/느낌표를 줄여보세요.")
+    if polite < GOOD_SCORE:
+        improvements.append("존댓말(요/습니다)과 완곡한 표현을 사용해 톤을 부드럽게 해보세요.")
+        if sig["rude_vocative_hit"] or sig["banmal_hit"] or sig["honorific_hits"] == 0:
+            improvements.append("반말/명령형을 피하고 “혹시…”, “괜찮으시면…” 같은 완곡어를 활용하세요.")
+    if red >= RED_ALERT:
+        improvements.append("강한 단어·올캡·느낌표 남용을 피하고 톤을 부드럽게 하세요.")
+
+    keyword = sig["keyword"]
+    tip = f"'{keyword}'를 받아 한 문장으로: 공감 1구 → 존댓말 질문 1개."
+    rewrite_example = f"“{keyword}” 말씀 공감돼요. 혹시 {keyword}에서 가장 좋았던 점은 무엇이었나요?"
+
+    return {
+        "scores": scores,
+        "feedback": {
+            "strengths": strengths[:3],
+            "improvements": improvements[:3],
+            "tip": tip,
+            "rewrite_example": rewrite_example,
+        },
+        "signals": {},
+    }
+
+# ================== 단계별(cascade) 평가 ==================
+# 휴리스틱으로 먼저 채점하고, 결과가 애매할 때만 LLM 으로 올린다(승격). 승격 사유:
+#   threshold: 점수가 피드백 경계(GOOD_SCORE / RED_ALERT)에서 margin 안쪽
+#   conflict : 긍정 신호(공감/완곡어)와 부정 신호(반말/무례/레드플래그/경계 침범)가 같이 있거나,
+#              휴리스틱이 정중함은 높게 보면서 레드플래그도 경고 수준으로 봄
+#   long     : long_chars 보다 긴 발화 (휴리스틱이 문맥을 못 봄)
+#   audit    : 위에 안 걸린 턴 중 audit_rate 비율 — 승격 안 된 턴에서도 두 단계 일치율을 재기 위한 표본
+CASCADE_DEFAULTS: Dict[str, Any] = {"margin": 0.5, "long_chars": 120, "audit_rate": 0.0}
+
+def _audit_pick(user_msg: str) -> float:
+    # 같은 발화는 항상 같은 값 (재현 가능한 표본 추출)
+    return int(hashlib.sha1(user_msg.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+def escalation_reasons(user_msg: str, scores: Dict[str, float], cfg: Optional[Dict[str, Any]] = None,
+                       sig: Optional[Dict[str, Any]] = None) -> List[str]:
+    """sig 는 휴리스틱 단계에서 이미 뽑은 extract_signals(user_msg) (없으면 여기서 뽑는다)."""
+    cfg = {**CASCADE_DEFAULTS, **(cfg or {})}
+    if sig is None:
+        sig = extract_signals(user_msg)
+    margin = cfg["margin"]
+    reasons: List[str] = []
+    if any(abs(scores[k] - GOOD_SCORE) < margin for k in RUBRIC if k != "레드플래그") \
+            or abs(scores["레드플래그"] - RED_ALERT) < margin:
+        reasons.append("threshold")
+    positive = sig["empathy_pos"] + sig["empathy_reflect"] + sig["softeners"] > 0
+    negative = (sig["banmal_hit"] or sig["rude_vocative_hit"] or sig["red_flags"] or sig["boundary_bad"]
+                or sig["meet_now"] or sig["private_place"])
+    if (positive and negative) or (scores["정중함"] >= GOOD_SCORE and scores["레드플래그"] >= RED_ALERT):
+        reasons.append("conflict")
+    if sig["n_chars"] > cfg["long_chars"]:
+        reasons.append("long")
+    if not reasons and cfg["audit_rate"] > 0 and _audit_pick(user_msg) < cfg["audit_rate"]:
+        reasons.append("audit")
+    return reasons
+
+def tier_agreement(h_scores: Dict[str, float], l_scores: Dict[str, float]) -> Dict[str, Any]:
+    """휴리스틱 vs LLM: 점수 평균 절대차, 총점 차, 피드백 구간(강점/개선, 레드플래그 경고)이 모두 같은지."""
+    same = all((h_scores[k] >= GOOD_SCORE) == (l_scores[k] >= GOOD_SCORE) for k in RUBRIC if k != "레드플래그") \
+        and (h_scores["레드플래그"] >= RED_ALERT) == (l_scores["레드플래그"] >= RED_ALERT)
+    return {
+        "mae": sum(abs(h_scores[k] - l_scores[k]) for k in RUBRIC) / len(RUBRIC),
+        "total_diff": abs(weighted_total(h_scores) - weighted_total(l_scores)),
+        "same_bands": same,
+    }
+
+class CascadeStats:
+    """평가 모델별 단계별 평가 카운터 (스레드 안전): 승격률/사유, 두 단계 일치율 (승격 턴 / audit 턴 따로)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        agree = {"compared": 0, "same_bands": 0, "mae_sum": 0.0, "total_diff_sum": 0.0}
+        return {"turns": 0, "escalated": 0, "skipped": 0, "llm_failed": 0, "reasons": {},
+                "escalated_agree": dict(agree), "audit_agree": dict(agree)}
+
+    def record(self, model: str, reasons: List[str], escalated: bool, llm_failed: bool = False,
+               agreement: Optional[Dict[str, Any]] = None):
+        """skipped = 승격 사유는 있었지만 LLM 을 못 씀(미동작/배압)."""
+        with self._lock:
+            row = self._by_model.setdefault(model, self._empty())
+            row["turns"] += 1
+            for r in reasons:
+                row["reasons"][r] = row["reasons"].get(r, 0) + 1
+            if reasons and not escalated:
+                row["skipped"] += 1
+            if escalated:
+                row["escalated"] += 1
+                row["llm_failed"] += 1 if llm_failed else 0
+            if agreement is not None:
+                a = row["audit_agree" if reasons == ["audit"] else "escalated_agree"]
+                a["compared"] += 1
+                a["same_bands"] += 1 if agreement["same_bands"] else 0
+                a["mae_sum"] += agreement["mae"]
+                a["total_diff_sum"] += agreement["total_diff"]
+
+    def summary(self, model: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._by_model.get(model) or self._empty()
+            n = row["turns"]
+            out: Dict[str, Any] = {
+                "turns": n,
+                "escalated": row["escalated"],
+                "escalation_rate": round(row["escalated"] / n, 3) if n else 0.0,
+                "skipped": row["skipped"],
+                "llm_failed": row["llm_failed"],
+                "reasons": dict(row["reasons"]),
+            }
+            for name in ("escalated_agree", "audit_agree"):
+                a = row[name]
+                if a["compared"]:
+                    out[name] = {
+                        "compared": a["compared"],
+                        "same_bands_rate": round(a["same_bands"] / a["compared"], 3),
+                        "mae": round(a["mae_sum"] / a["compared"], 2),
+                        "total_diff": round(a["total_diff_sum"] / a["compared"], 2),
+                    }
+            return out
+
+    def reset(self):
+        with self._lock:
+            self._by_model.clear()
+
+CASCADE_STATS = CascadeStats()
+
+def describe_cascade(summary: Dict[str, Any]) -> str:
+    text = f"승격 {summary['escalation_rate']:.0%} ({summary['escalated']}/{summary['turns']})"
+    if summary["reasons"]:
+        text += " · " + ", ".join(f"{k} {v}" for k, v in sorted(summary["reasons"].items()))
+    for name, label in (("escalated_agree", "승격 턴"), ("audit_agree", "audit")):
+        a = summary.get(name)
+        if a:
+            text += f" · {label} 일치 {a['same_bands_rate']:.0%} (점수차 {a['mae']}, 총점차 {a['total_diff']})"
+    return text
+
+def cascade_evaluate(user_msg: str, npc_msg: str, difficulty: str, model: str, cache=None, keep_alive=None,
+                     cfg: Optional[Dict[str, Any]] = None, slot=None, trace=None,
+                     allow_llm: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """
+    휴리스틱 → (승격 사유가 있으면) model 로 LLM 평가. LLM 이 실패하면 휴리스틱 결과를 그대로 쓴다.
+    allow_llm 은 승격할 때만 불러 LLM 을 써도 되는지 묻는다 (미동작/배압이면 False).
+    휴리스틱 단계는 캐시를 거치지 않는다 (디스크 왕복이 정규식 채점보다 비쌈). cache 는 LLM 평가에만 쓴다.
+    """
+    with (trace.span("eval_heuristic") if trace is not None else nullcontext()):
+        sig = extract_signals(user_msg)
+        heur = heuristic_from_signals(sig)
+        reasons = escalation_reasons(user_msg, heur["scores"], cfg, sig)
+    if trace is not None:
+        trace.note("eval_escalation", ",".join(reasons) or "-")
+    if not reasons or (allow_llm is not None and not allow_llm()):
+        CASCADE_STATS.record(model, reasons, escalated=False)
+        return finalize_eval(heur, user_msg, "휴리스틱")
+    data = llm_evaluate(user_msg, npc_msg, difficulty, model, cache=cache, keep_alive=keep_alive,
+                        slot=slot, trace=trace)
+    if data is None:
+        CASCADE_STATS.record(model, reasons, escalated=True, llm_failed=True)
+        return finalize_eval(heur, user_msg, "휴리스틱")
+    CASCADE_STATS.record(model, reasons, escalated=True, agreement=tier_agreement(heur["scores"], data["scores"]))
+    return finalize_eval(data, user_msg, "LLM")
+
+# ================== 세션 요약 ==================
+def summarize_overall(score_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not score_list:
+        return {"avg_total": 0.0, "strengths": [], "improvements": [], "tip": ""}
+    avg_total = round(sum(d["total"] for d in score_list) / len(score_list), 2)
+    strengths, improvements = [], []
+    for d in score_list:
+        strengths += d.get("feedback", {}).get("strengths", [])
+        improvements += d.get("feedback", {}).get("improvements", [])
+    strengths = list(dict.fromkeys(strengths))[:3]
+    improvements = list(dict.fromkeys(improvements))[:3]
+    tip = "상대의 마지막 문장에서 키워드 1개를 골라 공감 + 존댓말 질문으로 이어가세요."
+    return {"avg_total": avg_total, "strengths": strengths, "improvements": improvements, "tip": tip}
@@ -0,0 +1,293 @@
+# session_store.py
+# 세션별 append-only 로그 (sessions/<sid>.jsonl)
+# 레코드 종류(t):
+#   "h" 헤더      : 메타/프로필/시스템 프롬프트 (첫 줄, 1회)
+#   "s" 시스템    : 시스템 프롬프트가 바뀌었을 때
+#   "u" 턴        : 사용자/NPC 발화 + 점수(RUBRIC 순서 고정 배열) + 피드백 + 지연시간
+#   "m" 요약 접기 : history 요약이 갱신되어 앞쪽 메시지가 메모리에서 빠졌을 때 (요약문, 누적 접힌 메시지 수)
+#   "f" 종료      : 종합 요약
+# 세션 재개는 헤더 1줄 + 꼬리 몇 줄(요약 이후 창)만 읽으므로 세션 길이와 무관하다.
+# 내보내기는 예전 export_json() 과 같은 구조를 로그에서 레코드 단위로 흘려 UTF-8 바이트 버퍼에 바로 쓴다.
+
+import io
+import json
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Any, IO, Iterator, List, NamedTuple, Optional, Tuple
+
+from scoring import RUBRIC
+
+SESSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+CHAT_TAIL = 30                   # 화면용으로 메모리에 두는 최근 (사용자, NPC) 발화 쌍 수
+_SID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_ENGINE_CODES = {"LLM": "L", "휴리스틱": "H"}
+_ENGINE_NAMES = {v: k for k, v in _ENGINE_CODES.items()}
+
+class TurnRecord(NamedTuple):
+    n: int
+    user: str
+    npc: str
+    scores: tuple            # RUBRIC 키 순서의 점수
+    total: float
+    engine: str
+    strengths: tuple = ()
+    improvements: tuple = ()
+    tip: str = ""
+    rewrite: str = ""
+    latency: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_eval(cls, n: int, user: str, npc: str, ev: Dict[str, Any],
+                  latency: Optional[Dict[str, Any]] = None) -> "TurnRecord":
+        fb = ev.get("feedback", {})
+        return cls(
+            n=n, user=user, npc=npc,
+            scores=tuple(ev["scores"][k] for k in RUBRIC),
+            total=ev["total"],
+            engine=ev.get("__engine", "?"),
+            strengths=tuple(fb.get("strengths", [])),
+            improvements=tuple(fb.get("improvements", [])),
+            tip=fb.get("tip", ""),
+            rewrite=fb.get("rewrite_example", ""),
+            latency=latency,
+        )
+
+    def to_row(self) -> Dict[str, Any]:
+        row = {
+            "t": "u", "n": self.n, "u": self.user, "a": self.npc,
+            "s": list(self.scores), "tot": self.total,
+            "e": _ENGINE_CODES.get(self.engine, self.engine),
+        }
+        if self.strengths: row["fs"] = list(self.strengths)
+        if self.improvements: row["fi"] = list(self.improvements)
+        if self.tip: row["tip"] = self.tip
+        if self.rewrite: row["rw"] = self.rewrite
+        if self.latency: row["lat"] = self.latency
+        return row
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "TurnRecord":
+        return cls(
+            n=row["n"], user=row["u"], npc=row["a"], scores=tuple(row["s"]), total=row["tot"],
+            engine=_ENGINE_NAMES.get(row["e"], row["e"]),
+            strengths=tuple(row.get("fs", ())), improvements=tuple(row.get("fi", ())),
+            tip=row.get("tip", ""), rewrite=row.get("rw", ""), latency=row.get("lat"),
+        )
+
+    def to_eval(self) -> Dict[str, Any]:
+        """summarize_overall/화면 표시용 평가 dict (예전 scores 항목과 같은 모양, 원문 중복 없음)."""
+        fb: Dict[str, Any] = {"strengths": list(self.strengths), "improvements": list(self.improvements), "tip": self.tip}
+        if self.rewrite:
+            fb["rewrite_example"] = self.rewrite
+        return {
+            "scores": dict(zip(RUBRIC, self.scores)),
+            "feedback": fb,
+            "total": self.total,
+            "__eval_target": "나(사용자)",
+            "__engine": self.engine,
+        }
+
+def _dumps(row: Dict[str, Any]) -> str:
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+
+class SessionStore:
+    def __init__(self, path: str, chat_tail: int = CHAT_TAIL):
+        self.path = path
+        # 화면용 최근 (사용자, NPC) 발화 chat_tail 쌍과 어디까지 읽었는지 — rerun 마다 파일 전체를 다시 파싱하지 않도록.
+        # 그보다 앞의 발화는 메모리에 두지 않는다 (전체가 필요하면 iter_turns() 로 흘려 읽기)
+        self._chat: Deque[Tuple[str, str]] = deque(maxlen=chat_tail)
+        self._chat_seen = 0
+        self._chat_offset = 0
+
+    # ---------- 생성/열기 ----------
+    @classmethod
+    def create(cls, sid: str, meta: Dict[str, Any], profile: Dict[str, Any], system: str,
+               root: str = SESSIONS_DIR) -> "SessionStore":
+        if not _SID_RE.match(sid):
+            raise ValueError(f"잘못된 세션 id: {sid!r}")
+        os.makedirs(root, exist_ok=True)
+        store = cls(os.path.join(root, f"{sid}.jsonl"))
+        store._append({"t": "h", "v": 1, "id": sid, "meta": meta, "profile": profile, "system": system})
+        return store
+
+    @classmethod
+    def open(cls, sid: str, root: str = SESSIONS_DIR) -> Optional["SessionStore"]:
+        if not sid or not _SID_RE.match(sid):
+            return None
+        path = os.path.join(root, f"{sid}.jsonl")
+        return cls(path) if os.path.exists(path) else None
+
+    # ---------- 쓰기 ----------
+    def _append(self, row: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(_dumps(row) + "\n")
+
+    def append_turn(self, turn: TurnRecord):
+        self._append(turn.to_row())
+
+    def set_system(self, content: str):
+        self._append({"t": "s", "content": content})
+
+    def record_fold(self, summary: str, folded: int):
+        self._append({"t": "m", "summary": summary, "folded": folded})
+
+    def finish(self, summary: Dict[str, Any]):
+        self._append({"t": "f", "summary": summary, "ended_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+
+    # ---------- 읽기 ----------
+    def header(self) -> Dict[str, Any]:
+        with open(self.path, encoding="utf-8") as f:
+            return json.loads(f.readline())
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):   # 쓰다 끊긴 마지막 줄은 무시
+                    yield json.loads(line)
+
+    def iter_turns(self) -> Iterator[TurnRecord]:
+        for row in self.iter_records():
+            if row["t"] == "u":
+                yield TurnRecord.from_row(row)
+
+    def chat_tail(self) -> Tuple[int, List[Tuple[str, str]]]:
+        """(앞에서 생략된 턴 수, 최근 (사용자, NPC) 발화들). 지난번 읽은 위치 뒤에 붙은 줄만 새로 읽는다."""
+        with open(self.path, "rb") as f:
+            f.seek(self._chat_offset)
+            for line in f:
+                if not line.endswith(b"\n"):   # 쓰다 끊긴 줄은 다음에 다시
+                    break
+                self._chat_offset += len(line)
+                row = json.loads(line)
+                if row["t"] == "u":
+                    self._chat.append((row["u"], row["a"]))
+                    self._chat_seen += 1
+        return self._chat_seen - len(self._chat), list(self._chat)
+
+    def iter_tail(self, block: int = 8192) -> Iterator[Dict[str, Any]]:
+        """파일 끝에서부터 거꾸로 레코드를 읽는다 (헤더 포함)."""
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            while pos > 0:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                lines = buf.split(b"\n")
+                buf = lines[0]
+                for line in reversed(lines[1:]):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:   # 쓰다 끊긴 마지막 줄
+                        continue
+            if buf.strip():
+                yield json.loads(buf)
+
+    def recent_turns(self, n: int) -> List[TurnRecord]:
+        """마지막 n 턴 (오래된 것부터). 꼬리만 읽는다."""
+        out: List[TurnRecord] = []
+        for row in self.iter_tail():
+            if row["t"] == "u":
+                out.append(TurnRecord.from_row(row))
+                if len(out) >= n:
+                    break
+        out.reverse()
+        return out
+
+    def resume_state(self) -> Dict[str, Any]:
+        """
+        재개에 필요한 상태만 꼬리에서 읽는다.
+        마지막 "m"(요약 접기) 이후 + 그 창에 걸친 턴까지만 읽으면 되므로 세션 길이와 무관.
+        """
+        header = self.header()
+        system = header.get("system", "")
+        turns: List[TurnRecord] = []
+        fold: Optional[Dict[str, Any]] = None
+        finish: Optional[Dict[str, Any]] = None
+        system_seen = False
+        last_n = 0
+        for row in self.iter_tail():
+            t = row["t"]
+            if t == "f" and finish is None and not turns:
+                finish = row
+            elif t == "s" and not system_seen:
+                system, system_seen = row["content"], True
+            elif t == "m" and fold is None:
+                fold = row
+            elif t == "u":
+                last_n = last_n or row["n"]
+                turns.append(TurnRecord.from_row(row))
+                # 접힌 메시지 수 f 이후 메시지는 턴 f//2 + 1 부터 시작
+                if fold is not None and row["n"] <= fold["folded"] // 2 + 1:
+                    break
+            elif t == "h":
+                break
+        turns.reverse()
+        folded = fold["folded"] if fold else 0
+        recent: List[Dict[str, str]] = []
+        for tr in turns:
+            recent += [{"role": "user", "content": tr.user}, {"role": "assistant", "content": tr.npc}]
+        skip = folded - 2 * (turns[0].n - 1) if turns else 0
+        return {
+            "meta": header.get("meta", {}),
+            "profile": header.get("profile", {}),
+            "system": system,
+            "turn": last_n,
+            "finished": finish is not None,
+            "summary": finish["summary"] if finish else None,
+            "history": {"summary": fold["summary"] if fold else "", "upto": 0, "folded": folded},
+            "messages": recent[max(0, skip):],
+        }
+
+    # ---------- 내보내기 ----------
+    def export(self, fp: IO[str], summary: Optional[Dict[str, Any]] = None):
+        """예전 export_json() 과 같은 구조의 JSON 을 로그에서 바로 흘려 쓴다."""
+        header = self.header()
+        system = header.get("system", "")
+        meta = dict(header.get("meta", {}))
+        ended_at, final = None, None
+        for row in self.iter_records():
+            if row["t"] == "s":
+                system = row["content"]
+            elif row["t"] == "f":
+                ended_at, final = row.get("ended_at"), row.get("summary")
+        meta["ended_at"] = ended_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        meta["session_id"] = header.get("id", "")   # 아카이브/진행도 backfill 이 같은 세션을 다시 세지 않도록
+
+        fp.write('{"meta": ' + json.dumps(meta, ensure_ascii=False))
+        fp.write(', "profile": ' + json.dumps(header.get("profile", {}), ensure_ascii=False))
+        fp.write(', "messages": [' + json.dumps({"role": "system", "content": system}, ensure_ascii=False))
+        for tr in self.iter_turns():
+            fp.write(", " + json.dumps({"role": "user", "content": tr.user}, ensure_ascii=False))
+            fp.write(", " + json.dumps({"role": "assistant", "content": tr.npc}, ensure_ascii=False))
+        fp.write('], "scores": [')
+        for i, tr in enumerate(self.iter_turns()):
+            fp.write((", " if i else "") + json.dumps(tr.to_eval(), ensure_ascii=False))
+        fp.write('], "latency": [')
+        for i, tr in enumerate(self.iter_turns()):
+            fp.write((", " if i else "") + json.dumps(tr.latency or {}, ensure_ascii=False))
+        fp.write('], "summary": ' + json.dumps(summary or final, ensure_ascii=False) + "}")
+
+    def export_buffer(self, summary: Optional[Dict[str, Any]] = None) -> io.BytesIO:
+        """
+        export() 를 UTF-8 로 BytesIO 에 바로 써서 처음으로 되감아 돌려준다 (st.download_button 의 data 로 그대로).
+        문자열 전체를 만든 뒤 인코딩하지 않으므로 사본은 바이트 하나뿐이다.
+        """
+        buf = io.BytesIO()
+        text = io.TextIOWrapper(buf, encoding="utf-8")
+        self.export(text, summary)
+        text.flush()
+        text.detach()
+        buf.seek(0)
+        return buf
+
+def new_session_id() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{os.urandom(4).hex()}"
@@ -0,0 +1,39 @@
+# test_features.py
+# 실행 (SimTalk/ 또는 저장소 루트에서): python -m pytest -q
+# 특징 행렬 경로(feature_matrix + score_matrix)가 스칼라 경로(extract_signals + heuristic_scores)와
+# 특징/점수가 완전히 같은지 고정 시드 코퍼스/퍼즈로 확인한다 (bench_features.py 의 parity 검사를 작은 크기로).
+
+import numpy as np
+import pytest
+
+from bench_features import scalar_scores
+from bench_heuristics import make_corpus, make_fuzz
+from features import feature_matrix, matrix_evaluate, scalar_feature_matrix, score_matrix
+from scoring import extract_signals, heuristic_scores
+
+N = 3000
+CORPORA = {"corpus": make_corpus(N), "fuzz": make_fuzz(N)}
+
+def _first_bad(rows_differ: np.ndarray, corpus):
+    bad = np.flatnonzero(rows_differ)
+    return f"{len(bad)}건, 예: {corpus[bad[0]]!r}" if len(bad) else ""
+
+@pytest.mark.parametrize("name", CORPORA)
+def test_feature_matrix_matches_scalar(name):
+    corpus = CORPORA[name]
+    X_batch, X_scalar = feature_matrix(corpus, dedupe=False), scalar_feature_matrix(corpus)
+    assert not _first_bad((X_batch != X_scalar).any(axis=1), corpus)
+
+@pytest.mark.parametrize("name", CORPORA)
+def test_score_matrix_matches_heuristic_scores(name):
+    corpus = CORPORA[name]
+    scores = score_matrix(feature_matrix(corpus, dedupe=False))
+    assert not _first_bad((scores != scalar_scores(corpus)).any(axis=1), corpus)
+
+def test_dedupe_keeps_row_order():
+    corpus = CORPORA["corpus"]
+    np.testing.assert_array_equal(feature_matrix(corpus, dedupe=True), feature_matrix(corpus, dedupe=False))
+
+def test_matrix_evaluate_dicts():
+    corpus = CORPORA["corpus"][:200]
+    assert matrix_evaluate(corpus) == [heuristic_scores(extract_signals(u)) for u in corpus]
@@ -0,0 +1,46 @@
+# test_progress.py
+# 실행 (SimTalk/ 또는 저장소 루트에서): python -m pytest -q
+# 진행도 집계: 진행 중에 반영한 세션을 내보내기 → 아카이브 → backfill 로 다시 넣어도 한 번만 세는지 확인한다.
+
+import os
+
+from archive import convert
+from progress import ProgressStore, backfill, user_key
+from session_store import SessionStore, TurnRecord
+
+def _finished_session(root: str, sid: str, turns: int = 4) -> SessionStore:
+    store = SessionStore.create(sid, {"started_at": "2026-01-01 10:00:00", "scenario": "소개팅", "difficulty": "보통",
+                                      "rounds": turns}, {"내 이름": "민수"}, "시스템", root=root)
+    for i in range(turns):
+        store.append_turn(TurnRecord(n=i + 1, user=f"안녕하세요 {i}", npc="반가워요", scores=(7, 6, 8, 9, 1),
+                                     total=7.0 + i / 10, engine="휴리스틱"))
+    store.finish({"avg_total": 7.15})
+    return store
+
+def _record_live(progress: ProgressStore, store: SessionStore) -> bool:
+    # 1.py 가 세션을 끝낼 때와 같은 호출
+    header = store.header()
+    return progress.record_session(header["id"], user_key(header["profile"]), header["meta"]["scenario"],
+                                   header["meta"]["difficulty"], [tr.to_eval() for tr in store.iter_turns()])
+
+def test_backfill_from_archive_skips_live_sessions(tmp_path):
+    logs, exports = tmp_path / "sessions", tmp_path / "exports"
+    exports.mkdir()
+    progress = ProgressStore(str(tmp_path / "progress.sqlite3"))
+    for k in range(3):
+        store = _finished_session(str(logs), f"s{k}")
+        assert _record_live(progress, store)
+        with open(exports / f"date_sim_{k}.json", "w", encoding="utf-8") as f:
+            store.export(f)
+    convert([str(exports)], str(tmp_path / "archive"))
+
+    assert backfill([str(tmp_path / "archive")], progress) == {"seen": 3, "added": 0}
+    assert backfill([str(logs)], progress) == {"seen": 3, "added": 0}
+    assert progress.user_progress("민수")["sessions"] == 3
+
+def test_backfill_counts_new_sessions_once(tmp_path):
+    progress = ProgressStore(str(tmp_path / "progress.sqlite3"))
+    _finished_session(str(tmp_path), "new1")
+    assert backfill([str(tmp_path)], progress) == {"seen": 1, "added": 1}
+    assert backfill([str(tmp_path)], progress) == {"seen": 1, "added": 0}
+    assert os.path.exists(tmp_path / "progress.sqlite3")
@@ -0,0 +1,42 @@
+# test_scoring.py
+# 실행 (SimTalk/ 또는 저장소 루트에서): python -m pytest -q
+# 사전 컴파일 휴리스틱이 기존 구현(bench_heuristics.legacy_heuristic_evaluate)과 결과가 완전히 같은지 확인한다.
+# 벤치마크 스크립트와 같은 코퍼스/퍼즈를 쓰되 고정 시드 + 작은 크기로.
+
+import random
+
+import pytest
+
+from bench_heuristics import _SAMPLES, legacy_heuristic_evaluate, make_corpus, make_fuzz
+from scoring import LEXICON_MATCHER, LEXICONS, heuristic_evaluate
+
+N = 3000
+
+def _per_pattern_counts(text: str):
+    """예전 방식: 어휘마다 `k in text` 로 따로 센다."""
+    return {name: sum(1 for k in words if k in text) for name, words in LEXICONS.items()}
+
+# ================== 어휘 매칭 ==================
+@pytest.mark.parametrize("corpus", [make_corpus(N), make_fuzz(N)], ids=["corpus", "fuzz"])
+def test_lexicon_matcher_counts_match_per_pattern(corpus):
+    for text in corpus:
+        low = text.lower()
+        assert LEXICON_MATCHER.counts(low) == _per_pattern_counts(low), text
+
+def test_lexicon_matcher_overlapping_keywords():
+    # 겹치는/포함 관계 키워드가 한 글자 흐름 안에 몰려 있어도 목록별로 한 번씩만 센다
+    rng = random.Random(7)
+    words = [w for ws in LEXICONS.values() for w in ws]
+    for _ in range(500):
+        text = "".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+        assert LEXICON_MATCHER.counts(text) == _per_pattern_counts(text), text
+
+# ================== 휴리스틱 평가 ==================
+@pytest.mark.parametrize("text", _SAMPLES)
+def test_heuristic_matches_legacy_samples(text):
+    assert heuristic_evaluate(text) == legacy_heuristic_evaluate(text)
+
+@pytest.mark.parametrize("corpus", [make_corpus(N), make_fuzz(N)], ids=["corpus", "fuzz"])
+def test_heuristic_matches_legacy(corpus):
+    bad = [u for u in corpus if heuristic_evaluate(u) != legacy_heuristic_evaluate(u)]
+    assert not bad, f"parity 실패 {len(bad)}건, 예: {bad[0]!r}"
@@ -0,0 +1,37 @@
+# test_session_store.py
+# 실행 (SimTalk/ 또는 저장소 루트에서): python -m pytest -q
+# 세션 로그 내보내기가 예전 export_json() 구조 그대로이고, st.download_button 이 받는 형식인지 확인한다.
+
+import io
+import json
+
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from session_store import SessionStore, TurnRecord
+
+def _store(tmp_path, turns: int = 5) -> SessionStore:
+    store = SessionStore.create("test", {"rounds": turns, "scenario": "소개팅"}, {"내 이름": "민수"}, "시스템", root=str(tmp_path))
+    for i in range(turns):
+        store.append_turn(TurnRecord(n=i + 1, user=f"안녕하세요 {i}", npc=f"반가워요 {i}", scores=(7, 6, 8, 9, 1),
+                                     total=7.2, engine="휴리스틱", latency={"npc_s": 0.5}))
+    return store
+
+def test_export_buffer_accepted_by_download_button(tmp_path):
+    store = _store(tmp_path)
+    data, mime = convert_data_to_bytes_and_infer_mime(store.export_buffer({"avg_total": 7.2}),
+                                                      unsupported_error=TypeError("unsupported"))
+    assert mime == "application/octet-stream"
+    out = json.loads(data.decode("utf-8"))
+    assert [m["role"] for m in out["messages"]] == ["system"] + ["user", "assistant"] * 5
+    assert out["messages"][1]["content"] == "안녕하세요 0"
+    assert len(out["scores"]) == len(out["latency"]) == 5
+    assert out["scores"][0]["scores"]["레드플래그"] == 1
+    assert out["summary"] == {"avg_total": 7.2}
+    assert out["meta"]["scenario"] == "소개팅" and out["meta"]["ended_at"]
+
+def test_export_buffer_matches_text_export(tmp_path):
+    store = _store(tmp_path, turns=30)
+    store.finish({"avg_total": 7.2})   # ended_at 고정 (두 번 내보내는 사이 초가 바뀌지 않도록)
+    text = io.StringIO()
+    store.export(text)
+    assert store.export_buffer().getvalue() == text.getvalue().encode("utf-8")
@@ -0,0 +1 @@
+# SimTalk / NextTalk / FixTalk 가 같이 쓰는 모듈 (Streamlit 없이 import 가능)
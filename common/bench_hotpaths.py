@@ -0,0 +1,277 @@
+# bench_hotpaths.py
+# 턴마다 도는 순수 파이썬 핫패스 벤치마크 + 회귀 검사 (Streamlit 없이)
+#   SimTalk : scoring.heuristic_evaluate / weighted_total / parse_eval_output(예전 safe_json_parse) / summarize_overall
+#   NextTalk: dialog.normalize_dialog / clean_model_output / split_suggestions / SuggestionStream, chatlog.tail_window
+# 고정 시드로 만든 한국어 입력(짧은 채팅 발화, 길게 붙여넣은 카카오톡/LINE 로그, 깨진 모델 JSON, <think> 섞인 출력)에
+# 대해 케이스마다
+#   - 처리량: repeat 회차의 ops/s 와, 회차마다 앞뒤로 잰 보정 루프 대비 상대 처리량(rel)의 중앙값
+#   - 메모리: tracemalloc 으로 한 바퀴 도는 동안의 최대 할당 (시간 측정과 따로)
+#   - 출력 지문: 결과 전체의 sha256 (동작이 바뀌었는지)
+# 을 재고, 기준 파일(bench_hotpaths_baseline.json)과 비교해 허용 범위를 넘게 느려지거나 메모리가 늘면 종료 코드 1.
+# 기계 속도 차이와 실행 중 CPU 속도 변화는 rel 로 상쇄한다 (--no-calibrate 면 절대 처리량 중앙값으로 비교).
+# 실행 예 (저장소 루트에서):
+#   python -m common.bench_hotpaths                      # 기준과 비교 (느려지면 실패)
+#   python -m common.bench_hotpaths --cases simtalk.     # 이름에 simtalk. 이 들어간 케이스만
+#   python -m common.bench_hotpaths --update             # 지금 결과를 새 기준으로 저장 (의도한 변경 뒤)
+#   python -m common.bench_hotpaths --strict-output      # 출력 지문이 바뀌어도 실패로
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Any, List, NamedTuple, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+for _app in ("SimTalk", "NextTalk"):
+    sys.path.insert(0, str(ROOT / _app))
+from scoring import RUBRIC, heuristic_evaluate, parse_eval_output, summarize_overall, weighted_total
+from bench_heuristics import make_corpus
+from chatlog import log_budget, tail_window
+from dialog import SuggestionStream, clean_model_output, normalize_dialog, split_suggestions
+from bench_chatlog import make_export
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_hotpaths_baseline.json")
+
+class Case(NamedTuple):
+    name: str
+    unit: str                          # ops 하나가 무엇인지 (표시용)
+    items: List[Any]
+    fn: Callable[[Any], Any]
+
+# ================== 입력 ==================
+_REASONING = ["상대가 주말 얘기를 꺼냈으니 가볍게 이어가자.", "질문으로 끝내면 대화가 이어진다.", "너무 길면 안 되니까 30자 내외로."]
+_SUGGEST = ["오 그 영화 나도 보고 싶었어! 어땠어?", "주말에 같이 카페 갈래?", "ㅋㅋ 그거 완전 공감된다", "요즘 뭐에 빠져 있어?",
+            "다음엔 내가 맛집 알려줄게!", "헐 진짜? 더 얘기해줘", "그럼 토요일 어때?"]
+_FEEDBACK = ["존중감 있는 어투로 예의를 잘 지켰어요.", "질문으로 대화를 잘 이어갔어요.", "공감 1구 후 관련 질문 1개로 이어보세요.",
+             "짧은 문장 1–2개로 정리해 보세요."]
+
+def make_eval_json(n: int, seed: int = 0) -> List[str]:
+    """평가 모델 출력 흉내: 정상 JSON 과 흔히 깨지는 모양들 (코드펜스, <think>, 앞뒤 설명, 후행 쉼표, '0-10', 잘림, 작은따옴표, 잡문)."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        obj = {"scores": {k: rng.choice([rng.randint(0, 10), round(rng.uniform(0, 10), 1)]) for k in RUBRIC},
+               "feedback": {"strengths": rng.sample(_FEEDBACK, 2), "improvements": rng.sample(_FEEDBACK, 1),
+                            "tip": rng.choice(_FEEDBACK), "rewrite_example": rng.choice(_SUGGEST)}}
+        s = json.dumps(obj, ensure_ascii=False, indent=rng.choice([None, 2]))
+        kind = i % 9
+        if kind == 1:
+            s = f"```json\n{s}\n```"
+        elif kind == 2:
+            s = f"<think>{rng.choice(_REASONING)}</think>\n{s}"
+        elif kind == 3:
+            s = f"평가 결과입니다.\n{s}\n이상입니다."
+        elif kind == 4:
+            s = s.replace("]", ", ]").replace("\n}", ",\n}")
+        elif kind == 5:
+            s = s.replace(f'"{list(RUBRIC)[0]}": ', f'"{list(RUBRIC)[0]}": "0-10", "_": ', 1)
+        elif kind == 6:
+            s = s[: len(s) * 2 // 3]
+        elif kind == 7:
+            s = s.replace('"', "'")
+        elif kind == 8:
+            s = " ".join(rng.choice(_FEEDBACK) for _ in range(3))
+        out.append(s)
+    return out
+
+def make_model_outputs(n: int, seed: int = 0) -> List[str]:
+    """추천 모델 출력 흉내: <think> 블록, /no_think, 번호/글머리표, 빈 줄, 가끔 '\\n' 글자."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = []
+        if rng.random() < 0.6:
+            parts.append("<think>\n" + " ".join(rng.choice(_REASONING) for _ in range(rng.randint(1, 8))) + "\n</think>")
+        if rng.random() < 0.2:
+            parts.append("/no_think")
+        bullet = rng.choice(["{i}. ", "- ", "• ", ""])
+        lines = [bullet.format(i=i + 1) + rng.choice(_SUGGEST) for i in range(rng.randint(3, 6))]
+        parts.append(("\\n" if rng.random() < 0.1 else "\n").join(lines))
+        if rng.random() < 0.1:
+            parts.append("<tool_call>{}</tool_call>")
+        out.append("\n\n".join(parts))
+    return out
+
+def chunked(text: str, rng: random.Random) -> List[str]:
+    """스트리밍 조각 (1~6자 — Ollama 토큰 크기 흉내)."""
+    pieces, i = [], 0
+    while i < len(text):
+        k = rng.randint(1, 6)
+        pieces.append(text[i:i + k])
+        i += k
+    return pieces
+
+def _stream(pieces: List[str]) -> List[str]:
+    s = SuggestionStream(3)
+    for p in pieces:
+        s.feed(p)
+        if s.done:
+            break
+    else:
+        s.finish()
+    return s.suggestions
+
+def build_cases(scale: float = 1.0) -> List[Case]:
+    n = lambda k: max(10, int(k * scale))
+    turns = make_corpus(n(3000))
+    evals = [{"scores": heuristic_evaluate(t)["scores"]} for t in turns[:n(2000)]]
+    for e in evals:
+        e["total"] = weighted_total(e["scores"])
+        e["feedback"] = {"strengths": _FEEDBACK[:1], "improvements": _FEEDBACK[2:]}
+    rng = random.Random(3)
+    sessions = [rng.sample(evals, rng.randint(6, min(30, len(evals)))) for _ in range(n(500))]
+    logs = [make_export(kind, n(3000), seed=s) for s in range(2) for kind in ("카카오톡 PC", "카카오톡 모바일", "LINE")]
+    budget = log_budget(4096, 3)
+    raw = make_model_outputs(n(3000))
+    cleaned = [clean_model_output(r) for r in raw]
+    streams = [chunked(r, rng) for r in raw[:n(1000)]]
+    return [
+        Case("simtalk.heuristic_evaluate", "발화", turns, heuristic_evaluate),
+        Case("simtalk.weighted_total", "점수", [e["scores"] for e in evals] * 5, weighted_total),
+        Case("simtalk.parse_eval_output", "출력", make_eval_json(n(2000)), parse_eval_output),
+        Case("simtalk.summarize_overall", "세션", sessions, summarize_overall),
+        Case("nexttalk.normalize_dialog", "로그", logs, normalize_dialog),
+        Case("nexttalk.tail_window", "로그", logs, lambda t: tail_window(t, budget)),
+        Case("nexttalk.clean_model_output", "출력", raw, clean_model_output),
+        Case("nexttalk.split_suggestions", "출력", cleaned, lambda t: split_suggestions(t, 3)),
+        Case("nexttalk.suggestion_stream", "출력", streams, _stream),
+    ]
+
+# ================== 측정 ==================
+def _calib_round():
+    d: Dict[str, int] = {}
+    for i in range(200):
+        w = f"단어{i}"
+        d[w] = d.get(w, 0) + len(w.strip()) * 3 % 7
+    "".join(sorted(d)).count("1")
+
+# 기계 속도 보정용 순수 파이썬 루프 (문자열/딕셔너리/정수 연산 섞음)
+_CALIB = Case("calibration", "회", [None] * 10, lambda _: _calib_round())
+
+def _rate(case: Case, min_time: float) -> float:
+    """입력 전체를 min_time 초 이상 (필요하면 여러 바퀴) 돌린 ops/s."""
+    done, t0 = 0, time.perf_counter()
+    while True:
+        for x in case.items:
+            case.fn(x)
+        done += len(case.items)
+        dt = time.perf_counter() - t0
+        if dt >= min_time:
+            return done / dt
+
+def _digest(outputs: List[Any]) -> str:
+    h = hashlib.sha256()
+    for o in outputs:
+        h.update(json.dumps(o, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def measure(case: Case, repeat: int = 7, min_time: float = 0.05) -> Dict[str, Any]:
+    """
+    회차마다 보정 루프 → 케이스 → 보정 루프 순으로 재서 rel = 케이스 ops/s ÷ 같은 때의 보정 ops/s.
+    공유/절전 CPU 에서는 절대 속도가 실행마다 2배까지 흔들리지만 rel 의 중앙값은 10% 안팎이라 회귀 판정은 rel 로 한다.
+    """
+    digest = _digest([case.fn(x) for x in case.items])    # 한 바퀴는 데우기 겸 출력 지문
+    rates, rels = [], []
+    for _ in range(repeat):
+        before = _rate(_CALIB, min_time / 2)
+        r = _rate(case, min_time)
+        rels.append(r / max(before, _rate(_CALIB, min_time / 2)))
+        rates.append(r)
+    tracemalloc.start()
+    for x in case.items:
+        case.fn(x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"items": len(case.items), "unit": case.unit, "ops_s": round(max(rates), 1),
+            "median_ops_s": round(statistics.median(rates), 1), "rel": round(statistics.median(rels), 5),
+            "peak_kb": round(peak / 1024, 1), "digest": digest}
+
+def compare(cur: Dict[str, Any], base: Optional[Dict[str, Any]], tol: float, mem_tol: float,
+            mem_slack_kb: float, same_input: bool, calibrated: bool = True) -> List[str]:
+    """기준 대비 문제 목록 (빈 목록이면 통과)."""
+    key = "rel" if calibrated else "median_ops_s"
+    if base is None or not base.get(key):
+        return []
+    problems = []
+    ratio = cur[key] / base[key]
+    if ratio < 1 - tol:
+        problems.append(f"느려짐 -{1 - ratio:.0%} ({'보정 후' if calibrated else '절대'} 처리량)")
+    if same_input and cur["peak_kb"] > base["peak_kb"] * (1 + mem_tol) + mem_slack_kb:
+        problems.append(f"메모리 {cur['peak_kb']:,.0f}KB > 기준 {base['peak_kb']:,.0f}KB")
+    return problems
+
+# ================== CLI ==================
+def main():
+    ap = argparse.ArgumentParser(description="SimTalk/NextTalk 핫패스 벤치마크 + 회귀 검사")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--update", action="store_true",
+                    help="이번 결과를 기준으로 저장 (고른 케이스만 갱신, 회차를 3배로 돌린 중앙값)")
+    ap.add_argument("--cases", default="", help="이름에 이 문자열이 들어간 케이스만")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--scale", type=float, default=1.0, help="입력 크기 배율 (기준과 다르면 메모리/출력 비교는 건너뜀)")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="허용하는 처리량 감소 비율")
+    ap.add_argument("--mem-tolerance", type=float, default=0.5, help="허용하는 최대 메모리 증가 비율")
+    ap.add_argument("--mem-slack-kb", type=float, default=64.0, help="메모리 비교에 더해 주는 고정 여유")
+    ap.add_argument("--no-calibrate", action="store_true", help="보정 없이 절대 처리량 중앙값으로 비교 (같은 기계일 때)")
+    ap.add_argument("--strict-output", action="store_true", help="출력 지문이 바뀌면 실패")
+    ap.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    args = ap.parse_args()
+
+    if "streamlit" in sys.modules:
+        raise SystemExit("❌ 핫패스 모듈을 import 하다가 streamlit 이 같이 올라왔어요 — UI 코드와 분리돼야 해요")
+
+    base: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+    same_input = base.get("scale") == args.scale
+
+    results: Dict[str, Dict[str, Any]] = {}
+    failed = changed = 0
+    for case in build_cases(args.scale):
+        if args.cases and args.cases not in case.name:
+            continue
+        r = results[case.name] = measure(case, args.repeat * (3 if args.update else 1))
+        b = base.get("cases", {}).get(case.name)
+        problems = compare(r, b, args.tolerance, args.mem_tolerance, args.mem_slack_kb, same_input,
+                           not args.no_calibrate)
+        if b is not None and same_input and b["digest"] != r["digest"]:
+            changed += 1
+            problems.append("출력 지문 바뀜" + ("" if args.strict_output else " (경고)"))
+        hard = [p for p in problems if "경고" not in p]
+        failed += bool(hard)
+        r["problems"] = problems
+        r["vs_baseline"] = round(r["rel"] / b["rel"], 3) if b else None
+        if not args.json:
+            mark = "—" if b is None else ("❌" if hard else "✅")
+            ratio = f" · 기준 대비 x{r['vs_baseline']:.2f}" if b else " · 기준 없음"
+            print(f"{mark} {case.name:<28} {r['median_ops_s']:>12,.0f} {case.unit}/s (최고 {r['ops_s']:,.0f})"
+                  f" · 최대 {r['peak_kb']:>8,.1f}KB{ratio}" + (f" — {'; '.join(problems)}" if problems else ""))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=1))
+
+    if args.update:
+        kept = base.get("cases", {}) if same_input else {}
+        base = {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+            "machine": platform.machine(), "scale": args.scale,
+            "cases": {**kept, **{k: {f: v[f] for f in ("items", "unit", "ops_s", "median_ops_s", "rel", "peak_kb", "digest")}
+                                 for k, v in results.items()}},
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(base, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"기준 저장: {args.baseline}")
+        return
+    if failed:
+        raise SystemExit(f"❌ 회귀 {failed}건")
+
+if __name__ == "__main__":
+    main()
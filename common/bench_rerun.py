@@ -0,0 +1,191 @@
+# bench_rerun.py
+# Streamlit rerun 비용 벤치마크: 두 앱(SimTalk/1.py, NextTalk/ST.py)을 AppTest 로 헤드리스 실행해
+#   - 제출(submit) 1회에 걸리는 시간 (NextTalk 는 모델 확인, SimTalk 는 NPC+평가 포함)
+#   - 아무 입력 없는 rerun 1회에 걸리는 시간 (기록이 쌓인 뒤 위젯만 건드렸을 때)
+# 을 잰다. 모델 호출은 common/stub_ollama.py 를 띄워 쓰므로(지연 0) 앱 자체의 오버헤드만 남는다.
+# 실행 예 (저장소 루트에서):
+#   python -m common.bench_rerun                       # 현재 트리만
+#   python -m common.bench_rerun --baseline HEAD~1     # git 의 이전 리비전과 before/after 비교
+# --baseline 은 해당 리비전의 앱 파일을 임시 디렉터리에 풀어 같은 조건으로 돌린다.
+# 앱마다 별도 프로세스에서 돌린다 (engine/prompts 같은 모듈 이름이 트리끼리 겹치므로).
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+APPS = {"SimTalk": "SimTalk/1.py", "NextTalk": "NextTalk/ST.py"}
+_INPUTS = {
+    "SimTalk": ["안녕하세요! 혹시 주말에 뭐 하셨어요?", "영화 좋아하세요? 저는 요즘 자주 봐요.", "그거 정말 재밌겠네요. 어떤 장르 좋아해요?"],
+    "NextTalk": ["[철수] [오후 3:14] 안녕\n영희: 주말에 뭐 했어?\n철수 - 그냥 집에 있었어",
+                 "민수: 오늘 뭐 먹을까\n지은: 글쎄 너는?\n민수: 나는 아무거나"],
+}
+
+def _ms(xs: List[float]) -> Dict[str, float]:
+    xs = sorted(xs)
+    return {"p50": round(statistics.median(xs) * 1000, 1), "mean": round(statistics.fmean(xs) * 1000, 1),
+            "p90": round(xs[int(0.9 * (len(xs) - 1))] * 1000, 1)}
+
+# ================== 자식 프로세스: 앱 하나 측정 ==================
+def run_app(app: str, path: str, turns: int, reruns: int) -> Dict[str, Any]:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(path, default_timeout=120).run()
+    if app == "SimTalk":
+        next(s for s in at.slider if s.label == "라운드 수").set_value(30).run()
+    submit, rerun = [], []
+    for i in range(turns):
+        t0 = time.perf_counter()
+        at.chat_input[0].set_value(_INPUTS[app][i % len(_INPUTS[app])]).run()
+        submit.append(time.perf_counter() - t0)
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        rerun.append(time.perf_counter() - t0)
+    if at.exception:
+        raise SystemExit(f"{app} 실행 중 예외: {at.exception[0].value}")
+    # 측정하느라 만든 세션 로그는 지운다
+    sid = at.session_state["sid"] if "sid" in at.session_state else ""
+    log = Path(path).resolve().parent / "sessions" / f"{sid}.jsonl"
+    if app == "SimTalk" and sid and log.exists():
+        log.unlink()
+    return {"submit_ms": _ms(submit), "rerun_ms": _ms(rerun)}
+
+# ================== 구성 요소별 before/after (같은 프로세스) ==================
+def _per_call(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+def micro(history_turns: int) -> Dict[str, Any]:
+    """rerun 한 번에 도는 구성 요소를 예전 방식/캐시 방식으로 각각 잰다 (호출 1회당 ms)."""
+    import re
+    sys.path[:0] = [str(ROOT / "SimTalk"), str(ROOT / "NextTalk")]
+    from common.model_info import ModelInfoCache
+    from common.transport import get_transport
+    from dialog import normalize_dialog
+    from prompts import _system_prompt, build_system_prompt
+    from session_store import SessionStore, TurnRecord
+
+    model = "bench-model"
+    info = ModelInfoCache()
+    log = "\n".join(f"[철수] [오후 3:{i:02d}] 주말에 뭐 했어 {i}" if i % 2 else f"영희: 그냥 집에 있었어 {i}" for i in range(40))
+    old_patterns = [r'^\s*\[(?P<name>[^\]]+)\]\s*\[(?P<time>[^\]]*)\]\s*(?P<content>.+)\s*$',
+                    r'^\s*\[(?P<name>[^\]]+)\]\s*(?P<content>.+)\s*$',
+                    r'^\s*(?P<name>[^:\-\[\]]+)\s*[:\-]\s*(?P<content>.+)\s*$']
+
+    def normalize_old():   # 예전 ST.py 의 normalize_dialog 그대로 (호출마다 패턴 생성)
+        patterns = [re.compile(p) for p in old_patterns]
+        out = []
+        for raw in log.strip().splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            normalized = None
+            for p in patterns:
+                m = p.match(line)
+                if m:
+                    name = re.sub(r'\s+', ' ', m.group('name').strip())
+                    content = re.sub(r'\s+', ' ', m.group('content').strip())
+                    normalized = f"{name} - {content}"
+                    break
+            out.append(normalized if normalized else re.sub(r'\s+', ' ', line))
+        return "\n".join(out)
+
+    profile = {"내 이름": "민수", "상대 이름": "지은", "관심사": "영화, 카페", "_관심사_list": ["영화", "카페"]}
+    with tempfile.TemporaryDirectory(prefix="bench_rerun_") as d:
+        store = SessionStore.create("bench", {}, profile, "sys", root=d)
+        for i in range(history_turns):
+            store.append_turn(TurnRecord(n=i + 1, user=f"안녕하세요 {i}", npc=f"반가워요 {i}", scores=(7, 7, 7, 7, 1),
+                                         total=7.0, engine="휴리스틱"))
+        store.chat_tail()
+        rows = {
+            "model_check": (_per_call(lambda: get_transport().show(model=model), 20),
+                            _per_call(lambda: info.exists(model), 2000)),
+            "system_prompt": (_per_call(lambda: _system_prompt.__wrapped__(
+                                  tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in profile.items())),
+                                  "소개팅", "보통"), 2000),
+                              _per_call(lambda: build_system_prompt(profile, "소개팅", "보통"), 2000)),
+            f"history_{history_turns}": (_per_call(lambda: list(store.iter_turns()), 20),
+                                         _per_call(store.chat_tail, 2000)),
+            "normalize_dialog": (_per_call(normalize_old, 200), _per_call(lambda: normalize_dialog(log), 200)),
+        }
+    return {k: {"before_ms": round(b * 1000, 4), "after_ms": round(a * 1000, 4)} for k, (b, a) in rows.items()}
+
+# ================== 부모 프로세스 ==================
+def export_tree(rev: str, dest: str):
+    """git 리비전의 앱/공용 모듈만 dest 에 푼다."""
+    archive = subprocess.run(["git", "-C", str(ROOT), "archive", rev, "SimTalk", "NextTalk", "common"],
+                             check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+
+def measure(tree: Path, app: str, args, env: Dict[str, str]) -> Dict[str, Any]:
+    cmd = [sys.executable, __file__, "--child", app, "--app-path", str(tree / APPS[app]),
+           "--turns", str(args.turns), "--reruns", str(args.reruns)]
+    out = subprocess.run(cmd, cwd=str(tree), env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise SystemExit(f"{app} ({tree}) 측정 실패:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser(description="Streamlit 앱 rerun 오버헤드 벤치마크 (before/after)")
+    ap.add_argument("--apps", default="SimTalk,NextTalk", help="쉼표로 구분 (SimTalk, NextTalk)")
+    ap.add_argument("--turns", type=int, default=12, help="앱마다 제출할 메시지 수")
+    ap.add_argument("--reruns", type=int, default=30, help="제출 후 입력 없이 돌릴 rerun 수")
+    ap.add_argument("--baseline", default="", help="비교할 git 리비전 (예: HEAD~1)")
+    ap.add_argument("--show-delay", type=float, default=0.02, help="가짜 서버의 /api/show 지연(초)")
+    ap.add_argument("--history-turns", type=int, default=200, help="구성 요소 측정에 쓸 세션 로그 턴 수")
+    ap.add_argument("--out", default="", help="결과 JSON 저장 경로")
+    ap.add_argument("--child", default="", help=argparse.SUPPRESS)
+    ap.add_argument("--app-path", default="", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_app(args.child, args.app_path, args.turns, args.reruns)))
+        return
+
+    sys.path.insert(0, str(ROOT))
+    from common.stub_ollama import StubConfig, base_url, serve
+    server, _ = serve(port=0, background=True,
+                      cfg=StubConfig(token_delay=0.0, prefill_per_1k=0.0, show_delay=args.show_delay))
+    os.environ.update({"OLLAMA_HOST": base_url(server), "OLLAMA_TRANSPORT": "live"})
+    os.environ.pop("SMOOTHTALK_METRICS", None)
+    env = dict(os.environ)
+
+    trees = {"after": ROOT}
+    tmp = None
+    if args.baseline:
+        tmp = tempfile.TemporaryDirectory(prefix="bench_rerun_")
+        export_tree(args.baseline, tmp.name)
+        trees = {"before": Path(tmp.name), "after": ROOT}
+
+    report: Dict[str, Any] = {"turns": args.turns, "reruns": args.reruns, "show_delay": args.show_delay,
+                              "baseline": args.baseline or None, "components": micro(args.history_turns), "apps": {}}
+    for name, r in report["components"].items():
+        print(f"{name:<17} 예전 {r['before_ms']:>9.4f}ms → 캐시 {r['after_ms']:>9.4f}ms")
+    for app in [a.strip() for a in args.apps.split(",") if a.strip()]:
+        report["apps"][app] = {label: measure(tree, app, args, env) for label, tree in trees.items()}
+        for label, r in report["apps"][app].items():
+            print(f"{app:<9} {label:<6} 제출 p50 {r['submit_ms']['p50']:>7.1f}ms (평균 {r['submit_ms']['mean']:.1f})"
+                  f" | rerun p50 {r['rerun_ms']['p50']:>7.1f}ms (평균 {r['rerun_ms']['mean']:.1f}, p90 {r['rerun_ms']['p90']:.1f})")
+        if "before" in report["apps"][app]:
+            b, a = report["apps"][app]["before"], report["apps"][app]["after"]
+            print(f"{app:<9} 변화   제출 {a['submit_ms']['p50'] - b['submit_ms']['p50']:+.1f}ms"
+                  f" | rerun {a['rerun_ms']['p50'] - b['rerun_ms']['p50']:+.1f}ms (p50 기준)")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    server.shutdown()
+    if tmp is not None:
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
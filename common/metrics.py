@@ -0,0 +1,180 @@
+# metrics.py
+# 턴 단위 계측: 단계별 벽시계 구간(span) + Ollama 응답의 타이밍/토큰 필드
+# - Trace 하나가 턴 하나. 스레드 풀에서 도는 평가는 자기 Trace 를 만들어 끝난 뒤 merge()
+# - to_dict() 결과는 턴 기록(latency)에 그대로 들어가 JSON 내보내기에도 포함된다
+# - SMOOTHTALK_METRICS=경로 를 주면 턴마다 파일로도 남긴다
+#     *.prom → Prometheus 텍스트 (node_exporter textfile collector 용, 누적 히스토그램/카운터를 매번 통째로 다시 씀)
+#     그 외  → JSONL (한 줄 = 한 턴)
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+OLLAMA_COUNTS = ("prompt_eval_count", "eval_count")
+OLLAMA_DURATIONS = ("prompt_eval_duration", "eval_duration", "load_duration", "total_duration")
+
+def ollama_stats(resp: Any) -> Dict[str, Any]:
+    """Ollama 응답(또는 스트림의 done 조각)에서 토큰 수/소요 시간(초)/토큰 처리량만 뽑는다."""
+    if resp is None:
+        return {}
+    get = resp.get if hasattr(resp, "get") else (lambda k, d=None: getattr(resp, k, d))
+    out: Dict[str, Any] = {}
+    for k in OLLAMA_COUNTS:
+        if get(k) is not None:
+            out[k] = int(get(k))
+    for k in OLLAMA_DURATIONS:
+        if get(k) is not None:
+            out[k.replace("_duration", "_s")] = round(get(k) / 1e9, 4)
+    _add_rates(out)
+    return out
+
+def _add_rates(s: Dict[str, Any]):
+    if s.get("prompt_eval_s"):
+        s["prompt_tok_s"] = round(s.get("prompt_eval_count", 0) / s["prompt_eval_s"], 1)
+    if s.get("eval_s"):
+        s["gen_tok_s"] = round(s.get("eval_count", 0) / s["eval_s"], 1)
+
+class Trace:
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self.ollama: Dict[str, Dict[str, Any]] = {}
+        self.notes: Dict[str, Any] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float):
+        # 같은 이름이 여러 번 나오면(재호출 등) 누적
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def record_ollama(self, call: str, resp: Any):
+        stats = ollama_stats(resp)
+        if not stats:
+            return
+        cur = self.ollama.get(call)
+        if cur is None:
+            self.ollama[call] = stats
+            return
+        for k, v in stats.items():
+            if k.endswith("_count") or (k.endswith("_s") and not k.endswith("tok_s")):
+                cur[k] = round(cur.get(k, 0) + v, 4)
+        cur["calls"] = cur.get("calls", 1) + 1
+        _add_rates(cur)
+
+    def note(self, key: str, value: Any):
+        self.notes[key] = value
+
+    def merge(self, other: "Trace"):
+        for k, v in other.spans.items():
+            self.add(k, v)
+        self.ollama.update(other.ollama)
+        self.notes.update(other.notes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"spans": {k: round(v, 4) for k, v in self.spans.items()}}
+        if self.ollama:
+            out["ollama"] = self.ollama
+        if self.notes:
+            out["notes"] = self.notes
+        return out
+
+def trace_row(lat: Dict[str, Any]) -> Dict[str, Any]:
+    """디버그 표 한 줄: 턴 기록(latency)에서 단계별 초/토큰 처리량만 평평하게."""
+    row: Dict[str, Any] = {"턴": lat.get("turn")}
+    for k, v in (lat.get("spans") or {}).items():
+        row[k] = round(v, 3)
+    for call, s in (lat.get("ollama") or {}).items():
+        if "prompt_eval_count" in s:
+            row[f"{call} 프롬프트"] = s["prompt_eval_count"]
+        if "gen_tok_s" in s:
+            row[f"{call} tok/s"] = s["gen_tok_s"]
+        if s.get("load_s"):
+            row[f"{call} 로드"] = s["load_s"]
+    return row
+
+# ================== 파일 내보내기 ==================
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class MetricsSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.prom = path.endswith(".prom")
+        self._lock = threading.Lock()
+        # (app, stage) -> [버킷별 개수..., +Inf 개수, 합]
+        self._hist: Dict[tuple, List[float]] = {}
+        self._tokens: Dict[tuple, int] = {}
+        self._rate: Dict[tuple, float] = {}
+        self._turns: Dict[str, int] = {}
+
+    def record(self, app: str, trace: Dict[str, Any], **labels: Any):
+        with self._lock:
+            if self.prom:
+                self._accumulate(app, trace)
+                self._write_prom()
+            else:
+                row = {"ts": round(time.time(), 3), "app": app, **labels, **trace}
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _accumulate(self, app: str, trace: Dict[str, Any]):
+        self._turns[app] = self._turns.get(app, 0) + 1
+        for stage, sec in (trace.get("spans") or {}).items():
+            h = self._hist.setdefault((app, stage), [0.0] * (len(_BUCKETS) + 2))
+            for i, b in enumerate(_BUCKETS):
+                if sec <= b:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += sec
+        for call, s in (trace.get("ollama") or {}).items():
+            for kind, key in (("prompt", "prompt_eval_count"), ("gen", "eval_count")):
+                if key in s:
+                    self._tokens[(app, call, kind)] = self._tokens.get((app, call, kind), 0) + s[key]
+            if "gen_tok_s" in s:
+                self._rate[(app, call)] = s["gen_tok_s"]
+
+    def _write_prom(self):
+        lines = [
+            "# HELP smoothtalk_turns_total 처리한 턴 수",
+            "# TYPE smoothtalk_turns_total counter",
+        ]
+        lines += [f'smoothtalk_turns_total{{app="{a}"}} {n}' for a, n in sorted(self._turns.items())]
+        lines += ["# HELP smoothtalk_stage_seconds 단계별 소요 시간", "# TYPE smoothtalk_stage_seconds histogram"]
+        for (app, stage), h in sorted(self._hist.items()):
+            lab = f'app="{app}",stage="{stage}"'
+            for i, b in enumerate(_BUCKETS):
+                lines.append(f'smoothtalk_stage_seconds_bucket{{{lab},le="{b}"}} {int(h[i])}')
+            lines.append(f'smoothtalk_stage_seconds_bucket{{{lab},le="+Inf"}} {int(h[-2])}')
+            lines.append(f"smoothtalk_stage_seconds_sum{{{lab}}} {h[-1]:.4f}")
+            lines.append(f"smoothtalk_stage_seconds_count{{{lab}}} {int(h[-2])}")
+        lines += ["# HELP smoothtalk_tokens_total Ollama 가 처리한 토큰 수", "# TYPE smoothtalk_tokens_total counter"]
+        for (app, call, kind), n in sorted(self._tokens.items()):
+            lines.append(f'smoothtalk_tokens_total{{app="{app}",call="{call}",kind="{kind}"}} {n}')
+        lines += ["# HELP smoothtalk_gen_tokens_per_second 마지막 호출의 생성 속도", "# TYPE smoothtalk_gen_tokens_per_second gauge"]
+        for (app, call), v in sorted(self._rate.items()):
+            lines.append(f'smoothtalk_gen_tokens_per_second{{app="{app}",call="{call}"}} {v}')
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)   # 수집기가 반쯤 쓴 파일을 읽지 않도록
+
+_SINK: Optional[MetricsSink] = None
+_SINK_LOCK = threading.Lock()
+
+def get_sink() -> Optional[MetricsSink]:
+    """SMOOTHTALK_METRICS 가 있으면 프로세스 공용 sink, 없으면 None."""
+    global _SINK
+    path = os.environ.get("SMOOTHTALK_METRICS")
+    if not path:
+        return None
+    with _SINK_LOCK:
+        if _SINK is None or _SINK.path != path:
+            _SINK = MetricsSink(path)
+    return _SINK
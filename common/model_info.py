@@ -0,0 +1,80 @@
+# model_info.py
+# 모델 존재 여부/메타데이터 캐시: ollama.show() 결과를 TTL 동안 재사용
+# - Streamlit 은 입력마다 스크립트를 처음부터 다시 돌리므로, 제출할 때마다 show() 를 부르면 그만큼 서버 왕복이 붙는다
+# - 있는 모델은 ttl_s, 없는 모델은 miss_ttl_s(짧게) 동안 기억 → `ollama pull` 직후엔 금방 다시 확인
+# - 메타데이터: 컨텍스트 길이, 패밀리, 파라미터 크기, 양자화, capabilities(있으면)
+# - 호출은 common.transport 를 거친다 (replay 모드에선 아카이브에 기록된 show 응답을 쓴다)
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from common.transport import _plain, get_transport
+
+def _pick(d: Dict[str, Any], *keys: str) -> Any:
+    for k in keys:
+        if d.get(k) not in (None, ""):
+            return d[k]
+    return None
+
+def parse_show(resp: Any) -> Dict[str, Any]:
+    """show() 응답에서 화면/예산 계산에 쓰는 필드만 뽑는다."""
+    r = _plain(resp) or {}
+    details = r.get("details") or {}
+    info = r.get("model_info") or r.get("modelinfo") or {}
+    ctx = next((v for k, v in info.items() if k.endswith(".context_length")), None)
+    return {
+        "exists": True,
+        "context_length": int(ctx) if ctx else None,
+        "family": _pick(details, "family"),
+        "parameter_size": _pick(details, "parameter_size"),
+        "quantization": _pick(details, "quantization_level"),
+        "capabilities": list(r.get("capabilities") or []),
+    }
+
+class ModelInfoCache:
+    def __init__(self, ttl_s: float = 300.0, miss_ttl_s: float = 10.0):
+        self.ttl_s = ttl_s
+        self.miss_ttl_s = miss_ttl_s
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}   # model -> (만료 시각, info)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, model: str, refresh: bool = False) -> Dict[str, Any]:
+        """모델 정보. 없는 모델이면 {"exists": False, "error": ...}."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(model)
+            if hit is not None and hit[0] > now and not refresh:
+                self.stats["hits"] += 1
+                return hit[1]
+            self.stats["misses"] += 1
+        # 서버 왕복은 락 밖에서 (같은 모델을 동시에 물으면 두 번 부를 수 있지만 결과는 같다)
+        try:
+            info = parse_show(get_transport().show(model=model))
+            ttl = self.ttl_s
+        except Exception as e:
+            info = {"exists": False, "error": str(e)}
+            ttl = self.miss_ttl_s
+        with self._lock:
+            self._cache[model] = (time.monotonic() + ttl, info)
+        return info
+
+    def exists(self, model: str) -> bool:
+        return bool(self.get(model).get("exists"))
+
+    def invalidate(self, model: Optional[str] = None):
+        with self._lock:
+            if model is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(model, None)
+
+def describe_model(info: Dict[str, Any]) -> str:
+    """사이드바 한 줄: 'llama · 8.0B · Q4_K_M · ctx 8192'."""
+    if not info.get("exists"):
+        return ""
+    parts = [info.get("family"), info.get("parameter_size"), info.get("quantization")]
+    if info.get("context_length"):
+        parts.append(f"ctx {info['context_length']}")
+    return " · ".join(p for p in parts if p)
@@ -0,0 +1,43 @@
+# resources.py
+# 앱 공용 리소스: 모델 워머 / 요청 스케줄러 / 모델 정보 캐시 / 작업 스레드 풀을 프로세스에 하나씩 둔다
+# (앱 전용 리소스 — 예: SimTalk 평가 캐시 — 는 get_shared() 로 같은 저장소에 둔다)
+# - Streamlit 스크립트 안의 @st.cache_resource 함수는 rerun 마다 데코레이터가 다시 평가되고,
+#   그때마다 함수 소스를 해싱해 캐시 키를 만든다. 모듈은 한 번만 import 되므로 여기 두면 그 비용이 없다.
+# - 같은 프로세스의 모든 세션이 공유한다 (st.cache_resource 와 같은 범위)
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any
+
+from common.model_info import ModelInfoCache
+from common.scheduler import RequestScheduler
+from common.warmup import ModelWarmer
+
+_LOCK = threading.Lock()
+_RESOURCES: Dict[str, Any] = {}
+
+def _shared(name: str, factory: Callable[[], Any]) -> Any:
+    res = _RESOURCES.get(name)
+    if res is None:
+        with _LOCK:
+            res = _RESOURCES.get(name)
+            if res is None:
+                res = _RESOURCES[name] = factory()
+    return res
+
+def get_warmer() -> ModelWarmer:
+    return _shared("warmer", ModelWarmer)
+
+def get_scheduler() -> RequestScheduler:
+    return _shared("scheduler", RequestScheduler)
+
+def get_model_info() -> ModelInfoCache:
+    return _shared("model_info", ModelInfoCache)
+
+def get_executor(name: str, max_workers: int = 4) -> ThreadPoolExecutor:
+    """이름별 공용 스레드 풀 (스레드 이름 접두어도 name)."""
+    return _shared(f"executor:{name}", lambda: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name))
+
+def get_shared(name: str, factory: Callable[[], Any]) -> Any:
+    """common/ 이 import 할 수 없는 앱 전용 리소스를 이름으로 한 번만 만든다."""
+    return _shared(name, factory)
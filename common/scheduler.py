@@ -0,0 +1,163 @@
+# scheduler.py
+# 로컬 Ollama 서버 하나를 여러 Streamlit 세션이 나눠 쓸 때의 요청 스케줄러 (프로세스 내)
+# - 우선순위: NPC 응답 > 멘트 추천 > 평가  (숫자가 작을수록 먼저)
+# - 같은 우선순위 안에서는 세션별 라운드로빈 → 한 세션이 몰아서 보내도 다른 세션이 밀리지 않음
+# - 동시 실행 수는 서버 병렬도(OLLAMA_NUM_PARALLEL)에 맞춘다
+# - 대기열 길이/대기 시간 지표, 대기열이 길면 평가를 휴리스틱으로 낮추라는 신호(should_degrade)
+#
+# 사용:
+#   with sched.slot(session_id, PRIORITY_NPC):
+#       for chunk in ollama.chat(..., stream=True): ...
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Deque, Iterator, List, Optional
+
+PRIORITY_NPC = 0
+PRIORITY_SUGGEST = 1
+PRIORITY_EVAL = 2
+PRIORITY_NAMES = {PRIORITY_NPC: "npc", PRIORITY_SUGGEST: "suggest", PRIORITY_EVAL: "eval"}
+
+def default_concurrency() -> int:
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "")))
+    except ValueError:
+        return 2
+
+class _Ticket:
+    __slots__ = ("session", "priority", "event", "enq_at", "granted")
+
+    def __init__(self, session: str, priority: int):
+        self.session = session
+        self.priority = priority
+        self.event = threading.Event()
+        self.enq_at = time.perf_counter()
+        self.granted = False
+
+class RequestScheduler:
+    def __init__(self, max_concurrency: Optional[int] = None, degrade_depth: Optional[int] = None):
+        self.max_concurrency = max_concurrency or default_concurrency()
+        # 평가보다 앞서 기다리는 요청이 이만큼 쌓이면 평가는 LLM 대신 휴리스틱
+        self.degrade_depth = degrade_depth or 2 * self.max_concurrency
+        self._lock = threading.Lock()
+        self._running = 0
+        # 우선순위별: 세션 id -> 그 세션의 대기 티켓들 (OrderedDict 순서가 라운드로빈 순서)
+        self._queues: List["OrderedDict[str, Deque[_Ticket]]"] = [OrderedDict() for _ in PRIORITY_NAMES]
+        self._depth = [0] * len(PRIORITY_NAMES)
+        self.stats = {
+            name: {"granted": 0, "timeouts": 0, "degraded": 0, "wait_s_sum": 0.0, "wait_s_max": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    # ---------- 획득/반납 ----------
+    def acquire(self, session: str, priority: int, timeout: Optional[float] = None):
+        ticket = _Ticket(session or "-", priority)
+        with self._lock:
+            if self._running < self.max_concurrency and not any(self._depth):
+                self._grant(ticket)
+                return
+            self._queues[priority].setdefault(ticket.session, deque()).append(ticket)
+            self._depth[priority] += 1
+        if ticket.event.wait(timeout):
+            return
+        with self._lock:
+            if ticket.granted:   # 시간 초과와 동시에 차례가 온 경우
+                return
+            q = self._queues[priority].get(ticket.session)
+            q.remove(ticket)
+            if not q:
+                del self._queues[priority][ticket.session]
+            self._depth[priority] -= 1
+            self.stats[PRIORITY_NAMES[priority]]["timeouts"] += 1
+        raise TimeoutError(f"스케줄러 대기 시간 초과 ({PRIORITY_NAMES[priority]}, {timeout}s)")
+
+    def release(self):
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, session: str, priority: int, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(session, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _grant(self, ticket: _Ticket):
+        # self._lock 안에서만 호출
+        self._running += 1
+        ticket.granted = True
+        wait = time.perf_counter() - ticket.enq_at
+        s = self.stats[PRIORITY_NAMES[ticket.priority]]
+        s["granted"] += 1
+        s["wait_s_sum"] += wait
+        s["wait_s_max"] = max(s["wait_s_max"], wait)
+        ticket.event.set()
+
+    def _dispatch(self):
+        while self._running < self.max_concurrency:
+            ticket = self._pop_next()
+            if ticket is None:
+                return
+            self._grant(ticket)
+
+    def _pop_next(self) -> Optional[_Ticket]:
+        for prio, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            session, tickets = queue.popitem(last=False)
+            ticket = tickets.popleft()
+            if tickets:
+                queue[session] = tickets   # 맨 뒤로 보내 다음 세션에게 차례를 넘김
+            self._depth[prio] -= 1
+            return ticket
+        return None
+
+    # ---------- 지표/배압 ----------
+    def set_concurrency(self, n: int):
+        with self._lock:
+            self.max_concurrency = max(1, int(n))
+            self._dispatch()
+
+    def queue_depth(self, priority: Optional[int] = None) -> int:
+        return sum(self._depth) if priority is None else self._depth[priority]
+
+    def should_degrade(self, priority: int = PRIORITY_EVAL) -> bool:
+        """이 우선순위 요청이 자기 앞 대기열(같거나 높은 우선순위)에 degrade_depth 이상 밀려 있으면 True."""
+        ahead = sum(self._depth[: priority + 1])
+        if ahead >= self.degrade_depth:
+            with self._lock:
+                self.stats[PRIORITY_NAMES[priority]]["degraded"] += 1
+            return True
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "running": self._running,
+                "max_concurrency": self.max_concurrency,
+                "queued": sum(self._depth),
+            }
+            for prio, name in PRIORITY_NAMES.items():
+                s = self.stats[name]
+                out[name] = {
+                    "queued": self._depth[prio],
+                    "sessions": len(self._queues[prio]),
+                    "granted": s["granted"],
+                    "timeouts": s["timeouts"],
+                    "degraded": s["degraded"],
+                    "avg_wait_s": round(s["wait_s_sum"] / s["granted"], 3) if s["granted"] else 0.0,
+                    "max_wait_s": round(s["wait_s_max"], 3),
+                }
+            return out
+
+def describe_load(snap: Dict[str, Any]) -> str:
+    return (
+        f"Ollama 대기열: 실행 {snap['running']}/{snap['max_concurrency']} · "
+        f"NPC {snap['npc']['queued']} · 추천 {snap['suggest']['queued']} · 평가 {snap['eval']['queued']} "
+        f"(평가 평균 대기 {snap['eval']['avg_wait_s']:.2f}s, 휴리스틱 전환 {snap['eval']['degraded']})"
+    )
@@ -0,0 +1,199 @@
+# stub_ollama.py
+# 부하 테스트/벤치마크용 가짜 Ollama 서버 (표준 라이브러리만 사용)
+# 실행 예:
+#   python -m common.stub_ollama --port 11435 --token-delay 0.02 --parallel 2
+#   OLLAMA_HOST=http://127.0.0.1:11435 streamlit run SimTalk/1.py
+#
+# - /api/chat (스트리밍/비스트리밍), /api/generate, /api/show, /api/ps, /api/tags, /api/embed 만 흉내 낸다
+# - /api/ps 는 한 번이라도 chat/generate 요청을 받은 모델을 메모리에 있다고 답한다
+# - 응답 시간 = prefill(프롬프트 길이 비례) + 토큰 수 × token_delay
+# - parallel 을 넘는 요청은 서버 안에서 기다린다 (실제 OLLAMA_NUM_PARALLEL 처럼)
+# - format(JSON 스키마)이 오면 평가 JSON, 그 외에는 한국어 대화체 문장을 돌려준다
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+_NPC_REPLIES = [
+    "반가워요! 저도 그런 얘기 좋아해요. 요즘은 주말에 주로 뭐 하세요?",
+    "오 그렇군요. 저는 최근에 카페 투어를 자주 다녔어요. 좋아하는 메뉴 있으세요?",
+    "하하 재밌네요. 그런 경험은 처음 들어봐요. 그때 기분이 어땠어요?",
+    "음… 조금 빠른 것 같기도 해요. 우선 서로 더 알아가 보면 좋겠어요. 취미가 뭐예요?",
+    "좋아요! 저도 영화 좋아해요. 최근에 본 것 중에 추천해 주실 만한 거 있어요?",
+]
+_SUGGESTIONS = "1. 주말에 뭐 했어?\n2. 요즘 재밌는 거 있어?\n3. 밥은 먹었어?\n4. 다음에 같이 가볼래?\n5. 그거 어땠어?"
+_EVAL = {
+    "scores": {"공감": 7, "호기심": 8, "명료성": 6, "정중함": 9, "레드플래그": 1},
+    "feedback": {"strengths": ["질문으로 대화를 이어감"], "improvements": ["상대 말에 반응 한 줄 추가"],
+                 "tip": "상대가 한 말을 한 번 되짚어 주세요", "rewrite_example": "그랬구나! 그럼 요즘은 어떤 걸 즐겨요?"},
+}
+
+class StubConfig:
+    def __init__(self, token_delay: float = 0.02, prefill_per_1k: float = 0.05,
+                 chunk_chars: int = 3, parallel: int = 0, error_rate: float = 0.0, show_delay: float = 0.0):
+        self.token_delay = token_delay
+        self.prefill_per_1k = prefill_per_1k      # 프롬프트 1000자당 prefill 초
+        self.chunk_chars = chunk_chars            # 스트리밍 조각(≈토큰) 크기
+        self.parallel = parallel                  # 0 이면 무제한
+        self.error_rate = error_rate              # 이 비율만큼 500 응답 (해시 기반, 재현 가능)
+        self.show_delay = show_delay              # /api/show 지연 (실서버는 manifest/GGUF 메타데이터를 읽음)
+        self.gate = threading.BoundedSemaphore(parallel) if parallel else None
+        self.stats = {"requests": 0, "errors": 0}
+        self.loaded: List[str] = []               # 한 번이라도 요청받은 모델 (/api/ps 가 메모리에 있다고 답함)
+        self.lock = threading.Lock()
+
+def _pick(text: str, n: int) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16) % n
+
+def _reply_for(body: Dict[str, Any]) -> str:
+    msgs = body.get("messages") or [{"content": body.get("prompt", "")}]
+    last = msgs[-1].get("content", "") if msgs else ""
+    if body.get("format"):
+        return json.dumps(_EVAL, ensure_ascii=False)
+    if "추천" in last:
+        return "<think>상대 말투를 보면 가볍게 이어가는 게 좋겠다</think>\n" + _SUGGESTIONS
+    if "요약" in last:
+        return "사용자와 상대는 서로 취미와 주말 일정을 이야기했다."
+    return _NPC_REPLIES[_pick(last, len(_NPC_REPLIES))]
+
+def make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, obj: Dict[str, Any], status: int = 200):
+            b = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(b)))
+            self.end_headers()
+            self.wfile.write(b)
+
+        def _chunk(self, obj: Dict[str, Any]):
+            b = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(b), b))
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.startswith("/api/ps") or self.path.startswith("/api/tags"):
+                with cfg.lock:
+                    return self._send({"models": [{"name": m, "model": m} for m in cfg.loaded]})
+            self._send({})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with cfg.lock:
+                cfg.stats["requests"] += 1
+                if self.path in ("/api/chat", "/api/generate") and body.get("model") not in cfg.loaded:
+                    cfg.loaded.append(body.get("model"))
+            if self.path == "/api/show":
+                time.sleep(cfg.show_delay)
+                return self._send({"modelfile": "", "details": {"family": "stub"}, "model_info": {},
+                                   "capabilities": ["completion"]})
+            if self.path == "/api/embed":
+                inp = body.get("input")
+                inp = [inp] if isinstance(inp, str) else inp
+                vecs = [[b / 255 for b in hashlib.sha256(t.encode("utf-8")).digest()[:16]] for t in inp]
+                return self._send({"model": body.get("model"), "embeddings": vecs})
+            if self.path == "/api/generate" and not body.get("prompt"):
+                return self._send({"model": body.get("model"), "response": "", "done": True, "load_duration": 1_000_000})
+            if self.path not in ("/api/chat", "/api/generate"):
+                return self._send({"error": f"unsupported: {self.path}"}, 404)
+
+            prompt_chars = len(json.dumps(body.get("messages") or body.get("prompt", ""), ensure_ascii=False))
+            if cfg.error_rate and _pick(json.dumps(body, ensure_ascii=False), 1000) < cfg.error_rate * 1000:
+                with cfg.lock:
+                    cfg.stats["errors"] += 1
+                return self._send({"error": "stub: injected failure"}, 500)
+            if cfg.gate is not None:
+                cfg.gate.acquire()
+            try:
+                self._generate(body, prompt_chars)
+            finally:
+                if cfg.gate is not None:
+                    cfg.gate.release()
+
+        def _generate(self, body: Dict[str, Any], prompt_chars: int):
+            text = _reply_for(body)
+            pieces = [text[i:i + cfg.chunk_chars] for i in range(0, len(text), cfg.chunk_chars)]
+            prefill = prompt_chars / 1000 * cfg.prefill_per_1k
+            is_chat = self.path == "/api/chat"
+            t0 = time.perf_counter()
+            time.sleep(prefill)
+
+            def final(content: str) -> Dict[str, Any]:
+                total = time.perf_counter() - t0
+                out = {
+                    "model": body.get("model"), "done": True, "done_reason": "stop",
+                    "total_duration": int(total * 1e9), "load_duration": 1_000_000,
+                    "prompt_eval_count": prompt_chars // 3, "prompt_eval_duration": int(prefill * 1e9),
+                    "eval_count": len(pieces), "eval_duration": int(max(total - prefill, 0) * 1e9),
+                }
+                if is_chat:
+                    out["message"] = {"role": "assistant", "content": content}
+                else:
+                    out["response"] = content
+                return out
+
+            if not body.get("stream", True):
+                time.sleep(cfg.token_delay * len(pieces))
+                return self._send(final(text))
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for pc in pieces:
+                    time.sleep(cfg.token_delay)
+                    part = {"model": body.get("model"), "done": False}
+                    if is_chat:
+                        part["message"] = {"role": "assistant", "content": pc}
+                    else:
+                        part["response"] = pc
+                    self._chunk(part)
+                self._chunk(final(""))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+def serve(host: str = "127.0.0.1", port: int = 11435, cfg: Optional[StubConfig] = None,
+          background: bool = False) -> Tuple[ThreadingHTTPServer, StubConfig]:
+    """서버를 띄운다. background=True 면 데몬 스레드에서 돌리고 바로 반환 (port=0 이면 빈 포트)."""
+    cfg = cfg or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(cfg))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    else:
+        server.serve_forever()
+    return server, cfg
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="부하 테스트용 가짜 Ollama 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--token-delay", type=float, default=0.02, help="스트리밍 조각(≈토큰)당 지연(초)")
+    ap.add_argument("--prefill-per-1k", type=float, default=0.05, help="프롬프트 1000자당 prefill 지연(초)")
+    ap.add_argument("--parallel", type=int, default=0, help="동시 생성 수 (0=무제한)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율 (0~1)")
+    ap.add_argument("--show-delay", type=float, default=0.0, help="/api/show 지연(초)")
+    return ap
+
+if __name__ == "__main__":
+    a = build_parser().parse_args()
+    print(f"stub ollama on http://{a.host}:{a.port}")
+    serve(a.host, a.port, StubConfig(a.token_delay, a.prefill_per_1k, parallel=a.parallel, error_rate=a.error_rate,
+                                     show_delay=a.show_delay))
@@ -0,0 +1,141 @@
+# test_scheduler.py
+# 실행 (저장소 루트에서): python -m pytest -q
+# RequestScheduler: 우선순위 순서, 같은 우선순위 안의 세션별 라운드로빈, 시간 초과 정리, set_concurrency 로 대기 요청 배정.
+
+import threading
+import time
+from typing import List
+
+import pytest
+
+from common.scheduler import PRIORITY_EVAL, PRIORITY_NPC, PRIORITY_SUGGEST, RequestScheduler
+
+WAIT_S = 5.0
+
+def _wait_until(cond, timeout: float = WAIT_S):
+    end = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > end:
+            raise AssertionError("조건을 기다리다 시간 초과")
+        time.sleep(0.001)
+
+class _Waiter(threading.Thread):
+    """slot 을 받으면 순서를 기록하고, gate 가 열릴 때까지 붙잡고 있는다."""
+
+    def __init__(self, sched: RequestScheduler, session: str, priority: int, order: List[str], label: str,
+                 gate: threading.Event, timeout=None):
+        super().__init__(daemon=True)
+        self.sched, self.session, self.priority = sched, session, priority
+        self.order, self.label, self.gate, self.timeout = order, label, gate, timeout
+        self.error = None
+
+    def run(self):
+        try:
+            with self.sched.slot(self.session, self.priority, self.timeout):
+                self.order.append(self.label)
+                self.gate.wait(WAIT_S)
+        except Exception as e:
+            self.error = e
+
+def _enqueue(sched: RequestScheduler, order: List[str], gate: threading.Event, reqs, timeout=None) -> List[_Waiter]:
+    """reqs = [(세션, 우선순위, 라벨)] 를 이 순서 그대로 대기열에 넣는다 (하나씩 들어간 것을 확인하며)."""
+    waiters = []
+    for session, prio, label in reqs:
+        before = sched.queue_depth()
+        w = _Waiter(sched, session, prio, order, label, gate, timeout)
+        w.start()
+        _wait_until(lambda: sched.queue_depth() == before + 1)
+        waiters.append(w)
+    return waiters
+
+def test_priority_order():
+    sched = RequestScheduler(max_concurrency=1)
+    hold, gate, order = threading.Event(), threading.Event(), []
+    first = _Waiter(sched, "x", PRIORITY_EVAL, order, "hold", hold)
+    first.start()
+    _wait_until(lambda: order == ["hold"])
+    waiters = _enqueue(sched, order, gate, [
+        ("a", PRIORITY_EVAL, "eval"), ("b", PRIORITY_SUGGEST, "suggest"), ("c", PRIORITY_NPC, "npc"),
+    ])
+    gate.set()
+    hold.set()
+    _wait_until(lambda: len(order) == 4)
+    for w in [first, *waiters]:
+        w.join(WAIT_S)
+    assert order == ["hold", "npc", "suggest", "eval"]
+    assert sched.snapshot()["running"] == 0 and sched.queue_depth() == 0
+
+def test_round_robin_between_sessions():
+    sched = RequestScheduler(max_concurrency=1)
+    hold, gate, order = threading.Event(), threading.Event(), []
+    first = _Waiter(sched, "x", PRIORITY_EVAL, order, "hold", hold)
+    first.start()
+    _wait_until(lambda: order == ["hold"])
+    # 세션 a 가 세 개를 몰아서 먼저 보내도 b, c 가 사이사이 차례를 받는다
+    waiters = _enqueue(sched, order, gate, [
+        ("a", PRIORITY_EVAL, "a1"), ("a", PRIORITY_EVAL, "a2"), ("a", PRIORITY_EVAL, "a3"),
+        ("b", PRIORITY_EVAL, "b1"), ("c", PRIORITY_EVAL, "c1"), ("b", PRIORITY_EVAL, "b2"),
+    ])
+    assert sched.snapshot()["eval"]["sessions"] == 3
+    gate.set()
+    hold.set()
+    _wait_until(lambda: len(order) == 7)
+    for w in [first, *waiters]:
+        w.join(WAIT_S)
+    assert order == ["hold", "a1", "b1", "c1", "a2", "b2", "a3"]
+
+def test_timeout_cleans_up_queue():
+    sched = RequestScheduler(max_concurrency=1)
+    hold, order = threading.Event(), []
+    first = _Waiter(sched, "x", PRIORITY_NPC, order, "hold", hold)
+    first.start()
+    _wait_until(lambda: order == ["hold"])
+    with pytest.raises(TimeoutError):
+        sched.acquire("a", PRIORITY_EVAL, timeout=0.05)
+    assert sched.queue_depth() == 0
+    assert sched.queue_depth(PRIORITY_EVAL) == 0
+    assert sched.snapshot()["eval"]["sessions"] == 0
+    assert sched.stats["eval"]["timeouts"] == 1
+    # 정리된 뒤에도 다음 요청은 정상적으로 배정된다
+    hold.set()
+    first.join(WAIT_S)
+    with sched.slot("a", PRIORITY_EVAL, timeout=1.0):
+        assert sched.snapshot()["running"] == 1
+    assert sched.snapshot()["running"] == 0
+
+def test_timeout_keeps_other_tickets_of_same_session():
+    sched = RequestScheduler(max_concurrency=1)
+    hold, gate, order = threading.Event(), threading.Event(), []
+    first = _Waiter(sched, "x", PRIORITY_NPC, order, "hold", hold)
+    first.start()
+    _wait_until(lambda: order == ["hold"])
+    (queued,) = _enqueue(sched, order, gate, [("a", PRIORITY_EVAL, "a1")])
+    with pytest.raises(TimeoutError):
+        sched.acquire("a", PRIORITY_EVAL, timeout=0.05)
+    assert sched.queue_depth(PRIORITY_EVAL) == 1
+    gate.set()
+    hold.set()
+    _wait_until(lambda: len(order) == 2)
+    for w in (first, queued):
+        w.join(WAIT_S)
+    assert order == ["hold", "a1"] and sched.queue_depth() == 0
+
+def test_set_concurrency_dispatches_waiting():
+    sched = RequestScheduler(max_concurrency=1)
+    hold, gate, order = threading.Event(), threading.Event(), []
+    first = _Waiter(sched, "x", PRIORITY_NPC, order, "hold", hold)
+    first.start()
+    _wait_until(lambda: order == ["hold"])
+    waiters = _enqueue(sched, order, gate, [("a", PRIORITY_EVAL, "a1"), ("b", PRIORITY_EVAL, "b1"),
+                                           ("c", PRIORITY_EVAL, "c1")])
+    sched.set_concurrency(3)     # 실행 중 1 + 새로 2 개
+    _wait_until(lambda: len(order) == 3)
+    assert sorted(order) == ["a1", "b1", "hold"]   # a1, b1 은 동시에 배정되므로 기록 순서는 정해지지 않음
+    assert sched.snapshot()["running"] == 3 and sched.queue_depth() == 1
+    gate.set()
+    hold.set()
+    _wait_until(lambda: len(order) == 4)
+    for w in [first, *waiters]:
+        w.join(WAIT_S)
+        assert w.error is None
+    assert sched.snapshot()["running"] == 0 and sched.queue_depth() == 0
@@ -0,0 +1,118 @@
+# tiered_cache.py
+# 2단 캐시: 프로세스 내 LRU → 디스크 SQLite (SimTalk 평가 캐시, NextTalk 요약 캐시가 같이 쓴다)
+# - 키: version + 호출 측이 넘긴 조각들의 sha256
+# - 테이블마다 version 열을 두고, version 이 바뀌면 예전 레코드는 열 때 삭제
+# - 크기(LRU 개수, 디스크 행 수)와 TTL 로 축출, 적중/실패 카운터 제공
+# - 값은 dumps/loads 로 문자열로 바꿔 저장한다. 메모리에도 문자열로 두므로 get() 은 매번 새 객체를 돌려준다
+# 스레드 풀에서 같이 쓰므로 모든 접근은 락으로 보호한다.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+_TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _identity(v: Any) -> Any:
+    return v
+
+class TieredCache:
+    def __init__(self, path: Optional[str], table: str, version: Any, max_memory: int = 1024,
+                 max_disk: int = 100_000, ttl_s: float = 30 * 24 * 3600,
+                 dumps: Callable[[Any], str] = _identity, loads: Callable[[str], Any] = _identity):
+        if not _TABLE_RE.match(table):
+            raise ValueError(f"잘못된 테이블 이름: {table!r}")
+        self.path = path
+        self.table = table
+        self.version = version
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.ttl_s = ttl_s
+        self._dumps, self._loads = dumps, loads
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created, blob)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY, version TEXT, value TEXT, created REAL, accessed REAL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed)")
+            # 버전이 올라가면 예전 결과는 전부 무효
+            self._db.execute(f"DELETE FROM {table} WHERE version != ?", (str(version),))
+            self._db.execute(f"DELETE FROM {table} WHERE created < ?", (time.time() - ttl_s,))
+
+    def key(self, *parts: Any) -> str:
+        raw = json.dumps([self.version, *parts], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None and now - hit[0] <= self.ttl_s:
+                self._mem.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._loads(hit[1])
+            if hit is not None:
+                del self._mem[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT created, value FROM {self.table} WHERE key = ? AND created >= ?",
+                    (key, now - self.ttl_s),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    self.stats["disk_hits"] += 1
+                    return self._loads(row[1])
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        blob = self._dumps(value)
+        with self._lock:
+            self._remember(key, now, blob)
+            self.stats["puts"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table}(key, version, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, str(self.version), blob, now, now),
+                )
+                if self.stats["puts"] % 256 == 0:
+                    self._trim_disk()
+
+    def _remember(self, key: str, created: float, blob: str):
+        self._mem[key] = (created, blob)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory:
+            self._mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _trim_disk(self):
+        n = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if n > self.max_disk:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY accessed LIMIT ?)",
+                (n - self.max_disk,),
+            )
+            self.stats["evictions"] += n - self.max_disk
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
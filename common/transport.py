@@ -0,0 +1,298 @@
+# transport.py
+# Ollama 호출 계층: live(그대로 호출) / record(호출하면서 기록) / replay(기록으로 응답, 모델 불필요)
+# 환경변수로 고른다:
+#   OLLAMA_TRANSPORT=live|record|replay     (기본 live)
+#   OLLAMA_ARCHIVE=경로                       (기본 ./ollama_archive.jsonl.gz)
+#   OLLAMA_REPLAY_LATENCY=0|1|0.5             (replay 시 기록된 지연의 배율, 0=즉시)
+#   OLLAMA_REPLAY_STRICT=1                    (replay 에서 기록이 없으면 오류, 0 이면 live 로 넘김)
+# 예: OLLAMA_TRANSPORT=record streamlit run SimTalk/1.py  → 같은 조작을 OLLAMA_TRANSPORT=replay 로 다시 돌림
+#
+# 아카이브: gzip JSONL, 한 줄 = 요청 1건의 응답
+#   {"k": 요청 해시, "op": "chat", "req": {...}(키별 첫 줄만), "r": 응답 | "c": 스트림 조각들, "dt": 조각별 경과초, "err": 오류}
+#   - 키는 op + 요청 인자(keep_alive/stream 제외)의 sha256 → 같은 요청은 같은 키 (content-addressed)
+#   - 같은 키에 응답이 여러 개면(temperature>0) 재생 때 기록 순서대로 돌아가며 낸다
+#   - 스트리밍으로 기록한 응답을 비스트리밍으로 재생하거나 그 반대도 된다
+#   - 소비 측이 일찍 닫은 스트림(NextTalk 조기 종료)은 받은 조각까지만 "cut": true 로 남긴다
+# 응답은 ollama 응답 객체 대신 같은 모양의 dict (resp["message"]["content"], resp.get(...) 그대로 동작)
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    import ollama
+    OLLAMA_AVAILABLE = True
+except Exception:
+    ollama = None
+    OLLAMA_AVAILABLE = False
+
+DEFAULT_ARCHIVE = "ollama_archive.jsonl.gz"
+_KEY_EXCLUDE = ("keep_alive", "stream")
+
+class ReplayMiss(KeyError):
+    """replay 아카이브에 없는 요청."""
+
+class ReplayedError(RuntimeError):
+    """기록 당시 실패했던 요청을 재생할 때 다시 던지는 오류."""
+
+def _plain(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return obj
+
+def request_key(op: str, kwargs: Dict[str, Any]) -> str:
+    req = {k: v for k, v in kwargs.items() if k not in _KEY_EXCLUDE and v is not None}
+    raw = json.dumps([op, _plain(req)], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# ================== 아카이브 ==================
+class Archive:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._seen: set = set()          # (키, 응답 해시) — 같은 응답은 한 번만 저장
+        self._cursor: Dict[str, int] = {}
+        self._fp = None
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        self._index(json.loads(line))
+        except (EOFError, OSError):   # 기록 중 끊긴 꼬리는 버린다
+            pass
+
+    def _index(self, row: Dict[str, Any]):
+        self._entries.setdefault(row["k"], []).append(row)
+        self._seen.add((row["k"], _body_hash(row)))
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def add(self, row: Dict[str, Any]):
+        with self._lock:
+            if (row["k"], _body_hash(row)) in self._seen:
+                return
+            if row["k"] in self._entries:
+                row.pop("req", None)
+            self._index(row)
+            if self._fp is None:
+                self._fp = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._fp.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._fp.flush()
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            rows = self._entries.get(key)
+            if not rows:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return rows[i % len(rows)]
+
+    def rewind(self):
+        with self._lock:
+            self._cursor.clear()
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+def _body_hash(row: Dict[str, Any]) -> str:
+    body = {k: row.get(k) for k in ("r", "c", "err")}
+    # 조각 내용만 같으면 지연(dt)이 달라도 같은 응답으로 본다
+    return hashlib.sha1(json.dumps(body, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """스트림 조각들을 비스트리밍 응답 하나로 합친다 (마지막 조각의 타이밍 필드 유지)."""
+    out = dict(chunks[-1]) if chunks else {}
+    if chunks and "message" in chunks[0]:
+        msg = dict(chunks[0]["message"])
+        msg["content"] = "".join(c.get("message", {}).get("content", "") for c in chunks)
+        out["message"] = msg
+    elif chunks and "response" in chunks[0]:
+        out["response"] = "".join(c.get("response", "") for c in chunks)
+    return out
+
+def _split_response(resp: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """비스트리밍 응답을 스트림 조각 2개(내용 + done)로 나눈다."""
+    body = {k: v for k, v in resp.items() if k in ("model", "message", "response")}
+    body["done"] = False
+    tail = dict(resp)
+    if "message" in tail:
+        tail["message"] = dict(tail["message"], content="")
+    if "response" in tail:
+        tail["response"] = ""
+    return [body, tail]
+
+# ================== 전송 계층 ==================
+class LiveTransport:
+    mode = "live"
+
+    def __init__(self, host: Optional[str] = None):
+        self._client = ollama.Client(host=host) if (OLLAMA_AVAILABLE and host) else ollama
+
+    def available(self) -> bool:
+        return OLLAMA_AVAILABLE
+
+    def call(self, op: str, **kwargs) -> Any:
+        return getattr(self._client, op)(**kwargs)
+
+    def chat(self, **kwargs) -> Any:
+        return self.call("chat", **kwargs)
+
+    def generate(self, **kwargs) -> Any:
+        return self.call("generate", **kwargs)
+
+    def show(self, **kwargs) -> Any:
+        return self.call("show", **kwargs)
+
+    def embed(self, **kwargs) -> Any:
+        return self.call("embed", **kwargs)
+
+    def ps(self) -> Any:
+        return self.call("ps")
+
+class RecordingTransport(LiveTransport):
+    """live 로 호출하면서 요청/응답(타이밍 필드, 스트림 조각 간격 포함)을 아카이브에 남긴다."""
+    mode = "record"
+
+    def __init__(self, archive: Archive, host: Optional[str] = None):
+        super().__init__(host)
+        self.archive = archive
+
+    def call(self, op: str, **kwargs) -> Any:
+        if op == "ps":   # 서버 상태라 기록하지 않음
+            return super().call(op, **kwargs)
+        key = request_key(op, kwargs)
+        req = {k: v for k, v in kwargs.items() if k not in _KEY_EXCLUDE}
+        t0 = time.perf_counter()
+        try:
+            resp = super().call(op, **kwargs)
+        except Exception as e:
+            self.archive.add({"k": key, "op": op, "req": _plain(req), "err": str(e),
+                              "dt": [round(time.perf_counter() - t0, 4)]})
+            raise
+        if kwargs.get("stream"):
+            return self._tee(key, op, req, resp, t0)
+        self.archive.add({"k": key, "op": op, "req": _plain(req), "r": _plain(resp),
+                          "dt": [round(time.perf_counter() - t0, 4)]})
+        return resp
+
+    def _tee(self, key: str, op: str, req: Dict[str, Any], stream: Iterator[Any], t0: float) -> Iterator[Any]:
+        chunks, dts = [], []
+        try:
+            for chunk in stream:
+                chunks.append(_plain(chunk))
+                dts.append(round(time.perf_counter() - t0, 4))
+                yield chunk
+        except GeneratorExit:
+            # 소비 측이 일부러 닫은 스트림(조기 종료)은 받은 데까지 "cut" 표시로 남긴다 — 같은 흐름을 재생하는 데는 충분
+            getattr(stream, "close", lambda: None)()
+            if chunks:
+                self.archive.add({"k": key, "op": op, "req": _plain(req), "c": chunks, "dt": dts, "cut": True})
+            raise
+        # 오류로 끊긴 스트림은 기록하지 않는다 (재생용으로 쓸 수 없음)
+        self.archive.add({"k": key, "op": op, "req": _plain(req), "c": chunks, "dt": dts})
+
+class ReplayTransport(LiveTransport):
+    """아카이브로 응답. latency_scale 배로 기록된 지연을 흉내 내고, 없는 요청은 strict 면 ReplayMiss."""
+    mode = "replay"
+
+    def __init__(self, archive: Archive, latency_scale: float = 0.0, strict: bool = True,
+                 host: Optional[str] = None):
+        super().__init__(host)
+        self.archive = archive
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.stats = {"hits": 0, "misses": 0}
+
+    def available(self) -> bool:
+        return True
+
+    def call(self, op: str, **kwargs) -> Any:
+        if op == "ps":
+            return {"models": []}
+        row = self.archive.next(request_key(op, kwargs))
+        if row is None:
+            self.stats["misses"] += 1
+            if self.strict or not OLLAMA_AVAILABLE:
+                raise ReplayMiss(f"아카이브에 없는 요청: {op} {kwargs.get('model', '')}")
+            return super().call(op, **kwargs)
+        self.stats["hits"] += 1
+        if row.get("err") is not None:
+            self._sleep(row["dt"][-1])
+            raise ReplayedError(row["err"])
+        if kwargs.get("stream"):
+            return self._stream(row)
+        self._sleep(row["dt"][-1])
+        return row["r"] if "r" in row else _merge_chunks(row["c"])
+
+    def _stream(self, row: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        chunks = row["c"] if "c" in row else _split_response(row["r"])
+        dts = row["dt"] if "c" in row else [row["dt"][-1]] * len(chunks)
+        prev = 0.0
+        for chunk, dt in zip(chunks, dts):
+            self._sleep(dt - prev)
+            prev = dt
+            yield chunk
+
+    def _sleep(self, seconds: float):
+        if self.latency_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+# ================== 프로세스 공용 ==================
+_TRANSPORT = None
+_TRANSPORT_LOCK = threading.Lock()
+
+def make_transport(mode: str = "live", archive_path: str = DEFAULT_ARCHIVE, latency_scale: float = 0.0,
+                   strict: bool = True, host: Optional[str] = None):
+    if mode == "record":
+        return RecordingTransport(Archive(archive_path), host)
+    if mode == "replay":
+        return ReplayTransport(Archive(archive_path), latency_scale, strict, host)
+    return LiveTransport(host)
+
+def get_transport():
+    """환경변수(OLLAMA_TRANSPORT 등)로 한 번 만들어 프로세스 전체가 같이 쓴다."""
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        with _TRANSPORT_LOCK:
+            if _TRANSPORT is None:
+                _TRANSPORT = make_transport(
+                    os.environ.get("OLLAMA_TRANSPORT", "live"),
+                    os.environ.get("OLLAMA_ARCHIVE", DEFAULT_ARCHIVE),
+                    float(os.environ.get("OLLAMA_REPLAY_LATENCY", "0") or 0),
+                    os.environ.get("OLLAMA_REPLAY_STRICT", "1") != "0",
+                )
+    return _TRANSPORT
+
+def set_transport(transport) -> None:
+    global _TRANSPORT
+    _TRANSPORT = transport
+
+def describe_transport(t) -> str:
+    if t.mode == "record":
+        return f"⏺ 기록 모드 · {t.archive.path} ({len(t.archive)}건)"
+    if t.mode == "replay":
+        return f"⏯ 재생 모드 · {t.archive.path} (적중 {t.stats['hits']} · 없음 {t.stats['misses']})"
+    return ""
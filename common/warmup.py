@@ -0,0 +1,128 @@
+# warmup.py
+# 모델 사전 로드(워밍업) + keep_alive 관리
+# - 앱 시작 시 설정된 모델을 빈 프롬프트로 미리 올려 첫 요청의 로드 시간을 없앤다
+# - 모델별 keep_alive 를 기억해 chat 호출에 그대로 넘긴다
+# - ollama.ps() 로 실제 메모리에 올라간 모델을 확인해, 모델을 바꾸면 재로드가 필요한지 알려준다
+# - 로드에 실패한 모델(오타, pull 안 됨 등)은 retry_s 동안 다시 시도하지 않는다 (rerun 마다 스레드가 뜨지 않도록)
+# - 호출은 common.transport 를 거치며, 재생(replay) 모드에서는 올릴 모델이 없으므로 아무것도 하지 않는다
+
+import threading
+import time
+from typing import Dict, Any, List, Optional, Union
+
+from common.transport import get_transport
+
+KeepAlive = Union[str, float, int]
+
+def _live() -> bool:
+    t = get_transport()
+    return t.available() and t.mode != "replay"
+
+class ModelWarmer:
+    def __init__(self, default_keep_alive: KeepAlive = "30m", ps_ttl_s: float = 2.0, retry_s: float = 30.0):
+        self.default_keep_alive = default_keep_alive
+        self.ps_ttl_s = ps_ttl_s
+        self.retry_s = retry_s
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._keep_alive: Dict[str, KeepAlive] = {}
+        self._ps_cache: List[str] = []
+        self._ps_at = 0.0
+
+    # ---------- keep_alive ----------
+    def set_keep_alive(self, model: str, keep_alive: KeepAlive):
+        with self._lock:
+            self._keep_alive[model] = keep_alive
+
+    def keep_alive_for(self, model: str) -> KeepAlive:
+        return self._keep_alive.get(model, self.default_keep_alive)
+
+    # ---------- 로드 상태 ----------
+    def loaded_models(self, refresh: bool = False) -> List[str]:
+        """서버 메모리에 올라가 있는 모델 이름들 (ps_ttl_s 동안 캐시)."""
+        if not _live():
+            return []
+        now = time.monotonic()
+        if refresh or now - self._ps_at > self.ps_ttl_s:
+            try:
+                resp = get_transport().ps()
+                self._ps_cache = [m.get("model") or m.get("name") for m in resp.get("models", [])]
+            except Exception:
+                self._ps_cache = []
+            self._ps_at = now
+        return self._ps_cache
+
+    def is_loaded(self, model: str) -> bool:
+        names = self.loaded_models()
+        # 태그 없는 이름("foo")은 "foo:latest" 와 같은 모델로 본다
+        want = model if ":" in model else f"{model}:latest"
+        return any(n == model or n == want for n in names)
+
+    def status(self, model: str) -> Dict[str, Any]:
+        st = dict(self._state.get(model, {"status": "idle"}))
+        if st["status"] == "ready" and _live() and not self.is_loaded(model):
+            st["status"] = "evicted"   # keep_alive 만료나 다른 모델 로드로 내려감
+        return st
+
+    def will_reload(self, model: str) -> bool:
+        """이 모델로 요청하면 로드부터 해야 하는지."""
+        return _live() and not self.is_loaded(model) and self._state.get(model, {}).get("status") != "loading"
+
+    # ---------- 워밍업 ----------
+    def warm(self, model: str, keep_alive: Optional[KeepAlive] = None, background: bool = True) -> Optional[threading.Thread]:
+        """모델을 미리 로드. 이미 로딩 중이거나 메모리에 있거나 최근에 실패했으면 아무것도 안 함."""
+        if not model or not _live():
+            return None
+        if keep_alive is not None:
+            self.set_keep_alive(model, keep_alive)
+        with self._lock:
+            state = self._state.get(model)
+        cur = (state or {}).get("status")
+        if cur == "loading":
+            return None
+        if cur == "error" and time.time() - state.get("failed_at", 0) < self.retry_s:
+            return None
+        # ps() 는 네트워크 호출일 수 있으므로 락 밖에서
+        if cur == "ready" and self.is_loaded(model):
+            return None
+        with self._lock:
+            if self._state.get(model) is not state:   # 그 사이 다른 세션이 먼저 시작함
+                return None
+            self._state[model] = {"status": "loading", "started_at": time.time()}
+        if not background:
+            self._load(model)
+            return None
+        t = threading.Thread(target=self._load, args=(model,), name=f"warmup-{model}", daemon=True)
+        t.start()
+        return t
+
+    def _load(self, model: str):
+        t0 = time.perf_counter()
+        try:
+            # 빈 프롬프트 generate = 생성 없이 모델만 로드
+            resp = get_transport().generate(model=model, prompt="", keep_alive=self.keep_alive_for(model))
+            load_ns = resp.get("load_duration") or 0
+            state = {
+                "status": "ready",
+                "load_s": round(time.perf_counter() - t0, 3),
+                "server_load_s": round(load_ns / 1e9, 3),
+                "loaded_at": time.time(),
+            }
+        except Exception as e:
+            state = {"status": "error", "error": str(e), "load_s": round(time.perf_counter() - t0, 3),
+                     "failed_at": time.time()}
+        with self._lock:
+            self._state[model] = state
+        self._ps_at = 0.0
+
+def describe(status: Dict[str, Any]) -> str:
+    s = status.get("status")
+    if s == "ready":
+        return f"🟢 로드됨 ({status.get('load_s', 0):.1f}s)"
+    if s == "loading":
+        return "🟡 로딩 중…"
+    if s == "evicted":
+        return "⚪ 메모리에서 내려감 (다음 요청에 재로드)"
+    if s == "error":
+        return f"🔴 로드 실패 (잠시 뒤 다시 시도): {status.get('error', '')}"
+    return "⚪ 미로드"